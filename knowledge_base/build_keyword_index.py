@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+关键词索引构建工具
+将全部关键词编译为一个Aho-Corasick自动机，单次扫描每个文本，
+根据真实出现情况重新生成index/keyword_index.json，
+并基于段落级共现统计计算NPMI关联关键词。
+共现计数由段落×关键词的稀疏矩阵相乘得到（scipy，可选依赖），各文档的计数以三元组保存在
+index/keyword_cooccurrence.json中，增量构建时按文档累加；文本中不再出现的关键词从索引中删除
+"""
+
+import json
+import re
+import math
+import hashlib
+from bisect import bisect_right
+from collections import Counter
+from datetime import date
+from itertools import combinations
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from search.aho_corasick import AhoCorasickAutomaton
+
+
+def load_json(file_path: Path) -> Dict[str, Any]:
+    """加载JSON文件，文件不存在时返回空字典"""
+    if not file_path.exists():
+        return {}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def collect_keywords(keyword_index: Dict[str, Any], topic_index: Dict[str, Any],
+                     document_index: Dict[str, Any]) -> List[str]:
+    """
+    汇总需要统计的关键词
+    
+    Args:
+        keyword_index: 现有关键词索引
+        topic_index: 主题索引（提取各子主题的key_terms）
+        document_index: 文档索引（提取各文档人工整理的keywords，自动生成的generated_keywords不参与）
+    
+    Returns:
+        去重后的关键词列表（保持首次出现的顺序）
+    """
+    keywords = list(keyword_index.get("keywords", {}).keys())
+    
+    for topic_data in topic_index.get("topics", {}).values():
+        for subtopic_data in topic_data.get("subtopics", {}).values():
+            keywords.extend(subtopic_data.get("key_terms", []))
+    
+    for doc in document_index.get("documents", []):
+        keywords.extend(doc.get("keywords", []))
+    
+    return list(dict.fromkeys(k.strip() for k in keywords if k and k.strip()))
+
+
+def extract_context(text: str, start: int, length: int, window: int) -> str:
+    """截取命中位置前后window个字符作为上下文，并压缩空白"""
+    left = max(0, start - window)
+    right = min(len(text), start + length + window)
+    return re.sub(r'\s+', ' ', text[left:right]).strip()
+
+
+def keywords_fingerprint(keywords: List[str], passage_lines: int) -> str:
+    """关键词表和段落粒度的指纹，任一变化都需要全量重建"""
+    payload = json.dumps([passage_lines, sorted(keywords)], ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def split_passages(text: str, positions: Dict[str, List[int]], passage_lines: int) -> List[Set[str]]:
+    """
+    将关键词出现位置映射到段落（每passage_lines行为一个段落）
+    
+    Args:
+        text: 文档文本
+        positions: 关键词到出现位置列表的映射
+        passage_lines: 每个段落包含的行数
+    
+    Returns:
+        各段落出现的关键词集合
+    """
+    line_starts = [0]
+    pos = text.find('\n')
+    while pos != -1:
+        line_starts.append(pos + 1)
+        pos = text.find('\n', pos + 1)
+    
+    passage_count = (len(line_starts) + passage_lines - 1) // passage_lines
+    passages = [set() for _ in range(passage_count)]
+    for keyword, offsets in positions.items():
+        for offset in offsets:
+            line = bisect_right(line_starts, offset) - 1
+            passages[line // passage_lines].add(keyword)
+    return passages
+
+
+def count_cooccurrence(passages: List[Set[str]]) -> Tuple[Dict[str, int], Dict[Tuple[str, str], int]]:
+    """
+    统计段落级的关键词出现次数和两两共现次数（稀疏表示，只记录非零项）
+    
+    以段落×关键词的0/1稀疏矩阵X计算X^T·X：对角线为关键词出现的段落数，上三角为关键词对共现的段落数；
+    未安装scipy时逐段落枚举关键词对
+    
+    Returns:
+        (关键词段落计数, 关键词对共现计数)，关键词对按字典序排列
+    """
+    try:
+        import numpy as np
+        from scipy import sparse
+    except ImportError:
+        return count_cooccurrence_pairs(passages)
+    
+    vocabulary = sorted(set().union(*passages))
+    if not vocabulary:
+        return {}, {}
+    columns = {keyword: i for i, keyword in enumerate(vocabulary)}
+    indptr = [0]
+    indices = []
+    for passage in passages:
+        indices.extend(columns[keyword] for keyword in passage)
+        indptr.append(len(indices))
+    incidence = sparse.csr_matrix((np.ones(len(indices), dtype=np.int32), indices, indptr),
+                                  shape=(len(passages), len(vocabulary)))
+    cooccurrence = sparse.triu(incidence.T @ incidence).tocoo()
+    
+    keyword_counts = {}
+    pair_counts = {}
+    for i, j, count in zip(cooccurrence.row.tolist(), cooccurrence.col.tolist(), cooccurrence.data.tolist()):
+        if i == j:
+            keyword_counts[vocabulary[i]] = count
+        else:
+            pair_counts[(vocabulary[i], vocabulary[j])] = count
+    return keyword_counts, pair_counts
+
+
+def count_cooccurrence_pairs(passages: List[Set[str]]) -> Tuple[Dict[str, int], Dict[Tuple[str, str], int]]:
+    """count_cooccurrence的纯Python实现，逐段落枚举关键词对"""
+    keyword_counts = Counter()
+    pair_counts = Counter()
+    for passage in passages:
+        if not passage:
+            continue
+        keyword_counts.update(passage)
+        for pair in combinations(sorted(passage), 2):
+            pair_counts[pair] += 1
+    return dict(keyword_counts), dict(pair_counts)
+
+
+def compute_related_keywords(total_passages: int, keyword_counts: Dict[str, int],
+                             pair_counts: Dict[Tuple[str, str], int], top_n: int = 5,
+                             min_cooccurrence: int = 2) -> Dict[str, List[Tuple[str, float]]]:
+    """
+    按NPMI为每个关键词选出关联度最高的top_n个关键词
+    
+    NPMI(a, b) = log(p(a,b) / (p(a) * p(b))) / -log p(a,b)，取值范围[-1, 1]
+    
+    Args:
+        total_passages: 段落总数
+        keyword_counts: 关键词出现的段落数
+        pair_counts: 关键词对共现的段落数
+        top_n: 每个关键词保留的关联关键词数量
+        min_cooccurrence: 参与计算的最小共现次数，过滤偶然共现
+    
+    Returns:
+        关键词到[(关联关键词, NPMI)]的映射，按NPMI降序
+    """
+    neighbours: Dict[str, List[Tuple[str, float]]] = {}
+    if total_passages == 0:
+        return neighbours
+    
+    for (a, b), count in pair_counts.items():
+        if count < min_cooccurrence:
+            continue
+        p_ab = count / total_passages
+        p_a = keyword_counts[a] / total_passages
+        p_b = keyword_counts[b] / total_passages
+        if p_ab >= 1.0:
+            npmi = 1.0
+        else:
+            npmi = math.log(p_ab / (p_a * p_b)) / -math.log(p_ab)
+        if npmi <= 0:
+            continue
+        neighbours.setdefault(a, []).append((b, npmi))
+        neighbours.setdefault(b, []).append((a, npmi))
+    
+    for keyword, items in neighbours.items():
+        items.sort(key=lambda x: (-x[1], x[0]))
+        del items[top_n:]
+    return neighbours
+
+
+def scan_documents(base_path: Path, document_index: Dict[str, Any], keywords: List[str],
+                   context_window: int = 20, max_contexts: int = 5, passage_lines: int = 10,
+                   previous_index: Optional[Dict[str, Any]] = None,
+                   previous_state: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+    """
+    单次扫描每个文档，统计所有关键词的出现情况和段落级共现
+    
+    内容（SHA1）和关键词表都未变化的文档直接复用上次构建的结果，只扫描新增或变化的文档
+    
+    Args:
+        base_path: 知识库根目录
+        document_index: 文档索引
+        keywords: 关键词列表
+        context_window: 上下文窗口字符数
+        max_contexts: 每个文档每个关键词保留的上下文数量
+        passage_lines: 共现统计的段落行数
+        previous_index: 上次生成的关键词索引
+        previous_state: 上次构建保存的共现统计状态
+    
+    Returns:
+        (关键词到统计数据的映射, 新的共现统计状态)
+    """
+    automaton = AhoCorasickAutomaton(keywords)
+    automaton.build()
+    
+    fingerprint = keywords_fingerprint(keywords, passage_lines)
+    reusable = {}
+    if previous_state and previous_state.get("fingerprint") == fingerprint:
+        reusable = previous_state.get("documents", {})
+    
+    # 上次索引中按文档整理的关键词条目，用于复用未变化的文档
+    previous_entries: Dict[str, Dict[str, Any]] = {}
+    for keyword, data in (previous_index or {}).get("keywords", {}).items():
+        for doc_entry in data.get("documents", []):
+            previous_entries.setdefault(doc_entry["id"], {})[keyword] = doc_entry
+    
+    stats = {keyword: {"frequency": 0, "documents": []} for keyword in keywords}
+    state = {"fingerprint": fingerprint, "passage_lines": passage_lines, "documents": {}}
+    
+    for doc in document_index.get("documents", []):
+        file_path = base_path / doc["file_path"].replace("../", "")
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except Exception as e:
+            print(f"  警告: 读取 {file_path} 失败: {e}")
+            continue
+        
+        sha1 = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        cached = reusable.get(doc["id"])
+        if cached and cached.get("sha1") == sha1:
+            for keyword, doc_entry in previous_entries.get(doc["id"], {}).items():
+                if keyword in stats:
+                    stats[keyword]["frequency"] += doc_entry["occurrences"]
+                    stats[keyword]["documents"].append(doc_entry)
+            state["documents"][doc["id"]] = cached
+            print(f"  未变化，复用: {doc['id']}")
+            continue
+        
+        positions = automaton.find_all(text)
+        for keyword, offsets in positions.items():
+            stats[keyword]["frequency"] += len(offsets)
+            stats[keyword]["documents"].append({
+                "id": doc["id"],
+                "title": doc["title"],
+                "occurrences": len(offsets),
+                "offsets": offsets,
+                "contexts": [extract_context(text, offset, len(keyword), context_window)
+                             for offset in offsets[:max_contexts]]
+            })
+        
+        passages = split_passages(text, positions, passage_lines)
+        keyword_counts, pair_counts = count_cooccurrence(passages)
+        state["documents"][doc["id"]] = {
+            "sha1": sha1,
+            "passages": len(passages),
+            "keyword_counts": keyword_counts,
+            "pair_counts": [[a, b, n] for (a, b), n in pair_counts.items()]
+        }
+        
+        print(f"  扫描完成: {doc['id']} ({len(positions)} 个关键词命中)")
+    
+    return stats, state
+
+
+def merge_cooccurrence(state: Dict[str, Any]) -> Tuple[int, Dict[str, int], Dict[Tuple[str, str], int]]:
+    """汇总各文档的共现统计"""
+    total_passages = 0
+    keyword_counts = Counter()
+    pair_counts = Counter()
+    for doc_state in state.get("documents", {}).values():
+        total_passages += doc_state["passages"]
+        keyword_counts.update(doc_state["keyword_counts"])
+        for a, b, n in doc_state["pair_counts"]:
+            pair_counts[(a, b)] += n
+    return total_passages, dict(keyword_counts), dict(pair_counts)
+
+
+def build_keyword_index(base_path: Path, context_window: int = 20, max_contexts: int = 5,
+                        passage_lines: int = 10, top_n: int = 5,
+                        incremental: bool = True) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    重新生成关键词索引
+    
+    Args:
+        base_path: 知识库根目录
+        context_window: 上下文窗口字符数
+        max_contexts: 每个文档每个关键词保留的上下文数量
+        passage_lines: 共现统计的段落行数
+        top_n: 每个关键词保留的关联关键词数量
+        incremental: 是否复用上次构建中未变化文档的结果
+    
+    Returns:
+        (新的关键词索引, 共现统计状态)
+    """
+    index_path = base_path / "index"
+    keyword_index = load_json(index_path / "keyword_index.json")
+    topic_index = load_json(index_path / "topic_index.json")
+    document_index = load_json(index_path / "document_index.json")
+    previous_state = load_json(index_path / "keyword_cooccurrence.json") if incremental else None
+    
+    keywords = collect_keywords(keyword_index, topic_index, document_index)
+    print(f"共 {len(keywords)} 个关键词，开始扫描文档...")
+    
+    stats, state = scan_documents(base_path, document_index, keywords, context_window, max_contexts,
+                                  passage_lines, keyword_index, previous_state)
+    total_passages, keyword_counts, pair_counts = merge_cooccurrence(state)
+    related = compute_related_keywords(total_passages, keyword_counts, pair_counts, top_n)
+    
+    new_keywords = {}
+    pruned = []
+    for keyword in keywords:
+        data = stats[keyword]
+        # 文本中没有出现的关键词不写入索引（原有的关联关键词无法由数据得出，不再沿用）；
+        # 关联关键词全部按本次的共现统计计算，不会指向被删除的关键词
+        if data["frequency"] == 0:
+            if keyword in keyword_index.get("keywords", {}):
+                pruned.append(keyword)
+            continue
+        data["documents"].sort(key=lambda d: d["occurrences"], reverse=True)
+        neighbours = related.get(keyword, [])
+        data["related_keywords"] = [k for k, _ in neighbours]
+        data["related_scores"] = [round(score, 4) for _, score in neighbours]
+        new_keywords[keyword] = data
+    if pruned:
+        print(f"  删除 {len(pruned)} 个文本中不再出现的关键词: {'、'.join(pruned)}")
+    
+    new_index = {
+        "keywords": new_keywords,
+        "metadata": {
+            "total_keywords": len(new_keywords),
+            "total_occurrences": sum(d["frequency"] for d in new_keywords.values()),
+            "total_passages": total_passages,
+            "creation_date": date.today().isoformat(),
+            "version": keyword_index.get("metadata", {}).get("version", "1.0")
+        }
+    }
+    return new_index, state
+
+
+def main():
+    """主函数"""
+    base_path = Path(".")
+    output_file = base_path / "index" / "keyword_index.json"
+    state_file = base_path / "index" / "keyword_cooccurrence.json"
+    
+    print("=== 关键词索引构建工具 ===")
+    keyword_index, state = build_keyword_index(base_path)
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(keyword_index, f, ensure_ascii=False, indent=2)
+    with open(state_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    
+    metadata = keyword_index["metadata"]
+    print(f"\n✅ 已生成 {output_file}")
+    print(f"📊 关键词: {metadata['total_keywords']} 个, 总出现次数: {metadata['total_occurrences']}")
+
+
+if __name__ == "__main__":
+    main()
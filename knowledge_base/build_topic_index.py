@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+主题索引构建工具
+把各文档按段落切分，在段落TF-IDF矩阵上用MiniBatchNMF做主题建模：
+用权重最高的词项给主题命名，与现有普惠金融/经济展望/金融稳定/政策法规分类重叠的主题并入该分类。
+未并入分类的主题作为新主题输出时需要安装jieba：n-gram词项多是跨词片段（“统重要性”“行研究院”），
+不能用作主题名，此时只做分类归并，并提示跳过的主题。
+按段落的因子权重计算文档与主题的相关度（占文档在全部输出主题上权重的比例）和关键章节，
+重新生成index/topic_index.json；没有模型主题落入的人工分类保留原有文档列表并标记为stale。
+模型保存在index/topic_model.pkl，新增或修改的文档用partial_fit增量更新（词表不变），--rebuild全量重建
+"""
+
+import argparse
+import hashlib
+import json
+import pickle
+import re
+from collections import Counter
+from datetime import date
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from build_keyword_index import load_json
+from search.topic_vectors import TopicVectorIndex
+
+# 默认主题数和每个段落的行数
+DEFAULT_TOPICS = 8
+PASSAGE_LINES = 10
+
+# 中文字符少于该值的段落（目录、表格残片等）不参与建模
+MIN_PASSAGE_CHARS = 50
+
+# 去掉页码后重复出现至少该次数的行视为页眉页脚、图表来源等版式文字，不参与建模
+REPEATED_LINE_MIN = 5
+
+# 出现在超过该比例段落中的词项（“同比”“百分点”等）不进入词表
+MAX_DOC_FREQ = 0.1
+
+# 词表上限
+MAX_FEATURES = 20000
+
+# 每个主题输出的词项数
+TOP_TERMS = 8
+
+# 主题与现有分类画像的余弦相似度达到该值时并入该分类
+CATEGORY_SIMILARITY = 0.1
+
+# 文档在主题上的权重占比达到该值时列入主题的文档
+MIN_RELEVANCE = 0.1
+
+# 文档在全部输出主题上的权重不到其总权重的该比例时（大部分内容属于跳过的模型主题），不列入任何主题，
+# 避免按输出主题归一化后把零星的权重放大成高相关度
+MIN_COVERAGE = 0.1
+
+# 每篇文档列出的关键章节数
+KEY_SECTIONS = 3
+
+# 模型文件格式版本，变化时全量重建
+MODEL_VERSION = 1
+
+# 图表注释、计量单位和时间词不作为主题词项（“见图”“资料来源”“万亿元”“上年”等）
+LABEL_STOP_PATTERN = re.compile(
+    r'^(?:[见如][图表]|图表|(?:数据|资料)来源|来源|单位|注释?|附录|'
+    r'[万亿]*[美欧日英]?元|个?百分点|[万亿]+[户人家笔只]|'
+    r'[一二三四上下]?季度末?|[上下]半年|[上本今去明]年|同期|年[末初底度内]|月[末初底份]|'
+    r'同比|环比|近年来?|以来|期间)$')
+
+PAGE_MARKER_PATTERN = re.compile(r'---\s*第\s*(\d+)\s*页\s*---')
+CJK_RUN_PATTERN = re.compile(r'[\u4e00-\u9fa5]+')
+
+
+def jieba_available() -> bool:
+    """是否安装了jieba"""
+    try:
+        import jieba
+    except ImportError:
+        return False
+    return True
+
+
+def tokenize_terms(text: str) -> List[str]:
+    """切分词项：有jieba时取两个字以上的中文词，否则取中文2-4字n-gram"""
+    try:
+        import jieba
+    except ImportError:
+        terms = []
+        for run in CJK_RUN_PATTERN.findall(text):
+            for n in (2, 3, 4):
+                terms.extend(run[i:i + n] for i in range(len(run) - n + 1))
+        return terms
+    return [word for word in jieba.lcut(text) if len(word) >= 2 and CJK_RUN_PATTERN.fullmatch(word)]
+
+
+def split_into_passages(text: str, passage_lines: int = PASSAGE_LINES) -> List[Dict[str, Any]]:
+    """
+    每passage_lines行切成一个段落，记录段落起始行号和所在页码（依据“--- 第 N 页 ---”标记），
+    反复出现的页眉页脚行跳过
+    
+    Returns:
+        段落列表，每项含text、line（从1开始）、page（没有页码标记时为None）
+    """
+    lines = text.splitlines()
+    keys = [re.sub(r'^\s*\d+|\d+\s*$', '', line).strip() for line in lines]
+    repeated = {key for key, count in Counter(keys).items() if key and count >= REPEATED_LINE_MIN}
+    
+    passages = []
+    page = None
+    block: List[str] = []
+    block_line = block_page = None
+    for line_no, (line, key) in enumerate(zip(lines, keys), 1):
+        marker = PAGE_MARKER_PATTERN.search(line)
+        if marker:
+            page = int(marker.group(1))
+            continue
+        if key in repeated:
+            continue
+        if not block:
+            block_line, block_page = line_no, page
+        block.append(line)
+        if len(block) >= passage_lines:
+            passages.append({"text": "\n".join(block), "line": block_line, "page": block_page})
+            block = []
+    if block:
+        passages.append({"text": "\n".join(block), "line": block_line, "page": block_page})
+    return [p for p in passages
+            if sum(len(run) for run in CJK_RUN_PATTERN.findall(p["text"])) >= MIN_PASSAGE_CHARS]
+
+
+def load_passages(base_path: Path, document_index: Dict[str, Any],
+                  passage_lines: int = PASSAGE_LINES) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    读取全部文档并切分段落
+    
+    Returns:
+        (段落列表（含doc_id和预先切好的词项串terms）, 文档ID -> 内容SHA1)
+    """
+    passages = []
+    hashes = {}
+    for doc in document_index.get("documents", []):
+        file_path = base_path / doc["file_path"].replace("../", "")
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except Exception as e:
+            print(f"  警告: 读取 {file_path} 失败: {e}")
+            continue
+        hashes[doc["id"]] = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        for passage in split_into_passages(text, passage_lines):
+            passage["doc_id"] = doc["id"]
+            # 词项预先切好并用空格连接，向量化器只需str.split，模型可以直接pickle
+            passage["terms"] = " ".join(tokenize_terms(passage["text"]))
+            passages.append(passage)
+    return passages, hashes
+
+
+def load_model(model_path: Path, n_topics: int, passage_lines: int) -> Optional[Dict[str, Any]]:
+    """读取上次保存的模型，参数不一致或文件损坏时返回None"""
+    if not model_path.exists():
+        return None
+    try:
+        with open(model_path, 'rb') as f:
+            state = pickle.load(f)
+    except Exception as e:
+        print(f"  警告: 读取主题模型失败，将全量重建: {e}")
+        return None
+    if (state.get("version") != MODEL_VERSION or state.get("n_topics") != n_topics
+            or state.get("passage_lines") != passage_lines or state.get("jieba") != jieba_available()):
+        return None
+    return state
+
+
+def train_topic_model(passages: List[Dict[str, Any]], hashes: Dict[str, str], n_topics: int,
+                      passage_lines: int, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    训练或增量更新主题模型
+    
+    有上次的模型时只用新增或内容变化的文档的段落做partial_fit，词表和IDF沿用上次的结果；
+    否则在全部段落上拟合TF-IDF和MiniBatchNMF
+    
+    Returns:
+        模型状态：vectorizer、model、documents（文档ID -> SHA1）及参数
+    """
+    from sklearn.decomposition import MiniBatchNMF
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    
+    if previous:
+        changed = {doc_id for doc_id, sha1 in hashes.items() if previous["documents"].get(doc_id) != sha1}
+        new_passages = [p["terms"] for p in passages if p["doc_id"] in changed]
+        if new_passages:
+            matrix = previous["vectorizer"].transform(new_passages)
+            previous["model"].partial_fit(matrix)
+            print(f"  增量更新: {len(changed)} 个文档, {len(new_passages)} 个段落")
+        else:
+            print("  文档未变化，沿用已有模型")
+        previous["documents"] = hashes
+        return previous
+    
+    vectorizer = TfidfVectorizer(analyzer=str.split, sublinear_tf=True, min_df=2, max_df=MAX_DOC_FREQ,
+                                 max_features=MAX_FEATURES)
+    matrix = vectorizer.fit_transform([p["terms"] for p in passages])
+    model = MiniBatchNMF(n_components=n_topics, init="nndsvda", random_state=0, max_iter=500)
+    model.fit(matrix)
+    print(f"  全量训练: {len(passages)} 个段落, 词表 {matrix.shape[1]} 个词项")
+    return {
+        "version": MODEL_VERSION,
+        "n_topics": n_topics,
+        "passage_lines": passage_lines,
+        # 词表按jieba分词还是n-gram建立，决定词项能否用作主题名
+        "jieba": jieba_available(),
+        "vectorizer": vectorizer,
+        "model": model,
+        "documents": hashes
+    }
+
+
+def overlaps(first: str, second: str) -> bool:
+    """两个词项互为子串，或一个的结尾与另一个的开头重叠两个字以上"""
+    if first in second or second in first:
+        return True
+    return any(a.endswith(b[:n]) for a, b in ((first, second), (second, first))
+               for n in range(2, min(len(a), len(b))))
+
+
+def top_terms(weights, vocabulary, limit: int = TOP_TERMS) -> List[str]:
+    """
+    按权重取主题词项：先在候选中去掉图表注释、单位和时间词，以及被更长候选包含的片段（“统重”“要性”->“系统重要”），
+    再跳过与已选词项重叠的候选
+    """
+    candidates = [vocabulary[index] for index in weights.argsort()[::-1][:limit * 5]
+                  if weights[index] > 0 and not LABEL_STOP_PATTERN.match(vocabulary[index])]
+    candidates = [term for term in candidates
+                  if not any(term != other and term in other for other in candidates)]
+    terms = []
+    for term in candidates:
+        if any(overlaps(term, chosen) for chosen in terms):
+            continue
+        terms.append(term)
+        if len(terms) >= limit:
+            break
+    return terms
+
+
+def curated_topics(topic_index: Dict[str, Any]) -> List[str]:
+    """人工整理的分类（上次自动生成的主题带generated标记，每次重新生成）"""
+    return [name for name, data in topic_index.get("topics", {}).items() if not data.get("generated")]
+
+
+def map_categories(state: Dict[str, Any], topic_index: Dict[str, Any]) -> List[Tuple[Optional[str], float]]:
+    """
+    把每个模型主题对应到现有分类
+    
+    分类画像由分类名、描述、子主题名和key_terms组成，与主题的词项权重向量比较余弦相似度
+    
+    Returns:
+        每个模型主题的 (分类名或None, 相似度)
+    """
+    import numpy as np
+    
+    categories = curated_topics(topic_index)
+    components = state["model"].components_
+    if not categories:
+        return [(None, 0.0)] * len(components)
+    
+    profiles = []
+    for name in categories:
+        data = topic_index["topics"][name]
+        parts = [name, data.get("description", "")]
+        parts += list(data.get("subtopics", {})) + TopicVectorIndex.collect_key_terms(data)
+        profiles.append(" ".join(tokenize_terms(" ".join(parts))))
+    profile_matrix = state["vectorizer"].transform(profiles).toarray()
+    
+    norms = np.linalg.norm(components, axis=1, keepdims=True)
+    similarity = (components / np.where(norms > 0, norms, 1.0)) @ profile_matrix.T
+    mapping = []
+    for row in similarity:
+        best = int(row.argmax())
+        mapping.append((categories[best], float(row[best])) if row[best] >= CATEGORY_SIMILARITY
+                       else (None, float(row[best])))
+    return mapping
+
+
+def key_sections(doc: Dict[str, Any], doc_passages: List[Dict[str, Any]], scores) -> List[str]:
+    """
+    文档在主题上的关键章节：有章节页码时按章节汇总段落权重，否则取权重最高段落的首行
+    """
+    chapters = [c for c in doc.get("chapters", []) if c.get("start_page") is not None]
+    if chapters:
+        chapter_scores = []
+        for chapter in chapters:
+            end_page = chapter.get("end_page", chapter["start_page"])
+            score = sum(score for passage, score in zip(doc_passages, scores)
+                        if passage["page"] is not None and chapter["start_page"] <= passage["page"] <= end_page)
+            chapter_scores.append((score, chapter["title"]))
+        chapter_scores.sort(key=lambda x: x[0], reverse=True)
+        return [title for score, title in chapter_scores[:KEY_SECTIONS] if score > 0]
+    
+    sections = []
+    for index in sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:KEY_SECTIONS]:
+        if scores[index] <= 0:
+            break
+        first_line = next((line.strip() for line in doc_passages[index]["text"].splitlines() if line.strip()), "")
+        page = doc_passages[index]["page"]
+        sections.append(f"第{page}页 {first_line[:30]}" if page else first_line[:30])
+    return sections
+
+
+def build_topic_index(base_path: Path, n_topics: int = DEFAULT_TOPICS, passage_lines: int = PASSAGE_LINES,
+                      rebuild: bool = False) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    重新生成主题索引
+    
+    Args:
+        base_path: 知识库根目录
+        n_topics: 模型主题数
+        passage_lines: 段落行数
+        rebuild: 是否忽略已保存的模型全量重建
+    
+    Returns:
+        (新的主题索引, 模型状态)
+    """
+    import numpy as np
+    
+    index_path = base_path / "index"
+    topic_index = load_json(index_path / "topic_index.json")
+    document_index = load_json(index_path / "document_index.json")
+    documents = {doc["id"]: doc for doc in document_index.get("documents", [])}
+    
+    passages, hashes = load_passages(base_path, document_index, passage_lines)
+    print(f"共 {len(hashes)} 个文档, {len(passages)} 个段落")
+    previous = None if rebuild else load_model(index_path / "topic_model.pkl", n_topics, passage_lines)
+    state = train_topic_model(passages, hashes, n_topics, passage_lines, previous)
+    
+    vocabulary = state["vectorizer"].get_feature_names_out()
+    mapping = map_categories(state, topic_index)
+    weights = state["model"].transform(state["vectorizer"].transform([p["terms"] for p in passages]))
+    
+    # 每个输出主题包含的模型主题：并入现有分类的按分类归并，其余各自成为新主题（词项为完整的词时）
+    groups: Dict[str, List[int]] = {name: [] for name in curated_topics(topic_index)}
+    model_topics = []
+    skipped = []
+    for component, (category, similarity) in enumerate(mapping):
+        terms = top_terms(state["model"].components_[component], vocabulary)
+        if category is None and (not state.get("jieba") or len(terms) < 3):
+            skipped.append(terms)
+            continue
+        name = category or "·".join(terms[:3])
+        groups.setdefault(name, []).append(component)
+        model_topics.append({"component": component, "topic": name, "top_terms": terms,
+                             "category_similarity": round(similarity, 4)})
+    
+    if skipped:
+        reason = "未安装jieba，n-gram词项不能用作主题名" if not state.get("jieba") else "有效词项不足"
+        print(f"  {reason}，跳过 {len(skipped)} 个未并入分类的模型主题:")
+        for terms in skipped:
+            print(f"    {'、'.join(terms)}")
+    
+    doc_rows: Dict[str, List[int]] = {}
+    for row, passage in enumerate(passages):
+        doc_rows.setdefault(passage["doc_id"], []).append(row)
+    # 相关度只在输出的主题之间归一化，跳过的模型主题上的权重不计入分母
+    emitted = sorted(component for components in groups.values() for component in components)
+    doc_totals = {doc_id: float(weights[np.ix_(rows, emitted)].sum()) for doc_id, rows in doc_rows.items()}
+    covered = {doc_id for doc_id, rows in doc_rows.items()
+               if doc_totals[doc_id] > 0 and doc_totals[doc_id] >= float(weights[rows].sum()) * MIN_COVERAGE}
+    
+    new_topics = {}
+    for name, components in groups.items():
+        old = topic_index.get("topics", {}).get(name, {})
+        if old.get("generated"):
+            old = {}
+        if not components and old:
+            # 没有模型主题落入该分类，保留原有的文档列表并标记为stale：其中的相关度不是模型得分，不能与其他分类比较
+            print(f"  分类 {name} 没有对应的模型主题，保留原有文档列表（标记为stale）")
+            entry = {key: value for key, value in old.items() if key != "model_topics"}
+            entry["stale"] = True
+            new_topics[name] = entry
+            continue
+        
+        topic_docs = []
+        for doc_id, rows in doc_rows.items():
+            if doc_id not in covered:
+                continue
+            scores = weights[np.ix_(rows, components)].sum(axis=1)
+            relevance = float(scores.sum()) / doc_totals[doc_id]
+            if relevance < MIN_RELEVANCE:
+                continue
+            doc = documents[doc_id]
+            topic_docs.append({
+                "id": doc_id,
+                "title": doc.get("title", doc_id),
+                "relevance": round(relevance, 4),
+                "key_sections": key_sections(doc, [passages[row] for row in rows], scores.tolist())
+            })
+        topic_docs.sort(key=lambda d: d["relevance"], reverse=True)
+        if not topic_docs and not old:
+            continue
+        
+        terms = [term for item in model_topics if item["topic"] == name for term in item["top_terms"]]
+        if old:
+            entry = {key: value for key, value in old.items() if key != "stale"}
+        else:
+            entry = {
+                "generated": True,
+                "description": "自动生成的主题：" + "、".join(terms[:TOP_TERMS]),
+                "subtopics": {name: {"description": "模型主题词项", "key_terms": terms, "data_points": []}}
+            }
+        entry["documents"] = topic_docs
+        entry["model_topics"] = [item for item in model_topics if item["topic"] == name]
+        new_topics[name] = entry
+    
+    old_metadata = topic_index.get("metadata", {})
+    new_index = {
+        "topics": new_topics,
+        "metadata": {
+            "total_topics": len(new_topics),
+            "total_subtopics": sum(len(t.get("subtopics", {})) for t in new_topics.values()),
+            "creation_date": old_metadata.get("creation_date", date.today().isoformat()),
+            "update_date": date.today().isoformat(),
+            "version": old_metadata.get("version", "1.0"),
+            "model": {
+                "method": "MiniBatchNMF",
+                "components": n_topics,
+                "passages": len(passages),
+                "vocabulary": len(vocabulary)
+            }
+        }
+    }
+    return new_index, state
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="主题索引构建工具")
+    parser.add_argument("--topics", type=int, default=DEFAULT_TOPICS, help="模型主题数")
+    parser.add_argument("--passage-lines", type=int, default=PASSAGE_LINES, help="每个段落的行数")
+    parser.add_argument("--rebuild", action="store_true", help="忽略已保存的模型，全量重建")
+    args = parser.parse_args()
+    
+    base_path = Path(".")
+    output_file = base_path / "index" / "topic_index.json"
+    model_file = base_path / "index" / "topic_model.pkl"
+    
+    print("=== 主题索引构建工具 ===")
+    topic_index, state = build_topic_index(base_path, args.topics, args.passage_lines, args.rebuild)
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(topic_index, f, ensure_ascii=False, indent=2)
+    with open(model_file, 'wb') as f:
+        pickle.dump(state, f)
+    
+    print(f"\n✅ 已生成 {output_file}")
+    for name, data in topic_index["topics"].items():
+        docs = ", ".join(f"{d['id']}({d['relevance']})" for d in data.get("documents", []))
+        print(f"📊 {name}{'（stale，沿用原有文档列表）' if data.get('stale') else ''}: {docs}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite文本块存储
+替代每个文档一个的JSON切分文件：块元数据存放在一张带doc_id索引的表中，
+支持追加、按块ID随机读取、按文档读取和流式遍历，批量写入在单个事务中完成。
+块文本不重复存储，按记录的字节偏移从原文件读取（文件路径相对于知识库根目录记录）
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+from chunk_table import relative_path, resolve_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    file_name TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    sha1 TEXT,
+    company_name TEXT
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    start_offset INTEGER NOT NULL,
+    end_offset INTEGER NOT NULL,
+    chars INTEGER,
+    page INTEGER,
+    duplicate_of INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_doc_id ON chunks (doc_id, seq);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+CHUNK_COLUMNS = ["chunk_id", "doc_id", "seq", "start_line", "end_line",
+                 "start_offset", "end_offset", "chars", "page", "duplicate_of"]
+
+
+class ChunkStore:
+    """文本块存储"""
+    
+    def __init__(self, db_path: Path, base_path: Optional[Path] = None):
+        """
+        打开（或创建）块存储
+        
+        Args:
+            db_path: SQLite数据库文件路径
+            base_path: 知识库根目录，文档路径相对于它记录和解析；为None时按原样记录
+        """
+        self.db_path = Path(db_path)
+        self.base_path = base_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.executescript(SCHEMA)
+        self._file_paths: Dict[str, str] = {}
+    
+    def __enter__(self) -> "ChunkStore":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+    
+    def add_document(self, doc_id: str, file_name: str, file_path: Path,
+                     sha1: str = "", company_name: str = ""):
+        """登记文档（已存在时覆盖），块的偏移量相对于file_path"""
+        stored_path = relative_path(file_path, self.base_path)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO documents (doc_id, file_name, file_path, sha1, company_name) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (doc_id, file_name, stored_path, sha1, company_name))
+        self._file_paths[doc_id] = stored_path
+    
+    def delete_document(self, doc_id: str):
+        """删除文档及其全部块"""
+        with self.conn:
+            self.conn.execute("DELETE FROM chunks WHERE doc_id = ?", (doc_id,))
+            self.conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+        self._file_paths.pop(doc_id, None)
+    
+    def append_chunks(self, doc_id: str, chunks: Iterable[Dict[str, Any]]) -> List[int]:
+        """
+        在一个事务中批量追加文档的块
+        
+        Args:
+            doc_id: 文档ID
+            chunks: 含lines、offsets，可选chars、page、chunk_id的块
+        
+        Returns:
+            块ID列表
+        """
+        row = self.conn.execute("SELECT COALESCE(MAX(seq), -1) FROM chunks WHERE doc_id = ?",
+                                (doc_id,)).fetchone()
+        seq = row[0] + 1
+        chunk_ids = []
+        with self.conn:
+            for chunk in chunks:
+                cursor = self.conn.execute(
+                    "INSERT INTO chunks (chunk_id, doc_id, seq, start_line, end_line, "
+                    "start_offset, end_offset, chars, page) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (chunk.get("chunk_id"), doc_id, seq, chunk["lines"][0], chunk["lines"][1],
+                     chunk["offsets"][0], chunk["offsets"][1], chunk.get("chars"), chunk.get("page")))
+                chunk_ids.append(cursor.lastrowid)
+                seq += 1
+        return chunk_ids
+    
+    def mark_duplicates(self, duplicates: Dict[int, int]):
+        """批量记录近似重复块：块ID -> 规范副本的块ID"""
+        with self.conn:
+            self.conn.executemany("UPDATE chunks SET duplicate_of = ? WHERE chunk_id = ?",
+                                  [(canonical, chunk_id) for chunk_id, canonical in duplicates.items()])
+    
+    @staticmethod
+    def _row_to_chunk(row) -> Dict[str, Any]:
+        data = dict(zip(CHUNK_COLUMNS, row))
+        return {
+            "chunk_id": data["chunk_id"],
+            "doc_id": data["doc_id"],
+            "seq": data["seq"],
+            "lines": [data["start_line"], data["end_line"]],
+            "offsets": [data["start_offset"], data["end_offset"]],
+            "chars": data["chars"],
+            "page": data["page"],
+            "duplicate_of": data["duplicate_of"]
+        }
+    
+    def get(self, chunk_id: int) -> Optional[Dict[str, Any]]:
+        """按块ID读取块"""
+        row = self.conn.execute(f"SELECT {', '.join(CHUNK_COLUMNS)} FROM chunks WHERE chunk_id = ?",
+                                (chunk_id,)).fetchone()
+        return self._row_to_chunk(row) if row else None
+    
+    def document_chunks(self, doc_id: str) -> List[Dict[str, Any]]:
+        """文档的全部块，按顺序"""
+        rows = self.conn.execute(f"SELECT {', '.join(CHUNK_COLUMNS)} FROM chunks WHERE doc_id = ? "
+                                 "ORDER BY seq", (doc_id,))
+        return [self._row_to_chunk(row) for row in rows]
+    
+    def iter_chunks(self, batch_size: int = 1000, canonical_only: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        流式遍历全部块，供建索引使用
+        
+        Args:
+            batch_size: 每次从数据库取出的行数
+            canonical_only: 是否跳过近似重复块
+        """
+        sql = f"SELECT {', '.join(CHUNK_COLUMNS)} FROM chunks"
+        if canonical_only:
+            sql += " WHERE duplicate_of IS NULL"
+        cursor = self.conn.execute(sql + " ORDER BY chunk_id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield self._row_to_chunk(row)
+    
+    def documents(self) -> List[Dict[str, Any]]:
+        """全部文档"""
+        rows = self.conn.execute("SELECT doc_id, file_name, file_path, sha1, company_name FROM documents")
+        return [dict(zip(["doc_id", "file_name", "file_path", "sha1", "company_name"], row)) for row in rows]
+    
+    def get_meta(self, key: str) -> Optional[str]:
+        """读取元数据（如生成块时的切分参数）"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def set_meta(self, key: str, value: str):
+        """写入元数据"""
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+    
+    def count(self) -> int:
+        """块数量"""
+        return self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+    
+    def _file_path(self, doc_id: str) -> Optional[str]:
+        if doc_id not in self._file_paths:
+            row = self.conn.execute("SELECT file_path FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+            if not row:
+                return None
+            self._file_paths[doc_id] = row[0]
+        return self._file_paths[doc_id]
+    
+    def text(self, chunk: Dict[str, Any]) -> Optional[str]:
+        """按偏移量从原文件读取块文本"""
+        file_path = self._file_path(chunk["doc_id"])
+        if file_path is None:
+            return None
+        start, end = chunk["offsets"]
+        with open(resolve_path(file_path, self.base_path), 'rb') as f:
+            f.seek(start)
+            return f.read(end - start).decode('utf-8').replace('\r\n', '\n')
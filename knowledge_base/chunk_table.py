@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基于偏移量的文本块表
+文本块不再复制文本，只记录(文档序号, 起止字节偏移, 起止行号)，
+各列用array紧凑存储；读取时通过mmap映射原始文本文件，按需返回memoryview切片。
+文本文件路径相对于知识库根目录记录，与文档索引中的file_path一致，不依赖运行时的当前目录
+"""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Optional, Union
+
+TABLE_MAGIC = b"KBCHUNK1"
+
+# 列名及其array类型码：文档序号、起止字节偏移用64位，行号用32位
+COLUMNS = [
+    ("doc_index", "i"),
+    ("start", "q"),
+    ("end", "q"),
+    ("start_line", "i"),
+    ("end_line", "i")
+]
+
+
+def relative_path(file_path: Union[str, Path], base_path: Optional[Path]) -> str:
+    """
+    文件相对于知识库根目录的路径（/分隔）
+    
+    base_path为None或无法表示为相对路径（Windows下位于其他盘符）时按原样记录
+    """
+    if base_path is None:
+        return str(file_path)
+    try:
+        return Path(os.path.relpath(Path(file_path).resolve(), Path(base_path).resolve())).as_posix()
+    except ValueError:
+        return str(Path(file_path).resolve())
+
+
+def resolve_path(stored_path: str, base_path: Optional[Path]) -> Path:
+    """把relative_path记录的路径解析为可打开的路径"""
+    path = Path(stored_path)
+    if base_path is None or path.is_absolute():
+        return path
+    return Path(base_path) / path
+
+
+class ChunkTable:
+    """文本块元数据表"""
+    
+    def __init__(self, base_path: Optional[Path] = None):
+        """
+        Args:
+            base_path: 知识库根目录，文档路径相对于它记录和解析；为None时按原样记录
+        """
+        self.base_path = base_path
+        self.doc_ids: List[str] = []
+        self.doc_paths: List[str] = []
+        self.columns: Dict[str, array] = {name: array(typecode) for name, typecode in COLUMNS}
+        self._buffers: Dict[int, mmap.mmap] = {}
+    
+    def __len__(self) -> int:
+        return len(self.columns["start"])
+    
+    def add_document(self, doc_id: str, file_path: Path) -> int:
+        """
+        登记文档
+        
+        Args:
+            doc_id: 文档ID
+            file_path: 文本文件路径，块的偏移量都相对于该文件
+        
+        Returns:
+            文档序号
+        """
+        self.doc_ids.append(doc_id)
+        self.doc_paths.append(relative_path(file_path, self.base_path))
+        return len(self.doc_ids) - 1
+    
+    def add_chunk(self, doc_index: int, start: int, end: int, start_line: int, end_line: int) -> int:
+        """
+        追加一个文本块
+        
+        Args:
+            doc_index: 文档序号
+            start: 起始字节偏移
+            end: 结束字节偏移（不含）
+            start_line: 起始行号（从1开始）
+            end_line: 结束行号（含）
+        
+        Returns:
+            块序号
+        """
+        columns = self.columns
+        columns["doc_index"].append(doc_index)
+        columns["start"].append(start)
+        columns["end"].append(end)
+        columns["start_line"].append(start_line)
+        columns["end_line"].append(end_line)
+        return len(self) - 1
+    
+    def chunk(self, index: int) -> Dict[str, Any]:
+        """块的元数据"""
+        columns = self.columns
+        doc_index = columns["doc_index"][index]
+        return {
+            "doc_id": self.doc_ids[doc_index],
+            "lines": [columns["start_line"][index], columns["end_line"][index]],
+            "offsets": [columns["start"][index], columns["end"][index]]
+        }
+    
+    def document_chunks(self, doc_id: str) -> List[int]:
+        """文档的全部块序号"""
+        doc_index = self.doc_ids.index(doc_id)
+        return [i for i, value in enumerate(self.columns["doc_index"]) if value == doc_index]
+    
+    def _buffer(self, doc_index: int) -> mmap.mmap:
+        buffer = self._buffers.get(doc_index)
+        if buffer is None:
+            with open(resolve_path(self.doc_paths[doc_index], self.base_path), 'rb') as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._buffers[doc_index] = buffer
+        return buffer
+    
+    def view(self, index: int) -> memoryview:
+        """块对应的原始字节视图，不复制数据"""
+        buffer = self._buffer(self.columns["doc_index"][index])
+        return memoryview(buffer)[self.columns["start"][index]:self.columns["end"][index]]
+    
+    def text(self, index: int) -> str:
+        """块的文本（解码并统一换行符）"""
+        with self.view(index) as view:
+            return str(view, 'utf-8').replace('\r\n', '\n')
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(len(self)):
+            yield self.chunk(index)
+    
+    def close(self):
+        """关闭所有内存映射"""
+        for buffer in self._buffers.values():
+            buffer.close()
+        self._buffers = {}
+    
+    def size_bytes(self) -> int:
+        """元数据列占用的字节数"""
+        return sum(len(column) * column.itemsize for column in self.columns.values())
+    
+    def save(self, file_path: Path):
+        """
+        保存块表
+        
+        格式: 魔数 | 头部长度(uint32) | JSON头部(文档ID、路径、块数) | 各列原始字节
+        """
+        header = json.dumps({
+            "doc_ids": self.doc_ids,
+            "doc_paths": self.doc_paths,
+            "count": len(self)
+        }, ensure_ascii=False).encode('utf-8')
+        with open(file_path, 'wb') as f:
+            f.write(TABLE_MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            for name, _ in COLUMNS:
+                self.columns[name].tofile(f)
+    
+    @classmethod
+    def load(cls, file_path: Path, base_path: Optional[Path] = None) -> "ChunkTable":
+        """
+        读取块表
+        
+        Args:
+            file_path: 块表文件
+            base_path: 知识库根目录，须与保存时一致
+        """
+        table = cls(base_path)
+        with open(file_path, 'rb') as f:
+            if f.read(len(TABLE_MAGIC)) != TABLE_MAGIC:
+                raise ValueError(f"不是有效的块表文件: {file_path}")
+            header_length = struct.unpack('<I', f.read(4))[0]
+            header = json.loads(f.read(header_length).decode('utf-8'))
+            table.doc_ids = header["doc_ids"]
+            table.doc_paths = header["doc_paths"]
+            for name, _ in COLUMNS:
+                table.columns[name].fromfile(f, header["count"])
+        return table
+
+
+def line_offsets(file_path: Path) -> array:
+    """
+    逐行扫描文件，返回每行起始字节偏移，最后一项为文件长度
+    
+    Args:
+        file_path: 文本文件路径
+    """
+    offsets = array('q', [0])
+    with open(file_path, 'rb') as f:
+        for line in f:
+            offsets.append(offsets[-1] + len(line))
+    return offsets
@@ -1,16 +1,26 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-TXT文件转JSON格式切分工具
-将extracted_texts目录下的TXT文件转换为JSON格式，并按照指定参数进行切分
+TXT文件切分工具
+将extracted_texts目录下的TXT文件按照指定参数进行切分，块元数据写入SQLite块存储(chunks.db)，
+跨文件的近似重复块只保留一份规范副本（MinHash + LSH）。
+块只记录行号和字节偏移，文本通过块表(chunk_table.bin)映射原文件或按偏移从原文件读取。
+默认按句切分（见sentence_chunker），多个文件通过进程池并行切分。
+入口为chunk_text_files；convert_txt_to_json是早期写出JSON切分文件时的名字，保留为别名
 """
 
-import json
 import os
+import json
 import hashlib
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set, Tuple
 import re
+from concurrent.futures import ProcessPoolExecutor
+
+from chunk_table import ChunkTable, line_offsets
+from chunk_store import ChunkStore
+from sentence_chunker import split_text_file_by_sentences, DEFAULT_CHUNK_CHARS, DEFAULT_OVERLAP_CHARS
+from search.near_duplicates import find_near_duplicates, DEFAULT_THRESHOLD
 
 
 def split_text_file(file_path: Path, chunk_size: int = 30, chunk_overlap: int = 5) -> List[Dict[str, Any]]:
@@ -23,33 +33,32 @@ def split_text_file(file_path: Path, chunk_size: int = 30, chunk_overlap: int =
         chunk_overlap: 块之间的重叠行数
     
     Returns:
-        包含切分块的列表
+        包含切分块的列表，每块记录起止行号和原文件中的起止字节偏移
     """
     chunks = []
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        total_lines = len(lines)
+        # 只保留每行的起始偏移，不把文本读入内存
+        offsets = line_offsets(file_path)
+        total_lines = len(offsets) - 1
         
         # 按行切分
         start_line = 1
         while start_line <= total_lines:
             end_line = min(start_line + chunk_size - 1, total_lines)
             
-            # 提取当前块的行
-            chunk_lines = lines[start_line - 1:end_line]
-            chunk_text = ''.join(chunk_lines)
-            
             # 创建块对象
             chunk = {
                 "lines": [start_line, end_line],
-                "text": chunk_text
+                "offsets": [offsets[start_line - 1], offsets[end_line]]
             }
             
             chunks.append(chunk)
             
+            # 已到文件末尾，重叠部分不再单独成块
+            if end_line >= total_lines:
+                break
+            
             # 计算下一个块的起始行（考虑重叠）
             start_line = end_line - chunk_overlap + 1
             
@@ -65,11 +74,13 @@ def split_text_file(file_path: Path, chunk_size: int = 30, chunk_overlap: int =
 
 
 def generate_sha1(file_path: Path) -> str:
-    """生成文件的SHA1哈希值"""
+    """生成文件的SHA1哈希值（分块读取）"""
     try:
+        sha1 = hashlib.sha1()
         with open(file_path, 'rb') as f:
-            content = f.read()
-        return hashlib.sha1(content).hexdigest()
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                sha1.update(block)
+        return sha1.hexdigest()
     except:
         return f"file_{file_path.stem}"
 
@@ -94,70 +105,213 @@ def extract_company_name(file_name: str) -> str:
     return name
 
 
-def convert_txt_to_json(input_dir: Path, output_dir: Path, chunk_size: int = 30, chunk_overlap: int = 5):
+def mark_duplicate_chunks(files_chunks: List[Dict[str, Any]], table: ChunkTable,
+                          threshold: float = DEFAULT_THRESHOLD) -> Dict[int, int]:
+    """
+    标记所有文件中近似重复的块
+    
+    重复块的duplicate_of记为规范副本的块ID，建索引时只需处理规范副本
+    
+    Args:
+        files_chunks: [{"file_name": 文件名, "chunks": 块列表}]，按顺序靠前的块优先作为规范副本
+        table: 块表，用于按需读取块文本
+        threshold: 近似重复判定阈值
+    
+    Returns:
+        重复块ID -> 规范副本块ID
+    """
+    chunks = [chunk for item in files_chunks for chunk in item["chunks"]]
+    duplicates = find_near_duplicates(((chunk["chunk_id"], table.text(chunk["chunk_id"])) for chunk in chunks),
+                                      threshold)
+    for chunk in chunks:
+        if chunk["chunk_id"] in duplicates:
+            chunk["duplicate_of"] = duplicates[chunk["chunk_id"]]
+    return duplicates
+
+
+def load_unchanged_chunks(db_path: Path, params: str,
+                          txt_files: List[Path]) -> Tuple[Dict[str, Dict[str, Any]], Set[str]]:
     """
-    批量转换TXT文件为JSON格式
+    从已有块存储中取出内容和切分参数都未变化的文件的块
+    
+    Args:
+        db_path: 块存储路径
+        params: 本次的切分参数（JSON），与块存储记录的不一致时全部重新切分
+        txt_files: 本次的TXT文件
+    
+    Returns:
+        (文件名 -> 与chunk_file返回格式相同的文件信息和块, 块存储中已有的文件名)
+    """
+    if not db_path.exists():
+        return {}, set()
+    
+    unchanged = {}
+    with ChunkStore(db_path) as store:
+        documents = {doc["file_name"]: doc for doc in store.documents()}
+        if store.get_meta("params") != params:
+            return {}, set(documents)
+        for txt_file in txt_files:
+            doc = documents.get(txt_file.name)
+            if doc is None or doc["sha1"] != generate_sha1(txt_file):
+                continue
+            chunks = [{"lines": chunk["lines"], "offsets": chunk["offsets"],
+                       "chars": chunk["chars"], "page": chunk["page"]}
+                      for chunk in store.document_chunks(doc["doc_id"])]
+            unchanged[txt_file.name] = {
+                "file_name": txt_file.name,
+                "stem": txt_file.stem,
+                "sha1": doc["sha1"],
+                "company_name": doc["company_name"],
+                "chunks": chunks
+            }
+    return unchanged, set(documents)
+
+
+def chunk_file(txt_file: Path, chunk_size: int, chunk_overlap: int,
+               chunk_chars: int, overlap_chars: int) -> Dict[str, Any]:
+    """
+    处理单个文件（在进程池中执行）
+    
+    Args:
+        txt_file: 文本文件路径
+        chunk_size: 按行切分时每个块的最大行数
+        chunk_overlap: 按行切分时块之间的重叠行数
+        chunk_chars: 按句切分时每块的字符预算，为0时按行切分
+        overlap_chars: 按句切分时块之间的重叠字符数
+    
+    Returns:
+        文件信息和切分块
+    """
+    if chunk_chars > 0:
+        try:
+            chunks = split_text_file_by_sentences(txt_file, chunk_chars, overlap_chars)
+        except Exception as e:
+            print(f"处理文件 {txt_file} 时出错: {e}")
+            chunks = []
+    else:
+        chunks = split_text_file(txt_file, chunk_size, chunk_overlap)
+    
+    return {
+        "file_name": txt_file.name,
+        "stem": txt_file.stem,
+        "sha1": generate_sha1(txt_file),
+        "company_name": extract_company_name(txt_file.name),
+        "chunks": chunks
+    }
+
+
+def chunk_text_files(input_dir: Path, output_dir: Path, chunk_size: int = 30, chunk_overlap: int = 5,
+                     dedup_threshold: float = DEFAULT_THRESHOLD,
+                     chunk_chars: int = DEFAULT_CHUNK_CHARS, overlap_chars: int = DEFAULT_OVERLAP_CHARS,
+                     workers: int = None, base_path: Optional[Path] = None) -> List[str]:
+    """
+    批量切分TXT文件，写入块存储和块表
+    
+    内容（SHA1）和切分参数都未变化的文件沿用块存储中已有的块，只切分新增或修改的文件；
+    没有任何文件变化时不做任何写入
     
     Args:
         input_dir: 输入目录（包含TXT文件）
-        output_dir: 输出目录（保存JSON文件）
-        chunk_size: 每个块的最大行数
-        chunk_overlap: 块之间的重叠行数
+        output_dir: 输出目录（保存chunks.db和chunk_table.bin）
+        chunk_size: 按行切分时每个块的最大行数
+        chunk_overlap: 按行切分时块之间的重叠行数
+        dedup_threshold: 近似重复判定阈值，为0时不去重
+        chunk_chars: 按句切分时每块的字符预算，为0时改为按行切分
+        overlap_chars: 按句切分时块之间的重叠字符数
+        workers: 并行切分的进程数，默认为CPU核数，为1时不使用进程池
+        base_path: 知识库根目录，块存储和块表中的文本路径相对于它记录；
+            默认为output_dir的上两级（output_dir为知识库的data/json_segments）
+    
+    Returns:
+        本次重新切分的文件名列表
     """
     # 创建输出目录
     output_dir.mkdir(parents=True, exist_ok=True)
+    if base_path is None:
+        base_path = output_dir.resolve().parent.parent
     
     # 获取所有TXT文件
     txt_files = list(input_dir.glob("*.txt"))
     
     if not txt_files:
         print(f"在 {input_dir} 中未找到TXT文件")
-        return
+        return []
     
     print(f"找到 {len(txt_files)} 个TXT文件，开始转换...")
     
-    for txt_file in txt_files:
+    db_path = output_dir / "chunks.db"
+    params = json.dumps([chunk_size, chunk_overlap, chunk_chars, overlap_chars, dedup_threshold])
+    unchanged, stored_files = load_unchanged_chunks(db_path, params, txt_files)
+    changed_files = [txt_file for txt_file in txt_files if txt_file.name not in unchanged]
+    
+    if not changed_files and stored_files == {txt_file.name for txt_file in txt_files}:
+        print("所有文件均未变化，块存储已是最新")
+        return []
+    print(f"需要切分 {len(changed_files)} 个文件，沿用 {len(unchanged)} 个未变化文件的块")
+    
+    # 各文件的切分相互独立，交给进程池并行处理，结果保持文件顺序
+    workers = workers or os.cpu_count() or 1
+    args = [(txt_file, chunk_size, chunk_overlap, chunk_chars, overlap_chars) for txt_file in changed_files]
+    if workers > 1 and len(changed_files) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(changed_files))) as executor:
+            chunked = list(executor.map(chunk_file, *zip(*args)))
+    else:
+        chunked = [chunk_file(*arg) for arg in args]
+    chunked = {item["file_name"]: item for item in chunked}
+    results = [unchanged.get(txt_file.name) or chunked[txt_file.name] for txt_file in txt_files]
+    
+    files_chunks = []
+    table = ChunkTable(base_path)
+    for txt_file, item in zip(txt_files, results):
         print(f"\n处理文件: {txt_file.name}")
-        
-        # 生成SHA1
-        sha1 = generate_sha1(txt_file)
-        
-        # 提取公司名称
-        company_name = extract_company_name(txt_file.name)
-        
-        # 切分文件
-        chunks = split_text_file(txt_file, chunk_size, chunk_overlap)
+        chunks = item["chunks"]
         
         if not chunks:
             print(f"  警告: 文件 {txt_file.name} 切分失败")
             continue
         
-        # 构建JSON结构
-        json_data = {
-            "metainfo": {
-                "sha1": sha1,
-                "company_name": company_name,
-                "file_name": txt_file.name
-            },
-            "content": {
-                "chunks": chunks
-            }
-        }
-        
-        # 生成输出文件名
-        output_file = output_dir / f"{txt_file.stem}.json"
+        # 登记到块表，块ID即块在表中的序号
+        doc_index = table.add_document(txt_file.stem, txt_file)
+        for chunk in chunks:
+            chunk["chunk_id"] = table.add_chunk(doc_index, chunk["offsets"][0], chunk["offsets"][1],
+                                                chunk["lines"][0], chunk["lines"][1])
         
-        # 保存JSON文件
-        try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, ensure_ascii=False, indent=2)
-            
-            print(f"  成功: 生成 {output_file.name} ({len(chunks)} 个块)")
-            
-        except Exception as e:
-            print(f"  错误: 保存 {output_file.name} 失败: {e}")
+        files_chunks.append(item)
     
-    print(f"\n转换完成！共处理 {len(txt_files)} 个文件")
+    # 跨文件标记近似重复块，重复块只保留指向规范副本的引用
+    if dedup_threshold > 0:
+        duplicates = mark_duplicate_chunks(files_chunks, table, dedup_threshold)
+        print(f"\n近似重复块: {len(duplicates)} 个")
+    else:
+        duplicates = {}
+    
+    # 重新生成块存储，块ID与块表中的序号一致
+    if db_path.exists():
+        db_path.unlink()
+    
+    try:
+        with ChunkStore(db_path, base_path) as store:
+            for item in files_chunks:
+                store.add_document(item["stem"], item["file_name"], input_dir / item["file_name"],
+                                   item["sha1"], item["company_name"])
+                store.append_chunks(item["stem"], item["chunks"])
+                print(f"  成功: 写入 {item['file_name']} ({len(item['chunks'])} 个块)")
+            store.mark_duplicates(duplicates)
+            store.set_meta("params", params)
+    except Exception as e:
+        print(f"  错误: 写入块存储 {db_path} 失败: {e}")
+    
+    # 保存块表，文本块通过偏移量映射原文件读取
+    table.save(output_dir / "chunk_table.bin")
+    table.close()
+    print(f"  块表: {len(table)} 个块, 元数据 {table.size_bytes()} 字节")
+    
+    print(f"\n转换完成！共处理 {len(txt_files)} 个文件，重新切分 {len(changed_files)} 个")
+    return [txt_file.name for txt_file in changed_files]
+
+
+# 早期版本写出JSON切分文件时的函数名
+convert_txt_to_json = chunk_text_files
 
 
 def main():
@@ -172,18 +326,18 @@ def main():
         print(f"错误: 输入目录 {input_dir} 不存在")
         return
     
-    print("=== TXT文件转JSON格式切分工具 ===")
+    print("=== TXT文件切分工具 ===")
     print(f"输入目录: {input_dir}")
     print(f"输出目录: {output_dir}")
-    print(f"切分参数: chunk_size=30, chunk_overlap=5")
+    print(f"切分参数: chunk_chars={DEFAULT_CHUNK_CHARS}, overlap_chars={DEFAULT_OVERLAP_CHARS}")
     print("=" * 50)
     
-    # 执行转换
-    convert_txt_to_json(input_dir, output_dir)
+    # 执行切分
+    chunk_text_files(input_dir, output_dir, base_path=current_dir)
     
     print(f"\n✅ 转换完成！")
     print(f"📁 输出目录: {output_dir}")
-    print(f"📊 可以在输出目录中查看生成的JSON文件")
+    print(f"📊 块存储: {output_dir / 'chunks.db'}")
 
 
 if __name__ == "__main__":
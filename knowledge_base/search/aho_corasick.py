@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Aho-Corasick多模式匹配自动机
+一次扫描文本即可找出所有关键词的出现位置，扫描代价与关键词数量无关
+"""
+
+from collections import deque
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
+
+
+class AhoCorasickAutomaton:
+    """Aho-Corasick自动机"""
+    
+    def __init__(self, patterns: Iterable[str] = ()):
+        """
+        初始化自动机
+        
+        Args:
+            patterns: 初始模式串集合
+        """
+        # 状态0为根节点，goto[state]为字符到子状态的映射
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # pattern_at[state]为以该状态结尾的模式串编号，output[state]另含失败链上的输出，每次build重新计算
+        self.pattern_at: List[Optional[int]] = [None]
+        self.output: List[List[int]] = [[]]
+        self.patterns: List[str] = []
+        self._built = False
+        
+        for pattern in patterns:
+            self.add(pattern)
+    
+    def add(self, pattern: str) -> int:
+        """
+        添加模式串
+        
+        Args:
+            pattern: 模式串
+        
+        Returns:
+            模式串编号，重复添加时返回已有编号
+        """
+        if not pattern:
+            raise ValueError("模式串不能为空")
+        
+        state = 0
+        for ch in pattern:
+            next_state = self.goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][ch] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.pattern_at.append(None)
+                self.output.append([])
+            state = next_state
+        
+        if self.pattern_at[state] is not None:
+            return self.pattern_at[state]
+        
+        pattern_id = len(self.patterns)
+        self.patterns.append(pattern)
+        self.pattern_at[state] = pattern_id
+        self._built = False
+        return pattern_id
+    
+    def build(self):
+        """广度优先计算失败指针，并把失败链上的输出合并到各状态（可在add之后重复调用）"""
+        own = [[] if pattern_id is None else [pattern_id] for pattern_id in self.pattern_at]
+        self.output = list(own)
+        queue = deque()
+        for state in self.goto[0].values():
+            self.fail[state] = 0
+            queue.append(state)
+        
+        while queue:
+            state = queue.popleft()
+            for ch, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(ch, 0)
+                self.output[child] = own[child] + self.output[self.fail[child]]
+        
+        self._built = True
+    
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        扫描文本，逐个产出匹配
+        
+        Args:
+            text: 待扫描文本
+        
+        Yields:
+            (起始位置, 模式串编号)
+        """
+        if not self._built:
+            self.build()
+        
+        goto, fail, output, patterns = self.goto, self.fail, self.output, self.patterns
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pattern_id in output[state]:
+                yield pos - len(patterns[pattern_id]) + 1, pattern_id
+    
+    def find_all(self, text: str) -> Dict[str, List[int]]:
+        """
+        查找所有模式串在文本中的出现位置
+        
+        Args:
+            text: 待扫描文本
+        
+        Returns:
+            模式串到起始位置列表的映射（只包含出现过的模式串）
+        """
+        positions: Dict[str, List[int]] = {}
+        for start, pattern_id in self.iter_matches(text):
+            positions.setdefault(self.patterns[pattern_id], []).append(start)
+        return positions
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+搜索后端基准测试
+对比内存索引（KnowledgeBaseSearchEngine）与SQLite FTS5后端的
+构建时间、各搜索方法的查询延迟以及hybrid_search前k个结果的重合度
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Callable
+
+# 添加当前目录到Python路径
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from fts5_backend import create_search_engine
+
+
+def measure_latency(search: Callable[[str], Any], queries: List[str], repeat: int) -> Dict[str, float]:
+    """
+    统计查询延迟
+    
+    Returns:
+        平均延迟和p95延迟（毫秒）
+    """
+    timings = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "mean_ms": sum(timings) / len(timings),
+        "p95_ms": timings[min(int(len(timings) * 0.95), len(timings) - 1)]
+    }
+
+
+def top_k_overlap(engine_a, engine_b, queries: List[str], k: int) -> float:
+    """两个引擎hybrid_search前k个文档的平均重合比例"""
+    overlaps = []
+    for query in queries:
+        expected = {r["document_id"] for r in engine_a.hybrid_search(query, k)}
+        if not expected:
+            continue
+        actual = {r["document_id"] for r in engine_b.hybrid_search(query, k)}
+        overlaps.append(len(expected & actual) / len(expected))
+    return sum(overlaps) / len(overlaps) if overlaps else 1.0
+
+
+def main():
+    """运行基准测试并打印对比结果"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="内存索引与FTS5后端基准测试")
+    parser.add_argument("--base-path", default=".", help="知识库根目录")
+    parser.add_argument("--queries", type=int, default=50, help="评测查询数（取高频关键词）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个查询的重复次数")
+    parser.add_argument("--top-k", type=int, default=3, help="计算重合度的前k个结果")
+    args = parser.parse_args()
+    
+    engines = {}
+    build_times = {}
+    for backend in ("memory", "fts5"):
+        start = time.perf_counter()
+        engines[backend] = create_search_engine(args.base_path, backend)
+        build_times[backend] = time.perf_counter() - start
+    
+    memory_engine = engines["memory"]
+    queries = [kw["keyword"] for kw in memory_engine.get_popular_keywords(args.queries)]
+    queries += list(memory_engine.topic_index.get("topics", {}).keys())
+    
+    print("=== 构建时间 ===")
+    for backend, seconds in build_times.items():
+        print(f"{backend}: {seconds:.3f}s")
+    
+    print(f"\n=== 查询延迟（{len(queries)}个查询 × {args.repeat}次） ===")
+    for method in ("hybrid_search", "search_content", "search_by_keyword"):
+        for backend, engine in engines.items():
+            stats = measure_latency(getattr(engine, method), queries, args.repeat)
+            print(f"{method:<18} {backend:<6} 平均 {stats['mean_ms']:.2f}ms  p95 {stats['p95_ms']:.2f}ms")
+    
+    overlap = top_k_overlap(memory_engine, engines["fts5"], queries, args.top_k)
+    print("\n=== 结果重合度 ===")
+    print(f"hybrid_search top{args.top_k}: {overlap:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+布隆过滤器
+用于快速判定文档"一定不包含"某个词项，判定为可能包含时才需要读取文档
+"""
+
+import base64
+import hashlib
+import math
+from typing import Dict, Any, Iterable
+
+
+class BloomFilter:
+    """基于双重哈希的布隆过滤器"""
+    
+    def __init__(self, num_bits: int, num_hashes: int, bits: bytes = None):
+        """
+        初始化布隆过滤器
+        
+        Args:
+            num_bits: 位数组长度
+            num_hashes: 哈希函数个数
+            bits: 已有的位数组内容
+        """
+        self.num_bits = max(8, num_bits)
+        self.num_hashes = max(1, num_hashes)
+        self.bits = bytearray(bits) if bits else bytearray((self.num_bits + 7) // 8)
+    
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = 0.01) -> "BloomFilter":
+        """
+        按预计元素数量和误判率创建布隆过滤器
+        
+        Args:
+            capacity: 预计插入的元素数量
+            error_rate: 期望的误判率
+        """
+        capacity = max(1, capacity)
+        num_bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        num_hashes = round(num_bits / capacity * math.log(2))
+        return cls(num_bits, num_hashes)
+    
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+    
+    def add(self, item: str):
+        """插入元素"""
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+    
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+    
+    def might_contain_any(self, items: Iterable[str]) -> bool:
+        """是否可能包含任意一个元素"""
+        return any(item in self for item in items)
+    
+    def might_contain_all(self, items: Iterable[str]) -> bool:
+        """是否可能包含全部元素"""
+        return all(item in self for item in items)
+    
+    def size_bytes(self) -> int:
+        """位数组占用的字节数"""
+        return len(self.bits)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化为可写入JSON的字典"""
+        return {
+            "num_bits": self.num_bits,
+            "num_hashes": self.num_hashes,
+            "bits": base64.b64encode(bytes(self.bits)).decode('ascii')
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BloomFilter":
+        """从to_dict的结果恢复"""
+        return cls(data["num_bits"], data["num_hashes"], base64.b64decode(data["bits"]))
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+冷存储层
+归档文档以分块压缩的形式保存在磁盘上（见document_store），不放入内存中的document_contents；
+内存中只保留每个文档词项集合的布隆过滤器，查询时先用布隆过滤器排除
+一定不包含查询词的文档，只有可能命中的文档才读盘解压
+"""
+
+import json
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Iterable, Optional
+import logging
+
+from bloom_filter import BloomFilter
+from document_store import DocumentStore
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "bloom_manifest.json"
+
+
+class ColdTier:
+    """归档文档的冷存储"""
+    
+    def __init__(self, cold_path: Path, tokenize: Callable[[str], List[str]],
+                 error_rate: float = 0.01):
+        """
+        初始化冷存储
+        
+        Args:
+            cold_path: 冷存储目录
+            tokenize: 与搜索引擎一致的分词函数
+            error_rate: 布隆过滤器误判率
+        """
+        self.cold_path = Path(cold_path)
+        self.tokenize = tokenize
+        self.error_rate = error_rate
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        self.filters: Dict[str, BloomFilter] = {}
+        self.stats = {"bloom_rejected": 0, "loaded": 0}
+        self.store = DocumentStore(self.cold_path)
+        self._load_manifest()
+    
+    def _load_manifest(self):
+        manifest_file = self.cold_path / MANIFEST_FILE
+        if not manifest_file.exists():
+            return
+        try:
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except Exception as e:
+            logger.error(f"加载冷存储清单失败: {e}")
+            self.manifest = {}
+        self.filters = {doc_id: BloomFilter.from_dict(entry["bloom"])
+                        for doc_id, entry in self.manifest.items()}
+    
+    def save_manifest(self):
+        """保存冷存储清单"""
+        self.cold_path.mkdir(parents=True, exist_ok=True)
+        with open(self.cold_path / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        self.store.save()
+    
+    def contains(self, doc_id: str) -> bool:
+        """文档是否已归档（布隆过滤器和文档数据都存在）"""
+        return doc_id in self.manifest and self.store.contains(doc_id)
+    
+    def is_current(self, doc_id: str, source_path: Path) -> bool:
+        """归档内容是否与源文件一致（规则同DocumentStore.is_current）"""
+        return self.store.is_current(doc_id, source_path)
+    
+    def archive(self, doc_id: str, content: str, **stamp) -> Dict[str, Any]:
+        """
+        归档文档：压缩写盘并构建词项布隆过滤器
+        
+        Args:
+            doc_id: 文档ID
+            content: 文档内容
+            stamp: 源文件信息（source_stamp），用于判断归档内容是否过期
+        
+        Returns:
+            清单条目
+        """
+        words = self.tokenize(content)
+        term_counts = dict(sorted(Counter(words).items()))
+        terms = list(term_counts)
+        
+        bloom = BloomFilter.for_capacity(len(terms), self.error_rate)
+        for term in terms:
+            bloom.add(term)
+        
+        self.store.add_document(doc_id, content, **stamp)
+        
+        # terms（词项 -> 词频）只在启动时用于恢复文档频率和主题排序，不常驻内存
+        entry = {
+            "doc_length": len(words),
+            "terms": term_counts,
+            "bloom": bloom.to_dict()
+        }
+        self.manifest[doc_id] = entry
+        self.filters[doc_id] = bloom
+        return entry
+    
+    def remove(self, doc_id: str):
+        """取消归档：删除清单条目、布隆过滤器和存储中的文档"""
+        self.manifest.pop(doc_id, None)
+        self.filters.pop(doc_id, None)
+        self.store.remove_document(doc_id)
+    
+    def terms(self, doc_id: str) -> List[str]:
+        """归档文档的词项集合"""
+        return list(self.manifest.get(doc_id, {}).get("terms", []))
+    
+    def term_counts(self, doc_id: str) -> Dict[str, int]:
+        """归档文档的词频，旧版清单只有词项列表时词频按1计"""
+        terms = self.manifest.get(doc_id, {}).get("terms", {})
+        return dict(terms) if isinstance(terms, dict) else dict.fromkeys(terms, 1)
+    
+    def doc_length(self, doc_id: str) -> int:
+        """归档文档的长度（词数）"""
+        return self.manifest.get(doc_id, {}).get("doc_length", 0)
+    
+    def may_contain(self, doc_id: str, terms: Iterable[str], require_all: bool = False) -> bool:
+        """
+        布隆过滤器判定文档是否可能包含查询词
+        
+        Args:
+            doc_id: 文档ID
+            terms: 查询词
+            require_all: 是否要求包含全部查询词，否则包含任意一个即可
+        """
+        bloom = self.filters.get(doc_id)
+        if bloom is None:
+            return False
+        terms = list(terms)
+        matched = bloom.might_contain_all(terms) if require_all else bloom.might_contain_any(terms)
+        if not matched:
+            self.stats["bloom_rejected"] += 1
+        return matched
+    
+    def load(self, doc_id: str) -> Optional[str]:
+        """读盘并解压归档文档"""
+        try:
+            content = self.store.get_document(doc_id)
+        except Exception as e:
+            logger.error(f"读取冷存储文档失败: {e}")
+            return None
+        if content is not None:
+            self.stats["loaded"] += 1
+        return content
+    
+    def release_terms(self):
+        """释放清单中的词项列表，只保留布隆过滤器和文档长度"""
+        for entry in self.manifest.values():
+            entry.pop("terms", None)
+    
+    def memory_bytes(self) -> int:
+        """常驻内存的布隆过滤器总字节数"""
+        return sum(bloom.size_bytes() for bloom in self.filters.values())
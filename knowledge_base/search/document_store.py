@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+压缩文档存储
+文档按整行切分为固定大小的块，逐块压缩后追加写入数据文件，
+清单中记录每块的偏移、长度和起始行号。读取某个行范围时只解压覆盖该范围的块，
+解压后的块放入按字节数淘汰的LRU缓存
+"""
+
+import bisect
+import hashlib
+import json
+import lzma
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+DATA_FILE = "blocks.bin"
+
+# 每块未压缩文本的目标字节数
+DEFAULT_BLOCK_SIZE = 16 * 1024
+
+# 块缓存默认容量（解压后的字节数）
+DEFAULT_CACHE_BYTES = 8 * 1024 * 1024
+
+# 本知识库的文本（UTF-8中文为主）按16KB分块时zlib约2.3倍、lzma约2.5倍，256KB块时lzma约3.1倍
+CODECS = {
+    "zlib": (lambda data: zlib.compress(data, 9), zlib.decompress),
+    "lzma": (lzma.compress, lzma.decompress)
+}
+
+
+def file_sha1(path: Path) -> str:
+    """文件内容的SHA1"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_stamp(path: Path) -> Dict[str, Any]:
+    """源文件的大小、修改时间和SHA1，写入清单后用于判断存储中的文档是否过期"""
+    stat = Path(path).stat()
+    return {
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_sha1": file_sha1(path)
+    }
+
+
+class BlockCache:
+    """按解压后字节数淘汰的LRU块缓存"""
+    
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.blocks: "OrderedDict[Tuple[str, int], List[str]]" = OrderedDict()
+        self.sizes: Dict[Tuple[str, int], int] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Tuple[str, int]) -> Optional[List[str]]:
+        lines = self.blocks.get(key)
+        if lines is None:
+            self.misses += 1
+            return None
+        self.blocks.move_to_end(key)
+        self.hits += 1
+        return lines
+    
+    def put(self, key: Tuple[str, int], lines: List[str], size: int):
+        if size > self.max_bytes:
+            return
+        if key in self.blocks:
+            self.current_bytes -= self.sizes[key]
+            del self.blocks[key]
+        self.blocks[key] = lines
+        self.sizes[key] = size
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            old_key, _ = self.blocks.popitem(last=False)
+            self.current_bytes -= self.sizes.pop(old_key)
+    
+    def clear(self):
+        self.blocks.clear()
+        self.sizes.clear()
+        self.current_bytes = 0
+
+
+class DocumentStore:
+    """按块压缩、可按行随机访问的文档存储"""
+    
+    def __init__(self, store_path: Path, codec: str = "zlib",
+                 block_size: int = DEFAULT_BLOCK_SIZE,
+                 cache_bytes: int = DEFAULT_CACHE_BYTES):
+        """
+        初始化文档存储，目录中已有清单时沿用清单中的编码方式和块大小
+        
+        Args:
+            store_path: 存储目录
+            codec: 压缩方式，zlib或lzma
+            block_size: 每块未压缩文本的目标字节数
+            cache_bytes: 块缓存容量（字节）
+        """
+        if codec not in CODECS:
+            raise ValueError(f"不支持的压缩方式: {codec}")
+        self.store_path = Path(store_path)
+        self.codec = codec
+        self.block_size = block_size
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.block_first_lines: Dict[str, List[int]] = {}
+        self.cache = BlockCache(cache_bytes)
+        self._load_manifest()
+    
+    def _load_manifest(self):
+        manifest_file = self.store_path / MANIFEST_FILE
+        if not manifest_file.exists():
+            return
+        try:
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except Exception as e:
+            logger.error(f"加载文档存储清单失败: {e}")
+            return
+        self.codec = manifest.get("codec", self.codec)
+        self.block_size = manifest.get("block_size", self.block_size)
+        self.documents = manifest.get("documents", {})
+        self.block_first_lines = {doc_id: [block[2] for block in entry["blocks"]]
+                                  for doc_id, entry in self.documents.items()}
+    
+    def save(self):
+        """保存清单"""
+        self.store_path.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            "codec": self.codec,
+            "block_size": self.block_size,
+            "documents": self.documents
+        }
+        with open(self.store_path / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+    
+    def contains(self, doc_id: str) -> bool:
+        """文档是否在存储中"""
+        return doc_id in self.documents and (self.store_path / DATA_FILE).exists()
+    
+    def is_current(self, doc_id: str, source_path: Path) -> bool:
+        """
+        存储中的文档是否与源文件一致：大小和修改时间相同即视为一致，否则比较SHA1；
+        源文件不存在时以存储为准，清单中没有源文件信息时视为过期
+        
+        Args:
+            doc_id: 文档ID
+            source_path: 源文件路径
+        """
+        entry = self.documents.get(doc_id)
+        if entry is None:
+            return False
+        try:
+            stat = Path(source_path).stat()
+        except OSError:
+            return True
+        if entry.get("source_size") == stat.st_size and entry.get("source_mtime_ns") == stat.st_mtime_ns:
+            return True
+        if entry.get("source_sha1") is None or entry["source_sha1"] != file_sha1(source_path):
+            return False
+        # 内容未变（如文件被touch），记下新的修改时间，下次不必再算SHA1
+        entry["source_size"] = stat.st_size
+        entry["source_mtime_ns"] = stat.st_mtime_ns
+        return True
+    
+    def add_document(self, doc_id: str, content: str, **metadata) -> Dict[str, Any]:
+        """
+        追加写入文档，同名文档以新写入的为准（旧块留在数据文件中，重建存储时清除）
+        
+        Args:
+            doc_id: 文档ID
+            content: 文档内容
+            metadata: 随清单保存的附加信息
+        
+        Returns:
+            清单条目
+        """
+        compress = CODECS[self.codec][0]
+        lines = content.split('\n')
+        
+        # 按整行组块，保证行范围只落在相邻的若干块内
+        chunks = []
+        start = 0
+        size = 0
+        for i, line in enumerate(lines):
+            size += len(line.encode('utf-8')) + 1
+            if size >= self.block_size:
+                chunks.append((start, i + 1))
+                start = i + 1
+                size = 0
+        if start < len(lines) or not chunks:
+            chunks.append((start, len(lines)))
+        
+        self.store_path.mkdir(parents=True, exist_ok=True)
+        blocks = []
+        with open(self.store_path / DATA_FILE, 'ab') as f:
+            offset = f.tell()
+            for first, last in chunks:
+                raw = '\n'.join(lines[first:last]).encode('utf-8')
+                data = compress(raw)
+                f.write(data)
+                blocks.append([offset, len(data), first, len(raw)])
+                offset += len(data)
+        
+        entry = dict(metadata)
+        entry.update({
+            "line_count": len(lines),
+            "char_count": len(content),
+            "blocks": blocks
+        })
+        self.documents[doc_id] = entry
+        self.block_first_lines[doc_id] = [block[2] for block in blocks]
+        self._invalidate(doc_id)
+        return entry
+    
+    def remove_document(self, doc_id: str):
+        """从清单中删除文档（数据块留在数据文件中，重建存储时清除）"""
+        self.documents.pop(doc_id, None)
+        self.block_first_lines.pop(doc_id, None)
+        self._invalidate(doc_id)
+    
+    def _invalidate(self, doc_id: str):
+        for key in [key for key in self.cache.blocks if key[0] == doc_id]:
+            self.cache.current_bytes -= self.cache.sizes.pop(key)
+            del self.cache.blocks[key]
+    
+    def _read_block(self, doc_id: str, block: int, use_cache: bool = True) -> List[str]:
+        """读取并解压一个块，返回其中的行；use_cache为False时既不查缓存也不放入缓存"""
+        key = (doc_id, block)
+        lines = self.cache.get(key) if use_cache else None
+        if lines is not None:
+            return lines
+        
+        offset, length, _, raw_length = self.documents[doc_id]["blocks"][block]
+        with open(self.store_path / DATA_FILE, 'rb') as f:
+            f.seek(offset)
+            data = f.read(length)
+        lines = CODECS[self.codec][1](data).decode('utf-8').split('\n')
+        if use_cache:
+            self.cache.put(key, lines, raw_length)
+        return lines
+    
+    def get_lines(self, doc_id: str, start: int, end: Optional[int] = None) -> List[str]:
+        """
+        读取文档的行范围，只解压覆盖该范围的块
+        
+        Args:
+            doc_id: 文档ID
+            start: 起始行号（从0开始）
+            end: 结束行号（不含），为None时读到文档末尾
+        
+        Returns:
+            行列表
+        """
+        entry = self.documents.get(doc_id)
+        if entry is None:
+            return []
+        line_count = entry["line_count"]
+        start = max(0, start)
+        end = line_count if end is None else min(end, line_count)
+        if start >= end:
+            return []
+        
+        first_lines = self.block_first_lines[doc_id]
+        block = bisect.bisect_right(first_lines, start) - 1
+        lines = []
+        while block < len(first_lines) and first_lines[block] < end:
+            block_lines = self._read_block(doc_id, block)
+            block_start = first_lines[block]
+            lines.extend(block_lines[max(0, start - block_start):end - block_start])
+            block += 1
+        return lines
+    
+    def get_document(self, doc_id: str) -> Optional[str]:
+        """读取完整文档"""
+        if doc_id not in self.documents:
+            return None
+        # 整篇读取是顺序扫描（建索引、刷新过期条目），不放入块缓存，以免挤掉按行读取的热点块
+        lines = []
+        for block in range(len(self.block_first_lines[doc_id])):
+            lines.extend(self._read_block(doc_id, block, use_cache=False))
+        return '\n'.join(lines[:self.documents[doc_id]["line_count"]])
+    
+    def line_count(self, doc_id: str) -> int:
+        """文档行数"""
+        return self.documents.get(doc_id, {}).get("line_count", 0)
+    
+    def size_stats(self) -> Dict[str, int]:
+        """压缩前后的字节数"""
+        raw_bytes = 0
+        compressed_bytes = 0
+        for entry in self.documents.values():
+            for _, length, _, raw_length in entry["blocks"]:
+                raw_bytes += raw_length
+                compressed_bytes += length
+        return {"raw_bytes": raw_bytes, "compressed_bytes": compressed_bytes}
+
+
+def build_document_store(base_path: str = ".", codec: str = "zlib",
+                         block_size: int = DEFAULT_BLOCK_SIZE) -> DocumentStore:
+    """
+    根据文档索引把所有文档文本写入压缩存储（index/doc_store），已有存储会被重建
+    
+    Args:
+        base_path: 知识库根目录
+        codec: 压缩方式
+        block_size: 块大小
+    
+    Returns:
+        文档存储
+    """
+    base_path = Path(base_path)
+    store_path = base_path / "index" / "doc_store"
+    for name in (MANIFEST_FILE, DATA_FILE):
+        if (store_path / name).exists():
+            (store_path / name).unlink()
+    
+    with open(base_path / "index" / "document_index.json", 'r', encoding='utf-8') as f:
+        document_index = json.load(f)
+    
+    store = DocumentStore(store_path, codec=codec, block_size=block_size)
+    for doc in document_index.get("documents", []):
+        file_path = base_path / doc["file_path"].replace("../", "")
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except Exception as e:
+            logger.error(f"读取文档内容失败: {e}")
+            continue
+        store.add_document(doc["id"], content, **source_stamp(file_path))
+    store.save()
+    return store
+
+
+def main():
+    """构建文档存储并输出压缩情况"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="构建压缩文档存储")
+    parser.add_argument("--base-path", default=".", help="知识库根目录")
+    parser.add_argument("--codec", default="zlib", choices=sorted(CODECS), help="压缩方式")
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE, help="块大小（字节）")
+    args = parser.parse_args()
+    
+    store = build_document_store(args.base_path, args.codec, args.block_size)
+    stats = store.size_stats()
+    ratio = stats["raw_bytes"] / max(stats["compressed_bytes"], 1)
+    print(f"文档数: {len(store.documents)}")
+    print(f"原始大小: {stats['raw_bytes']} 字节")
+    print(f"压缩后: {stats['compressed_bytes']} 字节 (压缩比 {ratio:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档分面索引
+为分类、作者、发布年份的每个取值维护一个文档位图，
+过滤条件在打分前以位图交集的方式求出候选文档集合
+"""
+
+import re
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple, Union
+
+# 过滤字段别名
+FIELD_ALIASES = {
+    "categories": "category",
+    "publish_date": "year"
+}
+
+# 可过滤的分面字段
+FACET_FIELDS = ("category", "author", "year")
+
+# 支持范围比较的数值字段
+NUMERIC_FIELDS = {"year"}
+
+CONDITION_PATTERN = re.compile(r'^\s*(\w+)\s*(>=|<=|!=|=|>|<)\s*(.+?)\s*$')
+
+Filters = Union[str, Dict[str, Any], List[Tuple[str, str, str]], None]
+
+
+def popcount(bitmap: int) -> int:
+    """位图中置位的数量"""
+    return bin(bitmap).count('1')
+
+
+def parse_filters(filters: Filters) -> List[Tuple[str, str, str]]:
+    """
+    解析过滤条件
+    
+    Args:
+        filters: 过滤条件，支持以下形式：
+            - 字符串，如 "category=普惠金融&year>=2024"，多个取值用|分隔表示或
+            - 字典，如 {"category": "普惠金融", "year": 2024}，均按等值处理
+            - (字段, 运算符, 取值) 三元组列表
+    
+    Returns:
+        (字段, 运算符, 取值) 三元组列表
+    """
+    if not filters:
+        return []
+    
+    if isinstance(filters, dict):
+        conditions = [(field, "=", str(value)) for field, value in filters.items()]
+    elif isinstance(filters, str):
+        conditions = []
+        for part in filters.split('&'):
+            if not part.strip():
+                continue
+            match = CONDITION_PATTERN.match(part)
+            if not match:
+                raise ValueError(f"无法解析的过滤条件: {part}")
+            conditions.append(match.groups())
+    else:
+        conditions = [(field, op, str(value)) for field, op, value in filters]
+    
+    parsed = []
+    for field, op, value in conditions:
+        field = FIELD_ALIASES.get(field, field)
+        if op in (">", ">=", "<", "<=") and field not in NUMERIC_FIELDS:
+            raise ValueError(f"字段 {field} 不支持范围比较")
+        parsed.append((field, op, value))
+    return parsed
+
+
+def parse_filter_args(args: Iterable[Tuple[str, str]], reserved: Iterable[str] = ("q", "limit")) -> str:
+    """
+    将URL查询参数还原为过滤表达式
+    
+    URL中的 year>=2024 会被解析为键"year>"、值"2024"，year>2024 则是键"year>2024"、空值，
+    这里重新拼接为原始条件，再按CONDITION_PATTERN在第一个比较运算符处取出字段名。
+    只有分面字段（含别名）和filters参数作为过滤条件，其他无关参数被忽略；
+    分面字段的条件写法有误时照样保留，由parse_filters报错
+    
+    Args:
+        args: (键, 值) 序列
+        reserved: 不作为过滤条件的参数名
+    
+    Returns:
+        过滤表达式字符串
+    """
+    reserved = set(reserved)
+    parts = []
+    for key, value in args:
+        if key in reserved:
+            continue
+        if key == "filters":
+            parts.append(value)
+            continue
+        part = f"{key}={value}" if value else key
+        match = CONDITION_PATTERN.match(part)
+        field = match.group(1) if match else re.match(r'\s*(\w*)', key).group(1)
+        if FIELD_ALIASES.get(field, field) in FACET_FIELDS:
+            parts.append(part)
+    return '&'.join(part for part in parts if part)
+
+
+class FacetIndex:
+    """基于位图的文档分面索引"""
+    
+    def __init__(self):
+        self.doc_ids: List[str] = []
+        self.doc_positions: Dict[str, int] = {}
+        self.bitmaps: Dict[str, Dict[str, int]] = {}
+        self.all_docs = 0
+    
+    @staticmethod
+    def _document_facets(doc: Dict[str, Any]) -> Dict[str, List[str]]:
+        """提取文档的各分面取值"""
+        facets = {
+            "category": list(doc.get("categories", [])),
+            "author": [doc["author"]] if doc.get("author") else [],
+            "year": []
+        }
+        year = re.search(r'\d{4}', str(doc.get("publish_date", "")))
+        if year:
+            facets["year"].append(year.group())
+        return facets
+    
+    def build(self, documents: List[Dict[str, Any]]):
+        """
+        构建分面位图，文档在位图中的位置即其在documents中的序号
+        
+        Args:
+            documents: 文档元数据列表
+        """
+        self.doc_ids = [doc["id"] for doc in documents]
+        self.doc_positions = {doc_id: i for i, doc_id in enumerate(self.doc_ids)}
+        self.bitmaps = {field: {} for field in FACET_FIELDS}
+        self.all_docs = (1 << len(self.doc_ids)) - 1
+        
+        for i, doc in enumerate(documents):
+            for field, values in self._document_facets(doc).items():
+                for value in values:
+                    self.bitmaps[field][value] = self.bitmaps[field].get(value, 0) | (1 << i)
+    
+    def _condition_bitmap(self, field: str, op: str, value: str) -> int:
+        """单个过滤条件对应的位图"""
+        if field not in self.bitmaps:
+            raise ValueError(f"不支持的过滤字段: {field}")
+        values = self.bitmaps[field]
+        
+        if op in ("=", "!="):
+            bitmap = 0
+            for option in value.split('|'):
+                bitmap |= values.get(option.strip(), 0)
+            return bitmap if op == "=" else self.all_docs & ~bitmap
+        
+        # 数值字段的范围比较
+        try:
+            threshold = int(value)
+        except ValueError:
+            raise ValueError(f"字段 {field} 的取值必须为整数: {value}")
+        compare = {
+            ">": lambda v: v > threshold,
+            ">=": lambda v: v >= threshold,
+            "<": lambda v: v < threshold,
+            "<=": lambda v: v <= threshold
+        }[op]
+        bitmap = 0
+        for option, option_bitmap in values.items():
+            if compare(int(option)):
+                bitmap |= option_bitmap
+        return bitmap
+    
+    def filter_bitmap(self, filters: Filters) -> int:
+        """
+        计算满足全部过滤条件的文档位图（各条件取交集）
+        
+        Args:
+            filters: 过滤条件，格式见parse_filters
+        
+        Returns:
+            文档位图
+        """
+        bitmap = self.all_docs
+        for field, op, value in parse_filters(filters):
+            bitmap &= self._condition_bitmap(field, op, value)
+            if not bitmap:
+                break
+        return bitmap
+    
+    def filter_documents(self, filters: Filters) -> Optional[Set[str]]:
+        """
+        返回满足过滤条件的文档ID集合，没有过滤条件时返回None表示不过滤
+        """
+        if not parse_filters(filters):
+            return None
+        bitmap = self.filter_bitmap(filters)
+        return {doc_id for i, doc_id in enumerate(self.doc_ids) if bitmap >> i & 1}
+    
+    def bitmap_of(self, doc_ids: Iterable[str]) -> int:
+        """文档ID集合对应的位图"""
+        bitmap = 0
+        for doc_id in doc_ids:
+            position = self.doc_positions.get(doc_id)
+            if position is not None:
+                bitmap |= 1 << position
+        return bitmap
+    
+    def facet_counts(self, doc_ids: Iterable[str]) -> Dict[str, Dict[str, int]]:
+        """
+        统计结果集中各分面取值的文档数
+        
+        Args:
+            doc_ids: 结果集文档ID
+        
+        Returns:
+            字段 -> 取值 -> 文档数（只包含非零项）
+        """
+        result_bitmap = self.bitmap_of(doc_ids)
+        counts = {}
+        for field, values in self.bitmaps.items():
+            field_counts = {}
+            for value, bitmap in values.items():
+                count = popcount(bitmap & result_bitmap)
+                if count:
+                    field_counts[value] = count
+            counts[field] = dict(sorted(field_counts.items(), key=lambda x: x[1], reverse=True))
+        return counts
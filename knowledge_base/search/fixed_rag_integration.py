@@ -14,7 +14,8 @@ import logging
 current_dir = Path(__file__).parent
 sys.path.append(str(current_dir))
 
-from search_engine import KnowledgeBaseSearchEngine
+from fts5_backend import create_search_engine
+from numeric_facts import NumericFactIndex
 from rag_prompts import (
     BaseRAGPrompt, 
     AnswerWithRAGContextStringPrompt,
@@ -39,6 +40,7 @@ class RAGQuestionAnsweringSystem:
         """
         self.base_path = Path(base_path)
         self.search_engine = None
+        self.fact_index = None
         self.prompt_templates = {}
         
         # 初始化搜索引擎
@@ -63,11 +65,18 @@ class RAGQuestionAnsweringSystem:
                 knowledge_base_path = self.base_path
                 
             logger.info(f"使用知识库路径: {knowledge_base_path}")
-            self.search_engine = KnowledgeBaseSearchEngine(str(knowledge_base_path))
+            self.search_engine = create_search_engine(str(knowledge_base_path))
             logger.info("搜索引擎初始化成功")
         except Exception as e:
             logger.error(f"搜索引擎初始化失败: {e}")
             self.search_engine = None
+            return
+        
+        try:
+            self.fact_index = NumericFactIndex(str(knowledge_base_path))
+        except Exception as e:
+            logger.warning(f"数值事实索引初始化失败，数字类问题将走检索流程: {e}")
+            self.fact_index = None
     
     def _initialize_prompt_templates(self):
         """初始化提示模板"""
@@ -115,6 +124,12 @@ class RAGQuestionAnsweringSystem:
             # 获取提示模板
             prompt_template = self.prompt_templates[answer_type]
             
+            # 数字类问题先查数值事实表，唯一可靠命中时不再检索；未命中或有歧义时照常检索
+            if answer_type == "number" and self.fact_index:
+                facts = self.fact_index.match_question(question, limit)
+                if facts:
+                    return self._answer_from_facts(question, prompt_template, facts)
+            
             # 搜索相关文档
             search_results = self.search_engine.hybrid_search(question, limit)
             
@@ -135,7 +150,8 @@ class RAGQuestionAnsweringSystem:
                     "score": result.get("hybrid_score", 0),
                     "document_id": result.get("document_id", ""),
                     "author": result.get("author", ""),
-                    "publish_date": result.get("publish_date", "")
+                    "publish_date": result.get("publish_date", ""),
+                    "pages": result.get("pages", [])
                 }
                 context.append(context_item)
             
@@ -167,6 +183,43 @@ class RAGQuestionAnsweringSystem:
                 "traceback": traceback.format_exc()
             }
     
+    def _answer_from_facts(self, question: str, prompt_template: BaseRAGPrompt,
+                           facts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """用数值事实表的查询结果构造回答，答案直接取最匹配的事实，上下文为事实所在的句子"""
+        context = []
+        page_map = getattr(self.search_engine, "page_map", None)
+        for fact in facts:
+            page = page_map.page_of_line(fact["doc_id"], fact["line"] - 1) if page_map else None
+            context.append({
+                "title": fact["title"],
+                "content": [fact["sentence"]],
+                "score": fact["score"],
+                "document_id": fact["doc_id"],
+                "author": fact["author"],
+                "publish_date": fact["publish_date"],
+                "line": fact["line"],
+                "pages": [page] if page is not None else []
+            })
+        best = facts[0]
+        
+        return {
+            "question": question,
+            "answer_type": "number",
+            "answer": best["raw_value"],
+            "unit": best["raw_unit"],
+            "facts": facts,
+            "prompt": prompt_template.format_prompt(question, context),
+            "context": context,
+            "search_results": [],
+            "success": True,
+            "metadata": {
+                "source": "numeric_facts",
+                "context_count": len(context),
+                "search_scores": [fact["score"] for fact in facts],
+                "documents": [fact["title"] for fact in facts]
+            }
+        }
+    
     def get_available_answer_types(self) -> List[str]:
         """获取可用的答案类型"""
         return list(self.prompt_templates.keys())
@@ -0,0 +1,589 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite FTS5 搜索后端
+把文档逐行写入使用trigram分词器的FTS5虚拟表（index/fts5.db），
+hybrid_search、search_content、search_by_keyword 改由FTS5的bm25()和snippet()实现。
+trigram分词器只能匹配3个字符及以上的词，更短的词（如两字中文词）退化为LIKE扫描。
+索引按文档内容的SHA1增量更新，数据库使用WAL模式，可被多个进程同时读取。
+各文档的词频也存入数据库，启动时只读出主题词的词频编译主题向量；
+标记为archived的文档与内存后端一样放在cold_documents中，其内容本来就在磁盘上，照常参与检索。
+
+通过环境变量 KB_SEARCH_BACKEND=fts5 或 create_search_engine(backend="fts5") 选择该后端，
+当前SQLite不支持FTS5或trigram分词器（需3.34及以上）时退回内存索引
+"""
+
+import hashlib
+import math
+import os
+import sqlite3
+from collections import defaultdict, Counter
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+
+from search_engine import KnowledgeBaseSearchEngine
+from topic_vectors import TopicVectorIndex
+from facet_index import FacetIndex
+from near_duplicates import collapse_duplicate_contexts
+from page_map import PageMap, context_pages
+
+logger = logging.getLogger(__name__)
+
+BACKEND_ENV = "KB_SEARCH_BACKEND"
+
+# trigram分词器可匹配的最短词长
+MIN_MATCH_LENGTH = 3
+
+# 每个查询最多取出的命中行数
+MAX_MATCHED_LINES = 2000
+
+# SQL语句中IN列表的最大参数个数（旧版SQLite上限为999）
+MAX_SQL_PARAMS = 500
+
+# 表结构版本，与数据库的user_version不一致时删表重建
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5(
+    content, doc_id UNINDEXED, line_no UNINDEXED, char_offset UNINDEXED,
+    tokenize = 'trigram'
+);
+CREATE TABLE IF NOT EXISTS indexed_documents (
+    doc_id TEXT PRIMARY KEY,
+    sha1 TEXT NOT NULL,
+    first_rowid INTEGER NOT NULL,
+    last_rowid INTEGER NOT NULL,
+    doc_length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS document_terms (
+    doc_id TEXT NOT NULL,
+    term TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (doc_id, term)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS document_terms_term ON document_terms (term);
+"""
+
+
+def fts5_trigram_available() -> bool:
+    """当前SQLite是否支持FTS5及trigram分词器"""
+    try:
+        conn = sqlite3.connect(":memory:")
+        try:
+            conn.execute("CREATE VIRTUAL TABLE probe USING fts5(content, tokenize = 'trigram')")
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+    return True
+
+
+def escape_like(text: str) -> str:
+    """转义LIKE模式中的通配符"""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def quote_match(term: str) -> str:
+    """把词项写成FTS5短语，避免被解析为查询语法"""
+    return '"' + term.replace('"', '""') + '"'
+
+
+class FTS5SearchEngine(KnowledgeBaseSearchEngine):
+    """
+    基于SQLite FTS5的知识库搜索引擎，接口与KnowledgeBaseSearchEngine一致；
+    hybrid_search不支持impact_mode和budget_ms（影响力索引只在内存后端中），传入时报错
+    """
+    
+    def __init__(self, base_path: str = ".", db_path: Optional[str] = None):
+        """
+        初始化FTS5搜索引擎
+        
+        不调用父类的初始化：内存倒排表、影响力索引、子串索引、冷存储和压缩文档存储都由FTS5表代替，
+        这里只建立分面、页码映射和主题向量
+        
+        Args:
+            base_path: 知识库根目录路径
+            db_path: FTS5数据库路径，默认为index/fts5.db
+        """
+        self.base_path = Path(base_path)
+        self.index_path = self.base_path / "index"
+        self.data_path = self.base_path / "data"
+        self.fts_db_path = db_path
+        self.conn = None
+        
+        self.document_index = self._load_index("document_index.json")
+        self.topic_index = self._load_index("topic_index.json")
+        self.keyword_index = self._load_index("keyword_index.json")
+        
+        self.documents = []
+        self.cold_documents = []
+        self.total_docs = 0
+        self.total_lines = 0
+        self.doc_lengths = {}
+        self.avg_doc_length = 0
+        self.topic_vectors = TopicVectorIndex(self._tokenize_text)
+        self._topic_context_cache = {}
+        self.facet_index = FacetIndex()
+        self.page_map = PageMap()
+        # FTS5表按文档增量更新，不做建索引时的近似重复去重（结果中的重复上下文仍会合并）
+        self.duplicate_passages = {}
+        self.passage_duplicates = {}
+        
+        self._build_hybrid_index()
+        logger.info("FTS5搜索引擎初始化完成")
+    
+    def _build_hybrid_index(self):
+        """打开FTS5数据库并增量同步文档，不在内存中保留文档内容和词频"""
+        logger.info("开始同步FTS5索引...")
+        db_path = Path(self.fts_db_path) if self.fts_db_path else self.index_path / "fts5.db"
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # 旧版本的表结构缺少词频等字段，删表后全部重建
+            with self.conn:
+                for table in ("passages", "indexed_documents", "document_terms"):
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        
+        indexed = {row[0]: row[1:] for row in
+                   self.conn.execute("SELECT doc_id, sha1, first_rowid, last_rowid FROM indexed_documents")}
+        updated = 0
+        
+        for doc in self.document_index.get("documents", []):
+            content = self._get_document_content_for_hybrid(doc["id"])
+            if not content:
+                continue
+            # 归档文档与内存后端一样单独列出，其行已在磁盘上的FTS5表中，不需要另外的冷存储
+            (self.cold_documents if doc.get("archived") else self.documents).append(doc)
+            self.page_map.add_document(doc["id"], content)
+            
+            sha1 = hashlib.sha1(content.encode('utf-8')).hexdigest()
+            if doc["id"] in indexed and indexed[doc["id"]][0] == sha1:
+                continue
+            self._index_document(doc["id"], content, sha1, indexed.get(doc["id"]))
+            updated += 1
+        
+        # 删除已不在文档索引中的文档
+        current_ids = {doc["id"] for doc in self.documents + self.cold_documents}
+        for doc_id, (_, first_rowid, last_rowid) in indexed.items():
+            if doc_id not in current_ids:
+                with self.conn:
+                    self.conn.execute("DELETE FROM passages WHERE rowid BETWEEN ? AND ?", (first_rowid, last_rowid))
+                    self.conn.execute("DELETE FROM indexed_documents WHERE doc_id = ?", (doc_id,))
+                    self.conn.execute("DELETE FROM document_terms WHERE doc_id = ?", (doc_id,))
+        
+        self.total_docs = len(self.documents) + len(self.cold_documents)
+        self.total_lines = self.conn.execute("SELECT COUNT(*) FROM passages").fetchone()[0]
+        self.doc_lengths = {doc_id: doc_length for doc_id, doc_length in
+                            self.conn.execute("SELECT doc_id, doc_length FROM indexed_documents")
+                            if doc_id in current_ids}
+        self.avg_doc_length = sum(self.doc_lengths.values()) / self.total_docs if self.total_docs else 0
+        self.facet_index.build(self.documents + self.cold_documents)
+        self._build_topic_vectors()
+        logger.info(f"FTS5索引同步完成: {self.total_docs}个文档, 更新{updated}个, {self.total_lines}行")
+    
+    def _build_topic_vectors(self):
+        """只从document_terms表读出主题词的词频，编译主题向量和主题文档排序"""
+        topic_terms = set()
+        for topic, topic_data in self.topic_index.get("topics", {}).items():
+            key_terms = TopicVectorIndex.collect_key_terms(topic_data) or [topic]
+            topic_terms.update(self._tokenize_text(" ".join(key_terms)))
+        
+        term_freq = defaultdict(dict)
+        doc_freq = defaultdict(int)
+        topic_terms = sorted(topic_terms)
+        for i in range(0, len(topic_terms), MAX_SQL_PARAMS):
+            chunk = topic_terms[i:i + MAX_SQL_PARAMS]
+            rows = self.conn.execute(
+                "SELECT doc_id, term, tf FROM document_terms WHERE term IN (" +
+                ", ".join("?" * len(chunk)) + ")", chunk)
+            for doc_id, term, tf in rows:
+                if doc_id in self.doc_lengths:
+                    term_freq[doc_id][term] = tf
+                    doc_freq[term] += 1
+        
+        self._topic_context_cache = {}
+        term_ids = {term: i for i, term in enumerate(doc_freq)}
+        self.topic_vectors.build(self.topic_index, term_ids, term_freq, doc_freq,
+                                 self.doc_lengths, self.avg_doc_length, self.total_docs)
+    
+    def _index_document(self, doc_id: str, content: str, sha1: str, previous: Optional[tuple]):
+        """在一个事务中替换文档的全部行和词频"""
+        next_rowid = self.conn.execute("SELECT COALESCE(MAX(rowid), 0) + 1 FROM passages").fetchone()[0]
+        rows = []
+        offset = 0
+        for line_no, line in enumerate(content.split('\n'), 1):
+            rows.append((next_rowid + line_no - 1, line, doc_id, line_no, offset))
+            offset += len(line) + 1
+        words = self._tokenize_text(content)
+        
+        with self.conn:
+            if previous:
+                self.conn.execute("DELETE FROM passages WHERE rowid BETWEEN ? AND ?", (previous[1], previous[2]))
+            self.conn.execute("DELETE FROM document_terms WHERE doc_id = ?", (doc_id,))
+            self.conn.executemany(
+                "INSERT INTO passages (rowid, content, doc_id, line_no, char_offset) VALUES (?, ?, ?, ?, ?)", rows)
+            self.conn.executemany(
+                "INSERT INTO document_terms (doc_id, term, tf) VALUES (?, ?, ?)",
+                [(doc_id, term, tf) for term, tf in Counter(words).items()])
+            self.conn.execute(
+                "INSERT OR REPLACE INTO indexed_documents (doc_id, sha1, first_rowid, last_rowid, doc_length) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (doc_id, sha1, next_rowid, next_rowid + len(rows) - 1, len(words)))
+    
+    def _read_document_text(self, doc: Dict[str, Any]) -> Optional[str]:
+        """读取文档的源文件，是否需要重新索引由SHA1判断"""
+        file_path = self._source_path(doc)
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except Exception as e:
+            logger.error(f"读取文档内容失败: {e}")
+            return None
+    
+    def get_document_content(self, document_id: str) -> Optional[str]:
+        """从FTS5表读取文档内容，文档未索引时返回None"""
+        if not any(doc["id"] == document_id for doc in self.documents + self.cold_documents):
+            return None
+        return '\n'.join(self.get_document_lines(document_id, 0))
+    
+    def get_index_size(self) -> Dict[str, int]:
+        """FTS5索引规模统计"""
+        return {
+            "lines": self.total_lines,
+            "terms": self.conn.execute("SELECT COUNT(DISTINCT term) FROM document_terms").fetchone()[0],
+            "page_map_bytes": self.page_map.size_bytes()
+        }
+    
+    def _topic_document_content(self, doc_id: str) -> Optional[str]:
+        """归档文档的行也在FTS5表中，由_extract_context_terms读取"""
+        return None
+    
+    def _extract_context_terms(self, query_words: List[str], doc_id: str,
+                               content: Optional[str] = None, first_line: int = 0) -> List[Dict[str, Any]]:
+        """提取上下文，content为空时从FTS5表读取文档的全部行"""
+        if content is None:
+            content = '\n'.join(self.get_document_lines(doc_id, 0))
+        return super()._extract_context_terms(query_words, doc_id, content, first_line)
+    
+    def _context_lines(self, rowid: int, doc_id: str) -> List[str]:
+        """命中行及其前后各一行"""
+        rows = self.conn.execute(
+            "SELECT content FROM passages WHERE rowid BETWEEN ? AND ? AND doc_id = ? ORDER BY rowid",
+            (rowid - 1, rowid + 1, doc_id))
+        return [row[0] for row in rows]
+    
+    def _rowid_scope(self, line_ranges: Optional[Dict[str, Tuple[int, int]]]) -> Tuple[str, tuple]:
+        """把各文档的行范围换算为rowid区间条件，文档的行按行号连续存放"""
+        if line_ranges is None:
+            return "", ()
+        first_rowids = dict(self.conn.execute("SELECT doc_id, first_rowid FROM indexed_documents"))
+        clauses = []
+        params = []
+        for doc_id, (start, end) in line_ranges.items():
+            if doc_id in first_rowids:
+                clauses.append("rowid BETWEEN ? AND ?")
+                params.extend((first_rowids[doc_id] + start, first_rowids[doc_id] + end - 1))
+        return " AND (" + (" OR ".join(clauses) or "0") + ")", tuple(params)
+    
+    def _match_lines(self, terms: List[str],
+                     line_ranges: Optional[Dict[str, Tuple[int, int]]] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        找出包含查询词的行并打分
+        
+        长度不少于3的词用FTS5 MATCH，得分为 -bm25()；
+        更短的词用LIKE扫描，得分为 出现次数 × log(总行数 / 命中行数)
+        
+        Args:
+            terms: 查询词
+            line_ranges: 文档ID -> (起始行号, 结束行号)，给出时只查这些行（章节范围）
+        
+        Returns:
+            rowid -> 行信息（doc_id、line_no、content、bm25、tfidf、snippet）
+        """
+        lines: Dict[int, Dict[str, Any]] = {}
+        scope_sql, scope_params = self._rowid_scope(line_ranges)
+        
+        def line_entry(rowid, doc_id, line_no, content):
+            return lines.setdefault(rowid, {
+                "doc_id": doc_id, "line_no": line_no, "content": content,
+                "bm25": 0.0, "tfidf": 0.0, "snippet": None
+            })
+        
+        long_terms = [term for term in terms if len(term) >= MIN_MATCH_LENGTH]
+        short_terms = [term for term in terms if len(term) < MIN_MATCH_LENGTH]
+        
+        if long_terms:
+            rows = self.conn.execute(
+                "SELECT rowid, doc_id, line_no, content, bm25(passages), "
+                "snippet(passages, 0, '【', '】', '…', 16) FROM passages WHERE passages MATCH ?" + scope_sql +
+                " ORDER BY bm25(passages) LIMIT ?",
+                (" OR ".join(quote_match(term) for term in long_terms),) + scope_params + (MAX_MATCHED_LINES,))
+            for rowid, doc_id, line_no, content, bm25, snippet in rows:
+                entry = line_entry(rowid, doc_id, line_no, content)
+                entry["bm25"] = -bm25
+                entry["snippet"] = snippet
+        
+        for term in short_terms:
+            rows = self.conn.execute(
+                "SELECT rowid, doc_id, line_no, content FROM passages WHERE content LIKE ? ESCAPE '\\'" +
+                scope_sql + " LIMIT ?",
+                (f"%{escape_like(term)}%",) + scope_params + (MAX_MATCHED_LINES,)).fetchall()
+            if not rows:
+                continue
+            idf = math.log(max(self.total_lines, 1) / len(rows))
+            for rowid, doc_id, line_no, content in rows:
+                entry = line_entry(rowid, doc_id, line_no, content)
+                entry["tfidf"] += content.count(term) * idf
+        
+        return lines
+    
+    def _rank_documents(self, query: str, query_words: List[str],
+                        bm25_weight: float = 0.6, tfidf_weight: float = 0.4,
+                        filters=None, impact_mode: bool = False,
+                        budget_ms: Optional[float] = None,
+                        chapter: Optional[str] = None,
+                        match_all: bool = False) -> Tuple[List[tuple], bool]:
+        """
+        按FTS5行级命中为文档打分并排序，不读取上下文行，参数含义同KnowledgeBaseSearchEngine.hybrid_search
+        
+        文档得分为得分最高的3行之和；bm25_score来自FTS5 bm25()，tfidf_score来自短词的LIKE匹配。
+        match_all按document_terms中的词项（章节范围内按章节的行）要求文档包含全部查询词，与内存后端一致
+        
+        Returns:
+            ([(结果, 得分最高的3个(rowid, 行信息))], True)
+        
+        Raises:
+            ValueError: 给出impact_mode或budget_ms时
+        """
+        if impact_mode or budget_ms is not None:
+            raise ValueError("FTS5后端不支持impact_mode和budget_ms")
+        query_words = list(dict.fromkeys(query_words))
+        if not query_words:
+            return [], True
+        candidates = self.facet_index.filter_documents(filters)
+        chapter_ranges = self._chapter_line_ranges(chapter) if chapter else None
+        if chapter_ranges is not None and not chapter_ranges:
+            return [], True
+        if match_all:
+            complete = self._documents_with_all_terms(query_words, chapter_ranges)
+            candidates = complete if candidates is None else candidates & complete
+        
+        doc_lines = defaultdict(list)
+        for rowid, line in self._match_lines(query_words, chapter_ranges).items():
+            if candidates is not None and line["doc_id"] not in candidates:
+                continue
+            line["score"] = bm25_weight * line["bm25"] + tfidf_weight * line["tfidf"]
+            doc_lines[line["doc_id"]].append((rowid, line))
+        
+        docs = {doc["id"]: doc for doc in self.documents + self.cold_documents}
+        results = []
+        for doc_id, lines in doc_lines.items():
+            doc = docs.get(doc_id)
+            if doc is None:
+                continue
+            lines.sort(key=lambda x: x[1]["score"], reverse=True)
+            top_lines = lines[:3]
+            
+            result = {
+                "type": "hybrid_search",
+                "query": query,
+                "document_id": doc_id,
+                "title": doc["title"],
+                "author": doc.get("author", ""),
+                "publish_date": doc.get("publish_date", ""),
+                "hybrid_score": sum(line["score"] for _, line in top_lines),
+                "bm25_score": sum(line["bm25"] for _, line in top_lines),
+                "tfidf_score": sum(line["tfidf"] for _, line in top_lines),
+                "context": [],
+                "pages": [],
+                "summary": doc.get("summary", ""),
+                "keywords": doc.get("keywords", [])
+            }
+            if chapter:
+                result["chapter"] = chapter
+            results.append((result, top_lines))
+        
+        results.sort(key=lambda x: x[0]["hybrid_score"], reverse=True)
+        return results, True
+    
+    def _documents_with_all_terms(self, terms: List[str],
+                                  line_ranges: Optional[Dict[str, Tuple[int, int]]] = None) -> set:
+        """包含全部词项的文档，给出行范围时只看范围内的行"""
+        if line_ranges is not None:
+            return {doc_id for doc_id, (start, end) in line_ranges.items()
+                    if set(terms) <= set(self._tokenize_text('\n'.join(self.get_document_lines(doc_id, start, end))))}
+        if len(terms) > MAX_SQL_PARAMS:
+            return set()
+        rows = self.conn.execute(
+            "SELECT doc_id FROM document_terms WHERE term IN (" + ", ".join("?" * len(terms)) + ") "
+            "GROUP BY doc_id HAVING COUNT(*) = ?", terms + [len(terms)])
+        return {row[0] for row in rows}
+    
+    def _finish_results(self, query_words: List[str], ranked: List[tuple],
+                        impact_complete: Optional[bool] = None,
+                        collapse_duplicates: bool = True) -> List[Dict[str, Any]]:
+        """由各文档得分最高的行生成上下文，只为要返回的结果读取前后行"""
+        query_words = list(dict.fromkeys(query_words))
+        results = []
+        for result, top_lines in ranked:
+            doc_id = result["document_id"]
+            for rowid, line in top_lines:
+                line_words = set(self._tokenize_text(line["content"]))
+                result["context"].append({
+                    "paragraph_index": line["line_no"] - 1,
+                    "page": self.page_map.page_of_line(doc_id, line["line_no"] - 1),
+                    "content": line["content"].strip(),
+                    "context": '\n'.join(self._context_lines(rowid, doc_id)).strip(),
+                    "relevance": sum(1 for word in query_words if word in line_words) / len(query_words),
+                    "snippet": line["snippet"] or line["content"].strip()
+                })
+            results.append(result)
+        if collapse_duplicates:
+            collapse_duplicate_contexts(results)
+        # 页码按合并后留下的上下文计算
+        for result in results:
+            result["pages"] = context_pages(result["context"])
+        return results
+    
+    def search_content(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        在文档内容中搜索（LIKE子串匹配，3个字符及以上时由trigram索引加速）
+        
+        Args:
+            query: 搜索查询
+            limit: 返回结果数量限制
+        
+        Returns:
+            搜索结果列表
+        """
+        if not query:
+            return []
+        rows = self.conn.execute(
+            "SELECT rowid, doc_id, line_no, content, char_offset FROM passages "
+            "WHERE content LIKE ? ESCAPE '\\' ORDER BY rowid",
+            (f"%{escape_like(query)}%",))
+        
+        folded_query = query.lower()
+        doc_matches = defaultdict(list)
+        for rowid, doc_id, line_no, content, char_offset in rows:
+            folded = content.lower()
+            positions = []
+            pos = folded.find(folded_query)
+            while pos != -1:
+                positions.append(char_offset + pos)
+                pos = folded.find(folded_query, pos + 1)
+            doc_matches[doc_id].append({
+                "paragraph": line_no,
+                "page": self.page_map.page_of_line(doc_id, line_no - 1),
+                "positions": positions,
+                "content": content.strip(),
+                "context": self._context_lines(rowid, doc_id)
+            })
+        
+        results = []
+        for doc in self.documents + self.cold_documents:
+            matches = doc_matches.get(doc["id"])
+            if matches:
+                results.append({
+                    "type": "content_match",
+                    "query": query,
+                    "document_id": doc["id"],
+                    "title": doc["title"],
+                    "matches": matches,
+                    "pages": context_pages(matches),
+                    "relevance_score": len(matches) / doc.get("line_count", 1)
+                })
+        
+        results.sort(key=lambda x: x.get("relevance_score", 0), reverse=True)
+        return results[:limit]
+    
+    def search_by_keyword(self, keyword: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        按关键词搜索，出现次数和上下文由FTS5实时统计
+        
+        Args:
+            keyword: 搜索关键词
+            limit: 返回结果数量限制
+        
+        Returns:
+            搜索结果列表
+        """
+        results = []
+        if keyword:
+            if len(keyword) >= MIN_MATCH_LENGTH:
+                rows = self.conn.execute(
+                    "SELECT doc_id, content, snippet(passages, 0, '【', '】', '…', 16) FROM passages "
+                    "WHERE passages MATCH ? ORDER BY rowid", (quote_match(keyword),))
+            else:
+                rows = self.conn.execute(
+                    "SELECT doc_id, content, NULL FROM passages WHERE content LIKE ? ESCAPE '\\' ORDER BY rowid",
+                    (f"%{escape_like(keyword)}%",))
+            
+            occurrences = defaultdict(int)
+            contexts = defaultdict(list)
+            for doc_id, content, snippet in rows:
+                occurrences[doc_id] += max(content.lower().count(keyword.lower()), 1)
+                if len(contexts[doc_id]) < 5:
+                    contexts[doc_id].append(snippet or content.strip())
+            
+            total = sum(occurrences.values())
+            docs = {doc["id"]: doc for doc in self.documents + self.cold_documents}
+            for doc_id, count in occurrences.items():
+                if doc_id not in docs:
+                    continue
+                results.append({
+                    "type": "keyword_match",
+                    "keyword": keyword,
+                    "document_id": doc_id,
+                    "title": docs[doc_id]["title"],
+                    "occurrences": count,
+                    "contexts": contexts[doc_id],
+                    "relevance_score": count / total
+                })
+        
+        for doc in self.document_index.get("documents", []):
+            if keyword.lower() in doc.get("title", "").lower():
+                results.append({
+                    "type": "title_match",
+                    "keyword": keyword,
+                    "document_id": doc["id"],
+                    "title": doc["title"],
+                    "summary": doc.get("summary", ""),
+                    "relevance_score": 0.8
+                })
+        
+        results.sort(key=lambda x: x.get("relevance_score", 0), reverse=True)
+        return results[:limit]
+    
+    def get_document_lines(self, document_id: str, start: int, end: Optional[int] = None) -> List[str]:
+        """从FTS5表读取文档的行范围（行号从0开始，end不含）"""
+        end = end if end is not None else 2 ** 31
+        rows = self.conn.execute(
+            "SELECT content FROM passages WHERE doc_id = ? AND line_no > ? AND line_no <= ? ORDER BY rowid",
+            (document_id, start, end))
+        return [row[0] for row in rows]
+
+
+def create_search_engine(base_path: str = ".", backend: Optional[str] = None) -> KnowledgeBaseSearchEngine:
+    """
+    按配置创建搜索引擎
+    
+    Args:
+        base_path: 知识库根目录路径
+        backend: "memory"（内存索引，默认）或 "fts5"；为None时读取环境变量KB_SEARCH_BACKEND
+    
+    Returns:
+        搜索引擎实例
+    """
+    backend = (backend or os.environ.get(BACKEND_ENV, "memory")).lower()
+    if backend == "fts5":
+        if fts5_trigram_available():
+            return FTS5SearchEngine(base_path)
+        logger.warning(f"SQLite {sqlite3.sqlite_version} 不支持FTS5 trigram分词器，改用内存索引")
+        backend = "memory"
+    if backend != "memory":
+        raise ValueError(f"未知的搜索后端: {backend}")
+    return KnowledgeBaseSearchEngine(base_path)
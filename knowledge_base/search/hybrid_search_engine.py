@@ -7,12 +7,19 @@
 
 import json
 import re
+import sys
 import math
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import logging
 from collections import defaultdict, Counter
 
+# 添加当前目录到Python路径
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from topic_vectors import TopicVectorIndex
+
 # 设置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,6 +44,9 @@ class SimpleHybridSearchEngine:
         self.total_docs = 0
         self.doc_freq = defaultdict(int)
         self.term_freq = defaultdict(lambda: defaultdict(int))
+        self.doc_lengths = {}
+        self.term_ids = {}
+        self.topic_vectors = TopicVectorIndex(self._tokenize_text)
         
         # 构建索引
         self._build_indices()
@@ -65,11 +75,14 @@ class SimpleHybridSearchEngine:
                 
                 words = self._tokenize_text(content)
                 doc_length = len(words)
+                self.doc_lengths[doc["id"]] = doc_length
                 
                 word_freq = Counter(words)
                 for word, freq in word_freq.items():
                     self.term_freq[doc["id"]][word] = freq
                     self.doc_freq[word] += 1
+                    if word not in self.term_ids:
+                        self.term_ids[word] = len(self.term_ids)
                 
                 self.avg_doc_length += doc_length
         
@@ -77,6 +90,10 @@ class SimpleHybridSearchEngine:
         if self.total_docs > 0:
             self.avg_doc_length /= self.total_docs
         
+        # 编译主题向量并预计算各主题的文档排序
+        self.topic_vectors.build(self.topic_index, self.term_ids, self.term_freq, self.doc_freq,
+                                 self.doc_lengths, self.avg_doc_length, self.total_docs)
+        
         logger.info(f"索引构建完成: {self.total_docs}个文档, {len(self.doc_freq)}个词项")
     
     def _tokenize_text(self, text: str) -> List[str]:
@@ -195,16 +212,19 @@ class SimpleHybridSearchEngine:
     
     def _extract_context(self, query: str, doc_id: str) -> List[Dict[str, Any]]:
         """提取查询相关的上下文"""
+        return self._extract_context_terms(self._tokenize_text(query), doc_id)
+    
+    def _extract_context_terms(self, query_words: List[str], doc_id: str) -> List[Dict[str, Any]]:
+        """按已分好的查询词提取上下文"""
         content = self.document_contents.get(doc_id, "")
         if not content:
             return []
         
         contexts = []
-        query_words = self._tokenize_text(query)
         paragraphs = content.split('\n')
         
         for i, para in enumerate(paragraphs):
-            para_words = self._tokenize_text(para)
+            para_words = set(self._tokenize_text(para))
             
             if any(word in para_words for word in query_words):
                 start = max(0, i - 1)
@@ -228,18 +248,37 @@ class SimpleHybridSearchEngine:
     
     def search_by_topic_hybrid(self, topic: str, limit: int = 10) -> List[Dict[str, Any]]:
         """基于主题的混合搜索"""
-        topic_keywords = []
-        topics = self.topic_index.get("topics", {})
-        if topic in topics:
-            topic_data = topics[topic]
-            for subtopic, data in topic_data.get("subtopics", {}).items():
-                topic_keywords.extend(data.get("key_terms", []))
+        if not self.topic_vectors.has_topic(topic):
+            # 未知主题按普通查询处理
+            results = self.hybrid_search(topic, limit)
+            for result in results:
+                result["topic"] = topic
+                result["topic_keywords"] = [topic]
+            return results
         
-        if not topic_keywords:
-            topic_keywords = [topic]
+        # 直接使用建索引时预计算的主题文档排序
+        topic_keywords = self.topic_vectors.key_terms[topic]
+        topic_terms = self.topic_vectors.topic_terms(topic)
+        docs = {doc["id"]: doc for doc in self.documents}
+        results = []
         
-        query = " ".join(topic_keywords)
-        results = self.hybrid_search(query, limit)
+        for ranked in self.topic_vectors.search(topic, limit):
+            doc = docs[ranked["document_id"]]
+            result = {
+                "type": "hybrid_search",
+                "query": " ".join(topic_keywords),
+                "document_id": doc["id"],
+                "title": doc["title"],
+                "author": doc.get("author", ""),
+                "publish_date": doc.get("publish_date", ""),
+                "hybrid_score": ranked["hybrid_score"],
+                "bm25_score": ranked["bm25_score"],
+                "tfidf_score": ranked["tfidf_score"],
+                "context": self._extract_context_terms(topic_terms, doc["id"]),
+                "summary": doc.get("summary", ""),
+                "keywords": doc.get("keywords", [])
+            }
+            results.append(result)
         
         for result in results:
             result["topic"] = topic
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+影响力(impact)倒排索引
+BM25参数固定时，每个(词项, 文档)的得分可以在建索引时预先算好。
+这里把得分量化为uint8，按得分从高到低分段存储，查询时按段逐次累加
+(score-at-a-time)，超出时间预算即停止并返回当前结果
+"""
+
+import math
+import time
+from array import array
+from collections import Counter, defaultdict
+from typing import List, Dict, Optional, Tuple
+
+# 量化后的最大影响力值
+MAX_IMPACT = 255
+
+# IDF下限：文档频率过半的词项IDF为负，截断为一个很小的正数，
+# 这些词仍能把文档带进候选集，只是几乎不贡献得分
+IDF_FLOOR = 0.01
+
+
+class ImpactIndex:
+    """量化BM25影响力索引"""
+    
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.scale = 0.0
+        # 词项 -> [(影响力, 文档号数组)]，按影响力降序
+        self.segments: Dict[str, List[Tuple[int, array]]] = {}
+    
+    def build(self, doc_ids: List[str], term_freq: Dict[str, Dict[str, int]],
+              doc_freq: Dict[str, int], doc_lengths: Dict[str, int],
+              avg_doc_length: float, total_docs: int):
+        """
+        预计算并量化BM25影响力
+        
+        Args:
+            doc_ids: 文档号到文档ID的映射
+            term_freq: 文档ID -> 词项 -> 词频
+            doc_freq: 词项 -> 文档频率
+            doc_lengths: 文档ID -> 文档长度（词数）
+            avg_doc_length: 平均文档长度
+            total_docs: 文档总数
+        """
+        raw_impacts = defaultdict(list)
+        max_score = 0.0
+        
+        for doc_num, doc_id in enumerate(doc_ids):
+            doc_length = doc_lengths.get(doc_id, 0)
+            norm = self.k1 * (1 - self.b + self.b * (doc_length / avg_doc_length)) if avg_doc_length else self.k1
+            for term, tf in term_freq[doc_id].items():
+                df = doc_freq[term]
+                idf = max(math.log((total_docs - df + 0.5) / (df + 0.5)), IDF_FLOOR)
+                score = idf * (tf * (self.k1 + 1)) / (tf + norm)
+                raw_impacts[term].append((doc_num, score))
+                max_score = max(max_score, score)
+        
+        self.scale = max_score / MAX_IMPACT if max_score > 0 else 0.0
+        self.segments = {}
+        
+        for term, items in raw_impacts.items():
+            by_impact = defaultdict(lambda: array('l'))
+            for doc_num, score in items:
+                impact = max(1, min(MAX_IMPACT, round(score / self.scale)))
+                by_impact[impact].append(doc_num)
+            self.segments[term] = sorted(by_impact.items(), key=lambda x: x[0], reverse=True)
+    
+    def dequantize(self, impact: int) -> float:
+        """把累加的量化影响力还原为BM25分数"""
+        return impact * self.scale
+    
+    def size_bytes(self) -> int:
+        """索引占用的字节数（每个倒排项一个文档号和一个uint8影响力，按段共享）"""
+        total = 0
+        for segments in self.segments.values():
+            for _, docs in segments:
+                total += 1 + len(docs) * docs.itemsize
+        return total
+    
+    def search(self, query_terms: List[str],
+               budget_ms: Optional[float] = None) -> Tuple[Dict[int, int], bool]:
+        """
+        按影响力从高到低逐段累加文档得分
+        
+        Args:
+            query_terms: 查询词列表，重复出现的词按次数加权
+            budget_ms: 时间预算（毫秒），为None时处理全部分段
+        
+        Returns:
+            (文档号 -> 累加的量化得分, 是否处理完全部分段)
+        """
+        deadline = time.perf_counter() + budget_ms / 1000.0 if budget_ms is not None else None
+        
+        # 所有查询词的分段按 影响力×查询词次数 统一降序处理
+        ordered = []
+        for term, count in Counter(query_terms).items():
+            for impact, docs in self.segments.get(term, []):
+                ordered.append((impact * count, docs))
+        ordered.sort(key=lambda x: x[0], reverse=True)
+        
+        accumulators: Dict[int, int] = defaultdict(int)
+        for weight, docs in ordered:
+            if deadline is not None and time.perf_counter() > deadline:
+                return dict(accumulators), False
+            for doc_num in docs:
+                accumulators[doc_num] += weight
+        return dict(accumulators), True
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+静态索引剪枝
+在建索引时去掉对检索几乎没有贡献的词项和倒排项：
+1. 纯数字词项（年份、数值等），会让年份和数值查询失效，需显式开启
+2. 页码标记和在大量页面重复出现的页眉页脚行中的词项：视为版式文字从词频中扣除，
+   扣到0的倒排项删除并相应减少文档频率，如同这些行没有被索引（文档长度不变）；
+   页码标记中的数字总是去掉，与是否开启第1步无关
+3. 词项为中心的剪枝：某词项的倒排项BM25得分低于 阈值 × 该词项第k高得分 时删除，
+   文档频率保留剪枝前的值，保证未被剪掉的倒排项得分不变
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import List, Dict, Any, Callable, Iterable
+
+PAGE_MARKER_PATTERN = re.compile(r'^--- 第 \d+ 页 ---$', re.MULTILINE)
+NUMERIC_TERM_PATTERN = re.compile(r'^\d+$')
+
+
+def find_boilerplate_lines(content: str, min_ratio: float = 0.3, min_pages: int = 3) -> Dict[str, int]:
+    """
+    找出在大量页面中重复出现的行（页眉、页脚等）
+    
+    Args:
+        content: 带有页码标记的文档内容
+        min_ratio: 出现页面数占总页数的最小比例
+        min_pages: 最少出现页面数
+    
+    Returns:
+        重复行 -> 在文档中出现的总次数
+    """
+    pages = PAGE_MARKER_PATTERN.split(content)
+    threshold = max(min_pages, min_ratio * len(pages))
+    
+    page_counts = Counter()
+    occurrences = Counter()
+    for page in pages:
+        lines = [line.strip() for line in page.split('\n') if line.strip()]
+        page_counts.update(set(lines))
+        occurrences.update(lines)
+    
+    return {line: occurrences[line] for line, count in page_counts.items() if count >= threshold}
+
+
+class IndexPruner:
+    """建索引阶段的静态剪枝"""
+    
+    def __init__(self, tokenize: Callable[[str], List[str]], threshold: float = 0.1,
+                 top_k: int = 10, drop_numeric: bool = False, boilerplate_ratio: float = 0.3,
+                 k1: float = 1.2, b: float = 0.75):
+        """
+        初始化剪枝器
+        
+        Args:
+            tokenize: 与搜索引擎一致的分词函数
+            threshold: 词项为中心剪枝的阈值(epsilon)，为0时不做得分剪枝
+            top_k: 每个词项需要保证不受影响的前k个文档
+            drop_numeric: 是否删除纯数字词项
+            boilerplate_ratio: 判定为页眉页脚的页面比例，为0时不检测
+            k1: BM25参数k1
+            b: BM25参数b
+        """
+        self.tokenize = tokenize
+        self.threshold = threshold
+        self.top_k = top_k
+        self.drop_numeric = drop_numeric
+        self.boilerplate_ratio = boilerplate_ratio
+        self.k1 = k1
+        self.b = b
+    
+    @staticmethod
+    def _count_postings(term_freq: Dict[str, Dict[str, int]]) -> int:
+        return sum(len(terms) for terms in term_freq.values())
+    
+    @staticmethod
+    def _remove_posting(term_freq, doc_freq, doc_id: str, term: str, update_df: bool = True):
+        del term_freq[doc_id][term]
+        if update_df:
+            doc_freq[term] -= 1
+            if doc_freq[term] <= 0:
+                del doc_freq[term]
+    
+    def prune(self, document_contents: Dict[str, str], term_freq: Dict[str, Dict[str, int]],
+              doc_freq: Dict[str, int], doc_lengths: Dict[str, int],
+              avg_doc_length: float, total_docs: int) -> Dict[str, Any]:
+        """
+        就地剪枝词频表和文档频率表
+        
+        Args:
+            document_contents: 文档ID -> 文档内容
+            term_freq: 文档ID -> 词项 -> 词频
+            doc_freq: 词项 -> 文档频率
+            doc_lengths: 文档ID -> 文档长度（词数）
+            avg_doc_length: 平均文档长度
+            total_docs: 文档总数
+        
+        Returns:
+            剪枝报告
+        """
+        report = {
+            "terms_before": len(doc_freq),
+            "postings_before": self._count_postings(term_freq),
+            "numeric_terms": 0,
+            "page_markers": 0,
+            "boilerplate_lines": 0,
+            "boilerplate_postings": 0,
+            "pruned_postings": 0
+        }
+        
+        if self.drop_numeric:
+            numeric_terms = [term for term in doc_freq if NUMERIC_TERM_PATTERN.match(term)]
+            for term in numeric_terms:
+                for doc_id in term_freq:
+                    term_freq[doc_id].pop(term, None)
+                del doc_freq[term]
+            report["numeric_terms"] = len(numeric_terms)
+        
+        if self.boilerplate_ratio > 0:
+            for doc_id, content in document_contents.items():
+                boilerplate = find_boilerplate_lines(content, self.boilerplate_ratio)
+                report["boilerplate_lines"] += len(boilerplate)
+                removed = Counter()
+                for line, occurrences in boilerplate.items():
+                    for term in self.tokenize(line):
+                        removed[term] += occurrences
+                markers = PAGE_MARKER_PATTERN.findall(content)
+                report["page_markers"] += len(markers)
+                for marker in markers:
+                    removed.update(self.tokenize(marker))
+                for term, count in removed.items():
+                    if term not in term_freq[doc_id]:
+                        continue
+                    term_freq[doc_id][term] -= count
+                    if term_freq[doc_id][term] <= 0:
+                        self._remove_posting(term_freq, doc_freq, doc_id, term)
+                        report["boilerplate_postings"] += 1
+        
+        if self.threshold > 0:
+            report["pruned_postings"] = self._prune_by_score(term_freq, doc_freq, doc_lengths,
+                                                             avg_doc_length, total_docs)
+        
+        report["terms_after"] = len(doc_freq)
+        report["postings_after"] = self._count_postings(term_freq)
+        return report
+    
+    def _prune_by_score(self, term_freq, doc_freq, doc_lengths, avg_doc_length, total_docs) -> int:
+        """词项为中心的剪枝，返回删除的倒排项数"""
+        term_scores = defaultdict(list)
+        for doc_id, terms in term_freq.items():
+            doc_length = doc_lengths.get(doc_id, 0)
+            norm = self.k1 * (1 - self.b + self.b * (doc_length / avg_doc_length)) if avg_doc_length else self.k1
+            for term, tf in terms.items():
+                term_scores[term].append((tf * (self.k1 + 1) / (tf + norm), doc_id))
+        
+        pruned = 0
+        for term, scores in term_scores.items():
+            df = doc_freq[term]
+            idf = math.log((total_docs - df + 0.5) / (df + 0.5))
+            # IDF非正的词项不会提升任何文档的排名，不参与得分剪枝；出现文档不超过k个的词项全部保留
+            if idf <= 0 or len(scores) <= self.top_k:
+                continue
+            scores.sort(reverse=True)
+            cutoff = self.threshold * scores[self.top_k - 1][0]
+            for score, doc_id in scores[self.top_k:]:
+                if score < cutoff:
+                    # 保留原文档频率，未剪掉的倒排项得分不变
+                    self._remove_posting(term_freq, doc_freq, doc_id, term, update_df=False)
+                    pruned += 1
+        return pruned
+
+
+def evaluate_recall(full_engine, pruned_engine, queries: Iterable[str], k: int = 3) -> Dict[str, Any]:
+    """
+    以未剪枝索引的前k个结果为基准，计算剪枝索引的召回率
+    
+    Args:
+        full_engine: 未剪枝的搜索引擎
+        pruned_engine: 剪枝后的搜索引擎
+        queries: 评测查询
+        k: 前k个结果
+    
+    Returns:
+        平均召回率和逐查询结果
+    """
+    per_query = {}
+    for query in queries:
+        expected = {r["document_id"] for r in full_engine.hybrid_search(query, k)}
+        if not expected:
+            continue
+        actual = {r["document_id"] for r in pruned_engine.hybrid_search(query, k)}
+        per_query[query] = len(expected & actual) / len(expected)
+    
+    mean_recall = sum(per_query.values()) / len(per_query) if per_query else 1.0
+    return {"k": k, "queries": len(per_query), "recall": mean_recall, "per_query": per_query}
+
+
+def numeric_queries(engine, limit: int = 10) -> List[str]:
+    """
+    选取纯数字词项（年份、常见数值）作为评测查询，检验剪枝对数值检索的影响；
+    出现在半数以上文档中的数字IDF非正、本来就检索不到，不参与评测，其余按位数和文档频率优先
+    
+    Args:
+        engine: 未剪枝的搜索引擎
+        limit: 查询数
+    """
+    terms = [term for term, df in engine.doc_freq.items()
+             if NUMERIC_TERM_PATTERN.match(term) and df < engine.total_docs / 2]
+    terms.sort(key=lambda term: (-min(len(term), 4), -engine.doc_freq[term], term))
+    return terms[:limit]
+
+
+def main():
+    """对比剪枝前后的索引规模和召回率"""
+    import argparse
+    from search_engine import KnowledgeBaseSearchEngine
+    
+    parser = argparse.ArgumentParser(description="静态索引剪枝评估")
+    parser.add_argument("--base-path", default=".", help="知识库根目录")
+    parser.add_argument("--threshold", type=float, default=0.1, help="剪枝阈值")
+    parser.add_argument("--top-k", type=int, default=3, help="剪枝保证的及评估召回率的前k个结果")
+    parser.add_argument("--queries", type=int, default=50, help="评测查询数（取高频关键词）")
+    parser.add_argument("--numeric-queries", type=int, default=10, help="数值评测查询数（取高频数字词项）")
+    parser.add_argument("--drop-numeric", action="store_true", help="同时删除纯数字词项")
+    args = parser.parse_args()
+    
+    full_engine = KnowledgeBaseSearchEngine(args.base_path)
+    pruned_engine = KnowledgeBaseSearchEngine(args.base_path, prune_threshold=args.threshold,
+                                              prune_top_k=args.top_k, prune_numeric=args.drop_numeric)
+    
+    queries = [kw["keyword"] for kw in full_engine.get_popular_keywords(args.queries)]
+    queries += list(full_engine.topic_index.get("topics", {}).keys())
+    numeric = numeric_queries(full_engine, args.numeric_queries)
+    
+    before = full_engine.get_index_size()
+    after = pruned_engine.get_index_size()
+    recall = evaluate_recall(full_engine, pruned_engine, queries, args.top_k)
+    numeric_recall = evaluate_recall(full_engine, pruned_engine, numeric, args.top_k)
+    
+    print("=== 索引规模 ===")
+    for key in ("terms", "postings", "compressed_bytes"):
+        ratio = after[key] / before[key] if before[key] else 1.0
+        print(f"{key}: {before[key]} -> {after[key]} ({ratio:.1%})")
+    
+    print("\n=== 剪枝明细 ===")
+    for key, value in pruned_engine.pruning_report.items():
+        print(f"{key}: {value}")
+    
+    print("\n=== 召回率 ===")
+    print(f"recall@{recall['k']}: {recall['recall']:.3f} ({recall['queries']}个查询)")
+    for query, value in recall["per_query"].items():
+        if value < 1.0:
+            print(f"  {query}: {value:.2f}")
+    print(f"数值查询 recall@{numeric_recall['k']}: {numeric_recall['recall']:.3f} ({numeric_recall['queries']}个查询)")
+    for query, value in numeric_recall["per_query"].items():
+        if value < 1.0:
+            print(f"  {query}: {value:.2f}")
+
+
+if __name__ == "__main__":
+    main()
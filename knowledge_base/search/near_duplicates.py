@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+近似重复段落检测
+对每个段落的字符n-gram集合计算MinHash签名，用LSH分桶找出候选对，
+估计Jaccard相似度超过阈值的段落归为一簇，簇中第一次出现的段落作为规范副本
+"""
+
+import random
+import re
+import zlib
+from collections import defaultdict
+from typing import List, Dict, Any, Hashable, Iterable, Optional, Set, Tuple
+
+# 中文文本使用3字符的shingle
+SHINGLE_SIZE = 3
+
+# 默认的近似重复判定阈值（估计的Jaccard相似度）
+DEFAULT_THRESHOLD = 0.8
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+# 哈希值按64位无符号整数运算（溢出回绕），纯Python和numpy两种实现的签名一致
+UINT64_MASK = (1 << 64) - 1
+
+# 参与索引去重的段落最少字符数（去掉空白后），更短的行（页码标记、页眉等）交给索引剪枝处理
+MIN_PASSAGE_CHARS = 20
+
+
+def normalize_text(text: str) -> str:
+    """去掉空白字符，避免PDF换行和全角空格影响比较"""
+    return re.sub(r'\s+', '', text)
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """字符n-gram集合"""
+    text = normalize_text(text)
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    """MinHash签名生成器"""
+    
+    def __init__(self, num_perm: int = 64, seed: int = 42):
+        """
+        Args:
+            num_perm: 哈希函数（排列）个数，即签名长度
+            seed: 随机种子，相同种子生成的签名可以互相比较
+        """
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.params = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+                       for _ in range(num_perm)]
+        # 有numpy时一次算出全部排列（建索引时每个段落都要计算签名）
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        self.np = np
+        if np is not None:
+            self.a = np.array([a for a, _ in self.params], dtype=np.uint64).reshape(-1, 1)
+            self.b = np.array([b for _, b in self.params], dtype=np.uint64).reshape(-1, 1)
+    
+    def signature(self, text: str) -> Tuple[int, ...]:
+        """计算文本的MinHash签名，空文本返回空元组"""
+        hashes = [zlib.crc32(s.encode('utf-8')) for s in shingles(text)]
+        if not hashes:
+            return ()
+        if self.np is not None:
+            values = (self.a * self.np.array(hashes, dtype=self.np.uint64) + self.b) % self.np.uint64(MERSENNE_PRIME)
+            return tuple(values.min(axis=1).tolist())
+        return tuple(min(((a * h + b) & UINT64_MASK) % MERSENNE_PRIME for h in hashes) for a, b in self.params)
+
+
+def jaccard(set1: Set[str], set2: Set[str]) -> float:
+    """精确Jaccard相似度"""
+    if not set1 or not set2:
+        return 0.0
+    return len(set1 & set2) / len(set1 | set2)
+
+
+def estimate_jaccard(sig1: Tuple[int, ...], sig2: Tuple[int, ...]) -> float:
+    """由两个签名估计Jaccard相似度"""
+    if not sig1 or not sig2:
+        return 0.0
+    return sum(1 for x, y in zip(sig1, sig2) if x == y) / len(sig1)
+
+
+class LSHIndex:
+    """MinHash签名的LSH分桶索引"""
+    
+    def __init__(self, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("签名长度必须能被分段数整除")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets: List[Dict[Tuple[int, ...], List[Hashable]]] = [defaultdict(list) for _ in range(bands)]
+    
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+    
+    def insert(self, key: Hashable, signature: Tuple[int, ...]):
+        """插入签名"""
+        for band, band_key in self._band_keys(signature):
+            self.buckets[band][band_key].append(key)
+    
+    def query(self, signature: Tuple[int, ...]) -> List[Hashable]:
+        """返回至少在一个分段上落入同一桶的键，按插入顺序"""
+        seen = set()
+        candidates = []
+        for band, band_key in self._band_keys(signature):
+            for key in self.buckets[band].get(band_key, []):
+                if key not in seen:
+                    seen.add(key)
+                    candidates.append(key)
+        return candidates
+
+
+class NearDuplicateDetector:
+    """按输入顺序把段落归入近似重复簇"""
+    
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = 64, bands: int = 16):
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self.lsh = LSHIndex(num_perm, bands)
+        self.signatures: Dict[Hashable, Tuple[int, ...]] = {}
+    
+    def add(self, key: Hashable, text: str) -> Optional[Hashable]:
+        """
+        加入一个段落
+        
+        Returns:
+            若为已有段落的近似重复，返回其规范副本的键，否则返回None（该段落成为规范副本）
+        """
+        signature = self.hasher.signature(text)
+        if not signature:
+            return None
+        
+        best_key = None
+        best_score = self.threshold
+        for candidate in self.lsh.query(signature):
+            score = estimate_jaccard(signature, self.signatures[candidate])
+            if score >= best_score:
+                best_key, best_score = candidate, score
+        if best_key is not None:
+            return best_key
+        
+        # 只有规范副本进入索引，重复段落不会成为其他段落的规范副本
+        self.signatures[key] = signature
+        self.lsh.insert(key, signature)
+        return None
+
+
+def find_near_duplicates(passages: Iterable[Tuple[Hashable, str]],
+                         threshold: float = DEFAULT_THRESHOLD) -> Dict[Hashable, Hashable]:
+    """
+    找出近似重复的段落
+    
+    Args:
+        passages: (键, 文本) 序列，先出现的段落优先作为规范副本
+        threshold: 估计Jaccard相似度阈值
+    
+    Returns:
+        重复段落的键 -> 规范副本的键
+    """
+    detector = NearDuplicateDetector(threshold)
+    duplicates = {}
+    for key, text in passages:
+        canonical = detector.add(key, text)
+        if canonical is not None:
+            duplicates[key] = canonical
+    return duplicates
+
+
+def collapse_duplicate_contexts(results: List[Dict[str, Any]],
+                                threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    在搜索结果之间合并近似重复的上下文
+    
+    按结果排名顺序处理，后出现的重复上下文被移除，
+    并记录到保留的上下文的duplicates字段中（文档ID和段落序号）。
+    结果中的上下文只有几十条，直接两两比较shingle集合，比计算MinHash签名更快也更准确
+    
+    Args:
+        results: 带有context列表的搜索结果，就地修改
+    
+    Returns:
+        results本身
+    """
+    kept = []
+    for result in results:
+        collapsed = []
+        for context in result.get("context", []):
+            context_shingles = shingles(context.get("context") or context.get("content", ""))
+            canonical = None
+            for kept_shingles, kept_context in kept:
+                if jaccard(context_shingles, kept_shingles) >= threshold:
+                    canonical = kept_context
+                    break
+            if canonical is None:
+                kept.append((context_shingles, context))
+                collapsed.append(context)
+            else:
+                canonical.setdefault("duplicates", []).append({
+                    "document_id": result.get("document_id", ""),
+                    "paragraph_index": context.get("paragraph_index")
+                })
+        result["context"] = collapsed
+    return results
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数值事实索引
+用预编译的正则从文档中抽取“指标 + 数值 + 单位”形式的陈述（如“普惠小微贷款余额29.4万亿元”、
+“加权平均利率4.46%”），记录所在时期、文档和行号，单位中的万亿/亿/万换算为基本单位后
+写入SQLite表（index/numeric_facts.db），按指标和数值区间建有索引。
+问答系统遇到数字类问题时先在这里查表，唯一可靠命中时不再走检索和提示流程。
+表按文档内容的SHA1增量更新
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+from bisect import bisect_right
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Any, NamedTuple, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS facts (
+    id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    unit TEXT NOT NULL,
+    raw_value REAL NOT NULL,
+    raw_unit TEXT NOT NULL,
+    period TEXT,
+    sentence TEXT NOT NULL,
+    metric_offset INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS facts_metric ON facts (metric);
+CREATE INDEX IF NOT EXISTS facts_unit_value ON facts (unit, value);
+CREATE INDEX IF NOT EXISTS facts_doc ON facts (doc_id);
+CREATE TABLE IF NOT EXISTS indexed_documents (
+    doc_id TEXT PRIMARY KEY,
+    sha1 TEXT NOT NULL
+);
+"""
+
+# 表结构和抽取规则的版本，与数据库的user_version不一致时清空重建
+SCHEMA_VERSION = 2
+
+# 数量级前缀
+SCALES = {"万亿": 1e12, "亿": 1e8, "万": 1e4, "千": 1e3}
+
+# 指标 + 可选的连接词 + 可选的负号 + 数值 + 单位；“个百分点”须排在“个”之前
+FACT_PATTERN = re.compile(
+    r'(?P<metric>[\u4e00-\u9fa5A-Za-z]{2,20}?)\s*'
+    r'(?:约为|约|为|达到|达|超过|共|增至|降至|至)?\s*'
+    r'(?P<sign>[-－−]|负)?\s*'
+    r'(?P<value>\d+(?:,\d{3})*(?:\.\d+)?)\s*'
+    r'(?P<unit>个百分点|个基点|基点|%|倍|(?:万亿|亿|万|千)?(?:美元|欧元|日元|元|户|人|家|笔|张|辆|吨|个)|万亿|亿|万)'
+)
+
+# 时期：“2023年末”“2025年一季度”“2025年1-2月”等
+PERIOD_PATTERN = re.compile(
+    r'(?P<year>(?:19|20)\d{2})\s*年\s*'
+    r'(?P<part>末|底|初|上半年|下半年|前三季度|全年|第?[一二三四1-4]季度|\d{1,2}(?:-\d{1,2})?月(?:末|底)?)?'
+)
+
+# 指标开头的时间修饰词
+METRIC_PREFIX_PATTERN = re.compile(r'^(?:截至|截止|其中|年末|年底|年初|月末|季度末|上半年|全年|同期|当年|末|底|年|月)+')
+
+# 以这些词开头的指标描述的是前一个指标的变化（“同比增长23.5%”），与前一个指标拼接
+CHANGE_PATTERN = re.compile(r'^(?:同比|环比|比|较|增速|增长|下降|提高|降低|增加|减少|回落|上升|高出|低于|高|低)')
+
+# 去掉首尾页码后出现至少这么多次的行视为页眉页脚（与content_analysis.clean_text一致）
+REPEATED_LINE_MIN = 5
+
+SENTENCE_PATTERN = re.compile(r'[^。！？!?]+[。！？!?]?')
+PAGE_MARKER_PATTERN = re.compile(r'^\s*---\s*第\s*\d+\s*页\s*---\s*$')
+
+# 问题中与指标无关的疑问词和虚词
+QUESTION_NOISE_PATTERN = re.compile(r'是多少|为多少|有多少|多少|多大|几何|是什么|什么|请问|大约|左右|[的了吗呢是？?！!，,。\s]')
+
+# 指标与问题的匹配得分下限；F-beta的beta大于1，问题的字被指标覆盖比指标的字被问题覆盖更重要
+MIN_MATCH_SCORE = 0.6
+MATCH_BETA = 2.0
+
+# 得分与最高分相差不到该值、数值不同的其他指标视为歧义，不直接作答；
+# 最高分为满分（指标裁掉前缀后正好是问题）时只和同样满分的指标比较，“余额增加”“余额同比增长”不算“余额”的歧义
+MATCH_MARGIN = 0.1
+
+# “美国、欧元区和日本的失业率分别在……”一类列举，第一个数值属于哪个主体无法从指标判断，不直接作答
+ENUMERATION_PATTERN = re.compile(r'分别')
+
+# 保存的句子最大长度
+MAX_SENTENCE_CHARS = 200
+
+# 问题中指标以外的片段（国家、机构等主语）须出现在指标前这么多个字以内，且不越过分号
+SUBJECT_WINDOW = 20
+
+
+class NumericFact(NamedTuple):
+    """一条数值事实"""
+    metric: str
+    value: float
+    unit: str
+    raw_value: float
+    raw_unit: str
+    period: Optional[str]
+    line: int
+    sentence: str
+    metric_offset: int
+
+
+def normalize_unit(raw_value: float, raw_unit: str) -> tuple:
+    """把万亿/亿/万/千换算掉，返回 (基本单位下的数值, 基本单位)"""
+    for prefix, scale in SCALES.items():
+        if raw_unit.startswith(prefix) and raw_unit not in ("个百分点", "个基点"):
+            return raw_value * scale, raw_unit[len(prefix):]
+    return raw_value, raw_unit
+
+
+def bigrams(text: str) -> Set[str]:
+    """字符二元组集合，单字文本返回自身"""
+    return {text[i:i + 2] for i in range(len(text) - 1)} or {text}
+
+
+def trim_metric(metric: str, question_bigrams: Set[str]) -> str:
+    """
+    去掉长指标中问题没有提到的前缀修饰语（“新发放的普惠小微企业贷款加权平均利率”->“加权平均利率”），
+    中文指标的中心词在末尾，只裁掉第一个与问题相同的二元组之前的部分
+    """
+    for i in range(len(metric) - 1):
+        if metric[i:i + 2] in question_bigrams:
+            return metric[i:]
+    return metric
+
+
+def uncovered_spans(text: str, metric_bigrams: Set[str]) -> List[Tuple[int, int]]:
+    """
+    问题中没有被指标的二元组覆盖的片段的(起, 止)位置
+    （“美国失业率”对“失业率”为“美国”，“法国实际GDP增速”对“德国实际GDP增速”为“法”）
+    """
+    covered = ["0"] * len(text)
+    for i in range(len(text) - 1):
+        if text[i:i + 2] in metric_bigrams:
+            covered[i] = covered[i + 1] = "1"
+    return [run.span() for run in re.finditer(r'0+', "".join(covered))]
+
+
+def subject_window(sentence: str, metric_offset: int, metric: str) -> str:
+    """指标及其前面SUBJECT_WINDOW个字以内、同一分号分隔的列举项中的文字"""
+    start = max(metric_offset - SUBJECT_WINDOW, 0)
+    boundary = max(sentence.rfind(mark, start, metric_offset) for mark in "；;")
+    return sentence[max(start, boundary + 1):metric_offset + len(metric)]
+
+
+def extract_facts(text: str) -> List[NumericFact]:
+    """
+    从文档文本中抽取数值事实
+    
+    页码标记和反复出现的页眉页脚行先去掉，PDF排版造成的断行拼接起来再按句切分，
+    每条事实通过行起始偏移二分查找回原文行号（从1开始）
+    """
+    lines = text.split('\n')
+    keys = [re.sub(r'^\s*\d+|\d+\s*$', '', line).strip() for line in lines]
+    repeated = {key for key, count in Counter(keys).items() if key and count >= REPEATED_LINE_MIN}
+    line_starts = []
+    parts = []
+    offset = 0
+    for line, key in zip(lines, keys):
+        line_starts.append(offset)
+        line = "" if PAGE_MARKER_PATTERN.match(line) or key in repeated else line.strip()
+        parts.append(line)
+        offset += len(line)
+    joined = "".join(parts)
+    
+    facts = []
+    for sentence_match in SENTENCE_PATTERN.finditer(joined):
+        sentence = sentence_match.group()
+        # 保存的句子去掉了开头的空白，指标位置按去掉后的句子计算
+        indent = len(sentence) - len(sentence.lstrip())
+        periods = [(m.end(), m.group().replace(" ", "")) for m in PERIOD_PATTERN.finditer(sentence)]
+        base_metric = None
+        base_offset = 0
+        for match in FACT_PATTERN.finditer(sentence):
+            metric = METRIC_PREFIX_PATTERN.sub("", match.group("metric"))
+            if len(metric) < 2:
+                continue
+            metric_offset = match.end("metric") - len(metric) - indent
+            if CHANGE_PATTERN.match(metric):
+                if base_metric:
+                    metric = base_metric + metric
+                    metric_offset = base_offset
+            else:
+                base_metric = metric
+                base_offset = metric_offset
+            
+            raw_value = float(match.group("value").replace(",", ""))
+            if match.group("sign"):
+                raw_value = -raw_value
+            raw_unit = match.group("unit")
+            value, unit = normalize_unit(raw_value, raw_unit)
+            period = None
+            for end, period_text in periods:
+                if end > match.start("value"):
+                    break
+                period = period_text
+            position = sentence_match.start() + match.start("value")
+            facts.append(NumericFact(metric, value, unit, raw_value, raw_unit, period,
+                                     bisect_right(line_starts, position), sentence.strip()[:MAX_SENTENCE_CHARS],
+                                     metric_offset))
+    return facts
+
+
+class NumericFactIndex:
+    """数值事实表，支持按指标查找、按数值区间查询和按问题匹配"""
+    
+    def __init__(self, base_path: str = ".", db_path: Optional[str] = None):
+        """
+        打开（必要时创建）事实表并按文档索引增量同步
+        
+        Args:
+            base_path: 知识库根目录路径
+            db_path: 数据库路径，默认为index/numeric_facts.db
+        """
+        self.base_path = Path(base_path)
+        db_path = Path(db_path) if db_path else self.base_path / "index" / "numeric_facts.db"
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # 旧版本的表缺少指标位置，抽取规则也已变化，全部重新抽取
+            with self.conn:
+                self.conn.execute("DROP TABLE IF EXISTS facts")
+                self.conn.execute("DROP TABLE IF EXISTS indexed_documents")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.executescript(SCHEMA)
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self._metrics: Dict[str, Set[str]] = {}
+        self.sync()
+    
+    def sync(self) -> int:
+        """
+        按document_index.json同步：内容变化的文档重新抽取，已删除的文档移除
+        
+        Returns:
+            重新抽取的文档数
+        """
+        index_file = self.base_path / "index" / "document_index.json"
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                documents = json.load(f).get("documents", [])
+        except Exception as e:
+            logger.error(f"加载文档索引失败: {e}")
+            documents = []
+        self.documents = {doc["id"]: doc for doc in documents}
+        
+        indexed = dict(self.conn.execute("SELECT doc_id, sha1 FROM indexed_documents"))
+        updated = 0
+        for doc in documents:
+            file_path = self.base_path / doc["file_path"].replace("../", "")
+            try:
+                content = file_path.read_text(encoding='utf-8')
+            except Exception as e:
+                logger.warning(f"读取 {file_path} 失败: {e}")
+                continue
+            sha1 = hashlib.sha1(content.encode('utf-8')).hexdigest()
+            if indexed.get(doc["id"]) == sha1:
+                continue
+            facts = extract_facts(content)
+            with self.conn:
+                self.conn.execute("DELETE FROM facts WHERE doc_id = ?", (doc["id"],))
+                self.conn.executemany(
+                    "INSERT INTO facts (doc_id, line, metric, value, unit, raw_value, raw_unit, period, sentence, "
+                    "metric_offset) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(doc["id"], f.line, f.metric, f.value, f.unit, f.raw_value, f.raw_unit, f.period, f.sentence,
+                      f.metric_offset) for f in facts])
+                self.conn.execute("INSERT OR REPLACE INTO indexed_documents (doc_id, sha1) VALUES (?, ?)",
+                                  (doc["id"], sha1))
+            updated += 1
+            logger.info(f"抽取数值事实: {doc['id']} ({len(facts)} 条)")
+        
+        for doc_id in set(indexed) - set(self.documents):
+            with self.conn:
+                self.conn.execute("DELETE FROM facts WHERE doc_id = ?", (doc_id,))
+                self.conn.execute("DELETE FROM indexed_documents WHERE doc_id = ?", (doc_id,))
+        
+        # 不同的指标名常驻内存（连同其字符二元组），问题匹配不必扫描整张表
+        self._metrics = {row[0]: bigrams(row[0]) for row in self.conn.execute("SELECT DISTINCT metric FROM facts")}
+        logger.info(f"数值事实索引同步完成: {len(self._metrics)} 个指标, 更新{updated}个文档")
+        return updated
+    
+    def _to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        fact = dict(row)
+        doc = self.documents.get(fact["doc_id"], {})
+        fact["title"] = doc.get("title", fact["doc_id"])
+        fact["author"] = doc.get("author", "")
+        fact["publish_date"] = doc.get("publish_date", "")
+        return fact
+    
+    def lookup(self, metric: str, period: Optional[str] = None, doc_id: Optional[str] = None,
+               exact: bool = False, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        按指标名查找
+        
+        Args:
+            metric: 指标名，exact为False时按包含匹配
+            period: 时期前缀，如 "2023" 或 "2023年末"
+            doc_id: 只查该文档
+            exact: 是否要求指标名完全一致
+            limit: 返回数量上限
+        """
+        sql = "SELECT * FROM facts WHERE " + ("metric = ?" if exact else "metric LIKE ? ESCAPE '\\'")
+        params: List[Any] = [metric if exact else "%" + metric.replace('\\', '\\\\').replace('%', '\\%')
+                             .replace('_', '\\_') + "%"]
+        if period:
+            sql += " AND period LIKE ?"
+            params.append(period + "%")
+        if doc_id:
+            sql += " AND doc_id = ?"
+            params.append(doc_id)
+        sql += " ORDER BY length(metric), doc_id, line LIMIT ?"
+        params.append(limit)
+        return [self._to_dict(row) for row in self.conn.execute(sql, params)]
+    
+    def range_query(self, unit: str, min_value: Optional[float] = None, max_value: Optional[float] = None,
+                    metric: Optional[str] = None, period: Optional[str] = None,
+                    limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        按数值区间查询（数值为换算后的基本单位，如“元”“户”“%”）
+        
+        Args:
+            unit: 基本单位
+            min_value: 下限（含）
+            max_value: 上限（含）
+            metric: 指标名包含的文字
+            period: 时期前缀
+            limit: 返回数量上限
+        """
+        sql = "SELECT * FROM facts WHERE unit = ?"
+        params: List[Any] = [unit]
+        if min_value is not None:
+            sql += " AND value >= ?"
+            params.append(min_value)
+        if max_value is not None:
+            sql += " AND value <= ?"
+            params.append(max_value)
+        if metric:
+            sql += " AND instr(metric, ?) > 0"
+            params.append(metric)
+        if period:
+            sql += " AND period LIKE ?"
+            params.append(period + "%")
+        sql += " ORDER BY value DESC LIMIT ?"
+        params.append(limit)
+        return [self._to_dict(row) for row in self.conn.execute(sql, params)]
+    
+    def match_question(self, question: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        为数字类问题找出最匹配的事实
+        
+        去掉疑问词后，按字符二元组计算问题与各指标名（裁掉问题未提到的前缀修饰语）的F-beta得分；
+        问题中没有被指标覆盖的片段（如“美国失业率”中的“美国”）必须紧挨在事实的指标前面（见subject_window），
+        问题含年份时只取该年份的事实。得分最高的几个指标数值不一致时视为歧义，返回空列表交给检索流程
+        
+        Returns:
+            事实列表（含score），没有可靠匹配时为空
+        """
+        text = QUESTION_NOISE_PATTERN.sub("", question)
+        years = re.findall(r'(?:19|20)\d{2}', text)
+        text = PERIOD_PATTERN.sub("", text)
+        if not text:
+            return []
+        question_bigrams = bigrams(text)
+        beta2 = MATCH_BETA ** 2
+        
+        scored = []
+        for metric, metric_bigrams in self._metrics.items():
+            common = len(question_bigrams & metric_bigrams)
+            if not common or ENUMERATION_PATTERN.search(metric):
+                continue
+            precision = common / len(bigrams(trim_metric(metric, question_bigrams)))
+            recall = common / len(question_bigrams)
+            score = (1 + beta2) * precision * recall / (beta2 * precision + recall)
+            spans = uncovered_spans(text, metric_bigrams)
+            # 中文指标的中心词在末尾，问题结尾没被覆盖（“GDP增长率”对“拉动GDP增长”）说明问的不是这个量
+            if score >= MIN_MATCH_SCORE and not (spans and spans[-1][1] == len(text)):
+                # 其余没被覆盖的片段必须出现在事实的指标附近
+                scored.append((score, metric, [text[start:end].lower() for start, end in spans]))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        
+        matches = []
+        for score, metric, required in scored:
+            if matches and score < matches[0][0] - (0 if matches[0][0] >= 1 else MATCH_MARGIN):
+                break
+            facts = [self._to_dict(row) for row in self.conn.execute(
+                "SELECT * FROM facts WHERE metric = ? ORDER BY period DESC, doc_id, line", (metric,))]
+            facts = [fact for fact in facts if all(
+                term in subject_window(fact["sentence"], fact["metric_offset"], metric).lower() for term in required)]
+            if years:
+                facts = [fact for fact in facts if (fact["period"] and fact["period"][:4] in years)
+                         or any(year in fact["sentence"] for year in years)]
+            if facts:
+                matches.append((score, metric, facts))
+        if not matches:
+            return []
+        
+        best_score, _, facts = matches[0]
+        values = {(fact["value"], fact["unit"]) for _, _, other in matches[1:] for fact in other}
+        if values - {(fact["value"], fact["unit"]) for fact in facts}:
+            logger.info(f"问题“{question}”匹配到多个数值不同的指标，改走检索流程")
+            return []
+        for fact in facts:
+            fact["score"] = round(best_score, 4)
+        return facts[:limit]
+    
+    def count(self) -> int:
+        """事实总数"""
+        return self.conn.execute("SELECT COUNT(*) FROM facts").fetchone()[0]
+    
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+
+def main():
+    """构建数值事实索引并演示查询"""
+    import argparse
+    import time
+    
+    parser = argparse.ArgumentParser(description="数值事实索引")
+    parser.add_argument("--base-path", default=str(Path(__file__).parent.parent), help="知识库根目录")
+    parser.add_argument("question", nargs="*", default=["普惠小微贷款余额是多少？"], help="要查询的数字类问题")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    index = NumericFactIndex(args.base_path)
+    print(f"共 {index.count()} 条数值事实")
+    for question in args.question:
+        start = time.perf_counter()
+        facts = index.match_question(question)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"\n问题: {question} ({elapsed:.2f} ms)")
+        for fact in facts:
+            print(f"  {fact['metric']} = {fact['raw_value']:g}{fact['raw_unit']} "
+                  f"[{fact['period'] or '时期未知'}] {fact['title']} 第{fact['line']}行")
+
+
+if __name__ == "__main__":
+    main()
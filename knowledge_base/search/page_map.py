@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页码映射
+提取文本中每页以“--- 第 N 页 ---”标记开头，建索引时记下各页标记所在的行号，
+每个文档只保存两个紧凑数组（页起始行号、页码），行号到页码用二分查找换算；
+反过来也可以把章节的起止页换算成行范围，按章节检索时只扫描该范围内的行
+"""
+
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple, Iterable
+
+PAGE_MARKER_PATTERN = re.compile(r'^\s*---\s*第\s*(\d+)\s*页\s*---\s*$')
+
+
+class PageMap:
+    """各文档的页起始行号数组"""
+    
+    def __init__(self):
+        # 文档ID -> (页标记所在行号, 对应页码, 文档总行数)
+        self.pages: Dict[str, Tuple[array, array, int]] = {}
+    
+    def add_document(self, doc_id: str, content: str) -> int:
+        """
+        扫描文档中的页标记
+        
+        Returns:
+            识别出的页数
+        """
+        starts = array('I')
+        numbers = array('I')
+        lines = content.split('\n')
+        for line_no, line in enumerate(lines):
+            match = PAGE_MARKER_PATTERN.match(line)
+            # 页码必须递增，重复或乱序的标记不参与二分查找
+            if match and (not numbers or int(match.group(1)) > numbers[-1]):
+                starts.append(line_no)
+                numbers.append(int(match.group(1)))
+        self.pages[doc_id] = (starts, numbers, len(lines))
+        return len(numbers)
+    
+    def remove_document(self, doc_id: str):
+        """删除文档的页码映射"""
+        self.pages.pop(doc_id, None)
+    
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.pages
+    
+    def page_of_line(self, doc_id: str, line: int) -> Optional[int]:
+        """行号（从0开始）所在的页码，文档没有页标记或行在第一个页标记之前时返回None"""
+        entry = self.pages.get(doc_id)
+        if entry is None:
+            return None
+        starts, numbers, _ = entry
+        i = bisect_right(starts, line) - 1
+        return numbers[i] if i >= 0 else None
+    
+    def pages_of_lines(self, doc_id: str, start: int, end: int) -> List[int]:
+        """行范围[start, end)覆盖的页码"""
+        entry = self.pages.get(doc_id)
+        if entry is None or end <= start:
+            return []
+        starts, numbers, _ = entry
+        first = max(bisect_right(starts, start) - 1, 0)
+        last = bisect_left(starts, end)
+        return list(numbers[first:last])
+    
+    def line_range(self, doc_id: str, first_page: int, last_page: int) -> Optional[Tuple[int, int]]:
+        """
+        页码区间[first_page, last_page]对应的行范围
+        
+        Returns:
+            (起始行号, 结束行号)，结束行号不含；文档没有页标记或区间内没有页时返回None
+        """
+        entry = self.pages.get(doc_id)
+        if entry is None:
+            return None
+        starts, numbers, line_count = entry
+        first = bisect_left(numbers, first_page)
+        last = bisect_right(numbers, last_page)
+        if first >= last:
+            return None
+        return starts[first], starts[last] if last < len(starts) else line_count
+    
+    def size_bytes(self) -> int:
+        """页码映射占用的数组字节数"""
+        return sum(starts.itemsize * len(starts) + numbers.itemsize * len(numbers)
+                   for starts, numbers, _ in self.pages.values())
+
+
+def context_pages(contexts: Iterable[Dict]) -> List[int]:
+    """上下文列表涉及的页码，去重后升序排列"""
+    return sorted({context["page"] for context in contexts if context.get("page") is not None})
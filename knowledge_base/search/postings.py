@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+压缩倒排表
+文档号差值编码 + 变长字节(varint)压缩，按固定大小分块存储，
+每块记录最大文档号和最大影响力（量化的得分上界）：求交和按文档号查词频时按文档号整块跳过，
+求并集时跳过得分上界达不到阈值的块（block-max）
+"""
+
+from array import array
+from typing import List, Iterator, Optional, Tuple
+
+# 每块包含的倒排项数量
+BLOCK_SIZE = 128
+
+# 块头影响力的取值范围（有符号16位，得分可以为负）
+MAX_BLOCK_IMPACT = 32767
+
+
+def encode_varint(value: int, out: bytearray):
+    """将非负整数按7位一组写入out，最高位表示后续是否还有字节"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """从pos处读取一个varint，返回(数值, 下一个位置)"""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+class CompressedPostings:
+    """单个词项的压缩倒排表"""
+    
+    def __init__(self):
+        self.doc_count = 0
+        self.data = b""
+        self.block_last_doc = array('I')
+        self.block_offsets = array('I')
+        # 每块的最大影响力，构建时没有给出影响力则为空，此时不按影响力跳块
+        self.block_max_impact = array('h')
+    
+    @classmethod
+    def from_postings(cls, postings: List[Tuple[int, int]], block_size: int = BLOCK_SIZE,
+                      impacts: Optional[List[int]] = None) -> "CompressedPostings":
+        """
+        由(文档号, 词频)列表构建压缩倒排表
+        
+        Args:
+            postings: 按文档号升序排列的(文档号, 词频)列表
+            block_size: 每块的倒排项数量
+            impacts: 与postings一一对应的量化得分（向上取整，不超过MAX_BLOCK_IMPACT），块头记录每块的最大值
+        """
+        compressed = cls()
+        compressed.doc_count = len(postings)
+        data = bytearray()
+        previous = 0
+        
+        for start in range(0, len(postings), block_size):
+            block = postings[start:start + block_size]
+            compressed.block_offsets.append(len(data))
+            compressed.block_last_doc.append(block[-1][0])
+            if impacts is not None:
+                compressed.block_max_impact.append(max(impacts[start:start + block_size]))
+            encode_varint(len(block), data)
+            # 块内先存文档号差值，再存词频，便于只解码文档号
+            for doc, _ in block:
+                encode_varint(doc - previous, data)
+                previous = doc
+            for _, tf in block:
+                encode_varint(tf, data)
+        
+        compressed.data = bytes(data)
+        return compressed
+    
+    def _decode_docs(self, block: int) -> Tuple[List[int], int]:
+        """解码指定块的文档号，返回(文档号列表, 词频部分的起始位置)"""
+        pos = self.block_offsets[block]
+        previous = self.block_last_doc[block - 1] if block > 0 else 0
+        count, pos = decode_varint(self.data, pos)
+        
+        docs = []
+        for _ in range(count):
+            delta, pos = decode_varint(self.data, pos)
+            previous += delta
+            docs.append(previous)
+        return docs, pos
+    
+    def decode_block_docs(self, block: int) -> List[int]:
+        """只解码指定块的文档号"""
+        return self._decode_docs(block)[0]
+    
+    def decode_block(self, block: int) -> Tuple[List[int], List[int]]:
+        """解码指定块，返回(文档号列表, 词频列表)"""
+        docs, pos = self._decode_docs(block)
+        tfs = []
+        for _ in range(len(docs)):
+            tf, pos = decode_varint(self.data, pos)
+            tfs.append(tf)
+        return docs, tfs
+    
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        for block in range(len(self.block_offsets)):
+            docs, tfs = self.decode_block(block)
+            yield from zip(docs, tfs)
+    
+    def __len__(self) -> int:
+        return self.doc_count
+    
+    def cursor(self) -> "PostingsCursor":
+        """创建支持跳块的游标"""
+        return PostingsCursor(self)
+    
+    def size_bytes(self) -> int:
+        """压缩后占用的字节数（数据 + 块头）"""
+        return (len(self.data) + 2 * len(self.block_offsets) * self.block_offsets.itemsize
+                + len(self.block_max_impact) * self.block_max_impact.itemsize)
+
+
+class PostingsCursor:
+    """倒排表游标，advance时利用块头跳过不可能包含目标文档的整块"""
+    
+    def __init__(self, postings: CompressedPostings):
+        self.postings = postings
+        self.block = -1
+        self.docs: List[int] = []
+        self.tfs: List[int] = []
+        self.index = 0
+        self.exhausted = postings.doc_count == 0
+    
+    def _load_block(self, block: int):
+        self.block = block
+        self.docs, self.tfs = self.postings.decode_block(block)
+        self.index = 0
+    
+    def advance(self, target: int) -> Optional[int]:
+        """
+        移动到第一个文档号 >= target 的位置
+        
+        Returns:
+            当前文档号，倒排表耗尽时返回None
+        """
+        if self.exhausted:
+            return None
+        
+        block_last_doc = self.postings.block_last_doc
+        block = max(self.block, 0)
+        while block < len(block_last_doc) and block_last_doc[block] < target:
+            block += 1
+        if block >= len(block_last_doc):
+            self.exhausted = True
+            return None
+        if block != self.block:
+            self._load_block(block)
+        
+        while self.docs[self.index] < target:
+            self.index += 1
+        return self.docs[self.index]
+    
+    def tf(self) -> int:
+        """当前位置的词频"""
+        return self.tfs[self.index]
+
+
+def intersect(postings_lists: List[CompressedPostings]) -> List[int]:
+    """
+    求多个倒排表的交集
+    
+    从最短的倒排表开始，其余倒排表用advance跳块定位
+    
+    Returns:
+        同时出现在所有倒排表中的文档号列表
+    """
+    if not postings_lists:
+        return []
+    
+    ordered = sorted(postings_lists, key=len)
+    cursors = [p.cursor() for p in ordered[1:]]
+    result = []
+    
+    for doc, _ in ordered[0]:
+        matched = True
+        for cursor in cursors:
+            current = cursor.advance(doc)
+            if current is None:
+                return result
+            if current != doc:
+                matched = False
+                break
+        if matched:
+            result.append(doc)
+    return result
+
+
+def union(postings_lists: List[CompressedPostings], min_impact: Optional[int] = None) -> List[int]:
+    """
+    求多个倒排表的并集，只解码文档号
+    
+    Args:
+        postings_lists: 倒排表列表
+        min_impact: 给出时跳过块头最大影响力低于它的块（倒排表需带影响力），
+            这些块中的文档只有出现在其他倒排表保留的块中时才会返回
+    
+    Returns:
+        升序文档号列表
+    """
+    docs = set()
+    for postings in postings_lists:
+        block_max_impact = postings.block_max_impact if min_impact is not None else None
+        for block in range(len(postings.block_offsets)):
+            if block_max_impact and block_max_impact[block] < min_impact:
+                continue
+            docs.update(postings.decode_block_docs(block))
+    return sorted(docs)
@@ -46,6 +46,14 @@ class BaseRAGPrompt:
             提取的答案
         """
         raise NotImplementedError("子类必须实现extract_answer方法")
+    
+    def _context_title(self, ctx: Dict[str, Any], i: int) -> str:
+        """上下文标题，上下文带页码时附上出处页码"""
+        title = ctx.get('title', f'文档{i}')
+        pages = ctx.get('pages')
+        if pages:
+            title += f"（第{'、'.join(str(page) for page in pages)}页）"
+        return title
 
 class AnswerWithRAGContextNumberPrompt(BaseRAGPrompt):
     """数字答案RAG提示模板"""
@@ -85,7 +93,7 @@ class AnswerWithRAGContextNumberPrompt(BaseRAGPrompt):
         formatted_context = []
         for i, ctx in enumerate(context, 1):
             if isinstance(ctx, dict):
-                title = ctx.get('title', f'文档{i}')
+                title = self._context_title(ctx, i)
                 content = ctx.get('content', ctx.get('context', ''))
                 formatted_context.append(f"{i}. {title}\n{content}\n")
             else:
@@ -129,7 +137,7 @@ class AnswerWithRAGContextBooleanPrompt(BaseRAGPrompt):
         formatted_context = []
         for i, ctx in enumerate(context, 1):
             if isinstance(ctx, dict):
-                title = ctx.get('title', f'文档{i}')
+                title = self._context_title(ctx, i)
                 content = ctx.get('content', ctx.get('context', ''))
                 formatted_context.append(f"{i}. {title}\n{content}\n")
             else:
@@ -180,7 +188,7 @@ class AnswerWithRAGContextNamesPrompt(BaseRAGPrompt):
         formatted_context = []
         for i, ctx in enumerate(context, 1):
             if isinstance(ctx, dict):
-                title = ctx.get('title', f'文档{i}')
+                title = self._context_title(ctx, i)
                 content = ctx.get('content', ctx.get('context', ''))
                 formatted_context.append(f"{i}. {title}\n{content}\n")
             else:
@@ -248,7 +256,7 @@ class ComparativeAnswerPrompt(BaseRAGPrompt):
         formatted_context = []
         for i, ctx in enumerate(context, 1):
             if isinstance(ctx, dict):
-                title = ctx.get('title', f'文档{i}')
+                title = self._context_title(ctx, i)
                 content = ctx.get('content', ctx.get('context', ''))
                 formatted_context.append(f"{i}. {title}\n{content}\n")
             else:
@@ -340,7 +348,7 @@ class AnswerWithRAGContextStringPrompt(BaseRAGPrompt):
         
         for i, ctx in enumerate(context, 1):
             if isinstance(ctx, dict):
-                title = ctx.get('title', f'文档{i}')
+                title = self._context_title(ctx, i)
                 content = ctx.get('content', ctx.get('context', ''))
                 
                 # 截断过长的内容
@@ -8,27 +8,56 @@
 import json
 import os
 import re
+import sys
 import math
+import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 import logging
 from collections import defaultdict, Counter
 
+# 添加当前目录到Python路径
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from substring_index import SubstringIndex
+from topic_vectors import TopicVectorIndex
+from facet_index import FacetIndex
+from postings import CompressedPostings, MAX_BLOCK_IMPACT, union, intersect
+from impact_index import ImpactIndex
+from cold_tier import ColdTier
+from document_store import DocumentStore, source_stamp
+from index_pruning import IndexPruner
+from near_duplicates import (collapse_duplicate_contexts, normalize_text, NearDuplicateDetector,
+                             MIN_PASSAGE_CHARS)
+from page_map import PageMap, context_pages
+
 # 设置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 混合打分时分数归一化的下限
+SCORE_EPSILON = 1e-6
+
 class KnowledgeBaseSearchEngine:
     """知识库搜索引擎"""
     
-    def __init__(self, base_path: str = "."):
+    def __init__(self, base_path: str = ".", prune_threshold: float = 0.0, prune_top_k: int = 10,
+                 prune_numeric: bool = False):
         """
         初始化搜索引擎
         
         Args:
             base_path: 知识库根目录路径
+            prune_threshold: 静态索引剪枝阈值，大于0时在建索引时剪掉页眉页脚和低贡献的倒排项
+            prune_top_k: 剪枝时每个词项保证不受影响的前k个文档
+            prune_numeric: 剪枝时是否同时删除纯数字词项（年份、数值查询将不再命中）
         """
         self.base_path = Path(base_path)
+        self.prune_threshold = prune_threshold
+        self.prune_top_k = prune_top_k
+        self.prune_numeric = prune_numeric
+        self.pruning_report = {}
         self.index_path = self.base_path / "index"
         self.data_path = self.base_path / "data"
         
@@ -43,7 +72,29 @@ class KnowledgeBaseSearchEngine:
         self.avg_doc_length = 0
         self.total_docs = 0
         self.doc_freq = defaultdict(int)
-        self.term_freq = defaultdict(lambda: defaultdict(int))
+        self.doc_lengths = {}
+        self.term_ids = {}
+        # 子串索引只有位置表，命中行的文本经get_document_lines读取（压缩存储中的文档走块缓存）
+        self.substring_index = SubstringIndex(read_lines=self.get_document_lines)
+        self.topic_vectors = TopicVectorIndex(self._tokenize_text)
+        self._topic_context_cache = {}
+        self.facet_index = FacetIndex()
+        # 词项 -> 压缩倒排表（文档号为文档在self.documents中的序号），打分时的词频都从这里读取
+        self.postings = {}
+        self.doc_numbers = {}
+        # 倒排表块头影响力的量化单位（BM25分数 = 影响力 × impact_scale）
+        self.impact_scale = 0.0
+        self.impact_index = ImpactIndex()
+        # 标记为archived的文档放在冷存储中，只在内存里保留布隆过滤器
+        self.cold_documents = []
+        self.cold_tier = ColdTier(self.index_path / "cold", self._tokenize_text)
+        # 压缩文档存储（由document_store.py构建），与源文件一致时优先从中读取文档内容
+        self.document_store = DocumentStore(self.index_path / "doc_store")
+        # 各文档页标记所在的行号，用于给命中行标注页码、把章节页码换算为行范围
+        self.page_map = PageMap()
+        # 近似重复的段落只索引规范副本：(文档ID, 行号) -> 规范副本的(文档ID, 行号)，以及反向引用
+        self.duplicate_passages: Dict[Tuple[str, int], Tuple[str, int]] = {}
+        self.passage_duplicates: Dict[Tuple[str, int], List[Dict[str, Any]]] = defaultdict(list)
         
         # 构建混合搜索索引
         self._build_hybrid_index()
@@ -63,32 +114,228 @@ class KnowledgeBaseSearchEngine:
     def _build_hybrid_index(self):
         """构建混合搜索索引"""
         logger.info("开始构建混合搜索索引...")
+        cold_changed = False
+        # 文档ID -> 词项 -> 词频，只在建索引期间使用，压缩为倒排表后释放
+        term_freq = defaultdict(dict)
+        # 建索引期间的全部文档内容；已在压缩存储中的文档建完索引后不留在内存，按行从块缓存读取
+        contents = {}
+        # 参与索引的文本（近似重复的行已置空）
+        indexed_contents = {}
+        detector = NearDuplicateDetector()
         
         for doc in self.document_index.get("documents", []):
+            if doc.get("archived"):
+                cold_changed = self._add_cold_document(doc) or cold_changed
+                continue
+            if self.cold_tier.contains(doc["id"]):
+                # 已取消归档，冷存储中的副本不再使用
+                self.cold_tier.remove(doc["id"])
+                cold_changed = True
+            
             content = self._get_document_content_for_hybrid(doc["id"])
             if content:
                 self.documents.append(doc)
-                self.document_contents[doc["id"]] = content
+                contents[doc["id"]] = content
+                if not self.document_store.contains(doc["id"]):
+                    self.document_contents[doc["id"]] = content
+                self.page_map.add_document(doc["id"], content)
+                indexed_contents[doc["id"]] = self._mark_duplicate_passages(doc["id"], content, detector)
                 
                 # 分词处理
-                words = self._tokenize_text(content)
+                words = self._tokenize_text(indexed_contents[doc["id"]])
                 doc_length = len(words)
+                self.doc_lengths[doc["id"]] = doc_length
                 
                 # 更新词项频率和文档频率
                 word_freq = Counter(words)
                 for word, freq in word_freq.items():
-                    self.term_freq[doc["id"]][word] = freq
+                    term_freq[doc["id"]][word] = freq
                     self.doc_freq[word] += 1
+                    if word not in self.term_ids:
+                        self.term_ids[word] = len(self.term_ids)
                 
                 # 计算平均文档长度
                 self.avg_doc_length += doc_length
         
-        self.total_docs = len(self.documents)
+        if cold_changed:
+            self.cold_tier.save_manifest()
+        # 主题排序需要冷存储文档的词频，在释放清单中的词项之前取出
+        cold_term_freq = {doc["id"]: self.cold_tier.term_counts(doc["id"]) for doc in self.cold_documents}
+        self.cold_tier.release_terms()
+        
+        # 冷存储文档参与文档频率和平均长度统计，与在内存中时得分一致
+        self.total_docs = len(self.documents) + len(self.cold_documents)
         if self.total_docs > 0:
             self.avg_doc_length /= self.total_docs
         
+        if self.prune_threshold > 0:
+            pruner = IndexPruner(self._tokenize_text, self.prune_threshold, self.prune_top_k,
+                                 drop_numeric=self.prune_numeric)
+            self.pruning_report = pruner.prune(indexed_contents, term_freq, self.doc_freq,
+                                               self.doc_lengths, self.avg_doc_length, self.total_docs)
+            self.term_ids = {word: i for i, word in enumerate(self.doc_freq)}
+            logger.info(f"索引剪枝完成: 倒排项 {self.pruning_report['postings_before']} -> "
+                        f"{self.pruning_report['postings_after']}")
+        
+        # 构建压缩倒排表，文档号为文档在self.documents中的序号
+        self._build_postings(term_freq)
+        
+        # 预计算量化的BM25影响力，供impact_mode使用；冷存储文档不在其中，查询时经布隆过滤器读盘打分
+        self.impact_index.build([doc["id"] for doc in self.documents], term_freq, self.doc_freq,
+                                self.doc_lengths, self.avg_doc_length, self.total_docs)
+        
+        # 构建子串索引，内容搜索不再逐次读取文档
+        self.substring_index.build(contents)
+        
+        # 构建分类、作者、年份的分面位图
+        self.facet_index.build(self.documents + self.cold_documents)
+        
+        # 编译主题向量并预计算各主题的文档排序
+        self._topic_context_cache = {}
+        self.topic_vectors.build(self.topic_index, self.term_ids, dict(term_freq, **cold_term_freq), self.doc_freq,
+                                 self.doc_lengths, self.avg_doc_length, self.total_docs)
+        
         logger.info(f"混合搜索索引构建完成: {self.total_docs}个文档, {len(self.doc_freq)}个词项")
     
+    def _mark_duplicate_passages(self, doc_id: str, content: str, detector: NearDuplicateDetector) -> str:
+        """
+        用MinHash/LSH找出与先前索引的段落（行）近似重复的行，记入duplicate_passages
+        
+        Returns:
+            重复行置空后的文本，即参与索引的部分
+        """
+        lines = content.split('\n')
+        found = False
+        for line_no, line in enumerate(lines):
+            if len(normalize_text(line)) < MIN_PASSAGE_CHARS:
+                continue
+            canonical = detector.add((doc_id, line_no), line)
+            if canonical is not None:
+                self.duplicate_passages[(doc_id, line_no)] = canonical
+                self.passage_duplicates[canonical].append({"document_id": doc_id, "paragraph_index": line_no})
+                lines[line_no] = ""
+                found = True
+        return '\n'.join(lines) if found else content
+    
+    def _indexed_lines(self, doc_id: str, lines: List[str], first_line: int = 0) -> List[str]:
+        """把行列表中的近似重复行置空，first_line为第一行在文档中的行号"""
+        return ["" if (doc_id, first_line + i) in self.duplicate_passages else line
+                for i, line in enumerate(lines)]
+    
+    def _add_cold_document(self, doc: Dict[str, Any]) -> bool:
+        """
+        将归档文档登记到冷存储，只累计统计信息，不保留内容和词频；
+        归档内容与源文件不一致（或没有记录源文件信息）时重新归档
+        
+        Returns:
+            是否新归档了文档（需要保存清单）
+        """
+        doc_id = doc["id"]
+        newly_archived = False
+        file_path = self._source_path(doc)
+        if not (self.cold_tier.contains(doc_id) and self.cold_tier.is_current(doc_id, file_path)):
+            content = self._read_document_text(doc)
+            if not content:
+                return False
+            stamp = source_stamp(file_path) if file_path.exists() else {}
+            self.cold_tier.archive(doc_id, content, **stamp)
+            self.page_map.add_document(doc_id, content)
+            newly_archived = True
+        
+        self.cold_documents.append(doc)
+        doc_length = self.cold_tier.doc_length(doc_id)
+        self.doc_lengths[doc_id] = doc_length
+        self.avg_doc_length += doc_length
+        for word in self.cold_tier.terms(doc_id):
+            self.doc_freq[word] += 1
+            if word not in self.term_ids:
+                self.term_ids[word] = len(self.term_ids)
+        return newly_archived
+    
+    def _build_postings(self, term_freq: Dict[str, Dict[str, int]]):
+        """
+        由词频表构建按词项组织的压缩倒排表，
+        块头记录各块BM25得分的上界（按impact_scale量化并向上取整）
+        """
+        raw_postings = defaultdict(list)
+        raw_scores = defaultdict(list)
+        self.doc_numbers = {}
+        for doc_num, doc in enumerate(self.documents):
+            self.doc_numbers[doc["id"]] = doc_num
+            doc_length = self.doc_lengths.get(doc["id"], 0)
+            for word, freq in term_freq[doc["id"]].items():
+                raw_postings[word].append((doc_num, freq))
+                raw_scores[word].append(self._bm25_term_score(word, freq, doc_length))
+        
+        max_score = max((abs(score) for scores in raw_scores.values() for score in scores), default=0.0)
+        self.impact_scale = max_score / MAX_BLOCK_IMPACT
+        self.postings = {}
+        for word, items in raw_postings.items():
+            impacts = ([min(math.ceil(score / self.impact_scale), MAX_BLOCK_IMPACT) for score in raw_scores[word]]
+                       if self.impact_scale > 0 else None)
+            self.postings[word] = CompressedPostings.from_postings(items, impacts=impacts)
+    
+    def get_index_size(self) -> Dict[str, int]:
+        """倒排表规模统计"""
+        return {
+            "terms": len(self.postings),
+            "postings": sum(len(p) for p in self.postings.values()),
+            "compressed_bytes": sum(p.size_bytes() for p in self.postings.values()),
+            "substring_index_bytes": self.substring_index.size_bytes(),
+            "page_map_bytes": self.page_map.size_bytes()
+        }
+    
+    def _candidate_documents(self, query_words: List[str], match_all: bool = False,
+                             min_bm25: Optional[float] = None) -> List[Tuple[int, Dict[str, int]]]:
+        """
+        通过倒排表找出候选文档并取出查询词的词频
+        
+        match_all为False时候选为至少包含一个查询词的文档（并集），
+        为True时用跳块求交只保留包含全部查询词的文档。
+        给出min_bm25（不大于0）时，并集跳过BM25上界不超过它的块：
+        块中文档若不在其他查询词的保留块中，每个查询词贡献的分数都不超过min_bm25，总分也不会超过
+        
+        Returns:
+            按文档号顺序排列的(文档号, 查询词 -> 词频)
+        """
+        words = list(dict.fromkeys(query_words))
+        postings_lists = {word: self.postings[word] for word in words if word in self.postings}
+        if match_all:
+            if not words or len(postings_lists) < len(words):
+                return []
+            docs = intersect(list(postings_lists.values()))
+        else:
+            min_impact = None
+            if min_bm25 is not None and self.impact_scale > 0:
+                min_impact = math.floor(min_bm25 / self.impact_scale) + 1
+            docs = union(list(postings_lists.values()), min_impact)
+        
+        # 文档号升序，每个词项的游标只需向前移动
+        cursors = {word: postings.cursor() for word, postings in postings_lists.items()}
+        candidates = []
+        for doc_num in docs:
+            freqs = {}
+            for word, cursor in cursors.items():
+                if cursor.advance(doc_num) == doc_num:
+                    freqs[word] = cursor.tf()
+            candidates.append((doc_num, freqs))
+        return candidates
+    
+    def _document_term_freqs(self, doc_id: str, words: Iterable[str]) -> Dict[str, int]:
+        """从倒排表中查出词项在内存文档中的词频"""
+        doc_num = self.doc_numbers.get(doc_id)
+        freqs = {}
+        if doc_num is None:
+            return freqs
+        for word in set(words):
+            postings = self.postings.get(word)
+            if postings is None:
+                continue
+            cursor = postings.cursor()
+            if cursor.advance(doc_num) == doc_num:
+                freqs[word] = cursor.tf()
+        return freqs
+    
     def _get_document_content_for_hybrid(self, document_id: str) -> Optional[str]:
         """获取文档内容（用于混合搜索）"""
         doc = None
@@ -100,14 +347,40 @@ class KnowledgeBaseSearchEngine:
         if not doc:
             return None
         
+        return self._read_document_text(doc)
+    
+    def _source_path(self, doc: Dict[str, Any]) -> Path:
+        """文档源文件路径（修正为相对于知识库根目录的路径）"""
+        return self.base_path / doc["file_path"].replace("../", "")
+    
+    def _read_document_text(self, doc: Dict[str, Any]) -> Optional[str]:
+        """
+        读取文档文本：压缩存储中的版本与源文件一致时从存储读取，
+        源文件已更新时改读源文件，并用新内容刷新存储中的条目
+        """
+        doc_id = doc["id"]
+        file_path = self._source_path(doc)
+        in_store = self.document_store.contains(doc_id)
+        if in_store and self.document_store.is_current(doc_id, file_path):
+            return self.document_store.get_document(doc_id)
+        
         try:
-            # 修正路径，使用相对于知识库根目录的路径
-            file_path = self.base_path / doc["file_path"].replace("../", "")
             with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+                content = f.read()
         except Exception as e:
             logger.error(f"读取文档内容失败: {e}")
             return None
+        
+        if in_store:
+            logger.info(f"文档 {doc_id} 的源文件与压缩存储不一致，刷新存储")
+            try:
+                self.document_store.add_document(doc_id, content, **source_stamp(file_path))
+                self.document_store.save()
+            except Exception as e:
+                logger.error(f"刷新文档存储失败: {e}")
+                # 过期的条目不能再用，改为把内容留在内存中
+                self.document_store.remove_document(doc_id)
+        return content
     
     def _tokenize_text(self, text: str) -> List[str]:
         """文本分词"""
@@ -119,41 +392,57 @@ class KnowledgeBaseSearchEngine:
                 filtered_words.append(word)
         return filtered_words
     
-    def _calculate_bm25_score(self, query: str, doc_id: str, k1: float = 1.2, b: float = 0.75) -> float:
-        """计算BM25分数"""
+    def _calculate_bm25_score(self, query: str, doc_id: str, k1: float = 1.2, b: float = 0.75,
+                              doc_terms: Optional[Dict[str, int]] = None,
+                              doc_length: Optional[int] = None) -> float:
+        """
+        计算BM25分数，doc_terms为查询词的词频，未给出时从倒排表查询；
+        doc_length为临时统计的长度（章节切片）
+        """
         query_words = self._tokenize_text(query)
-        doc_words = self._tokenize_text(self.document_contents.get(doc_id, ""))
-        doc_length = len(doc_words)
+        if doc_length is None:
+            doc_length = self.doc_lengths.get(doc_id, 0)
+        if doc_terms is None:
+            doc_terms = self._document_term_freqs(doc_id, query_words)
         
         score = 0.0
         
         for word in query_words:
-            if word in self.term_freq[doc_id]:
-                if self.doc_freq[word] > 0:
-                    idf = math.log((self.total_docs - self.doc_freq[word] + 0.5) / 
-                                 (self.doc_freq[word] + 0.5))
-                else:
-                    idf = 0
-                
-                tf = self.term_freq[doc_id][word]
-                numerator = tf * (k1 + 1)
-                denominator = tf + k1 * (1 - b + b * (doc_length / self.avg_doc_length))
-                
-                score += idf * (numerator / denominator)
+            if word in doc_terms:
+                score += self._bm25_term_score(word, doc_terms[word], doc_length, k1, b)
         
         return score
     
-    def _calculate_tfidf_score(self, query: str, doc_id: str) -> float:
+    def _bm25_term_score(self, word: str, tf: int, doc_length: int,
+                         k1: float = 1.2, b: float = 0.75) -> float:
+        """单个词项的BM25分数"""
+        if self.doc_freq[word] > 0:
+            idf = math.log((self.total_docs - self.doc_freq[word] + 0.5) / 
+                         (self.doc_freq[word] + 0.5))
+        else:
+            idf = 0
+        
+        numerator = tf * (k1 + 1)
+        denominator = tf + k1 * (1 - b + b * (doc_length / self.avg_doc_length))
+        
+        return idf * (numerator / denominator)
+    
+    def _calculate_tfidf_score(self, query: str, doc_id: str,
+                               doc_terms: Optional[Dict[str, int]] = None,
+                               doc_length: Optional[int] = None) -> float:
         """计算TF-IDF分数"""
         query_words = self._tokenize_text(query)
-        doc_words = self._tokenize_text(self.document_contents.get(doc_id, ""))
+        if doc_length is None:
+            doc_length = self.doc_lengths.get(doc_id, 0)
+        if doc_terms is None:
+            doc_terms = self._document_term_freqs(doc_id, query_words)
         
         score = 0.0
         
         for word in query_words:
-            if word in self.term_freq[doc_id]:
+            if word in doc_terms:
                 # 计算TF
-                tf = self.term_freq[doc_id][word] / len(doc_words)
+                tf = doc_terms[word] / doc_length
                 
                 # 计算IDF
                 if self.doc_freq[word] > 0:
@@ -234,7 +523,9 @@ class KnowledgeBaseSearchEngine:
                     "title": doc["title"],
                     "relevance": doc.get("relevance", 0),
                     "key_sections": doc.get("key_sections", []),
-                    "description": topic_data.get("description", "")
+                    "description": topic_data.get("description", ""),
+                    # 沿用的人工文档列表，相关度不是模型得分
+                    "stale": topic_data.get("stale", False)
                 }
                 results.append(result)
         
@@ -271,16 +562,77 @@ class KnowledgeBaseSearchEngine:
         if not doc:
             return None
         
-        try:
-            file_path = self.base_path / doc["file_path"]
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except Exception as e:
-            logger.error(f"读取文档内容失败: {e}")
-            return None
+        if doc.get("archived") and self.cold_tier.contains(document_id):
+            return self.cold_tier.load(document_id)
+        return self._read_document_text(doc)
+    
+    def get_document_lines(self, document_id: str, start: int, end: Optional[int] = None) -> List[str]:
+        """
+        读取文档的行范围，文档在压缩存储中时只解压覆盖该范围的块
+        
+        Args:
+            document_id: 文档ID
+            start: 起始行号（从0开始）
+            end: 结束行号（不含），为None时读到文档末尾
+        
+        Returns:
+            行列表
+        """
+        for store in (self.cold_tier.store, self.document_store):
+            if store.contains(document_id):
+                return store.get_lines(document_id, start, end)
+        
+        content = self.document_contents.get(document_id)
+        if content is None:
+            content = self.get_document_content(document_id)
+        if content is None:
+            return []
+        return content.split('\n')[start:end]
+    
+    def _ensure_page_map(self, doc_id: str, content: Optional[str] = None) -> bool:
+        """确保文档已有页码映射，冷存储中早先归档的文档在首次需要时读取内容建立"""
+        if doc_id not in self.page_map:
+            if content is None:
+                content = self.get_document_content(doc_id)
+            if not content:
+                return False
+            self.page_map.add_document(doc_id, content)
+        return True
+    
+    def _chapter_line_ranges(self, chapter: str) -> Dict[str, Tuple[int, int]]:
+        """
+        找出标题包含chapter的章节在各文档中的行范围
+        
+        章节的start_page/end_page来自文档索引，经页码映射换算为行范围；
+        同一文档有多个章节匹配时取覆盖它们的范围
+        
+        Returns:
+            文档ID -> (起始行号, 结束行号)，结束行号不含
+        """
+        ranges = {}
+        for doc in self.document_index.get("documents", []):
+            for item in doc.get("chapters", []):
+                if chapter not in item.get("title", "") or "start_page" not in item:
+                    continue
+                if not self._ensure_page_map(doc["id"]):
+                    break
+                line_range = self.page_map.line_range(doc["id"], item["start_page"],
+                                                      item.get("end_page", item["start_page"]))
+                if line_range is None:
+                    continue
+                if doc["id"] in ranges:
+                    start, end = ranges[doc["id"]]
+                    line_range = (min(start, line_range[0]), max(end, line_range[1]))
+                ranges[doc["id"]] = line_range
+        return ranges
     
     def hybrid_search(self, query: str, limit: int = 10, 
-                     bm25_weight: float = 0.6, tfidf_weight: float = 0.4) -> List[Dict[str, Any]]:
+                     bm25_weight: float = 0.6, tfidf_weight: float = 0.4,
+                     filters=None, impact_mode: bool = False,
+                     budget_ms: Optional[float] = None,
+                     collapse_duplicates: bool = True,
+                     chapter: Optional[str] = None,
+                     match_all: bool = False) -> List[Dict[str, Any]]:
         """
         混合搜索 - 结合BM25和TF-IDF算法
         
@@ -289,30 +641,111 @@ class KnowledgeBaseSearchEngine:
             limit: 返回结果数量限制
             bm25_weight: BM25权重
             tfidf_weight: TF-IDF权重
+            filters: 过滤条件，如 "category=普惠金融&year>=2024"，在打分前通过分面位图缩小候选集
+            impact_mode: 使用预计算的量化BM25影响力按分段累加打分（IDF截断为很小的正数）
+            budget_ms: impact_mode下的时间预算（毫秒），覆盖影响力累加、冷存储读盘和逐文档的TF-IDF打分，
+                超时后按已打分的文档返回；最终结果（至多limit个）的上下文提取不计入预算
+            collapse_duplicates: 是否合并不同结果之间近似重复的上下文（MinHash）
+            chapter: 章节标题，给出时只检索文档索引中标题包含它的章节所在的页，没有该章节的文档不参与打分
+            match_all: 只返回包含全部查询词的文档，候选集由倒排表跳块求交得到
             
         Returns:
-            搜索结果列表
+            搜索结果列表，上下文带所在页码page，结果的pages为各上下文页码
+        """
+        query_words = self._tokenize_text(query)
+        ranked, impact_complete = self._rank_documents(query, query_words, bm25_weight, tfidf_weight, filters,
+                                                       impact_mode, budget_ms, chapter, match_all)
+        return self._finish_results(query_words, ranked[:limit],
+                                    impact_complete if impact_mode else None, collapse_duplicates)
+    
+    def _rank_documents(self, query: str, query_words: List[str],
+                        bm25_weight: float = 0.6, tfidf_weight: float = 0.4,
+                        filters=None, impact_mode: bool = False,
+                        budget_ms: Optional[float] = None,
+                        chapter: Optional[str] = None,
+                        match_all: bool = False) -> Tuple[List[tuple], bool]:
+        """
+        为全部候选文档打分并按混合分数排序，不提取上下文，参数含义同hybrid_search
+        
+        Returns:
+            ([(结果, 暂存的内容, 内容第一行的行号)], 是否在时间预算内完成)；
+            冷存储文档和章节切片的内容暂存到提取上下文时
         """
         results = []
+        deadline = time.perf_counter() + budget_ms / 1000.0 if impact_mode and budget_ms is not None else None
+        candidates = self.facet_index.filter_documents(filters)
+        chapter_ranges = self._chapter_line_ranges(chapter) if chapter else None
+        
+        impact_scores = None
+        impact_complete = True
+        if impact_mode:
+            impact_scores, impact_complete = self.impact_index.search(query_words, budget_ms)
+            # 影响力高的文档先打分，超出预算时保留的是最可能排在前面的文档
+            scored_docs = [(doc_num, None) for doc_num in
+                           sorted(impact_scores, key=lambda doc_num: impact_scores[doc_num], reverse=True)]
+        else:
+            # 只对倒排表中出现过查询词的文档打分，词频随候选一起从倒排表取出。
+            # BM25不超过min_bm25的文档混合分数不会大于0（TF-IDF归一化后至多为1），不必取出；
+            # 章节检索按章节切片重新统计词频，块头的上界不适用
+            min_bm25 = None
+            if chapter_ranges is None and bm25_weight > 0 and tfidf_weight >= 0:
+                min_bm25 = -tfidf_weight / bm25_weight * SCORE_EPSILON
+            scored_docs = self._candidate_documents(query_words, match_all, min_bm25)
+        scored_docs = [(doc_num, self.documents[doc_num], doc_terms) for doc_num, doc_terms in scored_docs]
+        
+        # 冷存储文档先用布隆过滤器排除，超出时间预算时不再读盘
+        if impact_complete:
+            scored_docs += [(None, doc, None) for doc in self.cold_documents
+                            if (candidates is None or doc["id"] in candidates)
+                            and self.cold_tier.may_contain(doc["id"], query_words, require_all=match_all)]
         
-        for doc in self.documents:
+        for doc_num, doc, doc_terms in scored_docs:
+            if deadline is not None and time.perf_counter() > deadline:
+                impact_complete = False
+                break
             doc_id = doc["id"]
+            if candidates is not None and doc_id not in candidates:
+                continue
+            if chapter_ranges is not None and doc_id not in chapter_ranges:
+                continue
+            
+            doc_length = None
+            content = None
+            first_line = 0
+            if chapter_ranges is not None:
+                # 只读取章节所在的行，按这些行统计词频和长度
+                first_line, last_line = chapter_ranges[doc_id]
+                chapter_lines = self.get_document_lines(doc_id, first_line, last_line)
+                content = '\n'.join(chapter_lines)
+                chapter_words = self._tokenize_text('\n'.join(self._indexed_lines(doc_id, chapter_lines, first_line)))
+                doc_terms = Counter(chapter_words)
+                doc_length = len(chapter_words)
+            elif doc_num is None:
+                content = self.cold_tier.load(doc_id)
+                if not content:
+                    continue
+                self._ensure_page_map(doc_id, content)
+                doc_terms = Counter(self._tokenize_text(content))
+            elif doc_terms is None:
+                doc_terms = self._document_term_freqs(doc_id, query_words)
+            if match_all and not all(word in doc_terms for word in query_words):
+                continue
             
             # 计算BM25和TF-IDF分数
-            bm25_score = self._calculate_bm25_score(query, doc_id)
-            tfidf_score = self._calculate_tfidf_score(query, doc_id)
+            if impact_scores is not None and doc_num is not None and chapter_ranges is None:
+                bm25_score = self.impact_index.dequantize(impact_scores[doc_num])
+            else:
+                bm25_score = self._calculate_bm25_score(query, doc_id, doc_terms=doc_terms, doc_length=doc_length)
+            tfidf_score = self._calculate_tfidf_score(query, doc_id, doc_terms=doc_terms, doc_length=doc_length)
             
             # 归一化分数
-            bm25_score_norm = bm25_score / max(bm25_score, 1e-6)
-            tfidf_score_norm = tfidf_score / max(tfidf_score, 1e-6)
+            bm25_score_norm = bm25_score / max(bm25_score, SCORE_EPSILON)
+            tfidf_score_norm = tfidf_score / max(tfidf_score, SCORE_EPSILON)
             
             # 计算混合分数
             hybrid_score = bm25_weight * bm25_score_norm + tfidf_weight * tfidf_score_norm
             
             if hybrid_score > 0:
-                # 提取上下文
-                context = self._extract_context(query, doc_id)
-                
                 result = {
                     "type": "hybrid_search",
                     "query": query,
@@ -323,63 +756,179 @@ class KnowledgeBaseSearchEngine:
                     "hybrid_score": hybrid_score,
                     "bm25_score": bm25_score,
                     "tfidf_score": tfidf_score,
-                    "context": context,
+                    "context": [],
+                    "pages": [],
                     "summary": doc.get("summary", ""),
                     "keywords": doc.get("keywords", [])
                 }
-                results.append(result)
+                if chapter:
+                    result["chapter"] = chapter
+                # 上下文只为最终返回的结果提取，冷存储文档和章节切片的内容暂存到那时
+                results.append((result, content, first_line))
         
         # 按混合分数排序
-        results.sort(key=lambda x: x["hybrid_score"], reverse=True)
-        return results[:limit]
+        results.sort(key=lambda x: x[0]["hybrid_score"], reverse=True)
+        return results, impact_complete
+    
+    def _finish_results(self, query_words: List[str], ranked: List[tuple],
+                        impact_complete: Optional[bool] = None,
+                        collapse_duplicates: bool = True) -> List[Dict[str, Any]]:
+        """
+        为_rank_documents排好序的结果提取上下文和页码
+        
+        Args:
+            query_words: 查询词
+            ranked: 要返回的(结果, 暂存的内容, 内容第一行的行号)
+            impact_complete: 不为None时写入结果的impact_complete
+            collapse_duplicates: 是否合并不同结果之间近似重复的上下文
+        """
+        results = []
+        for result, content, first_line in ranked:
+            result["context"] = self._extract_context_terms(query_words, result["document_id"], content, first_line)
+            if impact_complete is not None:
+                result["impact_complete"] = impact_complete
+            results.append(result)
+        
+        # 各报告相互引用的统计和段落只保留排名最高的一份
+        if collapse_duplicates:
+            collapse_duplicate_contexts(results)
+        # 页码按合并后留下的上下文计算
+        for result in results:
+            result["pages"] = context_pages(result["context"])
+        return results
+    
+    def facet_search(self, query: str, limit: int = 10, filters=None) -> Dict[str, Any]:
+        """
+        带分面统计的混合搜索
+        
+        Args:
+            query: 搜索查询
+            limit: 返回结果数量限制
+            filters: 过滤条件
+        
+        Returns:
+            包含结果列表、命中总数和各分面取值计数的字典
+        """
+        # 分面按全部命中文档统计，上下文只为返回的前limit个结果提取
+        query_words = self._tokenize_text(query)
+        ranked, _ = self._rank_documents(query, query_words, filters=filters)
+        return {
+            "results": self._finish_results(query_words, ranked[:limit]),
+            "total": len(ranked),
+            "facets": self.facet_index.facet_counts(entry[0]["document_id"] for entry in ranked)
+        }
     
     def _extract_context(self, query: str, doc_id: str) -> List[Dict[str, Any]]:
         """提取查询相关的上下文"""
-        content = self.document_contents.get(doc_id, "")
+        return self._extract_context_terms(self._tokenize_text(query), doc_id)
+    
+    def _extract_context_terms(self, query_words: List[str], doc_id: str,
+                               content: Optional[str] = None, first_line: int = 0) -> List[Dict[str, Any]]:
+        """
+        按已分好的查询词提取上下文，content为空时取内存中的文档内容，
+        文档在压缩存储中时只读取含查询词的行；
+        content为章节切片时first_line为切片第一行在文档中的行号，段落序号和页码按文档行号计算
+        """
+        if content is None:
+            content = self.document_contents.get(doc_id)
+        if content is None and self.document_store.contains(doc_id):
+            return self._extract_stored_context_terms(query_words, doc_id)
         if not content:
             return []
         
         contexts = []
-        query_words = self._tokenize_text(query)
         paragraphs = content.split('\n')
         
         for i, para in enumerate(paragraphs):
-            para_words = self._tokenize_text(para)
-            
-            if any(word in para_words for word in query_words):
-                start = max(0, i - 1)
-                end = min(len(paragraphs), i + 2)
-                context_paras = paragraphs[start:end]
-                
-                context = {
-                    "paragraph_index": i,
-                    "content": para.strip(),
-                    "context": '\n'.join(context_paras).strip(),
-                    "relevance": sum(1 for word in query_words if word in para_words) / len(query_words)
-                }
+            context = self._context_entry(query_words, doc_id, first_line + i, para,
+                                          paragraphs[max(0, i - 1):i + 2])
+            if context:
+                contexts.append(context)
+        
+        contexts.sort(key=lambda x: x["relevance"], reverse=True)
+        return contexts[:3]
+    
+    def _extract_stored_context_terms(self, query_words: List[str], doc_id: str) -> List[Dict[str, Any]]:
+        """
+        从压缩存储提取上下文：先用子串索引找出含查询词的行，
+        再经块缓存只读取这些行及其前后各一行，结果与逐行扫描全文相同
+        """
+        contexts = []
+        for line_no in self.substring_index.lines_containing(doc_id, query_words):
+            context_paras = self.document_store.get_lines(doc_id, max(0, line_no - 1), line_no + 2)
+            para = context_paras[1] if line_no > 0 else context_paras[0]
+            context = self._context_entry(query_words, doc_id, line_no, para, context_paras)
+            if context:
                 contexts.append(context)
         
         contexts.sort(key=lambda x: x["relevance"], reverse=True)
         return contexts[:3]
     
+    def _context_entry(self, query_words: List[str], doc_id: str, line_no: int,
+                       para: str, context_paras: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        段落含查询词时生成上下文条目，line_no为段落在文档中的行号；
+        近似重复的段落不生成条目，规范副本的条目带有各重复段落的引用(duplicates)
+        """
+        if (doc_id, line_no) in self.duplicate_passages:
+            return None
+        para_words = set(self._tokenize_text(para))
+        if not any(word in para_words for word in query_words):
+            return None
+        context = {
+            "paragraph_index": line_no,
+            "page": self.page_map.page_of_line(doc_id, line_no),
+            "content": para.strip(),
+            "context": '\n'.join(context_paras).strip(),
+            "relevance": sum(1 for word in query_words if word in para_words) / len(query_words)
+        }
+        duplicates = self.passage_duplicates.get((doc_id, line_no))
+        if duplicates:
+            context["duplicates"] = [dict(duplicate) for duplicate in duplicates]
+        return context
+    
     def search_by_keyword_hybrid(self, keyword: str, limit: int = 10) -> List[Dict[str, Any]]:
         """基于关键词的混合搜索"""
         return self.hybrid_search(keyword, limit)
     
     def search_by_topic_hybrid(self, topic: str, limit: int = 10) -> List[Dict[str, Any]]:
         """基于主题的混合搜索"""
-        topic_keywords = []
-        topics = self.topic_index.get("topics", {})
-        if topic in topics:
-            topic_data = topics[topic]
-            for subtopic, data in topic_data.get("subtopics", {}).items():
-                topic_keywords.extend(data.get("key_terms", []))
+        if not self.topic_vectors.has_topic(topic):
+            # 未知主题按普通查询处理
+            results = self.hybrid_search(topic, limit)
+            for result in results:
+                result["topic"] = topic
+                result["topic_keywords"] = [topic]
+            return results
         
-        if not topic_keywords:
-            topic_keywords = [topic]
+        # 直接使用建索引时预计算的主题文档排序
+        topic_keywords = self.topic_vectors.key_terms[topic]
+        topic_terms = self.topic_vectors.topic_terms(topic)
+        docs = {doc["id"]: doc for doc in self.documents + self.cold_documents}
+        results = []
         
-        query = " ".join(topic_keywords)
-        results = self.hybrid_search(query, limit)
+        for ranked in self.topic_vectors.search(topic, limit):
+            doc = docs[ranked["document_id"]]
+            cache_key = (topic, doc["id"])
+            if cache_key not in self._topic_context_cache:
+                content = self._topic_document_content(doc["id"])
+                self._topic_context_cache[cache_key] = self._extract_context_terms(topic_terms, doc["id"], content)
+            result = {
+                "type": "hybrid_search",
+                "query": " ".join(topic_keywords),
+                "document_id": doc["id"],
+                "title": doc["title"],
+                "author": doc.get("author", ""),
+                "publish_date": doc.get("publish_date", ""),
+                "hybrid_score": ranked["hybrid_score"],
+                "bm25_score": ranked["bm25_score"],
+                "tfidf_score": ranked["tfidf_score"],
+                "context": self._topic_context_cache[cache_key],
+                "pages": context_pages(self._topic_context_cache[cache_key]),
+                "summary": doc.get("summary", ""),
+                "keywords": doc.get("keywords", [])
+            }
+            results.append(result)
         
         for result in results:
             result["topic"] = topic
@@ -387,6 +936,14 @@ class KnowledgeBaseSearchEngine:
         
         return results
     
+    def _topic_document_content(self, doc_id: str) -> Optional[str]:
+        """主题上下文需要预先读出的文档内容：冷存储文档从磁盘读取，其余返回None由_extract_context_terms读取"""
+        if self.cold_tier.contains(doc_id) and doc_id not in self.document_contents:
+            content = self.cold_tier.load(doc_id)
+            self._ensure_page_map(doc_id, content)
+            return content
+        return None
+    
     def search_content(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """
         在文档内容中搜索
@@ -400,36 +957,63 @@ class KnowledgeBaseSearchEngine:
         """
         results = []
         
-        for doc in self.document_index.get("documents", []):
-            content = self.get_document_content(doc["id"])
-            if content and query.lower() in content.lower():
-                # 找到匹配的段落
-                paragraphs = content.split('\n')
-                matches = []
-                
-                for i, para in enumerate(paragraphs):
-                    if query.lower() in para.lower():
-                        matches.append({
-                            "paragraph": i + 1,
-                            "content": para.strip(),
-                            "context": paragraphs[max(0, i-1):min(len(paragraphs), i+2)]
-                        })
-                
-                if matches:
-                    result = {
-                        "type": "content_match",
-                        "query": query,
-                        "document_id": doc["id"],
-                        "title": doc["title"],
-                        "matches": matches,
-                        "relevance_score": len(matches) / doc.get("line_count", 1)
-                    }
-                    results.append(result)
+        # 子串索引按文档汇总匹配的段落，查询时无需读取磁盘
+        doc_matches = self.substring_index.search(query)
+        
+        for doc in self.documents + self.cold_documents:
+            if doc["id"] in doc_matches:
+                matches = doc_matches[doc["id"]]
+            else:
+                # 冷存储文档不在子串索引中，读盘逐行查找（子串可能落在词项中间，无法用布隆过滤器排除）
+                matches = self._scan_cold_document(query, doc["id"]) if self.cold_tier.contains(doc["id"]) else None
+            if matches:
+                for match in matches:
+                    match["page"] = self.page_map.page_of_line(doc["id"], match["paragraph"] - 1)
+                result = {
+                    "type": "content_match",
+                    "query": query,
+                    "document_id": doc["id"],
+                    "title": doc["title"],
+                    "matches": matches,
+                    "pages": context_pages(matches),
+                    "relevance_score": len(matches) / doc.get("line_count", 1)
+                }
+                results.append(result)
         
         # 按相关性排序并限制结果数量
         results.sort(key=lambda x: x.get("relevance_score", 0), reverse=True)
         return results[:limit]
     
+    def _scan_cold_document(self, query: str, doc_id: str) -> List[Dict[str, Any]]:
+        """在冷存储文档中逐行查找子串，匹配的格式与子串索引一致"""
+        if not query:
+            return []
+        content = self.cold_tier.load(doc_id)
+        if not content:
+            return []
+        self._ensure_page_map(doc_id, content)
+        
+        folded_query = query.lower()
+        lines = content.split('\n')
+        matches = []
+        offset = 0
+        for i, line in enumerate(lines):
+            folded = line.lower()
+            pos = folded.find(folded_query)
+            if pos != -1:
+                positions = []
+                while pos != -1:
+                    positions.append(offset + pos)
+                    pos = folded.find(folded_query, pos + 1)
+                matches.append({
+                    "paragraph": i + 1,
+                    "positions": positions,
+                    "content": line.strip(),
+                    "context": lines[max(0, i - 1):i + 2]
+                })
+            offset += len(line) + 1
+        return matches
+    
     def get_related_keywords(self, keyword: str) -> List[str]:
         """
         获取相关关键词
@@ -7,11 +7,19 @@
 
 import json
 import re
+import sys
 import math
 from pathlib import Path
 from typing import List, Dict, Any
 from collections import defaultdict, Counter
 
+# 添加当前目录到Python路径
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from topic_vectors import TopicVectorIndex
+from facet_index import FacetIndex
+
 class SimpleHybridSearch:
     def __init__(self, base_path: str = "."):
         self.base_path = Path(base_path)
@@ -27,6 +35,10 @@ class SimpleHybridSearch:
         self.document_contents = {}
         self.term_freq = defaultdict(lambda: defaultdict(int))
         self.doc_freq = defaultdict(int)
+        self.doc_lengths = {}
+        self.term_ids = {}
+        self.topic_vectors = TopicVectorIndex(self._tokenize)
+        self.facet_index = FacetIndex()
         self.avg_doc_length = 0
         self.total_docs = 0
         
@@ -52,12 +64,15 @@ class SimpleHybridSearch:
                 # 分词
                 words = self._tokenize(content)
                 doc_length = len(words)
+                self.doc_lengths[doc["id"]] = doc_length
                 
                 # 统计词频
                 word_freq = Counter(words)
                 for word, freq in word_freq.items():
                     self.term_freq[doc["id"]][word] = freq
                     self.doc_freq[word] += 1
+                    if word not in self.term_ids:
+                        self.term_ids[word] = len(self.term_ids)
                 
                 self.avg_doc_length += doc_length
         
@@ -65,6 +80,13 @@ class SimpleHybridSearch:
         if self.total_docs > 0:
             self.avg_doc_length /= self.total_docs
         
+        # 分面位图用于在打分前按分类、作者、年份过滤
+        self.facet_index.build(self.documents)
+        
+        # 主题向量和主题文档排序在建索引时预先计算
+        self.topic_vectors.build(self.topic_index, self.term_ids, self.term_freq, self.doc_freq,
+                                 self.doc_lengths, self.avg_doc_length, self.total_docs)
+        
         print(f"索引构建完成: {self.total_docs}个文档")
     
     def _get_document_content(self, doc_id: str) -> str:
@@ -131,11 +153,14 @@ class SimpleHybridSearch:
         
         return score
     
-    def hybrid_search(self, query: str, limit: int = 10) -> List[Dict]:
+    def hybrid_search(self, query: str, limit: int = 10, filters=None) -> List[Dict]:
         results = []
+        candidates = self.facet_index.filter_documents(filters)
         
         for doc in self.documents:
             doc_id = doc["id"]
+            if candidates is not None and doc_id not in candidates:
+                continue
             
             # 计算BM25和TF-IDF分数
             bm25_score = self._bm25_score(query, doc_id)
@@ -163,20 +188,33 @@ class SimpleHybridSearch:
         results.sort(key=lambda x: x["hybrid_score"], reverse=True)
         return results[:limit]
     
+    def facet_search(self, query: str, limit: int = 10, filters=None) -> Dict:
+        # 对全部命中结果统计分面，再截取前limit个
+        matched = self.hybrid_search(query, len(self.documents), filters)
+        return {
+            "results": matched[:limit],
+            "total": len(matched),
+            "facets": self.facet_index.facet_counts(r["doc_id"] for r in matched)
+        }
+    
     def search_by_topic(self, topic: str, limit: int = 10) -> List[Dict]:
-        # 获取主题相关关键词
-        topic_keywords = []
-        topics = self.topic_index.get("topics", {})
-        if topic in topics:
-            topic_data = topics[topic]
-            for subtopic, data in topic_data.get("subtopics", {}).items():
-                topic_keywords.extend(data.get("key_terms", []))
-        
-        if not topic_keywords:
-            topic_keywords = [topic]
-        
-        query = " ".join(topic_keywords)
-        return self.hybrid_search(query, limit)
+        # 未知主题按普通查询处理
+        if not self.topic_vectors.has_topic(topic):
+            return self.hybrid_search(topic, limit)
+        
+        docs = {doc["id"]: doc for doc in self.documents}
+        results = []
+        for ranked in self.topic_vectors.search(topic, limit):
+            doc = docs[ranked["document_id"]]
+            results.append({
+                "title": doc["title"],
+                "doc_id": doc["id"],
+                "hybrid_score": ranked["hybrid_score"],
+                "bm25_score": ranked["bm25_score"],
+                "tfidf_score": ranked["tfidf_score"],
+                "summary": doc.get("summary", "")
+            })
+        return results
 
 def main():
     print("=== 银行行业政策知识库混合搜索 ===")
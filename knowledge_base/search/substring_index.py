@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+知识库子串索引
+基于字符n-gram倒排位置表的任意子串检索。
+索引不保存语料文本：查询按覆盖全部字符的n-gram逐个核对位置表即可确认命中，
+返回结果时需要的行文本通过read_lines按需读取（搜索引擎中经压缩存储的块缓存读取）。
+位置表把n-gram编码为整数排序存放，全部位置拼接在一个uint32数组中
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 每个字符编码占用的位数（Unicode码位不超过0x10FFFF）
+CHAR_BITS = 21
+
+# 整数编码（64位）能容纳的最大n-gram长度
+MAX_NGRAM_SIZE = 3
+
+
+def fold_case(text: str) -> str:
+    """
+    大小写折叠，保证折叠前后字符位置一一对应
+    
+    Args:
+        text: 原始文本
+    
+    Returns:
+        折叠后的文本（长度与原文相同）
+    """
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    # 个别字符（如'İ'）小写后长度会变化，逐字符处理以保持偏移不变
+    return ''.join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+def encode_gram(gram: str) -> int:
+    """把长度不超过MAX_NGRAM_SIZE的n-gram编码为整数"""
+    code = 0
+    for ch in gram:
+        code = (code << CHAR_BITS) | ord(ch)
+    return code
+
+
+class PositionTable:
+    """n-gram -> 升序位置列表的紧凑表"""
+    
+    def __init__(self, positions: Optional[Dict[str, List[int]]] = None):
+        """
+        Args:
+            positions: n-gram到升序位置列表的映射
+        """
+        self.codes = array('Q')
+        self.offsets = array('I', [0])
+        self.positions = array('I')
+        for code, gram in sorted((encode_gram(gram), gram) for gram in positions or {}):
+            self.codes.append(code)
+            self.positions.extend(positions[gram])
+            self.offsets.append(len(self.positions))
+    
+    def __len__(self) -> int:
+        return len(self.codes)
+    
+    def span(self, gram: str) -> Tuple[int, int]:
+        """n-gram的位置在positions中的范围[start, end)，不存在时为空范围"""
+        code = encode_gram(gram)
+        i = bisect_left(self.codes, code)
+        if i == len(self.codes) or self.codes[i] != code:
+            return 0, 0
+        return self.offsets[i], self.offsets[i + 1]
+    
+    def contains(self, span: Tuple[int, int], position: int) -> bool:
+        """位置是否在span范围的位置列表中"""
+        i = bisect_left(self.positions, position, span[0], span[1])
+        return i < span[1] and self.positions[i] == position
+    
+    def size_bytes(self) -> int:
+        """编码、偏移和位置数组占用的字节数"""
+        return sum(len(data) * data.itemsize for data in (self.codes, self.offsets, self.positions))
+
+
+class SubstringIndex:
+    """字符n-gram子串索引"""
+    
+    def __init__(self, ngram_size: int = 2,
+                 read_lines: Optional[Callable[[str, int, int], List[str]]] = None):
+        """
+        初始化子串索引
+        
+        Args:
+            ngram_size: 建立位置表的n-gram长度（2或3），短于该长度的查询使用单字位置表
+            read_lines: 读取文档行范围的函数(文档ID, 起始行, 结束行) -> 行列表，
+                不给出时保留build传入的文档字典的引用，从中切分行
+        """
+        if not 2 <= ngram_size <= MAX_NGRAM_SIZE:
+            raise ValueError(f"n-gram长度必须在2到{MAX_NGRAM_SIZE}之间: {ngram_size}")
+        self.ngram_size = ngram_size
+        self.read_lines = read_lines
+        self.documents: Optional[Dict[str, str]] = None
+        self.corpus_length = 0
+        self.doc_ids: List[str] = []
+        self.doc_numbers: Dict[str, int] = {}
+        self.doc_starts = array('I')
+        self.doc_first_lines = array('I')
+        self.line_starts = array('I')
+        self.unigrams = PositionTable()
+        self.ngrams = PositionTable()
+    
+    def build(self, documents: Dict[str, str]):
+        """
+        基于文档内容构建索引，所有文档按换行拼接后的偏移作为位置
+        
+        Args:
+            documents: 文档ID到文档内容的映射
+        """
+        offset = 0
+        self.doc_ids = []
+        self.doc_numbers = {}
+        self.doc_starts = array('I')
+        self.doc_first_lines = array('I')
+        self.line_starts = array('I')
+        unigrams = defaultdict(list)
+        ngrams = defaultdict(list)
+        n = self.ngram_size
+        
+        for doc_id, content in documents.items():
+            self.doc_numbers[doc_id] = len(self.doc_ids)
+            self.doc_ids.append(doc_id)
+            self.doc_starts.append(offset)
+            self.doc_first_lines.append(len(self.line_starts))
+            
+            # 逐行建立位置表，记录每一行在语料中的起始位置
+            for line in fold_case(content).split('\n'):
+                self.line_starts.append(offset)
+                for i, ch in enumerate(line):
+                    unigrams[ch].append(offset + i)
+                for i in range(len(line) - n + 1):
+                    ngrams[line[i:i + n]].append(offset + i)
+                offset += len(line) + 1
+        
+        self.corpus_length = offset
+        self.unigrams = PositionTable(unigrams)
+        self.ngrams = PositionTable(ngrams)
+        self.documents = documents if self.read_lines is None else None
+        
+        logger.info(f"子串索引构建完成: {len(self.doc_ids)}个文档, {offset}个字符, "
+                    f"{len(self.ngrams)}个{n}-gram, 位置表{self.size_bytes() / 1024:.0f}KB")
+    
+    def size_bytes(self) -> int:
+        """常驻内存的位置表和行偏移数组的字节数"""
+        arrays = (self.doc_starts, self.doc_first_lines, self.line_starts)
+        return (self.unigrams.size_bytes() + self.ngrams.size_bytes()
+                + sum(len(data) * data.itemsize for data in arrays))
+    
+    def find(self, query: str) -> List[int]:
+        """
+        查找查询在语料中的全部出现位置（不跨行）
+        
+        查询按覆盖全部字符的n-gram（查询短于n时为单字）核对：
+        从位置最少的n-gram取候选，其余n-gram在各自位置表中二分查找对应位置
+        
+        Args:
+            query: 查询子串
+        
+        Returns:
+            升序排列的语料偏移列表
+        """
+        if not query or '\n' in query:
+            return []
+        
+        query = fold_case(query)
+        n = self.ngram_size if len(query) >= self.ngram_size else 1
+        table = self.ngrams if n > 1 else self.unigrams
+        offsets = sorted(set(range(0, len(query) - n + 1, n)) | {len(query) - n})
+        spans = {offset: table.span(query[offset:offset + n]) for offset in offsets}
+        if any(start == end for start, end in spans.values()):
+            return []
+        
+        best = min(spans, key=lambda offset: spans[offset][1] - spans[offset][0])
+        others = [(offset - best, spans[offset]) for offset in offsets if offset != best]
+        matches = []
+        for i in range(*spans[best]):
+            pos = table.positions[i]
+            if all(table.contains(span, pos + delta) for delta, span in others):
+                matches.append(pos - best)
+        return matches
+    
+    def locate(self, position: int) -> Tuple[str, int]:
+        """
+        将语料偏移解析为(文档ID, 文档内行号)，行号从0开始
+        """
+        doc_idx = bisect_right(self.doc_starts, position) - 1
+        line_idx = bisect_right(self.line_starts, position) - 1
+        return self.doc_ids[doc_idx], line_idx - self.doc_first_lines[doc_idx]
+    
+    def lines_containing(self, doc_id: str, queries: Iterable[str]) -> List[int]:
+        """
+        文档中包含任一查询子串的行（不区分大小写）
+        
+        Returns:
+            升序排列的文档内行号，从0开始
+        """
+        doc_idx = self.doc_numbers.get(doc_id)
+        if doc_idx is None:
+            return []
+        doc_start = self.doc_starts[doc_idx]
+        doc_end = self.doc_starts[doc_idx + 1] if doc_idx + 1 < len(self.doc_ids) else self.corpus_length
+        first_line = self.doc_first_lines[doc_idx]
+        
+        lines = set()
+        for query in queries:
+            for pos in self.find(query):
+                if doc_start <= pos < doc_end:
+                    lines.add(bisect_right(self.line_starts, pos) - 1 - first_line)
+        return sorted(lines)
+    
+    def _read_lines(self, doc_id: str, start: int, end: int) -> List[str]:
+        """读取文档的行范围[start, end)"""
+        if self.read_lines is not None:
+            return self.read_lines(doc_id, start, end)
+        return self.documents[doc_id].split('\n')[start:end]
+    
+    def search(self, query: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        子串搜索，按文档汇总匹配的行
+        
+        Args:
+            query: 查询子串
+        
+        Returns:
+            文档ID到匹配列表的映射，每个匹配包含行号(从1开始)、命中位置、行内容和上下文
+        """
+        results = defaultdict(list)
+        seen_lines = set()
+        
+        for pos in self.find(query):
+            doc_idx = bisect_right(self.doc_starts, pos) - 1
+            doc_id = self.doc_ids[doc_idx]
+            global_line = bisect_right(self.line_starts, pos) - 1
+            if global_line in seen_lines:
+                results[doc_id][-1]["positions"].append(pos - self.doc_starts[doc_idx])
+                continue
+            seen_lines.add(global_line)
+            results[doc_id].append({
+                "paragraph": global_line - self.doc_first_lines[doc_idx] + 1,
+                "positions": [pos - self.doc_starts[doc_idx]]
+            })
+        
+        # 每个文档只读取一次覆盖全部命中行的行范围，上下文为命中行及其前后各一行（不超出文档范围）
+        for doc_id, matches in results.items():
+            first = max(0, matches[0]["paragraph"] - 2)
+            lines = self._read_lines(doc_id, first, matches[-1]["paragraph"] + 1)
+            for match in matches:
+                line = match["paragraph"] - 1
+                match["content"] = lines[line - first].strip()
+                match["context"] = lines[max(0, line - 1) - first:line + 2 - first]
+        
+        return dict(results)
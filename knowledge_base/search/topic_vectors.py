@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+主题向量索引
+在建索引时把每个主题的key_terms编译成基于词项ID的加权向量（主题质心），
+并预先计算各主题的文档排序，主题浏览时直接查表
+"""
+
+import math
+from collections import Counter
+from typing import List, Dict, Any, Callable
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TopicVectorIndex:
+    """主题质心向量与预排序文档列表"""
+    
+    def __init__(self, tokenize: Callable[[str], List[str]],
+                 bm25_weight: float = 0.6, tfidf_weight: float = 0.4):
+        """
+        初始化主题向量索引
+        
+        Args:
+            tokenize: 与搜索引擎一致的分词函数
+            bm25_weight: BM25权重
+            tfidf_weight: TF-IDF权重
+        """
+        self.tokenize = tokenize
+        self.bm25_weight = bm25_weight
+        self.tfidf_weight = tfidf_weight
+        self.key_terms: Dict[str, List[str]] = {}
+        self.vectors: Dict[str, Dict[int, float]] = {}
+        self.rankings: Dict[str, List[Dict[str, Any]]] = {}
+        self.id_terms: Dict[int, str] = {}
+    
+    @staticmethod
+    def collect_key_terms(topic_data: Dict[str, Any]) -> List[str]:
+        """收集主题下所有子主题的key_terms"""
+        key_terms = []
+        for subtopic, data in topic_data.get("subtopics", {}).items():
+            key_terms.extend(data.get("key_terms", []))
+        return key_terms
+    
+    def build(self, topic_index: Dict[str, Any], term_ids: Dict[str, int],
+              term_freq: Dict[str, Dict[str, int]], doc_freq: Dict[str, int],
+              doc_lengths: Dict[str, int], avg_doc_length: float, total_docs: int,
+              k1: float = 1.2, b: float = 0.75):
+        """
+        编译主题向量并预计算每个主题的文档排序，重建索引时重新调用即可刷新
+        
+        Args:
+            topic_index: 主题索引
+            term_ids: 词项到词项ID的映射
+            term_freq: 文档ID -> 词项 -> 词频
+            doc_freq: 词项 -> 文档频率
+            doc_lengths: 文档ID -> 文档长度（词数）
+            avg_doc_length: 平均文档长度
+            total_docs: 文档总数
+            k1: BM25参数k1
+            b: BM25参数b
+        """
+        self.key_terms = {}
+        self.vectors = {}
+        self.rankings = {}
+        self.id_terms = {term_id: term for term, term_id in term_ids.items()}
+        
+        for topic, topic_data in topic_index.get("topics", {}).items():
+            key_terms = self.collect_key_terms(topic_data) or [topic]
+            self.key_terms[topic] = key_terms
+            
+            # 词项权重 = 在key_terms中的出现次数 × IDF，再做L2归一化
+            counts = Counter(term for term in self.tokenize(" ".join(key_terms)) if term in term_ids)
+            vector = {}
+            for term, count in counts.items():
+                idf = math.log((total_docs + 1) / (doc_freq[term] + 0.5))
+                vector[term_ids[term]] = count * idf
+            norm = math.sqrt(sum(w * w for w in vector.values()))
+            if norm > 0:
+                vector = {term_id: w / norm for term_id, w in vector.items()}
+            self.vectors[topic] = vector
+            
+            self.rankings[topic] = self._rank_documents(vector, term_freq, doc_freq, doc_lengths,
+                                                        avg_doc_length, total_docs, k1, b)
+        
+        logger.info(f"主题向量编译完成: {len(self.vectors)}个主题")
+    
+    def _rank_documents(self, vector: Dict[int, float], term_freq: Dict[str, Dict[str, int]],
+                        doc_freq: Dict[str, int], doc_lengths: Dict[str, int],
+                        avg_doc_length: float, total_docs: int,
+                        k1: float, b: float) -> List[Dict[str, Any]]:
+        """按主题向量对所有文档打分并排序"""
+        ranking = []
+        for doc_id, doc_terms in term_freq.items():
+            doc_length = doc_lengths.get(doc_id, 0)
+            if doc_length == 0:
+                continue
+            
+            bm25_score = 0.0
+            tfidf_score = 0.0
+            for term_id, weight in vector.items():
+                term = self.id_terms[term_id]
+                tf = doc_terms.get(term, 0)
+                if not tf:
+                    continue
+                df = doc_freq[term]
+                bm25_idf = math.log((total_docs - df + 0.5) / (df + 0.5))
+                denominator = tf + k1 * (1 - b + b * (doc_length / avg_doc_length))
+                bm25_score += weight * bm25_idf * (tf * (k1 + 1) / denominator)
+                tfidf_score += weight * (tf / doc_length) * math.log(total_docs / df)
+            
+            bm25_norm = bm25_score / max(bm25_score, 1e-6)
+            tfidf_norm = tfidf_score / max(tfidf_score, 1e-6)
+            hybrid_score = self.bm25_weight * bm25_norm + self.tfidf_weight * tfidf_norm
+            if hybrid_score > 0:
+                ranking.append({
+                    "document_id": doc_id,
+                    "hybrid_score": hybrid_score,
+                    "bm25_score": bm25_score,
+                    "tfidf_score": tfidf_score
+                })
+        
+        ranking.sort(key=lambda x: (x["hybrid_score"], x["bm25_score"]), reverse=True)
+        return ranking
+    
+    def has_topic(self, topic: str) -> bool:
+        """主题是否已编译"""
+        return topic in self.rankings
+    
+    def search(self, topic: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        返回主题的预排序文档列表
+        
+        Args:
+            topic: 主题名称
+            limit: 返回结果数量限制
+        
+        Returns:
+            包含document_id及各项分数的列表
+        """
+        return [dict(item) for item in self.rankings.get(topic, [])[:limit]]
+    
+    def topic_terms(self, topic: str) -> List[str]:
+        """主题向量中的词项，按权重降序"""
+        vector = self.vectors.get(topic, {})
+        return [self.id_terms[term_id] for term_id, _ in
+                sorted(vector.items(), key=lambda x: x[1], reverse=True)]
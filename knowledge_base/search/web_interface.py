@@ -14,8 +14,9 @@ from pathlib import Path
 current_dir = Path(__file__).parent
 sys.path.append(str(current_dir))
 
-from search_engine import KnowledgeBaseSearchEngine
+from fts5_backend import create_search_engine
 from simple_hybrid import SimpleHybridSearch
+from facet_index import parse_filter_args
 
 app = Flask(__name__)
 
@@ -27,7 +28,7 @@ def initialize_engines():
     """初始化搜索引擎"""
     global search_engine, hybrid_engine
     try:
-        search_engine = KnowledgeBaseSearchEngine(".")
+        search_engine = create_search_engine(".")
         hybrid_engine = SimpleHybridSearch(".")
         return True
     except Exception as e:
@@ -100,17 +101,23 @@ def search_hybrid():
     
     query = request.args.get('q', '').strip()
     limit = int(request.args.get('limit', 10))
+    # 其余参数作为过滤条件，如 category=普惠金融&year>=2024
+    filters = parse_filter_args(request.args.items(multi=True))
     
     if not query:
         return jsonify({"error": "请输入搜索查询"}), 400
     
     try:
-        results = hybrid_engine.hybrid_search(query, limit)
+        search_result = hybrid_engine.facet_search(query, limit, filters)
         return jsonify({
             "query": query,
-            "results": results,
-            "total": len(results)
+            "filters": filters,
+            "results": search_result["results"],
+            "total": search_result["total"],
+            "facets": search_result["facets"]
         })
+    except ValueError as e:
+        return jsonify({"error": f"过滤条件错误: {str(e)}"}), 400
     except Exception as e:
         return jsonify({"error": f"搜索失败: {str(e)}"}), 500
 
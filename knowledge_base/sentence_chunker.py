@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按句切分的流式分块器
+逐行流式读取文本，以中文句末标点（。！？；）和页码标记为边界切出句子，
+再把句子按字符预算打包成块，块之间按字符数保留重叠句子。
+块只记录行号和字节偏移，与chunk_table配合使用
+"""
+
+import re
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, NamedTuple
+
+SENTENCE_END_PATTERN = re.compile(r'[。！？；]')
+PAGE_MARKER_PATTERN = re.compile(r'^--- 第 (\d+) 页 ---$')
+
+# 默认每块的字符预算和重叠字符数
+DEFAULT_CHUNK_CHARS = 500
+DEFAULT_OVERLAP_CHARS = 100
+
+
+class Sentence(NamedTuple):
+    """句子在文件中的位置"""
+    start: int
+    end: int
+    start_line: int
+    end_line: int
+    chars: int
+    page: int
+
+
+def iter_sentences(file_path: Path, max_chars: int = DEFAULT_CHUNK_CHARS) -> Iterator[Sentence]:
+    """
+    流式切分句子，内存占用只与单行长度有关
+    
+    超过max_chars仍没有句末标点的内容（如表格）在行尾强制断开
+    
+    Args:
+        file_path: 文本文件路径
+        max_chars: 单个句子的最大字符数
+    """
+    page = 0
+    offset = 0
+    start = None
+    start_line = 0
+    chars = 0
+    
+    with open(file_path, 'rb') as f:
+        for line_number, raw_line in enumerate(f, 1):
+            line = raw_line.decode('utf-8')
+            content = line.rstrip('\r\n')
+            
+            marker = PAGE_MARKER_PATTERN.match(content.strip())
+            if marker:
+                # 页码标记前的残句单独成句，标记行本身不进入任何块
+                if start is not None and chars:
+                    yield Sentence(start, offset, start_line, line_number - 1, chars, page)
+                start = None
+                chars = 0
+                page = int(marker.group(1))
+                offset += len(raw_line)
+                continue
+            
+            position = 0
+            for match in SENTENCE_END_PATTERN.finditer(content):
+                if start is None:
+                    start = offset + len(content[:position].encode('utf-8'))
+                    start_line = line_number
+                chars += match.end() - position
+                position = match.end()
+                end = offset + len(content[:position].encode('utf-8'))
+                yield Sentence(start, end, start_line, line_number, chars, page)
+                start = None
+                chars = 0
+            
+            rest = len(content) - position
+            if rest and content[position:].strip():
+                if start is None:
+                    start = offset + len(content[:position].encode('utf-8'))
+                    start_line = line_number
+                chars += rest
+            
+            offset += len(raw_line)
+            
+            if start is not None and chars >= max_chars:
+                yield Sentence(start, offset, start_line, line_number, chars, page)
+                start = None
+                chars = 0
+    
+    if start is not None and chars:
+        yield Sentence(start, offset, start_line, line_number, chars, page)
+
+
+def _make_chunk(sentences: List[Sentence]) -> Dict[str, Any]:
+    return {
+        "lines": [sentences[0].start_line, sentences[-1].end_line],
+        "offsets": [sentences[0].start, sentences[-1].end],
+        "chars": sum(s.chars for s in sentences),
+        "page": sentences[0].page
+    }
+
+
+def iter_chunks(sentences: Iterator[Sentence], chunk_chars: int = DEFAULT_CHUNK_CHARS,
+                overlap_chars: int = DEFAULT_OVERLAP_CHARS) -> Iterator[Dict[str, Any]]:
+    """
+    把句子打包成不超过字符预算的块，块不跨页
+    
+    Args:
+        sentences: 句子序列
+        chunk_chars: 每块的字符预算
+        overlap_chars: 相邻块之间重叠的字符数上限（按整句计）
+    """
+    current: List[Sentence] = []
+    current_chars = 0
+    
+    for sentence in sentences:
+        if current and (sentence.page != current[-1].page or current_chars + sentence.chars > chunk_chars):
+            yield _make_chunk(current)
+            
+            # 同一页内保留末尾若干整句作为重叠，且至少丢掉一句以保证前进
+            overlap: List[Sentence] = []
+            overlap_total = 0
+            if sentence.page == current[-1].page:
+                for previous in reversed(current[1:]):
+                    if overlap_total + previous.chars > overlap_chars:
+                        break
+                    overlap.insert(0, previous)
+                    overlap_total += previous.chars
+            current = overlap
+            current_chars = overlap_total
+        
+        current.append(sentence)
+        current_chars += sentence.chars
+    
+    if current:
+        yield _make_chunk(current)
+
+
+def split_text_file_by_sentences(file_path: Path, chunk_chars: int = DEFAULT_CHUNK_CHARS,
+                                 overlap_chars: int = DEFAULT_OVERLAP_CHARS) -> List[Dict[str, Any]]:
+    """
+    按句切分单个文本文件
+    
+    Args:
+        file_path: 文本文件路径
+        chunk_chars: 每块的字符预算
+        overlap_chars: 块之间的重叠字符数
+    
+    Returns:
+        包含切分块的列表，每块记录起止行号、起止字节偏移、字符数和页码
+    """
+    return list(iter_chunks(iter_sentences(file_path, chunk_chars), chunk_chars, overlap_chars))
@@ -5,15 +5,20 @@ PDF文本提取工具 - 使用阿里云百炼API
 用于从PDF文件中提取文本内容
 """
 
-import requests
-import time
 import zipfile
 import os
+import sys
+import shutil
 import logging
 import json
 import base64
 from pathlib import Path
 
+from src.page_writer import extract_pdf_to_text
+from src.extraction_manifest import ExtractionManifest, MANIFEST_NAME
+from src.backend_selection import plan_backends
+from src.rate_limiter import TokenBucket, rate_limited
+
 # ==================== 配置区域 ====================
 # 请在此处配置您的API密钥和其他设置
 # 
@@ -28,11 +33,17 @@ ALIBABA_API_BASE_URL = 'https://dashscope.aliyuncs.com'
 
 # 处理设置
 RETRY_INTERVAL = 5  # 重试间隔（秒）
-FILE_PROCESSING_INTERVAL = 3  # 文件处理间隔（秒）
+FILE_PROCESSING_INTERVAL = 3  # 远程API调用的平均间隔（秒），由令牌桶限速，本地提取不等待
+API_BURST = 1  # 令牌桶容量，允许连续发出的远程调用数
 MAX_RETRIES = 60  # 最大重试次数（5分钟）
+EXTRACTION_WORKERS = os.cpu_count() or 1  # 并行提取页面的进程数
+PAGE_TIMEOUT = 60  # 单页提取超时（秒）
+EXTRACTION_BACKEND = 'auto'  # 提取后端：auto（抽样选择）、pypdf2、pdfplumber
+OFFLINE_MODE = False  # 离线模式：跳过API密钥验证，只做本地提取（也可用 --offline 开启）
 
 # 输出设置
 OUTPUT_DIR = 'extracted_texts'  # 输出目录
+KNOWLEDGE_BASE_DIR = 'knowledge_base'  # 知识库目录，提取后把有变化的文本同步到其中并重新切分，为空时不同步
 LOG_FILE = 'pdf_processing.log'  # 日志文件
 
 # ==================== 配置区域结束 ====================
@@ -48,6 +59,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 只对访问远程服务的调用限速
+api_bucket = TokenBucket(1.0 / FILE_PROCESSING_INTERVAL, API_BURST)
+
+@rate_limited(api_bucket)
+def post_api(url, headers, data, timeout=10):
+    """
+    向远程API发送POST请求（经令牌桶限速）
+    
+    Returns:
+        requests.Response
+    """
+    import requests
+    return requests.post(url, headers=headers, json=data, timeout=timeout)
+
 def check_api_key():
     """
     检查API密钥是否有效
@@ -75,7 +100,7 @@ def check_api_key():
     }
     
     try:
-        res = requests.post(url, headers=headers, json=data, timeout=10)
+        res = post_api(url, headers, data, timeout=10)
         if res.status_code == 200:
             logger.info("阿里云百炼API密钥验证成功！")
             return True
@@ -93,13 +118,13 @@ def check_api_key():
 
 def process_pdf_with_python(file_path):
     """
-    使用Python库处理PDF文件
+    使用Python库处理PDF文件，逐页写出提取的文本和页索引
     
     Args:
         file_path: PDF文件路径
         
     Returns:
-        str: 提取的文本内容
+        dict: 写出结果（文本文件、页索引、页数、字符数、提取后端），失败时返回None
     """
     try:
         # 检查文件大小
@@ -108,122 +133,93 @@ def process_pdf_with_python(file_path):
         
         logger.info(f"文件大小: {file_size_mb:.1f}MB")
         
-        # 尝试使用PyPDF2提取文本
-        try:
-            import PyPDF2
-            logger.info("使用PyPDF2提取文本...")
-            
-            with open(file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page_num, page in enumerate(reader.pages):
-                    logger.info(f"处理第 {page_num + 1}/{len(reader.pages)} 页")
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += f"\n--- 第 {page_num + 1} 页 ---\n"
-                        text += page_text
-                        text += "\n"
-                
-                if text.strip():
-                    logger.info(f"PDF文本提取成功，长度: {len(text)} 字符")
-                    return text
-                else:
-                    logger.warning("PyPDF2未能提取到文本，尝试其他方法...")
-                    
-        except ImportError:
-            logger.warning("PyPDF2未安装，尝试其他方法...")
-        except Exception as e:
-            logger.warning(f"PyPDF2提取失败: {e}")
-        
-        # 如果PyPDF2失败，尝试使用pdfplumber
-        try:
-            import pdfplumber
-            logger.info("使用pdfplumber提取文本...")
-            
-            text = ""
-            with pdfplumber.open(file_path) as pdf:
-                for page_num, page in enumerate(pdf.pages):
-                    logger.info(f"处理第 {page_num + 1}/{len(pdf.pages)} 页")
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += f"\n--- 第 {page_num + 1} 页 ---\n"
-                        text += page_text
-                        text += "\n"
-            
-            if text.strip():
-                logger.info(f"PDF文本提取成功，长度: {len(text)} 字符")
-                return text
-            else:
-                logger.warning("pdfplumber也未能提取到文本")
-                
-        except ImportError:
-            logger.warning("pdfplumber未安装")
-        except Exception as e:
-            logger.warning(f"pdfplumber提取失败: {e}")
+        # 抽样选择后端，再按页码区间并行提取，每页提取完即写入文件
+        backends, selection = plan_backends(file_path, EXTRACTION_BACKEND)
+        logger.info(f"使用 {EXTRACTION_WORKERS} 个进程提取文本...")
+        result = extract_pdf_to_text(file_path, get_output_file(file_path), EXTRACTION_WORKERS, PAGE_TIMEOUT,
+                                     backends)
+        if result:
+            result["backend_selection"] = selection
+            logger.info(f"使用{result['backend']}提取文本成功，长度: {result['chars']} 字符")
+            logger.info(f"文本内容已保存到: {result['text_file']}")
+            return result
         
         # 如果都失败了，返回错误信息
-        logger.error("所有PDF提取方法都失败了")
-        return "无法提取PDF文本内容。请确保PDF文件包含可提取的文本，或者安装PyPDF2或pdfplumber库。"
+        logger.error("所有PDF提取方法都失败了，请确保PDF文件包含可提取的文本，或者安装PyPDF2或pdfplumber库。")
+        return None
             
     except Exception as e:
         logger.error(f"处理PDF文件时出错: {e}")
         return None
 
-def save_extracted_text(file_name, text_content):
+def get_output_file(file_name):
     """
-    保存提取的文本内容到文件
+    生成提取文本的输出文件路径
     
     Args:
         file_name: 原始PDF文件名
-        text_content: 提取的文本内容
     """
-    try:
-        # 创建输出目录
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
-        
-        # 生成输出文件名
-        base_name = Path(file_name).stem
-        output_file = os.path.join(OUTPUT_DIR, f"{base_name}_extracted.txt")
-        
-        # 保存文本内容
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(text_content)
-        
-        logger.info(f"文本内容已保存到: {output_file}")
-        return output_file
-        
-    except Exception as e:
-        logger.error(f"保存文本内容时出错: {e}")
-        return None
-
-
-
-
+    # 创建输出目录
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    
+    # 生成输出文件名
+    base_name = Path(file_name).stem
+    return os.path.join(OUTPUT_DIR, f"{base_name}_extracted.txt")
 
-def process_pdf_file(file_name):
+def process_pdf_file(file_name, manifest=None):
     """
     处理单个PDF文件的完整流程
     
     Args:
         file_name: PDF文件名
+        manifest: 提取清单，提取成功后记录该文件
     """
     logger.info(f"开始处理PDF文件: {file_name}")
     
-    # 使用Python库处理PDF
-    extracted_text = process_pdf_with_python(file_name)
-    if extracted_text:
-        # 保存提取的文本内容
-        output_file = save_extracted_text(file_name, extracted_text)
-        if output_file:
-            logger.info(f"PDF文件 {file_name} 处理完成")
-            return True
-        else:
-            logger.error(f"保存PDF文件 {file_name} 的提取内容失败")
-            return False
+    # 使用Python库处理PDF，提取的文本边提取边写入输出目录
+    result = process_pdf_with_python(file_name)
+    if result:
+        if manifest is not None:
+            manifest.record(file_name, result)
+        logger.info(f"PDF文件 {file_name} 处理完成，共 {result['pages']} 页")
+        return True
     else:
         logger.error(f"PDF文件 {file_name} 处理失败")
         return False
 
+def update_knowledge_base(changed_files):
+    """
+    把本次提取的文本同步到知识库的data/extracted_texts，并重新切分
+    
+    切分按文本内容的SHA1增量进行，只有这些文件会被重新切分；
+    搜索索引在引擎启动时建立，FTS5后端和压缩文档存储同样只更新内容变化的文档
+    
+    Args:
+        changed_files: 本次提取成功的PDF文件名
+    
+    Returns:
+        重新切分的文本文件名列表
+    """
+    kb_dir = Path(KNOWLEDGE_BASE_DIR) if KNOWLEDGE_BASE_DIR else None
+    if kb_dir is None or not kb_dir.exists():
+        logger.info("未配置知识库目录，跳过切分")
+        return []
+    
+    text_dir = kb_dir / "data" / "extracted_texts"
+    text_dir.mkdir(parents=True, exist_ok=True)
+    for file_name in changed_files:
+        output_file = Path(get_output_file(file_name))
+        shutil.copy2(output_file, text_dir / output_file.name)
+        logger.info(f"已同步到知识库: {output_file.name}")
+    
+    # 切分工具按知识库目录内的模块路径导入
+    kb_path = str(kb_dir.resolve())
+    if kb_path not in sys.path:
+        sys.path.insert(0, kb_path)
+    from convert_txt_to_json import chunk_text_files
+    
+    return chunk_text_files(text_dir, kb_dir / "data" / "json_segments", base_path=kb_dir)
+
 def get_pdf_files():
     """
     自动获取当前目录下的所有PDF文件
@@ -241,11 +237,23 @@ def get_pdf_files():
 
 def main():
     """主函数 - 批量处理所有PDF文件"""
-    # 首先验证API密钥
-    logger.info("正在验证API密钥...")
-    if not check_api_key():
-        logger.error("API密钥验证失败，程序退出。")
-        return
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="PDF文本提取工具")
+    parser.add_argument("--offline", action="store_true", default=OFFLINE_MODE,
+                        help="离线模式，跳过API密钥验证")
+    parser.add_argument("--skip-kb", action="store_true",
+                        help="只提取文本，不同步到知识库、不重新切分")
+    args = parser.parse_args()
+    
+    # 提取完全在本地进行，只有在线模式才验证API密钥
+    if args.offline:
+        logger.info("离线模式，跳过API密钥验证")
+    else:
+        logger.info("正在验证API密钥...")
+        if not check_api_key():
+            logger.error("API密钥验证失败，程序退出。")
+            return
     
     # 自动获取当前目录下的所有PDF文件
     pdf_files = get_pdf_files()
@@ -261,30 +269,49 @@ def main():
     
     logger.info(f"开始批量处理 {len(pdf_files)} 个PDF文件...")
     
-    # 逐个处理每个PDF文件
+    # 提取清单中内容未变化的PDF直接跳过
+    manifest = ExtractionManifest(Path(OUTPUT_DIR) / MANIFEST_NAME)
+    changed_files = []
+    
+    # 逐个处理每个PDF文件，本地提取之间不等待，每个文件内部按页并行
     for i, file_name in enumerate(pdf_files, 1):
+        if manifest.is_unchanged(file_name):
+            logger.info(f"文件 {file_name} 未变化，跳过")
+            continue
+        
         logger.info(f"\n{'='*50}")
         logger.info(f"正在处理第 {i}/{len(pdf_files)} 个文件: {file_name}")
         logger.info(f"{'='*50}")
         
         try:
             # 处理PDF文件
-            success = process_pdf_file(file_name)
+            success = process_pdf_file(file_name, manifest)
             if success:
+                changed_files.append(file_name)
                 logger.info(f"文件 {file_name} 处理完成")
             else:
                 logger.error(f"文件 {file_name} 处理失败")
         except Exception as e:
             logger.error(f"处理文件 {file_name} 时出错: {e}")
             continue
-        
-        # 在处理下一个文件前稍作等待，避免API限制
-        if i < len(pdf_files):
-            logger.info(f"等待{FILE_PROCESSING_INTERVAL}秒后处理下一个文件...")
-            time.sleep(FILE_PROCESSING_INTERVAL)
+    
+    manifest.prune(pdf_files)
+    manifest.save()
     
     logger.info(f"\n{'='*50}")
     logger.info("所有PDF文件处理完成！")
+    if changed_files:
+        logger.info(f"本次提取 {len(changed_files)} 个文件:")
+        for file_name in changed_files:
+            logger.info(f"  - {file_name}")
+        if not args.skip_kb:
+            try:
+                rechunked = update_knowledge_base(changed_files)
+                logger.info(f"知识库重新切分 {len(rechunked)} 个文件，搜索引擎下次启动时按新内容建索引")
+            except Exception as e:
+                logger.error(f"更新知识库失败: {e}")
+    else:
+        logger.info("所有PDF文件均未变化")
     logger.info(f"{'='*50}")
 
 if __name__ == "__main__":
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+银行行业政策知识库 - 增量分析缓存
+按提取文本的SHA1缓存每篇文档的分析结果和词项指纹。
+只有文本变化的文档需要重新读取和分析，其余文档以词项指纹参与IDF统计，分析结果直接沿用。
+沿用的结果按当时的语料计算IDF，语料变化后不会随之更新；需要全部刷新时使用--reanalyze
+"""
+
+import base64
+import json
+import os
+from array import array
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional
+import logging
+
+from extraction_manifest import file_sha1
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_CACHE_NAME = "analysis_cache.json"
+
+
+class AnalysisCache:
+    """文档分析结果缓存，以PDF文件名为键"""
+    
+    def __init__(self, cache_path: Path, signature: str):
+        """
+        Args:
+            cache_path: 缓存文件路径，不存在时视为空缓存
+            signature: 分析器签名（ContentAnalyzer.signature），与缓存中的不同时缓存全部失效
+        """
+        self.cache_path = Path(cache_path)
+        self.signature = signature
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.cache_path.exists():
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("signature") == signature:
+                    self.entries = data.get("files", {})
+                else:
+                    logger.info("分析方法或主题画像已变化，缓存的分析结果全部失效")
+            except Exception as e:
+                logger.warning(f"读取分析缓存失败，将重新分析全部文档: {e}")
+    
+    def text_sha1(self, name: str, text_file: Path) -> str:
+        """
+        提取文本的SHA1，大小和修改时间都与缓存记录相同时不重新计算
+        """
+        stat = Path(text_file).stat()
+        entry = self.entries.get(name)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return entry["sha1"]
+        return file_sha1(text_file)
+    
+    def get(self, name: str, text_sha1: str) -> Optional[Dict[str, Any]]:
+        """
+        文本未变化时返回缓存的分析结果和词项指纹
+        
+        Returns:
+            {"analysis": 分析结果, "fingerprint": 词项指纹(array)}，没有可用缓存时返回None
+        """
+        entry = self.entries.get(name)
+        if entry is None or entry["sha1"] != text_sha1:
+            return None
+        return {"analysis": entry["analysis"],
+                "fingerprint": array('I', base64.b64decode(entry["fingerprint"]))}
+    
+    def record(self, name: str, text_file: Path, text_sha1: str, analysis: Dict[str, Any], fingerprint):
+        """
+        记录一篇文档的分析结果
+        
+        Args:
+            name: PDF文件名
+            text_file: 提取文本文件
+            text_sha1: 提取文本的SHA1
+            analysis: 分析结果
+            fingerprint: 词项指纹（uint32升序数组）
+        """
+        stat = Path(text_file).stat()
+        self.entries[name] = {
+            "sha1": text_sha1,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "analysis": analysis,
+            "fingerprint": base64.b64encode(bytes(memoryview(fingerprint))).decode('ascii')
+        }
+    
+    def prune(self, names: Iterable[str]):
+        """只保留给出的文件名的缓存"""
+        names = set(names)
+        for name in [name for name in self.entries if name not in names]:
+            del self.entries[name]
+    
+    def save(self):
+        """保存缓存（先写临时文件再替换）"""
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"signature": self.signature, "files": self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+银行行业政策知识库 - 按抽样页选择提取后端
+从每个PDF中均匀抽取几页，分别用各个可用后端提取，按速度和质量
+（中文字符比例、乱码比例、表格）打分，为整份文档选择后端。
+pdfplumber慢但更擅长表格，只有在它明显更好或文档含表格时才会被选中
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import logging
+
+# 添加当前目录到Python路径
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from parallel_extraction import count_pages, BACKENDS
+
+logger = logging.getLogger(__name__)
+
+# 默认抽样页数
+DEFAULT_SAMPLE_PAGES = 5
+
+# 质量与最好的后端相差在该范围内时视为相当，选择更快的后端
+QUALITY_TOLERANCE = 0.05
+
+# 抽样页中含表格的比例达到该值时优先选择pdfplumber
+TABLE_PAGE_RATIO = 0.4
+
+CJK_PATTERN = re.compile(r'[\u4e00-\u9fa5]')
+# pdfminer无法映射字形时输出 (cid:NN)；另计替换字符、私用区字符和控制字符
+GARBAGE_PATTERN = re.compile(r'\(cid:\d+\)|[\ufffd\ue000-\uf8ff\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def sample_page_indexes(page_count: int, samples: int = DEFAULT_SAMPLE_PAGES) -> List[int]:
+    """在全文范围内均匀抽取页序号（从0开始）"""
+    if page_count <= samples:
+        return list(range(page_count))
+    return sorted({int((i + 0.5) * page_count / samples) for i in range(samples)})
+
+
+def text_quality(text: str) -> Dict[str, float]:
+    """
+    文本质量指标
+    
+    Returns:
+        chars（非空白字符数）、cjk_ratio（中文字符比例）、garbage_ratio（乱码比例）
+    """
+    compact = re.sub(r'\s+', '', text)
+    if not compact:
+        return {"chars": 0, "cjk_ratio": 0.0, "garbage_ratio": 0.0}
+    garbage = sum(len(match) for match in GARBAGE_PATTERN.findall(compact))
+    return {
+        "chars": len(compact),
+        "cjk_ratio": len(CJK_PATTERN.findall(compact)) / len(compact),
+        "garbage_ratio": min(garbage / len(compact), 1.0)
+    }
+
+
+def _sample_backend(pdf_path: Path, backend: str, page_indexes: List[int]) -> Dict[str, Any]:
+    """
+    用一个后端提取抽样页
+    
+    Raises:
+        ImportError: 后端库未安装
+    """
+    texts = []
+    table_pages = None
+    if backend == "pypdf2":
+        import PyPDF2
+        with open(pdf_path, 'rb') as file:
+            pages = PyPDF2.PdfReader(file).pages
+            start = time.perf_counter()
+            texts = [pages[i].extract_text() or "" for i in page_indexes]
+            elapsed = time.perf_counter() - start
+    elif backend == "pdfplumber":
+        import pdfplumber
+        with pdfplumber.open(pdf_path) as pdf:
+            start = time.perf_counter()
+            texts = [pdf.pages[i].extract_text() or "" for i in page_indexes]
+            elapsed = time.perf_counter() - start
+            # 表格检测不计入提取耗时
+            table_pages = sum(1 for i in page_indexes if pdf.pages[i].find_tables())
+    else:
+        raise ValueError(f"未知的提取后端: {backend}")
+    
+    quality = text_quality("".join(texts))
+    return {
+        "seconds_per_page": elapsed / max(len(page_indexes), 1),
+        "table_pages": table_pages,
+        **quality
+    }
+
+
+def select_backend(pdf_path: Path, backends: Sequence[str] = BACKENDS,
+                   samples: int = DEFAULT_SAMPLE_PAGES) -> Optional[Dict[str, Any]]:
+    """
+    抽样比较各后端，为文档选择提取后端
+    
+    质量分 = 文本量（相对最多的后端） × (1 - 乱码比例) × (0.5 + 0.5 × 中文字符比例)。
+    质量与最好的后端相差不超过QUALITY_TOLERANCE的后端中选择最快的；
+    抽样页中含表格较多且pdfplumber质量相当时选择pdfplumber
+    
+    Args:
+        pdf_path: PDF文件路径
+        backends: 候选后端
+        samples: 抽样页数
+    
+    Returns:
+        选择结果：backend、reason、sample_pages（页码从1开始）和各后端的指标；
+        没有可用后端或都提取不到文本时返回None
+    """
+    scores: Dict[str, Dict[str, Any]] = {}
+    page_indexes = None
+    for backend in backends:
+        try:
+            if page_indexes is None:
+                page_indexes = sample_page_indexes(count_pages(pdf_path, backend), samples)
+            scores[backend] = _sample_backend(pdf_path, backend, page_indexes)
+        except ImportError:
+            logger.info(f"{backend}未安装，不参与选择")
+        except Exception as e:
+            logger.warning(f"{backend}抽样提取失败: {e}")
+    
+    max_chars = max((score["chars"] for score in scores.values()), default=0)
+    if not max_chars:
+        return None
+    
+    for score in scores.values():
+        score["quality"] = (score["chars"] / max_chars * (1 - score["garbage_ratio"])
+                            * (0.5 + 0.5 * score["cjk_ratio"]))
+    
+    best_quality = max(score["quality"] for score in scores.values())
+    acceptable = [backend for backend, score in scores.items()
+                  if score["quality"] >= best_quality - QUALITY_TOLERANCE]
+    table_pages = scores.get("pdfplumber", {}).get("table_pages") or 0
+    
+    if "pdfplumber" in acceptable and table_pages >= TABLE_PAGE_RATIO * len(page_indexes):
+        backend = "pdfplumber"
+        reason = f"抽样页中 {table_pages}/{len(page_indexes)} 页含表格"
+    else:
+        backend = min(acceptable, key=lambda name: scores[name]["seconds_per_page"])
+        reason = "质量相当的后端中最快" if len(acceptable) > 1 else "质量最好"
+    
+    logger.info(f"{Path(pdf_path).name} 选择提取后端 {backend}（{reason}）")
+    return {
+        "backend": backend,
+        "reason": reason,
+        "sample_pages": [i + 1 for i in page_indexes],
+        "scores": scores
+    }
+
+
+def plan_backends(pdf_path: Path, backend: str = "auto") -> Tuple[List[str], Optional[Dict[str, Any]]]:
+    """
+    确定提取时依次尝试的后端
+    
+    Args:
+        pdf_path: PDF文件路径
+        backend: "auto"时抽样选择，否则只使用指定的后端
+    
+    Returns:
+        (后端列表, 抽样选择结果)，选中的后端排在最前，其余后端作为整篇提取失败时的备选
+    """
+    if backend != "auto":
+        return [backend], None
+    selection = select_backend(pdf_path)
+    if selection is None:
+        return list(BACKENDS), None
+    return [selection["backend"]] + [name for name in BACKENDS if name != selection["backend"]], selection
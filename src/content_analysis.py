@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+银行行业政策知识库 - 批量内容分析
+对整个语料一次性做矩阵运算：语料级TF-IDF关键词、在句子相似度矩阵上迭代的TextRank抽取式摘要、
+按topic_index.json中的主题画像做主题归类。
+增量分析时未变化的文档只以词项指纹（词项CRC32的升序数组）参与文档频率统计，不再读取和切分原文。
+依赖numpy和scikit-learn（可选依赖），未安装时只返回基本统计；安装了jieba时按词切分，否则使用中文字符n-gram
+"""
+
+import hashlib
+import json
+import re
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 分析方法或结果格式变化时递增，缓存的分析结果全部失效
+ANALYSIS_VERSION = 1
+
+# 默认输出的关键词数、摘要句数和每篇文档最多归入的主题数
+DEFAULT_KEYWORDS = 10
+DEFAULT_SUMMARY_SENTENCES = 3
+DEFAULT_MAX_TOPICS = 2
+
+# 相似度达到最相关主题的该比例时一并归入
+TOPIC_SHARE = 0.6
+
+# 参与TextRank的句子长度范围和每篇文档的句子上限（超过时均匀抽取，相似度矩阵为句数的平方）
+MIN_SENTENCE_CHARS = 20
+MAX_SENTENCE_CHARS = 150
+MAX_SENTENCES = 2000
+
+# 与已选摘要句的相似度超过该值的句子不再入选
+SUMMARY_REDUNDANCY = 0.7
+
+# TextRank阻尼系数、收敛阈值和最大迭代次数
+DAMPING = 0.85
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 100
+
+# 去掉页码后在文档中重复出现至少该次数的行视为页眉页脚、图表来源等版式文字
+REPEATED_LINE_MIN = 5
+
+# 词项的出现大多落在某个多一个字的词项里时，用后者代替（“惠金”->“普惠金融”）
+EXTENSION_RATIO = 0.8
+
+# n-gram模式下不作为词首词尾的虚字，避免产生“的金融”“发展和”之类的跨词片段
+STOP_CHARS = set("的了和与在是对及为等将也而并或从以其于之各该这此中上下个")
+
+# 计量单位和时间词在报告中出现频繁但不表达主题，不作为关键词（“亿元”“季度”“同比”等）
+NOISE_TERM_PATTERN = re.compile(
+    r'^(?:[万亿]*[美欧日英]?元|个?百分点|[万亿]+[户人家笔只]|'
+    r'[一二三四上下]?季度末?|[上下]半年|年[末初底度内]|月[末初底份]|[上下]旬|'
+    r'同比|环比|今年|去年|明年|前年|近年来?|以来|期间|年份)$')
+
+PAGE_MARKER_PATTERN = re.compile(r'---\s*第\s*\d+\s*页\s*---')
+CJK_RUN_PATTERN = re.compile(r'[\u4e00-\u9fa5]+|[a-zA-Z]{2,}')
+CJK_PATTERN = re.compile(r'[\u4e00-\u9fa5]')
+SENTENCE_END_PATTERN = re.compile(r'(?<=[。！？；!?])')
+
+
+def clean_text(text: str) -> str:
+    """去掉页码标记和反复出现的页眉页脚，并把PDF排版造成的行内断行接回去"""
+    lines = PAGE_MARKER_PATTERN.sub("\n", text).splitlines()
+    keys = [re.sub(r'^\s*\d+|\d+\s*$', '', line).strip() for line in lines]
+    repeated = {key for key, count in Counter(keys).items() if key and count >= REPEATED_LINE_MIN}
+    text = "\n".join(line for line, key in zip(lines, keys) if key not in repeated)
+    text = re.sub(r'(?<=[^\x00-\xff])\s*\n\s*(?=[^\x00-\xff])', '', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def split_sentences(text: str) -> List[str]:
+    """按句末标点切句，只保留长度适中且以中文为主的句子（去掉目录、表格行等）"""
+    sentences = []
+    for sentence in SENTENCE_END_PATTERN.split(text):
+        sentence = sentence.strip()
+        if not MIN_SENTENCE_CHARS <= len(sentence) <= MAX_SENTENCE_CHARS:
+            continue
+        if len(CJK_PATTERN.findall(sentence)) / len(sentence) < 0.5:
+            continue
+        sentences.append(sentence)
+    return sentences
+
+
+def ngram_terms(text: str, min_n: int = 2, max_n: int = 5) -> List[str]:
+    """中文连续片段切成2-5字的n-gram，英文单词原样保留"""
+    terms = []
+    for run in CJK_RUN_PATTERN.findall(text):
+        if not CJK_PATTERN.match(run):
+            terms.append(run.lower())
+            continue
+        for n in range(min_n, max_n + 1):
+            for i in range(len(run) - n + 1):
+                gram = run[i:i + n]
+                if gram[0] not in STOP_CHARS and gram[-1] not in STOP_CHARS:
+                    terms.append(gram)
+    return terms
+
+
+def get_term_analyzer():
+    """关键词的切分函数：有jieba时取两个字以上的词，否则用n-gram"""
+    try:
+        import jieba
+    except ImportError:
+        return ngram_terms
+    
+    def jieba_terms(text: str) -> List[str]:
+        return [word.lower() for word in jieba.lcut(text)
+                if len(word) >= 2 and CJK_RUN_PATTERN.fullmatch(word)]
+    return jieba_terms
+
+
+def term_hashes(terms: List[str]):
+    """词项的CRC32（numpy uint32数组），与词项指纹比较"""
+    import numpy as np
+    return np.array([zlib.crc32(term.encode('utf-8')) for term in terms], dtype=np.uint32)
+
+
+def fingerprint_contains(fingerprint, hashes):
+    """词项指纹（升序uint32数组）中是否含有各个词项哈希，返回布尔数组"""
+    import numpy as np
+    fingerprint = np.asarray(fingerprint, dtype=np.uint32)
+    if len(fingerprint) == 0:
+        return np.zeros(len(hashes), dtype=bool)
+    positions = np.minimum(np.searchsorted(fingerprint, hashes), len(fingerprint) - 1)
+    return fingerprint[positions] == hashes
+
+
+def load_topic_profiles(topic_index_path: Path) -> Dict[str, str]:
+    """
+    把topic_index.json中的每个主题拼成一段画像文本
+    
+    Returns:
+        主题名 -> 主题名、描述、子主题名和描述、key_terms拼成的文本；文件不存在时为空
+    """
+    topic_index_path = Path(topic_index_path)
+    if not topic_index_path.exists():
+        return {}
+    with open(topic_index_path, 'r', encoding='utf-8') as f:
+        topics = json.load(f).get("topics", {})
+    
+    profiles = {}
+    for topic, topic_data in topics.items():
+        parts = [topic, topic_data.get("description", "")]
+        for subtopic, data in topic_data.get("subtopics", {}).items():
+            parts.append(subtopic)
+            parts.append(data.get("description", ""))
+            parts.extend(data.get("key_terms", []))
+        profiles[topic] = " ".join(part for part in parts if part)
+    return profiles
+
+
+def extend_fragment(term: str, counts: Dict[str, int], extensions: Dict[str, List[str]]) -> str:
+    """n-gram片段的出现大多落在某个多一个字的词项里时，逐字扩展为该词项"""
+    while True:
+        longer = max(extensions.get(term, ()), key=counts.get, default=None)
+        if longer is None or counts[longer] < counts[term] * EXTENSION_RATIO:
+            return term
+        term = longer
+
+
+def overlaps(first: str, second: str) -> bool:
+    """两个词项互为子串，或一个的开头与另一个的结尾重叠两个字以上（“重要性银”与“要性银行”）"""
+    if first in second or second in first:
+        return True
+    for a, b in ((first, second), (second, first)):
+        if any(a.endswith(b[:n]) for n in range(2, min(len(a), len(b)))):
+            return True
+    return False
+
+
+def select_keywords(ranked_terms: List[str], counts: Dict[str, int], limit: int) -> List[str]:
+    """
+    按TF-IDF从高到低取关键词：片段先扩展为完整词项，单位、时间词以及与已选关键词重叠的候选跳过
+    
+    Args:
+        ranked_terms: 按得分从高到低排列的词项
+        counts: 文档内各词项的出现次数
+        limit: 关键词数
+    """
+    extensions: Dict[str, List[str]] = {}
+    for term in counts:
+        if len(term) >= 3:
+            extensions.setdefault(term[1:], []).append(term)
+            extensions.setdefault(term[:-1], []).append(term)
+    
+    keywords = []
+    for term in ranked_terms:
+        term = extend_fragment(term, counts, extensions)
+        if NOISE_TERM_PATTERN.match(term) or any(overlaps(term, keyword) for keyword in keywords):
+            continue
+        keywords.append(term)
+        if len(keywords) >= limit:
+            break
+    return keywords
+
+
+def textrank(similarity, damping: float = DAMPING):
+    """
+    在句子相似度矩阵上做幂迭代求TextRank得分
+    
+    Args:
+        similarity: n×n相似度矩阵（numpy数组），对角线会被置零
+        damping: 阻尼系数
+    """
+    import numpy as np
+    
+    n = similarity.shape[0]
+    np.fill_diagonal(similarity, 0.0)
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    # 与其他句子都不相似的句子等概率跳到任意句子
+    transition = np.where(row_sums > 0, similarity / np.where(row_sums > 0, row_sums, 1.0), 1.0 / n)
+    
+    scores = np.full(n, 1.0 / n)
+    for _ in range(MAX_ITERATIONS):
+        updated = (1 - damping) / n + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            return updated
+        scores = updated
+    return scores
+
+
+class ContentAnalyzer:
+    """批量内容分析器"""
+    
+    def __init__(self, topic_index_path: Optional[Path] = None, top_keywords: int = DEFAULT_KEYWORDS,
+                 summary_sentences: int = DEFAULT_SUMMARY_SENTENCES, max_topics: int = DEFAULT_MAX_TOPICS):
+        """
+        Args:
+            topic_index_path: topic_index.json路径，不给出或不存在时不做主题归类
+            top_keywords: 每篇文档的关键词数
+            summary_sentences: 摘要句数
+            max_topics: 每篇文档最多归入的主题数
+        """
+        self.topic_profiles = load_topic_profiles(topic_index_path) if topic_index_path else {}
+        self.top_keywords = top_keywords
+        self.summary_sentences = summary_sentences
+        self.max_topics = max_topics
+        # 最近一次analyze中各文档的词项指纹，供下次增量分析时代替原文
+        self.term_fingerprints: Dict[str, Any] = {}
+        # 分析方法、参数、主题画像和切分方式的签名，任何一项变化时缓存的分析结果失效
+        settings = [ANALYSIS_VERSION, top_keywords, summary_sentences, max_topics,
+                    self.topic_profiles, get_term_analyzer().__name__]
+        self.signature = hashlib.sha1(json.dumps(settings, ensure_ascii=False, sort_keys=True)
+                                      .encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def _basic_result(name: str, text: str) -> Dict[str, Any]:
+        return {
+            "filename": name,
+            "content_length": len(text),
+            "keywords": [],
+            "summary": "",
+            "topics": [],
+            "entities": []  # 待实现实体识别
+        }
+    
+    def _context_idf(self, counter, count_matrix, context: Dict[str, Any]):
+        """
+        把只有词项指纹的文档计入文档频率
+        
+        主题画像中只出现在这些文档里的词项追加到词表末尾，使主题向量与整体分析时相同
+        
+        Returns:
+            (追加后的词表, 各词项的IDF)
+        """
+        import numpy as np
+        
+        vocabulary = dict(counter.vocabulary_)
+        analyzer = counter.build_analyzer()
+        extras = sorted({term for profile in self.topic_profiles.values() for term in analyzer(profile)}
+                        - set(vocabulary))
+        extra_hashes = term_hashes(extras)
+        extra_df = sum((fingerprint_contains(fingerprint, extra_hashes).astype(np.int64)
+                        for fingerprint in context.values()), np.zeros(len(extras), dtype=np.int64))
+        for term in np.array(extras, dtype=object)[extra_df > 0]:
+            vocabulary[term] = len(vocabulary)
+        
+        hashes = np.concatenate([term_hashes(counter.get_feature_names_out().tolist()), extra_hashes[extra_df > 0]])
+        df = np.bincount(count_matrix.indices, minlength=len(vocabulary))
+        for fingerprint in context.values():
+            df += fingerprint_contains(fingerprint, hashes)
+        # 与TfidfTransformer(smooth_idf=True)相同的公式
+        n_documents = count_matrix.shape[0] + len(context)
+        return vocabulary, np.log((1 + n_documents) / (1 + df)) + 1
+    
+    def analyze(self, texts: Dict[str, str], context: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        批量分析整个语料，IDF按传入的全部文档计算
+        
+        增量分析时只传入变化的文档，未变化的文档通过context给出词项指纹：它们计入IDF，
+        但不重新分析（各自的结果沿用上次的，不随IDF的变化更新）
+        
+        Args:
+            texts: 文件名 -> 文本内容
+            context: 不重新分析的其余文档，文件名 -> 词项指纹（term_fingerprints中的值）
+        
+        Returns:
+            texts中的文件名 -> 分析结果（keywords、summary、topics等）
+        """
+        results = {name: self._basic_result(name, text) for name, text in texts.items()}
+        self.term_fingerprints = {}
+        if not texts:
+            return results
+        try:
+            import numpy as np
+            from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer, TfidfVectorizer
+        except ImportError:
+            logger.warning("numpy或scikit-learn未安装，跳过关键词、摘要和主题分析")
+            return results
+        
+        names = list(texts)
+        cleaned = [clean_text(texts[name]) for name in names]
+        
+        # 关键词：语料级TF-IDF，每行取权重最高的词项
+        counter = CountVectorizer(analyzer=get_term_analyzer())
+        count_matrix = counter.fit_transform(cleaned)
+        vocabulary = counter.get_feature_names_out()
+        topic_counter = counter
+        if context:
+            topic_vocabulary, idf = self._context_idf(counter, count_matrix, context)
+            topic_counter = CountVectorizer(analyzer=counter.analyzer, vocabulary=topic_vocabulary)
+            count_matrix.resize(count_matrix.shape[0], len(topic_vocabulary))
+        transformer = TfidfTransformer(sublinear_tf=True).fit(count_matrix)
+        if context:
+            transformer.idf_ = idf
+        doc_matrix = transformer.transform(count_matrix)
+        
+        hashes = term_hashes(vocabulary.tolist())
+        for row, name in enumerate(names):
+            counts_row, weights_row = count_matrix.getrow(row), doc_matrix.getrow(row)
+            self.term_fingerprints[name] = np.unique(hashes[counts_row.indices])
+            counts = dict(zip(vocabulary[counts_row.indices].tolist(), counts_row.data.tolist()))
+            order = weights_row.indices[np.argsort(-weights_row.data, kind="stable")]
+            results[name]["keywords"] = select_keywords(vocabulary[order].tolist(), counts, self.top_keywords)
+        
+        # 主题：文档向量与主题画像向量的余弦相似度（TF-IDF行向量已做L2归一化）
+        if self.topic_profiles:
+            topic_names = list(self.topic_profiles)
+            topic_matrix = transformer.transform(topic_counter.transform([self.topic_profiles[topic]
+                                                                          for topic in topic_names]))
+            similarity = (doc_matrix @ topic_matrix.T).toarray()
+            for row, name in enumerate(names):
+                best = similarity[row].max()
+                if best <= 0:
+                    continue
+                ranked = [i for i in np.argsort(-similarity[row], kind="stable")[:self.max_topics]
+                          if similarity[row, i] >= best * TOPIC_SHARE]
+                results[name]["topics"] = [{"topic": topic_names[i], "score": round(float(similarity[row, i]), 4)}
+                                           for i in ranked]
+        
+        # 摘要：每篇文档的句子单独向量化（结果只取决于文档本身，增量分析时不受其余文档影响），
+        # 在句子相似度矩阵上做TextRank
+        for name, text in zip(names, cleaned):
+            sentences = split_sentences(text)
+            if len(sentences) > MAX_SENTENCES:
+                step = len(sentences) / MAX_SENTENCES
+                sentences = [sentences[int(i * step)] for i in range(MAX_SENTENCES)]
+            if not sentences:
+                continue
+            
+            block = TfidfVectorizer(analyzer="char", ngram_range=(2, 2),
+                                    sublinear_tf=True).fit_transform(sentences)
+            similarity = (block @ block.T).toarray()
+            scores = textrank(similarity)
+            # 按得分取句，跳过与已选句子几乎相同的句子（报告中常有重复的数据句）
+            top = []
+            for i in np.argsort(-scores, kind="stable"):
+                if all(similarity[i, j] < SUMMARY_REDUNDANCY for j in top):
+                    top.append(i)
+                    if len(top) >= self.summary_sentences:
+                        break
+            results[name]["summary"] = "".join(sentences[i] for i in sorted(top))
+        
+        return results
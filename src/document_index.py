@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+银行行业政策知识库 - 文档索引生成
+用批量内容分析的结果更新知识库的index/document_index.json：
+分析得到的关键词、摘要、分类写入generated_keywords、generated_summary、generated_categories，
+不覆盖人工整理的keywords、summary、categories；摘要和分类只在文档没有人工值时填入（用于展示和分面筛选），
+关键词只留在generated_keywords中，不会进入关键词索引。
+已有文档（按文本文件名对应）同时刷新统计信息，新文档自动生成条目，已删除的PDF对应的条目被移除。
+提取文本被复制到知识库内（新文档放在data/extracted_texts，与pdf_mineru.py一致），
+file_path记录相对于知识库根目录的路径，搜索引擎可以直接读取
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_INDEX_NAME = "document_index.json"
+
+# 没有人工值时用分析结果填入的字段；关键词质量不足以进入关键词索引，只写入generated_keywords
+FILLED_FIELDS = ("summary", "categories")
+
+# 新文档的文本在知识库中的存放目录（相对于知识库根目录）
+KB_TEXT_DIR = "data/extracted_texts"
+
+
+def text_file_name(pdf_name: str) -> str:
+    """PDF对应的提取文本文件名，与PDFPipeline的输出命名一致"""
+    return f"{Path(pdf_name).stem}_extracted.txt"
+
+
+def _document_stats(text_file: Path) -> Dict[str, Any]:
+    text = Path(text_file).read_text(encoding='utf-8')
+    return {
+        "file_size": f"{Path(text_file).stat().st_size // 1024}KB",
+        "char_count": len(text),
+        "line_count": len(text.splitlines())
+    }
+
+
+def _sync_text_file(text_file: Path, kb_root: Path, file_path: str) -> Path:
+    """把提取文本复制到知识库中file_path所指的位置（已在该位置时不复制），返回知识库中的文件"""
+    target = kb_root / file_path.replace("../", "")
+    if not target.exists() or not os.path.samefile(text_file, target):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(text_file, target)
+    return target
+
+
+def _new_document(pdf_name: str, file_path: str) -> Dict[str, Any]:
+    """为新文档生成条目，标题取PDF文件名，发布年份取文件名中的年份"""
+    title = Path(pdf_name).stem
+    year = re.findall(r'(?:19|20)\d{2}', title)
+    return {
+        "id": "doc_" + hashlib.sha1(title.encode('utf-8')).hexdigest()[:12],
+        "title": title,
+        "author": "",
+        "publish_date": year[-1] if year else "",
+        "file_path": file_path,
+        "keywords": [],
+        "categories": [],
+        "chapters": []
+    }
+
+
+def update_document_index(kb_root: Path, analyses: Dict[str, Dict[str, Any]],
+                          removed: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    用分析结果更新文档索引
+    
+    Args:
+        kb_root: 知识库根目录（含index子目录）
+        analyses: PDF文件名 -> {"text_file": 提取文本路径（可以在知识库之外）, "analysis": ContentAnalyzer的分析结果}
+        removed: 已删除的PDF文件名
+    
+    Returns:
+        更新后的文档索引
+    """
+    kb_root = Path(kb_root)
+    index_path = kb_root / "index" / DOCUMENT_INDEX_NAME
+    document_index = {"documents": [], "metadata": {}}
+    if index_path.exists():
+        with open(index_path, 'r', encoding='utf-8') as f:
+            document_index = json.load(f)
+    
+    documents = document_index.setdefault("documents", [])
+    by_file = {Path(doc.get("file_path", "")).name: doc for doc in documents}
+    
+    removed_files = {text_file_name(name) for name in removed}
+    kept = [doc for doc in documents if Path(doc.get("file_path", "")).name not in removed_files]
+    removed_count = len(documents) - len(kept)
+    documents[:] = kept
+    
+    added = 0
+    for pdf_name, item in analyses.items():
+        text_file = Path(item["text_file"])
+        doc = by_file.get(text_file.name)
+        if doc is None:
+            doc = _new_document(pdf_name, f"{KB_TEXT_DIR}/{text_file.name}")
+            documents.append(doc)
+            added += 1
+        # 重新提取的文本也要同步，否则搜索引擎读到的仍是旧内容
+        kb_file = _sync_text_file(text_file, kb_root, doc["file_path"])
+        analysis = item["analysis"]
+        doc.update(_document_stats(kb_file))
+        generated = {
+            "summary": analysis["summary"],
+            "keywords": analysis["keywords"],
+            "categories": [topic["topic"] for topic in analysis["topics"]]
+        }
+        for field, value in generated.items():
+            generated_field = "generated_" + field
+            previous = doc.get(generated_field)
+            # 分析结果为空（如缺少可选依赖、没有主题索引）时保留上次的结果
+            if value or generated_field not in doc:
+                doc[generated_field] = value
+            # 没有人工值、或现值就是上次生成的值时才填入，人工整理的内容不被覆盖
+            if field in FILLED_FIELDS and value and (not doc.get(field) or doc[field] == previous):
+                doc[field] = value
+    
+    metadata = document_index.setdefault("metadata", {})
+    metadata.update({
+        "total_documents": len(documents),
+        "total_characters": sum(doc.get("char_count", 0) for doc in documents),
+        "total_lines": sum(doc.get("line_count", 0) for doc in documents),
+        "update_date": datetime.now().strftime("%Y-%m-%d")
+    })
+    metadata.setdefault("creation_date", metadata["update_date"])
+    metadata.setdefault("version", "1.0")
+    
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_suffix(".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(document_index, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, index_path)
+    
+    logger.info(f"文档索引已更新: {index_path}（更新 {len(analyses) - added} 篇，新增 {added} 篇，"
+                f"移除 {removed_count} 篇）")
+    return document_index
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+银行行业政策知识库 - 增量提取清单
+记录每个PDF的SHA1（流式计算）、大小、修改时间以及提取后端和版本，
+再次运行时未变化的PDF直接跳过，只有新增或修改的PDF需要重新提取和进入后续处理
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "extraction_manifest.json"
+
+# 提取输出格式的版本，格式变化时递增，旧清单中的记录全部失效
+EXTRACTOR_VERSION = 1
+
+BACKEND_MODULES = {
+    "pypdf2": "PyPDF2",
+    "pdfplumber": "pdfplumber"
+}
+
+
+def file_sha1(file_path: Path, block_size: int = 1024 * 1024) -> str:
+    """分块流式计算文件的SHA1，内存占用与文件大小无关"""
+    sha1 = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def backend_version(backend: str) -> Optional[str]:
+    """提取后端库的版本，未安装时返回None"""
+    module_name = BACKEND_MODULES.get(backend)
+    if module_name is None:
+        return None
+    try:
+        module = __import__(module_name)
+    except ImportError:
+        return None
+    return getattr(module, "__version__", "unknown")
+
+
+class ExtractionManifest:
+    """PDF提取清单，以文件名为键"""
+    
+    def __init__(self, manifest_path: Path):
+        """
+        Args:
+            manifest_path: 清单文件路径，不存在时视为空清单
+        """
+        self.manifest_path = Path(manifest_path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._hashes: Dict[str, str] = {}
+        if self.manifest_path.exists():
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("extractor_version") == EXTRACTOR_VERSION:
+                    self.entries = data.get("files", {})
+                else:
+                    logger.info("提取格式版本已变化，清单中的记录全部失效")
+            except Exception as e:
+                logger.warning(f"读取提取清单失败，将重新提取全部文件: {e}")
+    
+    def _sha1(self, pdf_path: Path) -> str:
+        name = Path(pdf_path).name
+        if name not in self._hashes:
+            self._hashes[name] = file_sha1(pdf_path)
+        return self._hashes[name]
+    
+    def is_unchanged(self, pdf_path: Path) -> bool:
+        """
+        判断PDF自上次提取后是否未变化
+        
+        大小和修改时间都相同时不计算哈希；否则比较SHA1，内容相同（如只是被touch）时只更新修改时间。
+        提取结果文件缺失或后端库版本变化时视为需要重新提取
+        """
+        pdf_path = Path(pdf_path)
+        entry = self.entries.get(pdf_path.name)
+        if entry is None:
+            return False
+        if not Path(entry["text_file"]).exists():
+            return False
+        if entry.get("backend_version") != backend_version(entry.get("backend", "")):
+            return False
+        
+        stat = pdf_path.stat()
+        if entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return True
+        if entry["size"] != stat.st_size or entry["sha1"] != self._sha1(pdf_path):
+            return False
+        entry["mtime"] = stat.st_mtime
+        return True
+    
+    def record(self, pdf_path: Path, extraction: Dict[str, Any]):
+        """
+        记录一次成功的提取
+        
+        Args:
+            pdf_path: PDF文件路径
+            extraction: extract_pdf_to_text返回的写出结果
+        """
+        pdf_path = Path(pdf_path)
+        stat = pdf_path.stat()
+        self.entries[pdf_path.name] = {
+            "sha1": self._sha1(pdf_path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "backend": extraction["backend"],
+            "backend_version": backend_version(extraction["backend"]),
+            "text_file": extraction["text_file"],
+            "page_index": extraction["page_index"],
+            "pages": extraction["pages"],
+            "chars": extraction["chars"],
+            "failed_pages": extraction["failed_pages"],
+            "backend_selection": extraction.get("backend_selection"),
+            "extracted_at": datetime.now().isoformat(timespec="seconds")
+        }
+    
+    def prune(self, pdf_paths: Iterable[Path]) -> List[str]:
+        """删除已不存在的PDF的记录，返回被删除的文件名"""
+        names = {Path(pdf_path).name for pdf_path in pdf_paths}
+        removed = [name for name in self.entries if name not in names]
+        for name in removed:
+            del self.entries[name]
+        return removed
+    
+    def save(self):
+        """保存清单（先写临时文件再替换，中断时不会留下半个清单）"""
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"extractor_version": EXTRACTOR_VERSION, "files": self.entries},
+                      f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
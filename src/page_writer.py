@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+银行行业政策知识库 - 逐页流式写出提取文本
+每提取一页就追加写入文本文件，同时在旁边的JSONL页索引中记录该页的字节偏移，
+单个文档的内存占用与页数无关，也不再反复拼接整篇文本。
+每提取若干页把进度提交到检查点日志，中断后再次运行从最后提交的页继续；
+也可以只重新提取指定页码区间，其余页原样保留
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Optional, Sequence
+import logging
+
+# 添加当前目录到Python路径
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from parallel_extraction import PageRecord, iter_pdf_pages, BACKENDS, DEFAULT_PAGE_TIMEOUT
+from extraction_manifest import file_sha1
+
+logger = logging.getLogger(__name__)
+
+PAGE_MARKER = "\n--- 第 {page} 页 ---\n"
+
+# 每提取多少页提交一次检查点
+CHECKPOINT_PAGES = 10
+
+
+def page_index_path(text_path: Path) -> Path:
+    """文本文件对应的页索引路径，如 xxx_extracted.txt -> xxx_extracted.pages.jsonl"""
+    return Path(text_path).with_suffix(".pages.jsonl")
+
+
+def journal_path(text_path: Path) -> Path:
+    """文本文件对应的检查点日志路径，如 xxx_extracted.txt -> xxx_extracted.journal.json"""
+    return Path(text_path).with_suffix(".journal.json")
+
+
+def load_page_index(text_path: Path) -> List[Dict[str, Any]]:
+    """
+    读取页索引
+    
+    Returns:
+        按页码排列的记录，每条含page、start、end（字节偏移，end不含）、chars、failed
+    """
+    with open(page_index_path(text_path), 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ExtractionJournal:
+    """
+    提取检查点日志
+    
+    记录PDF的SHA1、提取后端、已提交的页数，以及提交时文本文件和页索引的字节长度。
+    日志先写临时文件再替换，任何时刻磁盘上都是一份完整的检查点
+    """
+    
+    def __init__(self, text_path: Path):
+        self.path = journal_path(text_path)
+    
+    def load(self) -> Optional[Dict[str, Any]]:
+        """读取最后提交的检查点，不存在或损坏时返回None"""
+        if not self.path.exists():
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"读取检查点失败，将从头提取: {e}")
+            return None
+    
+    def commit(self, state: Dict[str, Any]):
+        """提交检查点"""
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+    
+    def clear(self):
+        """提取完成后删除检查点"""
+        if self.path.exists():
+            self.path.unlink()
+
+
+class PageTextWriter:
+    """逐页写出文本文件和页索引"""
+    
+    def __init__(self, text_path: Path, page_markers: bool = True, newline: str = os.linesep,
+                 resume: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            text_path: 输出文本文件路径
+            page_markers: 是否在每页前写入“--- 第 N 页 ---”标记（知识库切分依赖该标记）
+            newline: 写入文件的换行符，默认与文本模式写文件一致
+            resume: 检查点，给出时截断到检查点处的长度后继续追加
+        """
+        self.text_path = Path(text_path)
+        self.index_path = page_index_path(self.text_path)
+        self.page_markers = page_markers
+        self.newline = newline
+        self.offset = 0
+        self.pages = 0
+        self.chars = 0
+        self.failed_pages: List[int] = []
+        self.resume = resume
+        self._text_file = None
+        self._index_file = None
+    
+    def __enter__(self) -> "PageTextWriter":
+        self.text_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.resume:
+            # 丢弃检查点之后写入的部分（进程被中断时可能只写了半页）
+            self._text_file = open(self.text_path, 'r+b')
+            self._text_file.truncate(self.resume["text_bytes"])
+            self._text_file.seek(0, os.SEEK_END)
+            self._index_file = open(self.index_path, 'r+b')
+            self._index_file.truncate(self.resume["index_bytes"])
+            self._index_file.seek(0, os.SEEK_END)
+            self.offset = self.resume["text_bytes"]
+            self.pages = self.resume["pages"]
+            self.chars = self.resume["chars"]
+            self.failed_pages = list(self.resume["failed_pages"])
+        else:
+            self._text_file = open(self.text_path, 'wb')
+            self._index_file = open(self.index_path, 'wb')
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def close(self):
+        """关闭输出文件"""
+        for f in (self._text_file, self._index_file):
+            if f is not None:
+                f.close()
+        self._text_file = None
+        self._index_file = None
+    
+    def _add_page(self, page: int, data: bytes, chars: int, failed: bool):
+        start = self.offset
+        self._text_file.write(data)
+        self.offset += len(data)
+        
+        self.pages += 1
+        self.chars += chars
+        if failed:
+            self.failed_pages.append(page)
+        self._index_file.write((json.dumps({
+            "page": page,
+            "start": start,
+            "end": self.offset,
+            "chars": chars,
+            "failed": failed
+        }) + "\n").encode('utf-8'))
+    
+    def write_page(self, record: PageRecord):
+        """追加一页，空白页只记入页索引"""
+        data = b""
+        if record.text:
+            block = (PAGE_MARKER.format(page=record.page) if self.page_markers else "") + record.text + "\n"
+            data = block.replace("\r\n", "\n").replace("\n", self.newline).encode('utf-8')
+        self._add_page(record.page, data, len(record.text), record.failed)
+    
+    def copy_pages(self, source, entries: Iterable[Dict[str, Any]]):
+        """
+        从已有文本文件逐页原样复制（按页索引记录的字节范围），偏移量随之平移
+        
+        Args:
+            source: 以二进制方式打开的原文本文件
+            entries: 原页索引中的记录
+        """
+        for entry in entries:
+            source.seek(entry["start"])
+            self._add_page(entry["page"], source.read(entry["end"] - entry["start"]),
+                           entry["chars"], entry["failed"])
+    
+    def checkpoint(self) -> Dict[str, Any]:
+        """把已写出的内容落盘，返回可用于续写的检查点"""
+        for f in (self._text_file, self._index_file):
+            f.flush()
+            os.fsync(f.fileno())
+        return {
+            "pages": self.pages,
+            "chars": self.chars,
+            "failed_pages": self.failed_pages,
+            "text_bytes": self.offset,
+            "index_bytes": self._index_file.tell()
+        }
+    
+    def write_pages(self, records: Iterable[PageRecord]):
+        """逐页写出整个页序列"""
+        for record in records:
+            self.write_page(record)
+    
+    def stats(self) -> Dict[str, Any]:
+        """写出结果的统计信息"""
+        return {
+            "text_file": str(self.text_path),
+            "page_index": str(self.index_path),
+            "pages": self.pages,
+            "chars": self.chars,
+            "bytes": self.offset,
+            "failed_pages": self.failed_pages
+        }
+
+
+def extract_pdf_to_text(pdf_path: Path, text_path: Path, workers: Optional[int] = None,
+                        page_timeout: float = DEFAULT_PAGE_TIMEOUT,
+                        backends: Sequence[str] = BACKENDS,
+                        page_markers: bool = True, resume: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    并行提取PDF并逐页写出文本文件和页索引
+    
+    依次尝试各后端，采用第一个提取到非空文本的后端。
+    每提取CHECKPOINT_PAGES页提交一次检查点，上次提取被中断且PDF未变化时从检查点继续
+    
+    Args:
+        pdf_path: PDF文件路径
+        text_path: 输出文本文件路径
+        workers: 工作进程数，默认为CPU核数
+        page_timeout: 单页超时（秒）
+        backends: 按顺序尝试的提取后端
+        page_markers: 是否写入页码标记
+        resume: 是否从检查点继续
+    
+    Returns:
+        写出结果的统计信息（含backend），所有后端都失败时返回None
+    """
+    sha1 = file_sha1(pdf_path)
+    journal = ExtractionJournal(text_path)
+    state = journal.load() if resume else None
+    if state and (state.get("sha1") != sha1 or state.get("page_markers") != page_markers
+                  or state.get("backend") not in backends
+                  or not Path(text_path).exists() or not page_index_path(text_path).exists()):
+        state = None
+    
+    # 有检查点时先用检查点的后端继续
+    if state:
+        backends = [state["backend"]] + [backend for backend in backends if backend != state["backend"]]
+    
+    for backend in backends:
+        checkpoint = state if state and state["backend"] == backend else None
+        try:
+            with PageTextWriter(text_path, page_markers, resume=checkpoint) as writer:
+                if writer.pages:
+                    logger.info(f"从检查点继续提取 {Path(pdf_path).name}，已完成 {writer.pages} 页")
+                for record in iter_pdf_pages(pdf_path, backend, workers, page_timeout, first_page=writer.pages):
+                    writer.write_page(record)
+                    if writer.pages % CHECKPOINT_PAGES == 0:
+                        journal.commit(dict(writer.checkpoint(), sha1=sha1, backend=backend,
+                                            page_markers=page_markers))
+        except ImportError:
+            logger.warning(f"{backend}未安装，尝试其他方法")
+            continue
+        except Exception as e:
+            logger.warning(f"{backend}提取失败: {e}")
+            continue
+        
+        journal.clear()
+        if writer.chars:
+            if writer.failed_pages:
+                logger.warning(f"{Path(pdf_path).name} 有 {len(writer.failed_pages)} 页提取失败: {writer.failed_pages}")
+            stats = writer.stats()
+            stats["backend"] = backend
+            return stats
+        logger.warning(f"{backend}提取的文本为空: {Path(pdf_path).name}")
+    
+    return None
+
+
+def reextract_pages(pdf_path: Path, text_path: Path, first: int, last: int, backend: str,
+                    workers: Optional[int] = None, page_timeout: float = DEFAULT_PAGE_TIMEOUT,
+                    page_markers: bool = True) -> Dict[str, Any]:
+    """
+    重新提取已有文本中的一段页码，其余页从原文件逐页复制
+    
+    Args:
+        pdf_path: PDF文件路径
+        text_path: 已有的输出文本文件路径（需有页索引）
+        first: 起始页码（从1开始，含）
+        last: 结束页码（含）
+        backend: 提取后端，一般与原提取一致
+        workers: 工作进程数
+        page_timeout: 单页超时（秒）
+        page_markers: 是否写入页码标记
+    
+    Returns:
+        写出结果的统计信息（含backend）
+    """
+    text_path = Path(text_path)
+    entries = load_page_index(text_path)
+    first = max(first, 1)
+    last = min(last, len(entries))
+    if first > last:
+        raise ValueError(f"页码区间无效: {first}-{last}（共 {len(entries)} 页）")
+    
+    tmp_path = text_path.with_name(text_path.stem + ".partial" + text_path.suffix)
+    with open(text_path, 'rb') as source, PageTextWriter(tmp_path, page_markers) as writer:
+        writer.copy_pages(source, entries[:first - 1])
+        for record in iter_pdf_pages(pdf_path, backend, workers, page_timeout, first - 1, last):
+            writer.write_page(record)
+        writer.copy_pages(source, entries[last:])
+    
+    os.replace(writer.index_path, page_index_path(text_path))
+    os.replace(tmp_path, text_path)
+    logger.info(f"已重新提取 {Path(pdf_path).name} 第 {first}-{last} 页")
+    stats = writer.stats()
+    stats.update(text_file=str(text_path), page_index=str(page_index_path(text_path)), backend=backend)
+    return stats
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+银行行业政策知识库 - 并行PDF页面提取
+把PDF的页码区间分发到进程池，每个工作进程独立打开PDF并用PyPDF2或pdfplumber提取文本，
+结果按页码顺序逐页产出。单页设有超时，病态页面只会被记为失败，不会拖住整批任务
+"""
+
+import math
+import os
+import signal
+from contextlib import contextmanager
+from collections import deque
+from multiprocessing import Pool, TimeoutError as PoolTimeoutError
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 支持的提取后端，按尝试顺序排列
+BACKENDS = ("pypdf2", "pdfplumber")
+
+# 默认工作进程数和单页超时（秒）
+DEFAULT_WORKERS = os.cpu_count() or 1
+DEFAULT_PAGE_TIMEOUT = 60
+
+# 每个工作进程平均分到的任务数，区间更小可以更好地均衡负载
+TASKS_PER_WORKER = 4
+
+
+class PageTimeoutError(Exception):
+    """单页提取超时"""
+
+
+class PageRecord(NamedTuple):
+    """单页提取结果"""
+    page: int
+    text: str
+    failed: bool
+
+
+@contextmanager
+def page_deadline(seconds: float):
+    """
+    单页超时：支持SIGALRM的平台在工作进程内中断提取；
+    其他平台（Windows）由主进程等待区间结果时的超时兜底
+    """
+    if not seconds or not hasattr(signal, "setitimer"):
+        yield
+        return
+    
+    def on_timeout(signum, frame):
+        raise PageTimeoutError(f"页面提取超过{seconds}秒")
+    
+    previous = signal.signal(signal.SIGALRM, on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def count_pages(pdf_path: Path, backend: str) -> int:
+    """
+    获取PDF页数
+    
+    Raises:
+        ImportError: 后端库未安装
+    """
+    if backend == "pypdf2":
+        import PyPDF2
+        with open(pdf_path, 'rb') as file:
+            return len(PyPDF2.PdfReader(file).pages)
+    if backend == "pdfplumber":
+        import pdfplumber
+        with pdfplumber.open(pdf_path) as pdf:
+            return len(pdf.pages)
+    raise ValueError(f"未知的提取后端: {backend}")
+
+
+def extract_page_range(pdf_path: str, backend: str, start: int, end: int,
+                       page_timeout: float) -> List[Tuple[int, Optional[str]]]:
+    """
+    在工作进程中提取一个页码区间，PDF由本进程独立打开
+    
+    Args:
+        pdf_path: PDF文件路径
+        backend: 提取后端
+        start: 起始页序号（从0开始）
+        end: 结束页序号（不含）
+        page_timeout: 单页超时（秒），0表示不限制
+    
+    Returns:
+        (页序号, 文本) 列表，提取失败或超时的页文本为None
+    """
+    results = []
+    
+    def extract_pages(pages):
+        for page_index in range(start, end):
+            try:
+                with page_deadline(page_timeout):
+                    text = pages[page_index].extract_text() or ""
+            except Exception as e:
+                logger.warning(f"第 {page_index + 1} 页提取失败: {e}")
+                text = None
+            results.append((page_index, text))
+    
+    if backend == "pypdf2":
+        import PyPDF2
+        with open(pdf_path, 'rb') as file:
+            extract_pages(PyPDF2.PdfReader(file).pages)
+    elif backend == "pdfplumber":
+        import pdfplumber
+        with pdfplumber.open(pdf_path) as pdf:
+            extract_pages(pdf.pages)
+    else:
+        raise ValueError(f"未知的提取后端: {backend}")
+    
+    return results
+
+
+def split_page_ranges(first: int, last: int, workers: int) -> List[Tuple[int, int]]:
+    """按工作进程数把页序号区间 [first, last) 切成连续的小区间"""
+    if last <= first:
+        return []
+    size = max(1, math.ceil((last - first) / (workers * TASKS_PER_WORKER)))
+    return [(start, min(start + size, last)) for start in range(first, last, size)]
+
+
+def iter_pdf_pages(pdf_path: Path, backend: str, workers: Optional[int] = None,
+                   page_timeout: float = DEFAULT_PAGE_TIMEOUT, first_page: int = 0,
+                   last_page: Optional[int] = None) -> Iterator[PageRecord]:
+    """
+    按页码顺序逐页产出提取结果
+    
+    同时在途的页码区间不超过工作进程数的两倍，内存占用与文档页数无关
+    
+    Args:
+        pdf_path: PDF文件路径
+        backend: 提取后端
+        workers: 工作进程数，默认为CPU核数，1表示在当前进程中提取
+        page_timeout: 单页超时（秒），0表示不限制
+        first_page: 起始页序号（从0开始），用于断点续提
+        last_page: 结束页序号（不含），默认为最后一页
+    
+    Raises:
+        ImportError: 后端库未安装
+    """
+    workers = workers or DEFAULT_WORKERS
+    page_count = count_pages(pdf_path, backend)
+    last_page = page_count if last_page is None else min(last_page, page_count)
+    ranges = split_page_ranges(first_page, last_page, workers)
+    
+    def to_records(start, end, results):
+        texts = dict(results)
+        for page_index in range(start, end):
+            text = texts.get(page_index)
+            yield PageRecord(page_index + 1, text or "", text is None)
+    
+    if workers <= 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            yield from to_records(start, end, extract_page_range(str(pdf_path), backend, start, end, page_timeout))
+        return
+    
+    with Pool(min(workers, len(ranges))) as pool:
+        remaining = iter(ranges)
+        pending = deque()
+        
+        def submit():
+            for start, end in remaining:
+                pending.append((start, end, pool.apply_async(extract_page_range,
+                                                             (str(pdf_path), backend, start, end, page_timeout))))
+                return
+        
+        for _ in range(workers * 2):
+            submit()
+        
+        while pending:
+            start, end, task = pending.popleft()
+            # 没有SIGALRM的平台上，工作进程内无法中断单页，由区间总超时兜底
+            timeout = page_timeout * (end - start) + page_timeout if page_timeout else None
+            try:
+                results = task.get(timeout)
+            except PoolTimeoutError:
+                logger.warning(f"第 {start + 1}-{end} 页提取超时")
+                results = []
+            submit()
+            logger.info(f"已完成第 {start + 1}-{end}/{page_count} 页")
+            yield from to_records(start, end, results)
+        # 退出with时terminate()会结束仍卡在超时页面上的工作进程
@@ -8,9 +8,21 @@
 import os
 import sys
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 
+# 添加当前目录到Python路径
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from parallel_extraction import DEFAULT_PAGE_TIMEOUT
+from page_writer import extract_pdf_to_text, reextract_pages
+from extraction_manifest import ExtractionManifest, MANIFEST_NAME
+from backend_selection import plan_backends
+from content_analysis import ContentAnalyzer
+from analysis_cache import AnalysisCache, ANALYSIS_CACHE_NAME
+from document_index import update_document_index
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -26,16 +38,38 @@ logger = logging.getLogger(__name__)
 class PDFPipeline:
     """PDF处理管道类"""
     
-    def __init__(self, pdf_dir: str = "."):
+    def __init__(self, pdf_dir: str = ".", workers: int = None,
+                 page_timeout: float = DEFAULT_PAGE_TIMEOUT, output_dir: str = "extracted_texts",
+                 force: bool = False, backend: str = "auto", knowledge_base: Optional[str] = "knowledge_base",
+                 reanalyze: bool = False):
         """
         初始化PDF处理管道
         
         Args:
             pdf_dir: PDF文件所在目录
+            workers: 并行提取页面的进程数，默认为CPU核数
+            page_timeout: 单页提取超时（秒）
+            output_dir: 提取文本的输出目录
+            force: 是否忽略提取清单，重新提取全部PDF
+            backend: 提取后端，"auto"表示对每个PDF抽样选择
+            knowledge_base: 知识库目录，从中读取主题索引并自动更新文档索引，为None时不更新
+            reanalyze: 是否忽略分析缓存，按当前语料重新分析全部文档
         """
         self.pdf_dir = Path(pdf_dir)
+        self.output_dir = Path(output_dir)
+        self.force = force
+        self.reanalyze = reanalyze or force
+        self.backend = backend
+        self.workers = workers
+        self.page_timeout = page_timeout
         self.pdf_files = []
         self.processed_data = {}
+        self.skipped_files = []
+        self.removed_files = []
+        self.analyses = {}
+        self.knowledge_base = Path(knowledge_base) if knowledge_base else None
+        topic_index = self.knowledge_base / "index" / "topic_index.json" if self.knowledge_base else None
+        self.analyzer = ContentAnalyzer(topic_index)
         
     def scan_pdf_files(self) -> List[Path]:
         """
@@ -59,69 +93,38 @@ class PDFPipeline:
             
         return pdf_files
     
-    def extract_text_from_pdf(self, pdf_path: Path) -> str:
+    def extract_text_from_pdf(self, pdf_path: Path) -> Optional[Dict[str, Any]]:
         """
-        从PDF文件中提取文本内容
+        从PDF文件中提取文本内容，逐页写入输出目录下的文本文件和页索引
         
         Args:
             pdf_path: PDF文件路径
             
         Returns:
-            提取的文本内容
+            写出结果（文本文件、页索引、页数、字符数、提取后端），提取失败时返回None
         """
         try:
             logger.info(f"正在提取文本: {pdf_path.name}")
             
-            # 尝试使用PyPDF2提取文本
-            try:
-                import PyPDF2
-                with open(pdf_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    text = ""
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
-                    
-                    if text.strip():
-                        logger.info(f"使用PyPDF2成功提取文本: {pdf_path.name}")
-                        return text
-                    else:
-                        logger.warning(f"PyPDF2提取的文本为空: {pdf_path.name}")
-            except ImportError:
-                logger.warning("PyPDF2未安装，尝试使用其他方法")
-            except Exception as e:
-                logger.warning(f"PyPDF2提取失败: {e}")
-            
-            # 尝试使用pdfplumber提取文本
-            try:
-                import pdfplumber
-                with pdfplumber.open(pdf_path) as pdf:
-                    text = ""
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-                    
-                    if text.strip():
-                        logger.info(f"使用pdfplumber成功提取文本: {pdf_path.name}")
-                        return text
-                    else:
-                        logger.warning(f"pdfplumber提取的文本为空: {pdf_path.name}")
-            except ImportError:
-                logger.warning("pdfplumber未安装")
-            except Exception as e:
-                logger.warning(f"pdfplumber提取失败: {e}")
+            # 抽样选择后端，再按页码区间并行提取，每页提取完即写出
+            backends, selection = plan_backends(pdf_path, self.backend)
+            text_path = self.output_dir / f"{pdf_path.stem}_extracted.txt"
+            result = extract_pdf_to_text(pdf_path, text_path, self.workers, self.page_timeout, backends)
+            if result:
+                result["backend_selection"] = selection
+                logger.info(f"使用{result['backend']}成功提取文本: {pdf_path.name}，共 {result['pages']} 页")
+                return result
             
-            # 如果都失败了，返回占位符
-            logger.warning(f"所有PDF提取方法都失败，返回占位符: {pdf_path.name}")
-            return f"从 {pdf_path.name} 提取的文本内容（需要安装PDF处理库）"
+            logger.warning(f"所有PDF提取方法都失败: {pdf_path.name}")
+            return None
             
         except Exception as e:
             logger.error(f"提取文本失败 {pdf_path.name}: {e}")
-            return ""
+            return None
     
     def analyze_content(self, text: str, filename: str) -> Dict[str, Any]:
         """
-        分析文本内容，提取关键信息
+        分析单篇文本内容，提取关键词、摘要和主题（IDF只来自这一篇，批量分析见analyze_corpus）
         
         Args:
             text: 文本内容
@@ -131,27 +134,68 @@ class PDFPipeline:
             分析结果字典
         """
         logger.info(f"正在分析内容: {filename}")
+        return self.analyzer.analyze({filename: text})[filename]
+    
+    def analyze_corpus(self, manifest: ExtractionManifest) -> Dict[str, Dict[str, Any]]:
+        """
+        对提取清单中的文档做批量分析（关键词的IDF按整个语料计算），
+        分析结果记入本次处理的文件，并更新知识库的文档索引
+        
+        提取文本未变化的文档沿用分析缓存，不读取原文，只以词项指纹计入IDF；
+        因此它们的关键词和主题停留在上次分析时的语料上，reanalyze时才全部重新分析
+        
+        Args:
+            manifest: 提取清单
+        
+        Returns:
+            PDF文件名 -> 分析结果
+        """
+        cache = AnalysisCache(self.output_dir / ANALYSIS_CACHE_NAME, self.analyzer.signature)
+        cache.prune(manifest.entries)
+        analyses, context, texts, hashes = {}, {}, {}, {}
+        for name, entry in manifest.entries.items():
+            text_file = Path(entry["text_file"])
+            if not text_file.exists():
+                continue
+            hashes[name] = cache.text_sha1(name, text_file)
+            cached = None if self.reanalyze else cache.get(name, hashes[name])
+            if cached:
+                analyses[name] = cached["analysis"]
+                context[name] = cached["fingerprint"]
+            else:
+                texts[name] = text_file.read_text(encoding='utf-8')
         
-        # 这里可以添加更复杂的文本分析逻辑
-        # 比如关键词提取、主题分类、实体识别等
+        logger.info(f"正在批量分析 {len(texts)} 个文档，{len(analyses)} 个未变化的文档沿用分析缓存")
+        for name, analysis in self.analyzer.analyze(texts, context).items():
+            analyses[name] = analysis
+            fingerprint = self.analyzer.term_fingerprints.get(name)
+            if fingerprint is not None:
+                cache.record(name, Path(manifest.entries[name]["text_file"]), hashes[name], analysis, fingerprint)
+        cache.save()
         
-        analysis_result = {
-            "filename": filename,
-            "content_length": len(text),
-            "keywords": [],  # 待实现关键词提取
-            "summary": "",   # 待实现摘要生成
-            "entities": [],  # 待实现实体识别
-            "topics": []     # 待实现主题分类
-        }
+        self.analyses = analyses
+        for name, data in self.processed_data.items():
+            data["analysis"] = self.analyses.get(name)
         
-        return analysis_result
+        if self.knowledge_base and self.knowledge_base.exists():
+            try:
+                update_document_index(self.knowledge_base, {
+                    name: {"text_file": manifest.entries[name]["text_file"], "analysis": analysis}
+                    for name, analysis in self.analyses.items()
+                }, self.removed_files)
+            except Exception as e:
+                logger.error(f"更新文档索引失败: {e}")
+        return self.analyses
     
     def process_all_pdfs(self) -> Dict[str, Any]:
         """
         处理所有PDF文件
         
+        提取清单中内容未变化的PDF直接跳过，只有新增或修改的PDF被提取；
+        有文件变化时只重新分析变化的文档（见analyze_corpus）
+        
         Returns:
-            处理结果字典
+            本次处理的文件的结果字典
         """
         logger.info("开始处理所有PDF文件")
         
@@ -162,19 +206,22 @@ class PDFPipeline:
             logger.warning("没有找到PDF文件")
             return {}
         
+        manifest = ExtractionManifest(self.output_dir / MANIFEST_NAME)
+        
         # 处理每个PDF文件
         for pdf_file in pdf_files:
             try:
+                if not self.force and manifest.is_unchanged(pdf_file):
+                    logger.info(f"文件未变化，跳过: {pdf_file.name}")
+                    self.skipped_files.append(pdf_file.name)
+                    continue
+                
                 # 提取文本
-                text_content = self.extract_text_from_pdf(pdf_file)
+                extraction = self.extract_text_from_pdf(pdf_file)
                 
-                if text_content:
-                    # 分析内容
-                    analysis_result = self.analyze_content(text_content, pdf_file.name)
-                    self.processed_data[pdf_file.name] = {
-                        "text_content": text_content,
-                        "analysis": analysis_result
-                    }
+                if extraction:
+                    manifest.record(pdf_file, extraction)
+                    self.processed_data[pdf_file.name] = {"extraction": extraction}
                     logger.info(f"成功处理: {pdf_file.name}")
                 else:
                     logger.warning(f"无法提取文本内容: {pdf_file.name}")
@@ -182,20 +229,71 @@ class PDFPipeline:
             except Exception as e:
                 logger.error(f"处理文件失败 {pdf_file.name}: {e}")
         
-        logger.info(f"处理完成，共处理 {len(self.processed_data)} 个文件")
+        self.removed_files = manifest.prune(pdf_files)
+        manifest.save()
+        
+        if self.processed_data or self.removed_files or self.reanalyze:
+            self.analyze_corpus(manifest)
+        
+        logger.info(f"处理完成，共处理 {len(self.processed_data)} 个文件，跳过 {len(self.skipped_files)} 个未变化的文件")
         return self.processed_data
     
+    def reextract_pages(self, pdf_name: str, first: int, last: int) -> Optional[Dict[str, Any]]:
+        """
+        重新提取某个PDF的一段页码（如超时失败的页），其余页沿用已有结果
+        
+        Args:
+            pdf_name: PDF文件名
+            first: 起始页码（从1开始，含）
+            last: 结束页码（含）
+        
+        Returns:
+            写出结果，该PDF尚未提取过或重新提取失败时返回None
+        """
+        pdf_file = self.pdf_dir / pdf_name
+        manifest = ExtractionManifest(self.output_dir / MANIFEST_NAME)
+        entry = manifest.entries.get(pdf_file.name)
+        if entry is None or not Path(entry["text_file"]).exists():
+            logger.error(f"{pdf_file.name} 尚未提取，请先完整提取")
+            return None
+        
+        try:
+            extraction = reextract_pages(pdf_file, Path(entry["text_file"]), first, last, entry["backend"],
+                                         self.workers, self.page_timeout)
+        except Exception as e:
+            logger.error(f"重新提取失败 {pdf_file.name}: {e}")
+            return None
+        
+        manifest.record(pdf_file, extraction)
+        manifest.save()
+        self.processed_data[pdf_file.name] = {"extraction": extraction}
+        self.analyze_corpus(manifest)
+        return extraction
+    
     def save_results(self, output_file: str = "analysis_results.json"):
         """
-        保存处理结果到文件
+        保存处理结果到文件，正文已写入各自的文本文件，这里只记录其路径和统计信息
+        
+        本次跳过的文件沿用已有的提取结果，分析结果随批量分析刷新；已删除的PDF从结果中移除
         
         Args:
             output_file: 输出文件名
         """
         try:
             import json
+            results = {}
+            if Path(output_file).exists():
+                with open(output_file, 'r', encoding='utf-8') as f:
+                    results = json.load(f)
+            for name in self.removed_files:
+                results.pop(name, None)
+            for name, analysis in self.analyses.items():
+                if isinstance(results.get(name), dict):
+                    results[name]["analysis"] = analysis
+            results.update(self.processed_data)
+            
             with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(self.processed_data, f, ensure_ascii=False, indent=2)
+                json.dump(results, f, ensure_ascii=False, indent=2)
             logger.info(f"结果已保存到: {output_file}")
         except Exception as e:
             logger.error(f"保存结果失败: {e}")
@@ -203,18 +301,47 @@ class PDFPipeline:
 
 def main():
     """主函数"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="银行行业政策知识库PDF处理管道")
+    parser.add_argument("--pdf-dir", default=".", help="PDF文件所在目录")
+    parser.add_argument("--workers", type=int, default=None, help="并行提取页面的进程数，默认为CPU核数")
+    parser.add_argument("--page-timeout", type=float, default=DEFAULT_PAGE_TIMEOUT, help="单页提取超时（秒）")
+    parser.add_argument("--output-dir", default="extracted_texts", help="提取文本的输出目录")
+    parser.add_argument("--force", action="store_true", help="忽略提取清单，重新提取全部PDF")
+    parser.add_argument("--reanalyze", action="store_true",
+                        help="忽略分析缓存，按当前语料重新分析全部文档（不重新提取）")
+    parser.add_argument("--backend", default="auto", choices=["auto", "pypdf2", "pdfplumber"],
+                        help="提取后端，auto为抽样选择")
+    parser.add_argument("--knowledge-base", default="knowledge_base",
+                        help="知识库目录，处理后自动更新其中的文档索引，传空字符串则不更新")
+    parser.add_argument("--file", help="配合--pages使用，要重新提取的PDF文件名")
+    parser.add_argument("--pages", help="只重新提取--file指定PDF的页码区间，如 120-135 或 57")
+    args = parser.parse_args()
+    
     logger.info("启动银行行业政策知识库PDF处理管道")
     
     # 创建处理管道
-    pipeline = PDFPipeline()
+    pipeline = PDFPipeline(args.pdf_dir, args.workers, args.page_timeout, args.output_dir, args.force,
+                           args.backend, args.knowledge_base, args.reanalyze)
+    
+    if args.pages:
+        if not args.file:
+            parser.error("--pages 需要配合 --file 使用")
+        first, _, last = args.pages.partition("-")
+        if pipeline.reextract_pages(args.file, int(first), int(last or first)):
+            pipeline.save_results()
+        return
     
     # 处理所有PDF文件
     results = pipeline.process_all_pdfs()
     
     # 保存结果
-    if results:
+    if results or pipeline.removed_files or pipeline.analyses:
         pipeline.save_results()
         logger.info("PDF处理管道执行完成")
+    elif pipeline.skipped_files:
+        logger.info("所有PDF文件均未变化，无需处理")
     else:
         logger.warning("没有处理任何PDF文件")
 
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+银行行业政策知识库 - 远程调用限速
+令牌桶限速器，只包在访问远程服务的调用外面；本地PDF提取不经过限速器，可以连续或并行执行
+"""
+
+import functools
+import threading
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """令牌桶：平均每秒rate个令牌，最多积攒capacity个（允许的突发调用数）"""
+    
+    def __init__(self, rate: float, capacity: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量
+            clock: 单调时钟，便于替换
+            sleep: 等待函数，便于替换
+        """
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate和capacity必须大于0")
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+    
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """有足够令牌时取走并返回True，否则立即返回False"""
+        with self._lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+    
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        取走令牌，不足时等待
+        
+        Returns:
+            等待的秒数
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                delay = (tokens - self.tokens) / self.rate
+            self.sleep(delay)
+            waited += delay
+
+
+def rate_limited(bucket: TokenBucket):
+    """装饰器：每次调用前从令牌桶取一个令牌"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bucket.acquire()
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共配置
+知识库搜索模块和PDF处理模块都按同目录导入，测试时把这两个目录加入Python路径
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+for path in (ROOT / "knowledge_base" / "search", ROOT / "knowledge_base", ROOT / "src"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+import json
+
+import pytest
+
+DOCUMENTS = {
+    "inclusive": ("普惠金融报告", "2024", ["普惠金融"], [
+        "--- 第 1 页 ---",
+        "普惠金融 服务 小微企业 银行 贷款",
+        "银行 普惠金融 信贷 投放 增长",
+        "--- 第 2 页 ---",
+        "小微企业 融资 成本 下降",
+    ]),
+    "stability": ("金融稳定报告", "2024", ["金融稳定"], [
+        "--- 第 1 页 ---",
+        "银行 体系 运行 稳健 风险 可控",
+        "--- 第 2 页 ---",
+        "房地产 风险 化解 银行 资本 充足",
+        "--- 第 3 页 ---",
+        "债券 市场 风险 监测",
+    ]),
+    "outlook": ("经济展望报告", "2025", ["宏观经济"], [
+        "--- 第 1 页 ---",
+        "经济 增长 消费 投资 出口",
+        "--- 第 2 页 ---",
+        "货币 政策 稳健 利率 下行",
+    ]),
+}
+
+
+def write_knowledge_base(root, documents=DOCUMENTS, archived=(), topics=None):
+    """在root下写出一个最小的知识库（文本、文档索引、主题索引和空的关键词索引）"""
+    (root / "index").mkdir(parents=True, exist_ok=True)
+    (root / "data").mkdir(exist_ok=True)
+    entries = []
+    for doc_id, (title, year, categories, lines) in documents.items():
+        (root / "data" / f"{doc_id}.txt").write_text("\n".join(lines), encoding='utf-8')
+        entries.append({
+            "id": doc_id, "title": title, "author": "", "publish_date": year,
+            "file_path": f"data/{doc_id}.txt", "categories": categories,
+            "chapters": [{"title": "第二部分", "start_page": 2, "end_page": 2}],
+            "archived": doc_id in archived
+        })
+    (root / "index" / "document_index.json").write_text(
+        json.dumps({"documents": entries, "metadata": {}}, ensure_ascii=False), encoding='utf-8')
+    for name, data in (("topic_index.json", {"topics": topics or {}}), ("keyword_index.json", {"keywords": {}})):
+        (root / "index" / name).write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    return root
+
+
+@pytest.fixture
+def knowledge_base(tmp_path):
+    return write_knowledge_base(tmp_path)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Aho-Corasick多模式匹配"""
+
+import random
+import re
+
+import pytest
+
+from aho_corasick import AhoCorasickAutomaton
+
+
+def naive_find_all(patterns, text):
+    positions = {}
+    for pattern in patterns:
+        found = [m.start() for m in re.finditer(f"(?={re.escape(pattern)})", text)]
+        if found:
+            positions[pattern] = found
+    return positions
+
+
+def test_overlapping_and_nested_patterns():
+    patterns = ["普惠", "普惠金融", "金融", "融资", "he", "she", "his", "hers"]
+    text = "普惠金融融资ushers普惠金融"
+    automaton = AhoCorasickAutomaton(patterns)
+    assert automaton.find_all(text) == naive_find_all(patterns, text)
+
+
+def test_duplicate_pattern_keeps_id():
+    automaton = AhoCorasickAutomaton()
+    first = automaton.add("银行")
+    assert automaton.add("银行") == first
+    assert automaton.find_all("银行银行") == {"银行": [0, 2]}
+
+
+def test_rebuild_after_add_reports_each_match_once():
+    automaton = AhoCorasickAutomaton(["金融", "普惠金融"])
+    assert automaton.find_all("普惠金融") == {"金融": [2], "普惠金融": [0]}
+    
+    automaton.add("惠金")
+    automaton.build()
+    automaton.build()
+    assert automaton.find_all("普惠金融") == {"金融": [2], "普惠金融": [0], "惠金": [1]}
+    assert len(list(automaton.iter_matches("普惠金融"))) == 3
+
+
+def test_matches_brute_force_on_random_input():
+    rng = random.Random(3)
+    alphabet = "abc"
+    patterns = {"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(30)}
+    automaton = AhoCorasickAutomaton(patterns)
+    for _ in range(20):
+        text = "".join(rng.choice(alphabet) for _ in range(60))
+        assert automaton.find_all(text) == naive_find_all(patterns, text)
+        extra = "".join(rng.choice(alphabet) for _ in range(5))
+        patterns.add(extra)
+        automaton.add(extra)
+
+
+def test_empty_pattern_rejected():
+    with pytest.raises(ValueError):
+        AhoCorasickAutomaton().add("")
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""增量分析：缓存按文本SHA1失效，只分析变化的文档时结果与整体分析一致"""
+
+import json
+
+import pytest
+
+from analysis_cache import AnalysisCache
+from content_analysis import ContentAnalyzer
+
+TEXTS = {
+    "inclusive.pdf": "普惠金融服务覆盖面持续扩大，小微企业贷款余额同比增长。" * 3
+                     + "小微企业融资成本稳中有降，普惠金融政策效果明显。",
+    "stability.pdf": "压力测试结果显示银行业整体抗风险能力较强。" * 3
+                     + "防范化解系统性风险仍是金融工作的重点任务。",
+    "outlook.pdf": "全球经济增长放缓，主要经济体货币政策分化。" * 3
+                   + "国内消费和投资稳步恢复，出口增速有所回落。",
+}
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    pytest.importorskip("sklearn")
+    topic_index = tmp_path / "topic_index.json"
+    topic_index.write_text(json.dumps({"topics": {
+        "普惠金融": {"description": "小微企业贷款", "subtopics": {"小微企业": {"key_terms": ["普惠金融"]}}},
+        "金融稳定": {"description": "银行业风险", "subtopics": {"风险防范": {"key_terms": ["系统性风险", "出口"]}}},
+    }}, ensure_ascii=False), encoding='utf-8')
+    return ContentAnalyzer(topic_index)
+
+
+def test_changed_document_matches_full_analysis(analyzer):
+    full = analyzer.analyze(TEXTS)
+    fingerprints = dict(analyzer.term_fingerprints)
+    context = {name: fingerprints[name] for name in TEXTS if name != "stability.pdf"}
+    partial = analyzer.analyze({"stability.pdf": TEXTS["stability.pdf"]}, context)
+    assert list(partial) == ["stability.pdf"]
+    assert partial["stability.pdf"] == full["stability.pdf"]
+
+
+def test_cache_round_trip_and_invalidation(tmp_path, analyzer):
+    text_file = tmp_path / "stability_extracted.txt"
+    text_file.write_text(TEXTS["stability.pdf"], encoding='utf-8')
+    analysis = analyzer.analyze({"stability.pdf": TEXTS["stability.pdf"]})["stability.pdf"]
+    fingerprint = analyzer.term_fingerprints["stability.pdf"]
+    
+    cache = AnalysisCache(tmp_path / "cache.json", analyzer.signature)
+    cache.record("stability.pdf", text_file, cache.text_sha1("stability.pdf", text_file), analysis, fingerprint)
+    cache.save()
+    
+    cache = AnalysisCache(tmp_path / "cache.json", analyzer.signature)
+    cached = cache.get("stability.pdf", cache.text_sha1("stability.pdf", text_file))
+    assert cached["analysis"] == analysis
+    assert list(cached["fingerprint"]) == fingerprint.tolist()
+    
+    text_file.write_text(TEXTS["stability.pdf"] + "新增一句。", encoding='utf-8')
+    assert cache.get("stability.pdf", cache.text_sha1("stability.pdf", text_file)) is None
+    # 分析方法或主题画像变化时整个缓存失效
+    assert AnalysisCache(tmp_path / "cache.json", "other").entries == {}
+
+
+def test_prune_drops_removed_documents(tmp_path):
+    cache = AnalysisCache(tmp_path / "cache.json", "signature")
+    cache.entries = {"a.pdf": {}, "b.pdf": {}}
+    cache.prune(["b.pdf"])
+    assert list(cache.entries) == ["b.pdf"]
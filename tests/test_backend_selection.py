@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""按抽样页选择提取后端：抽样、质量打分、表格优先和备选顺序"""
+
+import pytest
+
+import backend_selection
+from backend_selection import sample_page_indexes, text_quality, select_backend, plan_backends
+
+
+def test_samples_spread_over_the_document():
+    assert sample_page_indexes(3, 5) == [0, 1, 2]
+    assert sample_page_indexes(100, 5) == [10, 30, 50, 70, 90]
+    assert sample_page_indexes(0, 5) == []
+
+
+def test_text_quality_counts_cjk_and_garbage():
+    assert text_quality(" \n") == {"chars": 0, "cjk_ratio": 0.0, "garbage_ratio": 0.0}
+    quality = text_quality("银行 业务\n(cid:12)ab")
+    assert quality["chars"] == len("银行业务(cid:12)ab")
+    assert quality["cjk_ratio"] == pytest.approx(4 / quality["chars"])
+    assert quality["garbage_ratio"] == pytest.approx(len("(cid:12)") / quality["chars"])
+
+
+def sample(chars, seconds, cjk_ratio=1.0, garbage_ratio=0.0, table_pages=None):
+    return {"chars": chars, "seconds_per_page": seconds, "cjk_ratio": cjk_ratio,
+            "garbage_ratio": garbage_ratio, "table_pages": table_pages}
+
+
+@pytest.fixture
+def samples(monkeypatch):
+    """各后端的抽样结果，不读取PDF；结果为ImportError时视为后端未安装"""
+    results = {}
+    
+    def sample_backend(pdf_path, backend, page_indexes):
+        if isinstance(results[backend], Exception):
+            raise results[backend]
+        return dict(results[backend])
+    
+    monkeypatch.setattr(backend_selection, "count_pages", lambda pdf_path, backend: 10)
+    monkeypatch.setattr(backend_selection, "_sample_backend", sample_backend)
+    return results
+
+
+def test_faster_backend_wins_when_quality_is_close(samples):
+    samples.update(pypdf2=sample(1000, 0.01), pdfplumber=sample(1020, 0.2, table_pages=1))
+    selection = select_backend("report.pdf")
+    assert selection["backend"] == "pypdf2"
+    assert selection["sample_pages"] == [2, 4, 6, 8, 10]
+
+
+def test_clearly_better_backend_wins(samples):
+    samples.update(pypdf2=sample(1000, 0.01, garbage_ratio=0.3), pdfplumber=sample(1000, 0.2, table_pages=0))
+    assert select_backend("report.pdf")["backend"] == "pdfplumber"
+
+
+def test_tables_favour_pdfplumber(samples):
+    samples.update(pypdf2=sample(1000, 0.01), pdfplumber=sample(990, 0.2, table_pages=2))
+    selection = select_backend("report.pdf")
+    assert selection["backend"] == "pdfplumber"
+    assert "表格" in selection["reason"]
+
+
+def test_missing_or_empty_backends(samples):
+    samples.update(pypdf2=sample(500, 0.01), pdfplumber=ImportError("pdfplumber"))
+    assert select_backend("report.pdf")["backend"] == "pypdf2"
+    samples.update(pypdf2=sample(0, 0.01))
+    assert select_backend("report.pdf") is None
+
+
+def test_plan_puts_the_selected_backend_first(samples):
+    assert plan_backends("report.pdf", "pypdf2") == (["pypdf2"], None)
+    samples.update(pypdf2=sample(1000, 0.01, garbage_ratio=0.3), pdfplumber=sample(1000, 0.2))
+    backends, selection = plan_backends("report.pdf")
+    assert backends == ["pdfplumber", "pypdf2"]
+    assert selection["backend"] == "pdfplumber"
+    samples.update(pypdf2=sample(0, 0.01), pdfplumber=sample(0, 0.2))
+    assert plan_backends("report.pdf") == (list(backend_selection.BACKENDS), None)
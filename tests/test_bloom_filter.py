@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""布隆过滤器"""
+
+from bloom_filter import BloomFilter
+
+
+def test_no_false_negatives():
+    bloom = BloomFilter.for_capacity(1000, 0.01)
+    words = [f"词项{i}" for i in range(1000)]
+    for word in words:
+        bloom.add(word)
+    assert all(word in bloom for word in words)
+    assert bloom.might_contain_all(words[:10])
+
+
+def test_false_positive_rate_close_to_target():
+    bloom = BloomFilter.for_capacity(1000, 0.01)
+    for i in range(1000):
+        bloom.add(f"in-{i}")
+    false_positives = sum(f"out-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_empty_filter_rejects_everything():
+    bloom = BloomFilter.for_capacity(10)
+    assert "银行" not in bloom
+    assert not bloom.might_contain_any(["银行", "风险"])
+
+
+def test_dict_round_trip():
+    bloom = BloomFilter.for_capacity(50)
+    for word in ("普惠金融", "小微企业", "GDP"):
+        bloom.add(word)
+    restored = BloomFilter.from_dict(bloom.to_dict())
+    assert restored.num_bits == bloom.num_bits
+    assert restored.num_hashes == bloom.num_hashes
+    assert restored.bits == bloom.bits
+    assert "普惠金融" in restored
+
+
+def test_cold_tier_skips_documents_rejected_by_the_filter(tmp_path):
+    from cold_tier import ColdTier
+    tier = ColdTier(tmp_path, str.split)
+    tier.archive("stability", "银行 风险 房地产")
+    assert tier.may_contain("stability", ["房地产", "贷款"])
+    assert not tier.may_contain("stability", ["房地产", "贷款"], require_all=True)
+    assert tier.stats == {"bloom_rejected": 1, "loaded": 0}
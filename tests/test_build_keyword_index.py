@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""关键词索引构建：稀疏共现计数、NPMI关联关键词和不再出现的关键词的删除"""
+
+import json
+import random
+
+import pytest
+
+import build_keyword_index
+from build_keyword_index import build_keyword_index as build, count_cooccurrence, count_cooccurrence_pairs
+from conftest import write_knowledge_base
+
+DOCUMENTS = {
+    "inclusive": ("普惠金融报告", "2024", ["普惠金融"], [
+        "普惠金融 小微企业 贷款", "普惠金融 小微企业", "普惠金融 小微企业 信贷",
+        "房地产 市场", "普惠金融 小微企业", "债券 市场",
+    ]),
+    "stability": ("金融稳定报告", "2024", ["金融稳定"], [
+        "房地产 风险", "债券 市场", "房地产 风险 化解", "普惠金融 信贷", "房地产 风险",
+    ]),
+}
+
+
+def write_keywords(root, keywords):
+    (root / "index" / "keyword_index.json").write_text(json.dumps({"keywords": {
+        keyword: {"frequency": 1, "documents": [], "related_keywords": related}
+        for keyword, related in keywords.items()}}, ensure_ascii=False), encoding='utf-8')
+
+
+def test_sparse_counts_match_pair_enumeration():
+    pytest.importorskip("scipy")
+    rng = random.Random(0)
+    words = [f"词{i}" for i in range(30)]
+    passages = [set(rng.sample(words, rng.randint(0, 6))) for _ in range(200)]
+    assert count_cooccurrence(passages) == count_cooccurrence_pairs(passages)
+
+
+def test_related_keywords_come_from_cooccurrence(tmp_path):
+    root = write_knowledge_base(tmp_path, DOCUMENTS)
+    write_keywords(root, {"普惠金融": [], "小微企业": [], "房地产": [], "风险": []})
+    index, _ = build(root, passage_lines=1, incremental=False)
+    keywords = index["keywords"]
+    assert keywords["普惠金融"]["related_keywords"] == ["小微企业"]
+    assert keywords["房地产"]["related_keywords"] == ["风险"]
+    assert keywords["普惠金融"]["frequency"] == 5
+
+
+def test_vanished_keyword_is_pruned(tmp_path):
+    root = write_knowledge_base(tmp_path, DOCUMENTS)
+    write_keywords(root, {"普惠金融": ["数字人民币"], "小微企业": [], "数字人民币": ["普惠金融"]})
+    index, state = build(root, passage_lines=1, incremental=False)
+    # 文本中没有出现的关键词被删除，其人工整理的关联关键词不再沿用
+    assert "数字人民币" not in index["keywords"]
+    assert index["keywords"]["普惠金融"]["related_keywords"] == ["小微企业"]
+    assert "数字人民币" not in state["documents"]["inclusive"]["keyword_counts"]
+
+
+def test_incremental_build_reuses_unchanged_documents(tmp_path, capsys):
+    root = write_knowledge_base(tmp_path, DOCUMENTS)
+    write_keywords(root, {"普惠金融": [], "小微企业": [], "房地产": [], "风险": []})
+    index, state = build(root, passage_lines=1, incremental=False)
+    (root / "index" / "keyword_index.json").write_text(json.dumps(index, ensure_ascii=False), encoding='utf-8')
+    (root / "index" / "keyword_cooccurrence.json").write_text(json.dumps(state, ensure_ascii=False),
+                                                             encoding='utf-8')
+    capsys.readouterr()
+    
+    with open(root / "data" / "stability.txt", 'a', encoding='utf-8') as f:
+        f.write("\n房地产 风险")
+    rebuilt, _ = build(root, passage_lines=1)
+    output = capsys.readouterr().out
+    assert "未变化，复用: inclusive" in output
+    assert "扫描完成: stability" in output
+    assert rebuilt["keywords"]["房地产"]["frequency"] == index["keywords"]["房地产"]["frequency"] + 1
+    assert rebuilt["keywords"]["普惠金融"]["documents"][0] == index["keywords"]["普惠金融"]["documents"][0]
+    # 段落总数变化后NPMI按合并的统计重新计算
+    assert rebuilt["keywords"]["普惠金融"]["related_keywords"] == ["小微企业"]
+    assert rebuilt["keywords"]["普惠金融"]["related_scores"] != index["keywords"]["普惠金融"]["related_scores"]
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""主题索引构建：主题词项过滤和自动生成主题的命名条件"""
+
+import json
+import random
+
+import numpy as np
+import pytest
+
+import build_topic_index
+from build_topic_index import build_topic_index as build, top_terms
+
+pytest.importorskip("sklearn")
+
+# 12个互不相交的主题词表，每个词只出现在少数段落中（词表的max_df为10%）
+THEMES = [[chr(0x4e00 + 400 * theme + 2 * i) + chr(0x4e01 + 400 * theme + 2 * i) for i in range(30)]
+          for theme in range(12)]
+
+
+def write_corpus(root):
+    (root / "index").mkdir()
+    (root / "data").mkdir()
+    rng = random.Random(0)
+    documents = []
+    for i in range(3):
+        lines = []
+        for theme in THEMES[4 * i:4 * i + 4]:
+            for _ in range(10):
+                lines += ["，".join(rng.sample(theme, 8)) + "。" for _ in range(10)]
+        (root / "data" / f"doc{i}.txt").write_text("\n".join(lines), encoding='utf-8')
+        documents.append({"id": f"doc{i}", "title": f"报告{i}", "file_path": f"data/doc{i}.txt", "chapters": []})
+    (root / "index" / "document_index.json").write_text(
+        json.dumps({"documents": documents}, ensure_ascii=False), encoding='utf-8')
+    (root / "index" / "topic_index.json").write_text(json.dumps({"topics": {}}), encoding='utf-8')
+
+
+def test_top_terms_skip_boilerplate_and_units():
+    vocabulary = np.array(["见图", "资料来源", "万亿元", "上年", "同比", "普惠金融", "小微企业", "信贷"])
+    weights = np.array([8.0, 7.0, 6.0, 5.0, 4.0, 3.0, 2.0, 1.0])
+    assert top_terms(weights, vocabulary, 3) == ["普惠金融", "小微企业", "信贷"]
+
+
+def test_generated_topics_require_whole_words(tmp_path, monkeypatch):
+    write_corpus(tmp_path)
+    monkeypatch.setattr(build_topic_index, "jieba_available", lambda: False)
+    topic_index, state = build(tmp_path, n_topics=3)
+    assert state["jieba"] is False
+    assert topic_index["topics"] == {}
+
+
+def test_generated_topics_with_word_vocabulary(tmp_path, monkeypatch):
+    write_corpus(tmp_path)
+    monkeypatch.setattr(build_topic_index, "jieba_available", lambda: True)
+    topic_index, _ = build(tmp_path, n_topics=3)
+    assert topic_index["topics"]
+    assert all(data["generated"] for data in topic_index["topics"].values())
+
+
+def write_categories(root, categories):
+    (root / "index" / "topic_index.json").write_text(json.dumps({"topics": categories}, ensure_ascii=False),
+                                                     encoding='utf-8')
+
+
+def test_relevance_is_normalised_over_emitted_topics(tmp_path, monkeypatch):
+    write_corpus(tmp_path)
+    # 只有doc0的主题能并入分类，其余模型主题因没有jieba而被跳过
+    write_categories(tmp_path, {"甲类": {"description": "", "subtopics": {"甲": {"key_terms": THEMES[0]}}}})
+    monkeypatch.setattr(build_topic_index, "jieba_available", lambda: False)
+    topic_index, _ = build(tmp_path, n_topics=6)
+    documents = topic_index["topics"]["甲类"]["documents"]
+    # doc0的权重全部落在输出的主题上；doc1、doc2几乎只属于被跳过的主题，不因归一化而列入
+    assert [(doc["id"], doc["relevance"]) for doc in documents] == [("doc0", 1.0)]
+
+
+def test_category_without_model_topics_is_marked_stale(tmp_path, monkeypatch):
+    write_corpus(tmp_path)
+    curated = [{"id": "doc1", "title": "报告1", "relevance": 0.85, "key_sections": []}]
+    write_categories(tmp_path, {
+        "甲类": {"description": "", "subtopics": {"甲": {"key_terms": THEMES[0]}}},
+        "政策法规": {"description": "法规", "subtopics": {}, "documents": curated, "model_topics": []},
+    })
+    monkeypatch.setattr(build_topic_index, "jieba_available", lambda: False)
+    topic_index, _ = build(tmp_path, n_topics=6)
+    kept = topic_index["topics"]["政策法规"]
+    assert kept["stale"] is True
+    assert kept["documents"] == curated
+    assert "model_topics" not in kept
+    assert "stale" not in topic_index["topics"]["甲类"]
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""SQLite块存储：追加、随机读取、流式遍历、近似重复标记，文档路径相对于知识库根目录记录"""
+
+import convert_txt_to_json
+from chunk_store import ChunkStore
+from convert_txt_to_json import chunk_text_files
+
+
+def write_texts(root):
+    text_dir = root / "data" / "extracted_texts"
+    text_dir.mkdir(parents=True)
+    for name in ("报告A", "报告B"):
+        lines = [f"{name}第{i}段：银行业总资产稳步增长，普惠小微贷款余额同比增长{i}%。" for i in range(30)]
+        (text_dir / f"{name}_extracted.txt").write_text("\n".join(lines), encoding='utf-8')
+    return text_dir
+
+
+def test_document_paths_are_relative_to_the_knowledge_base(tmp_path, monkeypatch):
+    root = tmp_path / "kb"
+    text_dir = write_texts(root)
+    monkeypatch.chdir(tmp_path)
+    chunk_text_files(text_dir.relative_to(tmp_path), root / "data" / "json_segments", workers=1)
+    
+    monkeypatch.chdir(text_dir)
+    with ChunkStore(root / "data" / "json_segments" / "chunks.db", root) as store:
+        paths = sorted(doc["file_path"] for doc in store.documents())
+        assert paths == ["data/extracted_texts/报告A_extracted.txt", "data/extracted_texts/报告B_extracted.txt"]
+        chunk = next(store.iter_chunks())
+        assert store.text(chunk).startswith("报告")
+
+
+def test_convert_txt_to_json_is_an_alias():
+    assert convert_txt_to_json.convert_txt_to_json is chunk_text_files
+
+
+def chunks(count, start=0):
+    return [{"lines": [i + 1, i + 1], "offsets": [i * 10, i * 10 + 10], "chars": 10, "page": 1}
+            for i in range(start, start + count)]
+
+
+def test_append_read_and_delete(tmp_path):
+    with ChunkStore(tmp_path / "chunks.db") as store:
+        store.add_document("a", "a.txt", tmp_path / "a.txt")
+        store.add_document("b", "b.txt", tmp_path / "b.txt")
+        first = store.append_chunks("a", chunks(2))
+        store.append_chunks("b", chunks(1))
+        # 追加时序号接着已有的块
+        more = store.append_chunks("a", chunks(1, start=2))
+        assert [chunk["seq"] for chunk in store.document_chunks("a")] == [0, 1, 2]
+        assert store.get(more[0])["lines"] == [3, 3]
+        assert store.get(first[0])["offsets"] == [0, 10]
+        assert store.count() == 4
+        
+        store.delete_document("a")
+        assert store.document_chunks("a") == []
+        assert [doc["doc_id"] for doc in store.documents()] == ["b"]
+        assert store.get(first[0]) is None
+
+
+def test_duplicates_are_skipped_when_streaming_canonical_chunks(tmp_path):
+    with ChunkStore(tmp_path / "chunks.db") as store:
+        store.add_document("a", "a.txt", tmp_path / "a.txt")
+        ids = store.append_chunks("a", chunks(5))
+        store.mark_duplicates({ids[3]: ids[0]})
+        assert store.get(ids[3])["duplicate_of"] == ids[0]
+        assert [chunk["chunk_id"] for chunk in store.iter_chunks(batch_size=2)] == ids
+        assert [chunk["chunk_id"] for chunk in store.iter_chunks(batch_size=2, canonical_only=True)] == \
+            [ids[0], ids[1], ids[2], ids[4]]
+
+
+def test_meta_and_text_survive_reopening(tmp_path):
+    (tmp_path / "a.txt").write_bytes("第一句。\r\n第二句。".encode('utf-8'))
+    with ChunkStore(tmp_path / "chunks.db", tmp_path) as store:
+        store.add_document("a", "a.txt", tmp_path / "a.txt", sha1="abc")
+        store.append_chunks("a", [{"lines": [1, 2], "offsets": [0, len("第一句。\r\n第二句。".encode('utf-8'))]}])
+        store.set_meta("params", "[1, 2]")
+    with ChunkStore(tmp_path / "chunks.db", tmp_path) as store:
+        assert store.get_meta("params") == "[1, 2]"
+        assert store.get_meta("missing") is None
+        assert store.documents()[0]["sha1"] == "abc"
+        assert store.text(store.document_chunks("a")[0]) == "第一句。\n第二句。"
+        assert store.text({"doc_id": "missing", "offsets": [0, 1]}) is None
+
+
+def test_only_changed_files_are_chunked_again(tmp_path):
+    root = tmp_path / "kb"
+    text_dir = write_texts(root)
+    output_dir = root / "data" / "json_segments"
+    assert sorted(chunk_text_files(text_dir, output_dir, workers=1)) == ["报告A_extracted.txt", "报告B_extracted.txt"]
+    assert chunk_text_files(text_dir, output_dir, workers=1) == []
+    
+    (text_dir / "报告B_extracted.txt").write_text("报告B改写后的内容。", encoding='utf-8')
+    assert chunk_text_files(text_dir, output_dir, workers=1) == ["报告B_extracted.txt"]
+    # 参数变化时全部重新切分
+    assert len(chunk_text_files(text_dir, output_dir, chunk_chars=100, workers=1)) == 2
+    with ChunkStore(output_dir / "chunks.db", root) as store:
+        texts = {doc["doc_id"]: "".join(store.text(chunk) for chunk in store.document_chunks(doc["doc_id"]))
+                 for doc in store.documents()}
+    assert texts["报告B_extracted"] == "报告B改写后的内容。"
+    assert texts["报告A_extracted"].startswith("报告A第0段")
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""基于偏移量的块表：按偏移读取原文、保存读取，以及相对于知识库根目录的路径"""
+
+import pytest
+
+from chunk_table import ChunkTable, line_offsets, relative_path, resolve_path
+
+LINES = ["第一行：银行业总资产稳步增长。", "第二行：普惠小微贷款余额增长。", "第三行：风险总体可控。"]
+
+
+@pytest.fixture
+def text_file(tmp_path):
+    path = tmp_path / "kb" / "data" / "extracted_texts" / "report_extracted.txt"
+    path.parent.mkdir(parents=True)
+    path.write_bytes("\r\n".join(LINES).encode('utf-8'))
+    return path
+
+
+def test_line_offsets_end_with_file_length(text_file):
+    offsets = line_offsets(text_file)
+    assert len(offsets) == len(LINES) + 1
+    assert offsets[-1] == text_file.stat().st_size
+
+
+def test_chunk_text_is_read_through_offsets(text_file):
+    offsets = line_offsets(text_file)
+    table = ChunkTable()
+    doc = table.add_document("report", text_file)
+    index = table.add_chunk(doc, offsets[1], offsets[3], 2, 3)
+    assert table.text(index) == "\n".join(LINES[1:])
+    assert table.chunk(index) == {"doc_id": "report", "lines": [2, 3], "offsets": [offsets[1], offsets[3]]}
+    table.close()
+
+
+def test_paths_are_relative_to_the_knowledge_base(tmp_path, text_file, monkeypatch):
+    base_path = tmp_path / "kb"
+    offsets = line_offsets(text_file)
+    table = ChunkTable(base_path)
+    table.add_chunk(table.add_document("report", text_file), offsets[0], offsets[1], 1, 1)
+    table.save(tmp_path / "chunk_table.bin")
+    table.close()
+    assert table.doc_paths == ["data/extracted_texts/report_extracted.txt"]
+    
+    # 从其他目录读取时按知识库根目录解析
+    monkeypatch.chdir(text_file.parent)
+    loaded = ChunkTable.load(tmp_path / "chunk_table.bin", base_path)
+    assert loaded.text(0) == LINES[0] + "\n"
+    loaded.close()
+
+
+def test_relative_path_helpers(tmp_path):
+    assert relative_path("data/a.txt", None) == "data/a.txt"
+    assert relative_path(tmp_path / "kb" / "data" / "a.txt", tmp_path / "kb") == "data/a.txt"
+    assert resolve_path("data/a.txt", tmp_path) == tmp_path / "data" / "a.txt"
+    assert resolve_path(str(tmp_path / "a.txt"), tmp_path / "kb") == tmp_path / "a.txt"
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""归档文档在各检索路径中的处理"""
+
+import json
+
+from conftest import write_knowledge_base
+from search_engine import KnowledgeBaseSearchEngine
+
+TOPICS = {"金融风险": {"subtopics": {"房地产": {"key_terms": ["房地产", "风险"]}}}}
+
+
+def build(tmp_path):
+    root = write_knowledge_base(tmp_path, archived=("stability",), topics=TOPICS)
+    return KnowledgeBaseSearchEngine(str(root))
+
+
+def test_archived_document_is_kept_off_heap(tmp_path):
+    engine = build(tmp_path)
+    assert [doc["id"] for doc in engine.cold_documents] == ["stability"]
+    assert "stability" not in engine.document_contents
+    # 词频写入清单供启动时使用，建完索引后不常驻内存
+    assert engine.cold_tier.term_counts("stability") == {}
+    manifest = json.loads((tmp_path / "index" / "cold" / "bloom_manifest.json").read_text(encoding='utf-8'))
+    assert manifest["stability"]["terms"]["风险"] == 3
+
+
+def test_hybrid_search_reads_cold_document(tmp_path):
+    engine = build(tmp_path)
+    results = engine.hybrid_search("房地产", 5)
+    assert [result["document_id"] for result in results] == ["stability"]
+    assert results[0]["pages"] == [2]
+    assert engine.hybrid_search("房地产 小微企业", 5, match_all=True) == []
+
+
+def test_search_content_scans_cold_document(tmp_path):
+    engine = build(tmp_path)
+    results = {result["document_id"]: result for result in engine.search_content("风险")}
+    assert set(results) == {"stability"}
+    matches = results["stability"]["matches"]
+    assert [(match["paragraph"], match["page"]) for match in matches] == [(2, 1), (4, 2), (6, 3)]
+    content = engine.get_document_content("stability")
+    assert all(content[pos:pos + 2] == "风险" for match in matches for pos in match["positions"])
+
+
+def test_topic_ranking_includes_cold_document(tmp_path):
+    engine = build(tmp_path)
+    results = engine.search_by_topic_hybrid("金融风险", 5)
+    assert [result["document_id"] for result in results] == ["stability"]
+    assert results[0]["context"][0]["page"] == 2
+
+
+def test_edited_source_is_archived_again(tmp_path):
+    build(tmp_path)
+    (tmp_path / "data" / "stability.txt").write_text("--- 第 1 页 ---\n债务 重组 进展", encoding='utf-8')
+    engine = KnowledgeBaseSearchEngine(str(tmp_path))
+    assert "债务 重组" in engine.get_document_content("stability")
+    assert [result["document_id"] for result in engine.hybrid_search("重组", 5)] == ["stability"]
+    assert engine.hybrid_search("房地产", 5) == []
+
+
+def test_unarchived_document_leaves_cold_tier(tmp_path):
+    build(tmp_path)
+    write_knowledge_base(tmp_path, topics=TOPICS)
+    (tmp_path / "data" / "stability.txt").write_text("--- 第 1 页 ---\n债务 重组 进展", encoding='utf-8')
+    engine = KnowledgeBaseSearchEngine(str(tmp_path))
+    assert engine.cold_documents == []
+    assert not engine.cold_tier.contains("stability")
+    assert engine.get_document_content("stability") == "--- 第 1 页 ---\n债务 重组 进展"
+    manifest = json.loads((tmp_path / "index" / "cold" / "bloom_manifest.json").read_text(encoding='utf-8'))
+    assert "stability" not in manifest
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""内容分析：文本清洗、切句、关键词、主题和摘要"""
+
+import json
+
+import pytest
+
+from content_analysis import ContentAnalyzer, clean_text, select_keywords, split_sentences
+
+
+def test_clean_text_drops_page_markers_and_repeated_headers():
+    pages = [f"--- 第 {page} 页 ---\n金融稳定报告 {page}\n第{page}页正文\n接续的第{page}段。" for page in range(1, 7)]
+    text = clean_text("\n".join(pages))
+    assert "金融稳定报告" not in text
+    assert "---" not in text
+    # 中文之间的排版断行被接回去
+    assert "第1页正文接续的第1段。" in text
+
+
+def test_split_sentences_skips_short_and_non_chinese_sentences():
+    sentences = split_sentences("目录。" + "商业银行资本充足率保持在较高水平，风险抵御能力较强。"
+                                + "1.2 3.4 5.6 7.8 9.0 1.2 3.4 5.6。")
+    assert sentences == ["商业银行资本充足率保持在较高水平，风险抵御能力较强。"]
+
+
+def test_unit_and_time_words_are_not_keywords():
+    ranked = ["亿元", "季度", "同比", "普惠金融", "万亿元", "上半年", "小微企业", "百分点"]
+    counts = {term: 10 for term in ranked}
+    assert select_keywords(ranked, counts, 5) == ["普惠金融", "小微企业"]
+
+
+def test_basic_result_keeps_the_original_schema():
+    result = ContentAnalyzer._basic_result("a.pdf", "文本")
+    assert set(result) == {"filename", "content_length", "keywords", "summary", "topics", "entities"}
+    assert result["entities"] == []
+
+
+def test_analyze_assigns_keywords_topics_and_summary(tmp_path):
+    pytest.importorskip("sklearn")
+    topic_index = tmp_path / "topic_index.json"
+    topic_index.write_text(json.dumps({"topics": {
+        "普惠金融": {"description": "小微企业贷款", "subtopics": {"小微企业": {"key_terms": ["普惠金融"]}}},
+        "金融稳定": {"description": "银行业风险", "subtopics": {"风险防范": {"key_terms": ["系统性风险", "压力测试"]}}},
+    }}, ensure_ascii=False), encoding='utf-8')
+    texts = {
+        "inclusive.pdf": "普惠金融服务覆盖面持续扩大，小微企业贷款余额同比增长。" * 3
+                         + "小微企业融资成本稳中有降，普惠金融政策效果明显。",
+        "stability.pdf": "压力测试结果显示银行业整体抗风险能力较强。" * 3
+                         + "防范化解系统性风险仍是金融工作的重点任务。",
+    }
+    results = ContentAnalyzer(topic_index).analyze(texts)
+    assert results["inclusive.pdf"]["topics"][0]["topic"] == "普惠金融"
+    assert results["stability.pdf"]["topics"][0]["topic"] == "金融稳定"
+    assert any("小微企业" in keyword for keyword in results["inclusive.pdf"]["keywords"])
+    # 摘要不重复选取相同的句子
+    summary = results["stability.pdf"]["summary"]
+    assert summary.count("压力测试结果显示银行业整体抗风险能力较强。") == 1
+    assert "系统性风险" in summary
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""用内容分析结果更新文档索引"""
+
+import json
+
+from document_index import update_document_index
+from search_engine import KnowledgeBaseSearchEngine
+
+CURATED = {
+    "id": "inclusive", "title": "普惠金融报告", "file_path": "data/inclusive_extracted.txt",
+    "summary": "人工摘要", "keywords": ["普惠金融", "小微企业"], "categories": ["普惠金融", "政策法规"]
+}
+
+
+def analysis(keywords, topics, summary="生成的摘要"):
+    return {"keywords": keywords, "summary": summary, "topics": [{"topic": topic, "score": 0.5} for topic in topics]}
+
+
+def write_index(root, documents):
+    (root / "index").mkdir()
+    (root / "data").mkdir()
+    (root / "index" / "document_index.json").write_text(
+        json.dumps({"documents": documents, "metadata": {}}, ensure_ascii=False), encoding='utf-8')
+
+
+def test_curated_fields_are_not_overwritten(tmp_path):
+    write_index(tmp_path, [dict(CURATED)])
+    text_file = tmp_path / "data" / "inclusive_extracted.txt"
+    text_file.write_text("普惠金融 小微企业", encoding='utf-8')
+
+    index = update_document_index(tmp_path, {"inclusive.pdf": {
+        "text_file": str(text_file), "analysis": analysis(["亿元", "受访者"], ["普惠金融"])}})
+    doc = index["documents"][0]
+    assert doc["keywords"] == ["普惠金融", "小微企业"]
+    assert doc["categories"] == ["普惠金融", "政策法规"]
+    assert doc["summary"] == "人工摘要"
+    assert doc["generated_keywords"] == ["亿元", "受访者"]
+    assert doc["generated_categories"] == ["普惠金融"]
+    assert doc["generated_summary"] == "生成的摘要"
+
+
+def test_new_document_gets_generated_categories_but_not_keywords(tmp_path):
+    write_index(tmp_path, [])
+    text_file = tmp_path / "data" / "新报告2025_extracted.txt"
+    text_file.write_text("经济 增长", encoding='utf-8')
+
+    item = {"text_file": str(text_file), "analysis": analysis(["经济增长"], ["经济展望"])}
+    doc = update_document_index(tmp_path, {"新报告2025.pdf": item})["documents"][0]
+    assert doc["publish_date"] == "2025"
+    assert doc["keywords"] == []
+    assert doc["categories"] == ["经济展望"]
+    assert doc["summary"] == "生成的摘要"
+
+    # 生成的值随再次分析刷新，人工修改后不再被覆盖
+    item["analysis"] = analysis(["经济增长"], ["宏观经济"], "新的摘要")
+    doc = update_document_index(tmp_path, {"新报告2025.pdf": item})["documents"][0]
+    assert doc["categories"] == ["宏观经济"]
+    assert doc["summary"] == "新的摘要"
+
+    index_file = tmp_path / "index" / "document_index.json"
+    index = json.loads(index_file.read_text(encoding='utf-8'))
+    index["documents"][0]["categories"] = ["政策法规"]
+    index_file.write_text(json.dumps(index, ensure_ascii=False), encoding='utf-8')
+    item["analysis"] = analysis(["经济增长"], ["经济展望"])
+    doc = update_document_index(tmp_path, {"新报告2025.pdf": item})["documents"][0]
+    assert doc["categories"] == ["政策法规"]
+    assert doc["generated_categories"] == ["经济展望"]
+
+
+def test_text_outside_the_knowledge_base_is_copied_in(tmp_path):
+    kb_root = tmp_path / "knowledge_base"
+    kb_root.mkdir()
+    write_index(kb_root, [])
+    (kb_root / "index" / "keyword_index.json").write_text('{"keywords": {}}', encoding='utf-8')
+    (kb_root / "index" / "topic_index.json").write_text('{"topics": {}}', encoding='utf-8')
+    # PDFPipeline默认把文本写到知识库之外的extracted_texts目录
+    output_dir = tmp_path / "extracted_texts"
+    output_dir.mkdir()
+    text_file = output_dir / "新报告2025_extracted.txt"
+    text_file.write_text("--- 第 1 页 ---\n经济增长保持稳定", encoding='utf-8')
+
+    item = {"text_file": str(text_file), "analysis": analysis([], [])}
+    doc = update_document_index(kb_root, {"新报告2025.pdf": item})["documents"][0]
+    assert doc["file_path"] == "data/extracted_texts/新报告2025_extracted.txt"
+    engine = KnowledgeBaseSearchEngine(str(kb_root))
+    assert [d["id"] for d in engine.documents] == [doc["id"]]
+    assert "经济增长保持稳定" in engine.get_document_content(doc["id"])
+
+    # 重新提取后知识库中的副本同步更新
+    text_file.write_text("--- 第 1 页 ---\n通胀压力有所缓解", encoding='utf-8')
+    doc = update_document_index(kb_root, {"新报告2025.pdf": item})["documents"][0]
+    assert "通胀压力" in (kb_root / doc["file_path"]).read_text(encoding='utf-8')
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""压缩文档存储的过期检查和按行读取"""
+
+import os
+
+from document_store import build_document_store
+from search_engine import KnowledgeBaseSearchEngine
+
+
+def test_store_detects_changed_source(knowledge_base):
+    store = build_document_store(str(knowledge_base))
+    source = knowledge_base / "data" / "outlook.txt"
+    assert store.is_current("outlook", source)
+
+    # 只改修改时间、内容不变时仍然一致
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert store.is_current("outlook", source)
+
+    source.write_text("经济 增长 放缓\n汇率 稳定", encoding='utf-8')
+    assert not store.is_current("outlook", source)
+
+
+def test_engine_refreshes_stale_store_entry(knowledge_base):
+    build_document_store(str(knowledge_base))
+    (knowledge_base / "data" / "outlook.txt").write_text("经济 增长 放缓\n汇率 稳定", encoding='utf-8')
+
+    engine = KnowledgeBaseSearchEngine(str(knowledge_base))
+    assert engine.get_document_content("outlook") == "经济 增长 放缓\n汇率 稳定"
+    assert [result["document_id"] for result in engine.hybrid_search("汇率", 5)] == ["outlook"]
+    assert engine.document_store.is_current("outlook", knowledge_base / "data" / "outlook.txt")
+    assert engine.document_store.get_lines("outlook", 1) == ["汇率 稳定"]
+
+
+def test_contexts_are_read_through_block_cache(knowledge_base):
+    expected = KnowledgeBaseSearchEngine(str(knowledge_base)).hybrid_search("风险 银行", 5)
+
+    build_document_store(str(knowledge_base))
+    engine = KnowledgeBaseSearchEngine(str(knowledge_base))
+    # 存储中的文档建完索引后不再保留全文
+    assert engine.document_contents == {}
+    assert engine.hybrid_search("风险 银行", 5) == expected
+
+    cache = engine.document_store.cache
+    misses = cache.misses
+    engine.hybrid_search("风险 银行", 5)
+    assert cache.misses == misses
+    assert cache.hits > 0
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""提取清单：未变化的PDF跳过，变化、缺失输出和版本变化时重新提取"""
+
+import json
+import os
+
+import pytest
+
+import extraction_manifest
+from extraction_manifest import ExtractionManifest, MANIFEST_NAME
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    pdf_path = tmp_path / "report.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 fake")
+    return pdf_path
+
+
+def extraction(tmp_path):
+    text_file = tmp_path / "report_extracted.txt"
+    text_file.write_text("--- 第 1 页 ---\n正文\n", encoding='utf-8')
+    return {"backend": "pypdf2", "text_file": str(text_file), "page_index": str(text_file) + ".pages.json",
+            "pages": 1, "chars": 2, "failed_pages": []}
+
+
+def recorded(tmp_path, pdf):
+    manifest = ExtractionManifest(tmp_path / MANIFEST_NAME)
+    manifest.record(pdf, extraction(tmp_path))
+    manifest.save()
+    return ExtractionManifest(tmp_path / MANIFEST_NAME)
+
+
+def test_new_pdf_is_not_unchanged(tmp_path, pdf):
+    assert not ExtractionManifest(tmp_path / MANIFEST_NAME).is_unchanged(pdf)
+
+
+def test_recorded_pdf_is_skipped_after_reload(tmp_path, pdf):
+    assert recorded(tmp_path, pdf).is_unchanged(pdf)
+
+
+def test_touched_pdf_is_compared_by_hash(tmp_path, pdf):
+    manifest = recorded(tmp_path, pdf)
+    stat = pdf.stat()
+    os.utime(pdf, (stat.st_atime, stat.st_mtime + 10))
+    assert manifest.is_unchanged(pdf)
+    # 内容相同时只更新记录的修改时间
+    assert manifest.entries[pdf.name]["mtime"] == pdf.stat().st_mtime
+
+
+def test_modified_pdf_is_reextracted(tmp_path, pdf):
+    manifest = recorded(tmp_path, pdf)
+    pdf.write_bytes(b"%PDF-1.4 edited")
+    assert not manifest.is_unchanged(pdf)
+
+
+def test_missing_text_file_forces_reextraction(tmp_path, pdf):
+    manifest = recorded(tmp_path, pdf)
+    os.remove(manifest.entries[pdf.name]["text_file"])
+    assert not manifest.is_unchanged(pdf)
+
+
+def test_backend_version_change_forces_reextraction(tmp_path, pdf, monkeypatch):
+    manifest = recorded(tmp_path, pdf)
+    monkeypatch.setattr(extraction_manifest, "backend_version", lambda backend: "999")
+    assert not manifest.is_unchanged(pdf)
+
+
+def test_old_extractor_version_discards_entries(tmp_path, pdf):
+    recorded(tmp_path, pdf)
+    path = tmp_path / MANIFEST_NAME
+    data = json.loads(path.read_text(encoding='utf-8'))
+    data["extractor_version"] = extraction_manifest.EXTRACTOR_VERSION - 1
+    path.write_text(json.dumps(data), encoding='utf-8')
+    assert ExtractionManifest(path).entries == {}
+
+
+def test_prune_drops_deleted_pdfs(tmp_path, pdf):
+    manifest = recorded(tmp_path, pdf)
+    assert manifest.prune([]) == [pdf.name]
+    assert manifest.entries == {}
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""分面过滤和URL参数解析"""
+
+from urllib.parse import parse_qsl
+
+import pytest
+
+from facet_index import FacetIndex, parse_filter_args
+
+DOCUMENTS = [
+    {"id": "a", "categories": ["普惠金融"], "author": "中国人民银行", "publish_date": "2024"},
+    {"id": "b", "categories": ["宏观经济"], "author": "中国银行研究院", "publish_date": "2025"},
+    {"id": "c", "categories": ["普惠金融", "宏观经济"], "author": "", "publish_date": "2023-06"},
+]
+
+
+def test_parse_filter_args_restores_comparisons():
+    args = [("q", "贷款"), ("limit", "5"), ("year>", "2024"), ("category", "普惠金融")]
+    assert parse_filter_args(args) == "year>=2024&category=普惠金融"
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("q=贷款&year>2024", "year>2024"),
+    ("q=贷款&year<2025&category=普惠金融", "year<2025&category=普惠金融"),
+    ("q=贷款&year<=2025", "year<=2025"),
+    ("q=贷款&category!=宏观经济", "category!=宏观经济"),
+])
+def test_parse_filter_args_keeps_strict_comparisons(query, expected):
+    # 与Flask一样保留空值：year>2024 解析为键"year>2024"、值""
+    assert parse_filter_args(parse_qsl(query, keep_blank_values=True)) == expected
+
+
+def test_parse_filter_args_ignores_unrelated_parameters():
+    args = [("q", "贷款"), ("_", "1718000000"), ("page", "2"), ("categories", "普惠金融"),
+            ("filters", "author=中国人民银行")]
+    assert parse_filter_args(args) == "categories=普惠金融&author=中国人民银行"
+
+
+def test_filter_documents():
+    index = FacetIndex()
+    index.build(DOCUMENTS)
+    assert index.filter_documents(None) is None
+    assert index.filter_documents("category=普惠金融&year>=2024") == {"a"}
+    assert index.filter_documents("category=普惠金融|宏观经济&year<2025") == {"a", "c"}
+    assert index.filter_documents(parse_filter_args([("year>2023", "")])) == {"a", "b"}
+    assert index.filter_documents(parse_filter_args([("year<2025", ""), ("category", "宏观经济")])) == {"c"}
+    assert index.filter_documents({"author": "中国银行研究院"}) == {"b"}
+    with pytest.raises(ValueError):
+        index.filter_documents("color=red")
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""SQLite FTS5后端的主题检索、归档文档和启动检查"""
+
+import logging
+import sqlite3
+
+import pytest
+
+import fts5_backend
+from conftest import write_knowledge_base
+from fts5_backend import FTS5SearchEngine, create_search_engine
+from search_engine import KnowledgeBaseSearchEngine
+
+pytestmark = pytest.mark.skipif(not fts5_backend.fts5_trigram_available(),
+                                reason="SQLite不支持FTS5 trigram分词器")
+
+TOPICS = {
+    "金融风险": {"subtopics": {"房地产": {"key_terms": ["房地产", "风险"]}}},
+    "普惠金融": {"subtopics": {"小微": {"key_terms": ["小微企业", "普惠金融"]}}},
+}
+
+
+def ranking(results):
+    return [(result["document_id"], round(result["hybrid_score"], 6)) for result in results]
+
+
+def test_topic_search_matches_memory_engine(tmp_path):
+    root = write_knowledge_base(tmp_path, topics=TOPICS)
+    memory_engine = KnowledgeBaseSearchEngine(str(root))
+    engine = FTS5SearchEngine(str(root))
+    for topic in TOPICS:
+        expected = memory_engine.search_by_topic_hybrid(topic, 5)
+        results = engine.search_by_topic_hybrid(topic, 5)
+        assert results and ranking(results) == ranking(expected)
+        assert [result["context"] for result in results] == [result["context"] for result in expected]
+
+
+def test_archived_documents_are_listed_and_searchable(tmp_path):
+    root = write_knowledge_base(tmp_path, archived=("stability",), topics=TOPICS)
+    engine = FTS5SearchEngine(str(root))
+    assert [doc["id"] for doc in engine.cold_documents] == ["stability"]
+    assert "stability" not in [doc["id"] for doc in engine.documents]
+    assert engine.total_docs == 3
+    assert [result["document_id"] for result in engine.hybrid_search("房地产", 5)] == ["stability"]
+    assert [result["document_id"] for result in engine.search_content("房地产")] == ["stability"]
+    assert [result["document_id"] for result in engine.search_by_topic_hybrid("金融风险", 1)] == ["stability"]
+
+
+@pytest.mark.parametrize("query, kwargs, expected", [
+    ("银行 风险", {}, {"inclusive", "stability"}),
+    ("银行 风险", {"match_all": True}, {"stability"}),
+    ("房地产 银行", {"match_all": True}, {"stability"}),
+    ("小微企业 房地产", {"match_all": True}, set()),
+    ("小微企业 房地产", {"chapter": "第二部分"}, {"inclusive", "stability"}),
+    ("小微企业 房地产", {"chapter": "第二部分", "match_all": True}, set()),
+    ("债券 风险", {"chapter": "第二部分", "match_all": True}, set()),
+])
+def test_search_options_are_honoured(knowledge_base, query, kwargs, expected):
+    engine = FTS5SearchEngine(str(knowledge_base))
+    assert {result["document_id"] for result in engine.hybrid_search(query, 5, **kwargs)} == expected
+
+
+def test_unsupported_options_raise(knowledge_base):
+    engine = FTS5SearchEngine(str(knowledge_base))
+    scoped = engine.hybrid_search("风险", 5, chapter="第二部分")
+    assert scoped[0]["chapter"] == "第二部分" and scoped[0]["pages"] == [2]
+    with pytest.raises(ValueError):
+        engine.hybrid_search("银行", 5, impact_mode=True)
+    with pytest.raises(ValueError):
+        engine.hybrid_search("银行", 5, budget_ms=10)
+
+
+def test_collapse_duplicates_is_honoured(tmp_path):
+    repeated = "银行 体系 运行 稳健 风险 可控 资本 充足"
+    documents = {
+        "first": ("第一份报告", "2024", ["金融稳定"], [repeated, "票据 市场", "", "债券 发行"]),
+        "second": ("第二份报告", "2024", ["金融稳定"], [repeated, "票据 市场", "", "外汇 交易"]),
+    }
+    engine = FTS5SearchEngine(str(write_knowledge_base(tmp_path, documents)))
+    collapsed = engine.hybrid_search("风险 银行", 5)
+    assert sum(len(result["context"]) for result in collapsed) == 1
+    assert sum(len(result["context"]) for result in engine.hybrid_search("风险 银行", 5,
+                                                                        collapse_duplicates=False)) == 2
+
+
+def test_memory_indexes_are_not_built(tmp_path):
+    root = write_knowledge_base(tmp_path, archived=("stability",))
+    engine = FTS5SearchEngine(str(root))
+    for name in ("cold_tier", "document_store", "substring_index", "postings", "impact_index"):
+        assert not hasattr(engine, name)
+    assert not (root / "index" / "cold").exists()
+    assert engine.get_document_content("stability").startswith("--- 第 1 页 ---")
+
+
+def test_facet_search_counts_all_matches(tmp_path):
+    root = write_knowledge_base(tmp_path)
+    engine = FTS5SearchEngine(str(root))
+    faceted = engine.facet_search("风险 普惠金融 经济", 1)
+    assert faceted["total"] == 3
+    assert faceted["facets"]["year"] == {"2024": 2, "2025": 1}
+    assert [result["document_id"] for result in faceted["results"]] == \
+        [result["document_id"] for result in engine.hybrid_search("风险 普惠金融 经济", 1)]
+
+
+def test_outdated_schema_is_rebuilt(tmp_path):
+    root = write_knowledge_base(tmp_path, topics=TOPICS)
+    conn = sqlite3.connect(str(root / "index" / "fts5.db"))
+    conn.execute("CREATE TABLE indexed_documents (doc_id TEXT PRIMARY KEY, sha1 TEXT NOT NULL, "
+                 "first_rowid INTEGER NOT NULL, last_rowid INTEGER NOT NULL)")
+    conn.commit()
+    conn.close()
+
+    engine = FTS5SearchEngine(str(root))
+    assert engine.search_by_topic_hybrid("金融风险", 1)[0]["document_id"] == "stability"
+
+
+def test_falls_back_to_memory_engine_without_trigram(tmp_path, monkeypatch, caplog):
+    root = write_knowledge_base(tmp_path)
+    monkeypatch.setattr(fts5_backend, "fts5_trigram_available", lambda: False)
+    with caplog.at_level(logging.WARNING, logger="fts5_backend"):
+        engine = create_search_engine(str(root), "fts5")
+    assert type(engine) is KnowledgeBaseSearchEngine
+    assert "trigram" in caplog.text
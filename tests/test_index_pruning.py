@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""静态索引剪枝对数字词项的处理"""
+
+from conftest import DOCUMENTS, write_knowledge_base
+from index_pruning import evaluate_recall, numeric_queries
+from search_engine import KnowledgeBaseSearchEngine
+
+DOCUMENTS_WITH_NUMBERS = dict(DOCUMENTS, outlook=("经济展望报告", "2025", ["宏观经济"], [
+    "--- 第 1 页 ---",
+    "经济 增长 消费 投资 出口 2025 年",
+    "--- 第 2 页 ---",
+    "货币 政策 稳健 利率 下行",
+]))
+
+
+def build(tmp_path, **kwargs):
+    root = write_knowledge_base(tmp_path, documents=DOCUMENTS_WITH_NUMBERS)
+    return KnowledgeBaseSearchEngine(str(root), **kwargs)
+
+
+def test_numeric_terms_are_kept_by_default(tmp_path):
+    engine = build(tmp_path, prune_threshold=0.1)
+    assert engine.pruning_report["numeric_terms"] == 0
+    assert [result["document_id"] for result in engine.hybrid_search("2025", 3)] == ["outlook"]
+
+
+def test_numeric_terms_are_dropped_when_requested(tmp_path):
+    full_engine = build(tmp_path)
+    pruned_engine = build(tmp_path, prune_threshold=0.1, prune_numeric=True)
+    assert pruned_engine.pruning_report["numeric_terms"] == 1
+    assert pruned_engine.hybrid_search("2025", 3) == []
+
+    # 数值评测查询能暴露剪枝造成的召回损失
+    queries = numeric_queries(full_engine)
+    assert queries == ["2025"]
+    assert evaluate_recall(full_engine, pruned_engine, queries)["recall"] == 0.0
+
+
+def test_page_marker_numbers_are_removed_without_drop_numeric(tmp_path):
+    documents = dict(DOCUMENTS_WITH_NUMBERS, inclusive=("普惠金融报告", "2024", ["普惠金融"], [
+        "--- 第 12 页 ---",
+        "普惠金融 服务 小微企业 银行 贷款",
+        "--- 第 13 页 ---",
+        "小微企业 贷款 期限 12 个月",
+    ]))
+    root = write_knowledge_base(tmp_path, documents=documents)
+    full_engine = KnowledgeBaseSearchEngine(str(root))
+    pruned_engine = KnowledgeBaseSearchEngine(str(root), prune_threshold=0.1)
+    assert pruned_engine.pruning_report["page_markers"] == 7
+    assert full_engine.doc_freq["13"] == 1
+    # 只出现在页码标记中的数字被删除，正文中的同一数字保留，文档频率随之更新
+    assert "13" not in pruned_engine.doc_freq
+    assert pruned_engine.doc_freq["12"] == 1
+    assert "2025" in pruned_engine.doc_freq
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""近似重复段落：MinHash签名、LSH聚类、建索引时去重和结果中的合并"""
+
+from conftest import DOCUMENTS, write_knowledge_base
+from near_duplicates import MinHasher, collapse_duplicate_contexts, find_near_duplicates
+from search_engine import KnowledgeBaseSearchEngine
+
+PASSAGE = "2023年末普惠小微贷款余额29.4万亿元，同比增长23.5%，连续多年保持较快增长"
+
+
+def test_signature_does_not_depend_on_numpy():
+    hasher = MinHasher()
+    signature = hasher.signature(PASSAGE)
+    hasher.np = None
+    assert hasher.signature(PASSAGE) == signature
+    assert hasher.signature("  ") == ()
+
+
+def test_near_duplicates_point_to_first_copy():
+    passages = [
+        ("a", PASSAGE),
+        ("b", "货币政策保持稳健，流动性合理充裕，社会融资规模平稳增长"),
+        ("c", PASSAGE.replace("23.5%", "23.5% ")),
+        ("d", PASSAGE[:-4] + "较快发展"),
+    ]
+    assert find_near_duplicates(passages) == {"c": "a", "d": "a"}
+
+
+def test_collapse_keeps_highest_ranked_copy():
+    results = [
+        {"document_id": "first", "context": [{"paragraph_index": 3, "context": PASSAGE}]},
+        {"document_id": "second", "context": [{"paragraph_index": 8, "context": PASSAGE},
+                                              {"paragraph_index": 9, "context": "汇率 稳定"}]},
+    ]
+    collapse_duplicate_contexts(results)
+    assert results[0]["context"][0]["duplicates"] == [{"document_id": "second", "paragraph_index": 8}]
+    assert [context["paragraph_index"] for context in results[1]["context"]] == [9]
+
+
+def test_engine_indexes_one_copy_of_repeated_passages(tmp_path):
+    documents = dict(DOCUMENTS)
+    documents["inclusive"] = DOCUMENTS["inclusive"][:3] + (DOCUMENTS["inclusive"][3] + [PASSAGE],)
+    documents["stability"] = DOCUMENTS["stability"][:3] + (DOCUMENTS["stability"][3] + [PASSAGE],)
+    engine = KnowledgeBaseSearchEngine(str(write_knowledge_base(tmp_path, documents)))
+    
+    assert engine.duplicate_passages == {("stability", 6): ("inclusive", 5)}
+    # 重复的段落不计入词频和文档长度
+    assert engine.doc_lengths["stability"] == len(engine._tokenize_text("\n".join(DOCUMENTS["stability"][3])))
+    results = engine.hybrid_search("万亿元", 5, collapse_duplicates=False)
+    assert [result["document_id"] for result in results] == ["inclusive"]
+    assert results[0]["context"][0]["duplicates"] == [{"document_id": "stability", "paragraph_index": 6}]
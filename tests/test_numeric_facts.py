@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""数字类问题与数值事实表的匹配"""
+
+import pytest
+
+from conftest import write_knowledge_base
+from numeric_facts import NumericFactIndex
+
+DOCUMENTS = {
+    "overseas": ("国际经济展望", "2025", ["宏观经济"], [
+        "欧元区劳动力市场表现平稳，2025年1月失业率为6.2%，与2024年四季度持平，支撑居民消费。",
+        "日本经济表现良好，全年GDP增长1.9%。",
+        "2023年，美国、欧元区和日本的失业率分别在3.4%～ 3.8%、6.5%～ 6.6%和 2.5%～ 2.7%的区间波动。",
+    ]),
+    "futures": ("期货市场报告", "2024", ["金融市场"], [
+        "截至2023年末，全国共有150家期货公司。",
+        "总资产1.65万亿元（含客户资产），同比增长6.8%。",
+    ]),
+    "inclusive": ("普惠金融报告", "2024", ["普惠金融"], [
+        "2023年末，普惠小微贷款余额29.4万亿元，同比增长23.5%。",
+        "2023年12月，新发放的普惠小微企业贷款加权平均利率为4.46%。",
+        "全年共发行小微金融债，平均利率为2.78%。",
+        "全年DR007加权平均为1.97%。",
+    ]),
+}
+
+
+def outlook_lines():
+    """每页开头有页眉，一句话跨页时被页眉隔开"""
+    body = {
+        4: ["从成员国表现看，西班牙在旅游等服务业增长带动下表现较"],
+        5: ["好，2024年实际GDP增速为3.2%；法国、荷兰、意大利的实际经济增速分别",
+            "为1.2%、0.9%和0.7%；德国实际GDP增速为-0.2%，连续两年出现负增长。",
+            "瑞士央行政策利率为负0.75%。"],
+    }
+    lines = []
+    for page in range(1, 6):
+        lines += [f"--- 第 {page} 页 ---", "全球经济金融展望报告", f"中国银行研究院 2025年第2季度 {page + 12}"]
+        lines += body.get(page, ["正文。"])
+    return lines
+
+
+DOCUMENTS["outlook"] = ("全球经济金融展望报告", "2025", ["宏观经济"], outlook_lines())
+
+
+@pytest.fixture
+def fact_index(tmp_path):
+    index = NumericFactIndex(str(write_knowledge_base(tmp_path, DOCUMENTS)))
+    yield index
+    index.conn.close()
+
+
+def answer(index, question):
+    return [(fact["metric"], fact["raw_value"], fact["raw_unit"]) for fact in index.match_question(question)]
+
+
+@pytest.mark.parametrize("question", [
+    "美国失业率是多少？",      # 只有欧元区的失业率
+    "中国GDP增长多少",         # 只有日本的GDP增长
+    "银行业总资产是多少?",     # 总资产是期货公司的
+    "欧元区失业率是多少",      # 列举句中的第一个数值属于美国
+    "2024年中国GDP增速是多少？",  # “中国”只出现在页眉“中国银行研究院”里
+    "法国实际GDP增速是多少",   # “法国”在西班牙的数值之后
+    "西班牙实际GDP增速是多少",  # 主语离指标太远
+    "2024年普惠小微贷款余额是多少？",
+])
+def test_unmatched_subject_falls_through(fact_index, question):
+    assert fact_index.match_question(question) == []
+
+
+def test_long_metric_matches_its_suffix(fact_index):
+    # “平均利率”“加权平均”只覆盖问题的一部分，不能抢走完整匹配的长指标
+    expected = [("新发放的普惠小微企业贷款加权平均利率", 4.46, "%")]
+    assert answer(fact_index, "加权平均利率") == expected
+    assert answer(fact_index, "普惠小微企业贷款加权平均利率是多少") == expected
+
+
+def test_ambiguous_metric_falls_through(tmp_path):
+    documents = dict(DOCUMENTS, discount=("票据市场报告", "2024", ["金融市场"], [
+        "2023年，全市场贴现加权平均利率为1.78%。",
+    ]))
+    index = NumericFactIndex(str(write_knowledge_base(tmp_path, documents)))
+    assert index.match_question("加权平均利率") == []
+    assert answer(index, "贴现加权平均利率") == [("全市场贴现加权平均利率", 1.78, "%")]
+    index.conn.close()
+
+
+def test_subject_found_in_sentence(fact_index):
+    assert answer(fact_index, "日本GDP增长多少") == [("GDP增长", 1.9, "%")]
+
+
+def test_page_headers_are_dropped_from_sentences(fact_index):
+    facts = fact_index.lookup("实际GDP增速")
+    assert [fact["raw_value"] for fact in facts] == [3.2, -0.2]
+    assert all("中国银行研究院" not in fact["sentence"] for fact in facts)
+    assert facts[0]["sentence"].startswith("从成员国表现看，西班牙在旅游等服务业增长带动下表现较好")
+
+
+def test_negative_values_keep_their_sign(fact_index):
+    assert answer(fact_index, "德国实际GDP增速是多少") == [("德国实际GDP增速", -0.2, "%")]
+    assert answer(fact_index, "瑞士央行政策利率") == [("瑞士央行政策利率", -0.75, "%")]
+
+
+def test_exact_metric_beats_longer_variants(fact_index):
+    facts = fact_index.match_question("2023年普惠小微贷款余额是多少？")
+    assert [(fact["metric"], fact["raw_value"], fact["period"]) for fact in facts] == [
+        ("普惠小微贷款余额", 29.4, "2023年末")]
+    assert facts[0]["score"] == 1.0
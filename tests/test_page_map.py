@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""页码映射"""
+
+import pytest
+
+import fts5_backend
+from conftest import DOCUMENTS, write_knowledge_base
+from page_map import PageMap, context_pages
+from search_engine import KnowledgeBaseSearchEngine
+
+CONTENT = "\n".join([
+    "封面",                 # 0
+    "--- 第 1 页 ---",      # 1
+    "第一页内容",            # 2
+    "--- 第 2 页 ---",      # 3
+    "第二页内容",            # 4
+    "第二页续",              # 5
+    "--- 第 4 页 ---",      # 6 第3页为空白页，没有标记
+    "第四页内容",            # 7
+    "--- 第 2 页 ---",      # 8 乱序的标记被忽略
+    "结尾",                 # 9
+])
+
+
+def build():
+    page_map = PageMap()
+    assert page_map.add_document("doc", CONTENT) == 3
+    return page_map
+
+
+def test_page_of_line():
+    page_map = build()
+    assert page_map.page_of_line("doc", 0) is None
+    assert [page_map.page_of_line("doc", line) for line in range(1, 10)] == [1, 1, 2, 2, 2, 4, 4, 4, 4]
+    assert page_map.page_of_line("missing", 3) is None
+
+
+def test_line_range():
+    page_map = build()
+    assert page_map.line_range("doc", 1, 1) == (1, 3)
+    assert page_map.line_range("doc", 1, 2) == (1, 6)
+    # 区间端点落在没有标记的空白页上
+    assert page_map.line_range("doc", 3, 4) == (6, 10)
+    assert page_map.line_range("doc", 2, 100) == (3, 10)
+    assert page_map.line_range("doc", 3, 3) is None
+    assert page_map.line_range("doc", 5, 9) is None
+    assert page_map.line_range("missing", 1, 2) is None
+
+
+def test_pages_of_lines():
+    page_map = build()
+    assert page_map.pages_of_lines("doc", 2, 5) == [1, 2]
+    assert page_map.pages_of_lines("doc", 4, 10) == [2, 4]
+    assert page_map.pages_of_lines("doc", 0, 1) == []
+    assert page_map.pages_of_lines("doc", 5, 5) == []
+
+
+def test_document_without_markers():
+    page_map = PageMap()
+    assert page_map.add_document("plain", "没有页码\n的文本") == 0
+    assert page_map.page_of_line("plain", 1) is None
+    assert page_map.line_range("plain", 1, 2) is None
+
+
+def test_context_pages():
+    assert context_pages([{"page": 4}, {"page": None}, {"page": 2}, {}, {"page": 4}]) == [2, 4]
+
+
+@pytest.mark.parametrize("backend", ["memory", "fts5"])
+def test_pages_follow_collapsed_contexts(tmp_path, backend):
+    if backend == "fts5" and not fts5_backend.fts5_trigram_available():
+        pytest.skip("SQLite不支持FTS5 trigram分词器")
+    repeated = ["--- 第 1 页 ---", "理财 产品 净值 转型 基本 完成", "票据 市场", ""]
+    documents = dict(DOCUMENTS, first=("第一份报告", "2024", ["金融市场"], repeated),
+                     second=("第二份报告", "2024", ["金融市场"], repeated + ["--- 第 2 页 ---", "理财 转型 持续 推进"]))
+    root = str(write_knowledge_base(tmp_path, documents))
+    engine = fts5_backend.FTS5SearchEngine(root) if backend == "fts5" else KnowledgeBaseSearchEngine(root)
+    results = engine.hybrid_search("理财 转型", 5)
+    assert sum(len(result["context"]) for result in results) == 2
+    for result in results:
+        assert result["pages"] == context_pages(result["context"])
+    assert sorted(page for result in results for page in result["pages"]) == [1, 2]
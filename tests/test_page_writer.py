@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""逐页写出、检查点续写和页码区间重提取"""
+
+import pytest
+
+import page_writer
+from page_writer import PageTextWriter, ExtractionJournal, load_page_index, journal_path
+from parallel_extraction import PageRecord
+
+PAGES = [PageRecord(page, f"第{page}页正文\n第二行" if page != 3 else "", False) for page in range(1, 26)]
+
+
+def fake_pages(pages, fail_after=None):
+    """按extract_pdf_to_text调用iter_pdf_pages的方式产出页，fail_after页之后模拟进程中断"""
+    def iter_pages(pdf_path, backend, workers=None, page_timeout=0, first_page=0, last_page=None):
+        for record in pages[first_page:last_page]:
+            if fail_after is not None and record.page > fail_after:
+                raise RuntimeError("中断")
+            yield record
+    return iter_pages
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    pdf_path = tmp_path / "report.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 fake")
+    return pdf_path
+
+
+def write_all(text_path, pages):
+    with PageTextWriter(text_path, newline="\n") as writer:
+        writer.write_pages(pages)
+    return writer
+
+
+def test_page_index_offsets(tmp_path):
+    text_path = tmp_path / "out_extracted.txt"
+    writer = write_all(text_path, PAGES[:4])
+    data = text_path.read_bytes()
+    entries = load_page_index(text_path)
+    
+    assert [entry["page"] for entry in entries] == [1, 2, 3, 4]
+    assert entries[2]["start"] == entries[2]["end"]
+    assert data[entries[1]["start"]:entries[1]["end"]].decode('utf-8') == "\n--- 第 2 页 ---\n第2页正文\n第二行\n"
+    assert writer.stats()["bytes"] == len(data)
+
+
+def test_newlines_markers_and_failed_pages(tmp_path):
+    text_path = tmp_path / "out_extracted.txt"
+    records = [PageRecord(1, "第一行\r\n第二行", False), PageRecord(2, "", True), PageRecord(3, "末页", False)]
+    with PageTextWriter(text_path, page_markers=False, newline="\r\n") as writer:
+        writer.write_pages(records)
+    
+    assert text_path.read_bytes().decode('utf-8') == "第一行\r\n第二行\r\n末页\r\n"
+    assert writer.stats()["failed_pages"] == [2]
+    assert writer.stats()["chars"] == len("第一行\r\n第二行") + len("末页")
+    assert [entry["failed"] for entry in load_page_index(text_path)] == [False, True, False]
+
+
+def test_resume_from_checkpoint_truncates_partial_output(tmp_path):
+    text_path = tmp_path / "out_extracted.txt"
+    with PageTextWriter(text_path, newline="\n") as writer:
+        writer.write_pages(PAGES[:10])
+        checkpoint = writer.checkpoint()
+        # 检查点之后写出的页在中断时丢失
+        writer.write_pages(PAGES[10:13])
+    
+    with PageTextWriter(text_path, newline="\n", resume=checkpoint) as writer:
+        assert writer.pages == 10
+        writer.write_pages(PAGES[10:])
+    
+    expected = tmp_path / "expected_extracted.txt"
+    write_all(expected, PAGES)
+    assert text_path.read_bytes() == expected.read_bytes()
+    assert load_page_index(text_path) == load_page_index(expected)
+
+
+def test_extract_resumes_after_interruption(tmp_path, pdf, monkeypatch):
+    text_path = tmp_path / "report_extracted.txt"
+    monkeypatch.setattr(page_writer, "iter_pdf_pages", fake_pages(PAGES, fail_after=15))
+    assert page_writer.extract_pdf_to_text(pdf, text_path, backends=("pypdf2",)) is None
+    
+    state = ExtractionJournal(text_path).load()
+    assert state["pages"] == page_writer.CHECKPOINT_PAGES
+    assert state["backend"] == "pypdf2"
+    
+    requested = []
+    iter_pages = fake_pages(PAGES)
+    
+    def record_first_page(pdf_path, backend, workers=None, page_timeout=0, first_page=0, last_page=None):
+        requested.append(first_page)
+        return iter_pages(pdf_path, backend, workers, page_timeout, first_page, last_page)
+    
+    monkeypatch.setattr(page_writer, "iter_pdf_pages", record_first_page)
+    stats = page_writer.extract_pdf_to_text(pdf, text_path, backends=("pypdf2",))
+    
+    assert requested == [page_writer.CHECKPOINT_PAGES]
+    assert stats["pages"] == len(PAGES)
+    assert not journal_path(text_path).exists()
+    
+    expected = tmp_path / "expected_extracted.txt"
+    with PageTextWriter(expected) as writer:
+        writer.write_pages(PAGES)
+    assert text_path.read_bytes() == expected.read_bytes()
+
+
+def test_changed_pdf_discards_checkpoint(tmp_path, pdf, monkeypatch):
+    text_path = tmp_path / "report_extracted.txt"
+    monkeypatch.setattr(page_writer, "iter_pdf_pages", fake_pages(PAGES, fail_after=12))
+    page_writer.extract_pdf_to_text(pdf, text_path, backends=("pypdf2",))
+    pdf.write_bytes(b"%PDF-1.4 changed")
+    
+    requested = []
+    
+    def record_first_page(pdf_path, backend, workers=None, page_timeout=0, first_page=0, last_page=None):
+        requested.append(first_page)
+        return iter(PAGES[first_page:last_page])
+    
+    monkeypatch.setattr(page_writer, "iter_pdf_pages", record_first_page)
+    assert page_writer.extract_pdf_to_text(pdf, text_path, backends=("pypdf2",))["pages"] == len(PAGES)
+    assert requested == [0]
+
+
+def test_reextract_page_range(tmp_path, pdf, monkeypatch):
+    text_path = tmp_path / "report_extracted.txt"
+    write_all(text_path, PAGES[:6])
+    fixed = [PageRecord(record.page, f"重新提取第{record.page}页", False) for record in PAGES[:6]]
+    monkeypatch.setattr(page_writer, "iter_pdf_pages", fake_pages(fixed))
+    
+    page_writer.reextract_pages(pdf, text_path, 2, 3, "pypdf2")
+    text = text_path.read_text(encoding='utf-8')
+    entries = load_page_index(text_path)
+    
+    assert "重新提取第2页" in text and "重新提取第3页" in text
+    assert "第1页正文" in text and "第4页正文" in text and "第2页正文" not in text
+    assert [entry["page"] for entry in entries] == [1, 2, 3, 4, 5, 6]
+    data = text_path.read_bytes()
+    assert data[entries[3]["start"]:entries[3]["end"]].decode('utf-8').endswith("第4页正文\n第二行\n")
+    assert entries[-1]["end"] == len(data)
+
+
+def test_falls_back_to_the_next_backend(tmp_path, pdf, monkeypatch):
+    text_path = tmp_path / "report_extracted.txt"
+    
+    def iter_pages(pdf_path, backend, workers=None, page_timeout=0, first_page=0, last_page=None):
+        if backend == "pypdf2":
+            raise ImportError("PyPDF2")
+        if backend == "blank":
+            return iter([PageRecord(record.page, "", False) for record in PAGES])
+        return iter(PAGES[first_page:last_page])
+    
+    monkeypatch.setattr(page_writer, "iter_pdf_pages", iter_pages)
+    stats = page_writer.extract_pdf_to_text(pdf, text_path, backends=("pypdf2", "blank", "pdfplumber"))
+    assert stats["backend"] == "pdfplumber"
+    assert stats["pages"] == len(PAGES)
+    assert page_writer.extract_pdf_to_text(pdf, text_path, backends=("pypdf2", "blank")) is None
+
+
+def test_checkpoint_of_another_backend_is_not_resumed(tmp_path, pdf, monkeypatch):
+    text_path = tmp_path / "report_extracted.txt"
+    monkeypatch.setattr(page_writer, "iter_pdf_pages", fake_pages(PAGES, fail_after=15))
+    page_writer.extract_pdf_to_text(pdf, text_path, backends=("pypdf2",))
+    
+    requested = []
+    
+    def record_first_page(pdf_path, backend, workers=None, page_timeout=0, first_page=0, last_page=None):
+        requested.append((backend, first_page))
+        return iter(PAGES[first_page:last_page])
+    
+    monkeypatch.setattr(page_writer, "iter_pdf_pages", record_first_page)
+    assert page_writer.extract_pdf_to_text(pdf, text_path, backends=("pdfplumber",))["pages"] == len(PAGES)
+    assert requested == [("pdfplumber", 0)]
+
+
+def test_reextract_rejects_empty_range(tmp_path, pdf):
+    text_path = tmp_path / "report_extracted.txt"
+    write_all(text_path, PAGES[:6])
+    with pytest.raises(ValueError):
+        page_writer.reextract_pages(pdf, text_path, 7, 9, "pypdf2")
+    with pytest.raises(ValueError):
+        page_writer.reextract_pages(pdf, text_path, 4, 3, "pypdf2")
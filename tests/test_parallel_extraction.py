@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""并行页面提取：页码区间切分、按页序产出、单页失败和超时"""
+
+import time
+
+import pytest
+
+import parallel_extraction
+from parallel_extraction import PageRecord, iter_pdf_pages, split_page_ranges, extract_page_range
+
+PyPDF2 = pytest.importorskip("PyPDF2")
+
+
+def make_pdf(texts):
+    """每页一行文本的最小PDF"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1')
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return data
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    pdf_path = tmp_path / "report.pdf"
+    pdf_path.write_bytes(make_pdf([f"Page {page} text" for page in range(1, 12)]))
+    return pdf_path
+
+
+def test_page_ranges_cover_the_interval_in_order():
+    ranges = split_page_ranges(3, 50, workers=2)
+    assert ranges[0][0] == 3 and ranges[-1][1] == 50
+    assert all(previous[1] == current[0] for previous, current in zip(ranges, ranges[1:]))
+    assert len(ranges) <= 2 * parallel_extraction.TASKS_PER_WORKER
+    assert split_page_ranges(5, 6, workers=8) == [(5, 6)]
+    assert split_page_ranges(5, 5, workers=8) == []
+
+
+def test_pool_yields_pages_in_order(pdf):
+    serial = list(iter_pdf_pages(pdf, "pypdf2", workers=1))
+    assert serial == [PageRecord(page, f"Page {page} text", False) for page in range(1, 12)]
+    assert list(iter_pdf_pages(pdf, "pypdf2", workers=3)) == serial
+
+
+def test_page_window_for_resuming(pdf):
+    assert [record.page for record in iter_pdf_pages(pdf, "pypdf2", workers=2, first_page=4, last_page=7)] == [5, 6, 7]
+    assert [record.page for record in iter_pdf_pages(pdf, "pypdf2", workers=1, first_page=9, last_page=99)] == [10, 11]
+
+
+def test_unknown_backend_is_rejected(pdf):
+    with pytest.raises(ValueError):
+        list(iter_pdf_pages(pdf, "unknown", workers=1))
+
+
+class SlowPage:
+    def __init__(self, text, delay=0.0, error=None):
+        self.text, self.delay, self.error = text, delay, error
+    
+    def extract_text(self):
+        if self.error:
+            raise self.error
+        time.sleep(self.delay)
+        return self.text
+
+
+def test_failed_and_slow_pages_are_marked_failed(pdf, monkeypatch):
+    pages = [SlowPage("一"), SlowPage("", error=RuntimeError("坏页")), SlowPage("三", delay=5), SlowPage(None)]
+    
+    class Reader:
+        def __init__(self, file):
+            self.pages = pages
+    
+    monkeypatch.setattr(PyPDF2, "PdfReader", Reader)
+    started = time.monotonic()
+    results = extract_page_range(str(pdf), "pypdf2", 0, 4, page_timeout=0.2)
+    assert time.monotonic() - started < 2
+    assert results == [(0, "一"), (1, None), (2, None), (3, "")]
+    
+    monkeypatch.setattr(parallel_extraction, "count_pages", lambda pdf_path, backend: len(pages))
+    pages[2].delay = 0
+    assert list(iter_pdf_pages(pdf, "pypdf2", workers=1, page_timeout=0.2)) == [
+        PageRecord(1, "一", False), PageRecord(2, "", True), PageRecord(3, "三", False), PageRecord(4, "", False)]
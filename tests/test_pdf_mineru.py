@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""提取后同步知识库并重新切分"""
+
+import sys
+
+from conftest import ROOT
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pdf_mineru
+
+
+def test_changed_files_are_synced_and_rechunked(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "knowledge_base").mkdir()
+    monkeypatch.setattr(pdf_mineru, "OUTPUT_DIR", str(tmp_path / "extracted_texts"))
+    monkeypatch.setattr(pdf_mineru, "KNOWLEDGE_BASE_DIR", str(tmp_path / "knowledge_base"))
+    for name in ("报告A.pdf", "报告B.pdf"):
+        text = "\n".join(f"{name} 第{i}行：银行业总资产稳步增长。" for i in range(40))
+        (tmp_path / pdf_mineru.get_output_file(name)).write_text(text, encoding='utf-8')
+
+    assert sorted(pdf_mineru.update_knowledge_base(["报告A.pdf", "报告B.pdf"])) == \
+        ["报告A_extracted.txt", "报告B_extracted.txt"]
+    assert (tmp_path / "knowledge_base" / "data" / "json_segments" / "chunks.db").exists()
+
+    # 只有再次提取的文件被重新切分
+    (tmp_path / pdf_mineru.get_output_file("报告B.pdf")).write_text("银行业总资产。\n" * 5, encoding='utf-8')
+    assert pdf_mineru.update_knowledge_base(["报告B.pdf"]) == ["报告B_extracted.txt"]
+    assert pdf_mineru.update_knowledge_base([]) == []
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""压缩倒排表的编解码、求并集和求交集"""
+
+import random
+
+import pytest
+
+from postings import CompressedPostings, encode_varint, decode_varint, union, intersect
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 16383, 16384, 2 ** 31 - 1, 2 ** 40])
+def test_varint_round_trip(value):
+    out = bytearray()
+    encode_varint(value, out)
+    assert decode_varint(bytes(out), 0) == (value, len(out))
+
+
+def test_postings_round_trip_across_blocks():
+    rng = random.Random(7)
+    docs = sorted(rng.sample(range(10000), 500))
+    postings = [(doc, rng.randint(1, 50)) for doc in docs]
+    compressed = CompressedPostings.from_postings(postings, block_size=16)
+    
+    assert len(compressed) == 500
+    assert list(compressed) == postings
+    assert len(compressed.block_offsets) == 32
+    assert list(compressed.block_last_doc) == [postings[i][0] for i in range(15, 500, 16)] + [postings[-1][0]]
+    # 压缩后小于每项两个4字节整数
+    assert compressed.size_bytes() < 8 * len(postings)
+
+
+def test_block_headers_allow_skipping():
+    postings = [(0, 3), (5, 1), (6, 2), (1000, 7)]
+    compressed = CompressedPostings.from_postings(postings, block_size=2)
+    assert list(compressed.block_last_doc) == [5, 1000]
+    assert compressed.decode_block(1) == ([6, 1000], [2, 7])
+
+
+def test_empty_postings():
+    compressed = CompressedPostings.from_postings([])
+    assert list(compressed) == []
+    assert union([compressed]) == []
+    assert intersect([compressed]) == []
+
+
+def test_union_and_intersect():
+    a = CompressedPostings.from_postings([(doc, 1) for doc in range(0, 300, 2)], block_size=8)
+    b = CompressedPostings.from_postings([(doc, 1) for doc in range(0, 300, 3)], block_size=8)
+    c = CompressedPostings.from_postings([(7, 1), (150, 2), (299, 1)], block_size=8)
+    
+    assert union([a, b]) == sorted(set(range(0, 300, 2)) | set(range(0, 300, 3)))
+    assert union([]) == []
+    assert intersect([a, b]) == list(range(0, 300, 6))
+    assert intersect([a, b, c]) == [150]
+    assert intersect([]) == []
+
+
+def test_cursor_skips_to_target():
+    compressed = CompressedPostings.from_postings([(doc, doc % 5 + 1) for doc in range(0, 1000, 10)],
+                                                  block_size=8)
+    cursor = compressed.cursor()
+    assert cursor.advance(0) == 0
+    assert cursor.advance(455) == 460
+    assert cursor.tf() == 1
+    assert cursor.advance(460) == 460
+    assert cursor.advance(991) is None
+    assert cursor.advance(0) is None
+
+
+def test_block_headers_carry_max_impact():
+    postings = [(0, 3), (5, 1), (6, 2), (1000, 7)]
+    compressed = CompressedPostings.from_postings(postings, block_size=2, impacts=[-4, -2, 9, 3])
+    assert list(compressed.block_max_impact) == [-2, 9]
+    assert compressed.decode_block_docs(1) == [6, 1000]
+    assert CompressedPostings.from_postings(postings).block_max_impact.tolist() == []
+
+
+def test_union_skips_low_impact_blocks():
+    a = CompressedPostings.from_postings([(1, 1), (2, 1), (8, 1), (9, 1)], block_size=2, impacts=[-3, -1, 5, 2])
+    b = CompressedPostings.from_postings([(2, 1), (4, 1)], block_size=2, impacts=[1, 4])
+    assert union([a, b]) == [1, 2, 4, 8, 9]
+    assert union([a, b], min_impact=0) == [2, 4, 8, 9]
+    # 没有影响力的倒排表不跳块
+    assert union([CompressedPostings.from_postings([(3, 1)])], min_impact=0) == [3]
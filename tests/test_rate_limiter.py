@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""令牌桶限速：突发容量、等待时长和装饰器"""
+
+import pytest
+
+from rate_limiter import TokenBucket, rate_limited
+
+
+class FakeClock:
+    """可手动推进的时钟，sleep只推进时间"""
+    
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+    
+    def __call__(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_burst_then_refill(clock):
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    clock.now += 0.5
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    # 空闲再久也只积攒到容量
+    clock.now += 60
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_acquire_waits_for_missing_tokens(clock):
+    bucket = TokenBucket(rate=0.5, capacity=1, clock=clock, sleep=clock.sleep)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(2.0)
+    clock.now += 1.5
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert clock.sleeps == pytest.approx([2.0, 0.5])
+
+
+def test_decorator_spaces_out_calls(clock):
+    bucket = TokenBucket(rate=1, capacity=2, clock=clock, sleep=clock.sleep)
+    calls = []
+    
+    @rate_limited(bucket)
+    def upload(name):
+        """上传文件"""
+        calls.append((name, clock.now))
+        return name.upper()
+    
+    assert [upload(name) for name in "abcd"] == ["A", "B", "C", "D"]
+    assert [at - 100.0 for _, at in calls] == pytest.approx([0, 0, 1, 2])
+    assert upload.__name__ == "upload" and upload.__doc__ == "上传文件"
+
+
+@pytest.mark.parametrize("rate, capacity", [(0, 1), (1, 0), (-1, 1)])
+def test_invalid_parameters(rate, capacity):
+    with pytest.raises(ValueError):
+        TokenBucket(rate, capacity)
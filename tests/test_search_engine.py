@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""内存搜索引擎：倒排表打分、候选生成和页码"""
+
+from search_engine import KnowledgeBaseSearchEngine
+
+
+def result_ids(results):
+    return [result["document_id"] for result in results]
+
+
+def test_scores_read_term_frequencies_from_postings(knowledge_base):
+    engine = KnowledgeBaseSearchEngine(str(knowledge_base))
+    assert not hasattr(engine, "term_freq")
+    assert engine._document_term_freqs("inclusive", ["银行", "普惠金融", "房地产"]) == {"银行": 2, "普惠金融": 2}
+    
+    results = engine.hybrid_search("普惠金融 小微企业", 5)
+    assert result_ids(results) == ["inclusive"]
+    assert results[0]["bm25_score"] > 0
+
+
+def test_match_all_intersects_postings(knowledge_base):
+    engine = KnowledgeBaseSearchEngine(str(knowledge_base))
+    assert [doc for doc, _ in engine._candidate_documents(["银行", "风险"])] == [0, 1]
+    candidates = engine._candidate_documents(["银行", "风险"], match_all=True)
+    assert candidates == [(1, {"银行": 2, "风险": 3})]
+    assert engine._candidate_documents(["银行", "不存在"], match_all=True) == []
+    
+    assert set(result_ids(engine.hybrid_search("房地产 债券", 5))) == {"stability"}
+    assert result_ids(engine.hybrid_search("小微企业 房地产", 5, match_all=True)) == []
+
+
+def test_hits_carry_pages_and_chapter_scope(knowledge_base):
+    engine = KnowledgeBaseSearchEngine(str(knowledge_base))
+    results = engine.hybrid_search("房地产", 5)
+    assert results[0]["pages"] == [2]
+    assert results[0]["context"][0]["page"] == 2
+    
+    scoped = engine.hybrid_search("风险", 5, chapter="第二部分")
+    assert result_ids(scoped) == ["stability"]
+    assert scoped[0]["pages"] == [2]
+
+
+def test_facet_search_counts_all_matches(knowledge_base):
+    engine = KnowledgeBaseSearchEngine(str(knowledge_base))
+    matched = engine.hybrid_search("风险 普惠金融 经济", 5)
+    faceted = engine.facet_search("风险 普惠金融 经济", 1)
+    assert faceted["total"] == len(matched) == 3
+    assert faceted["results"] == matched[:1]
+    assert faceted["facets"]["year"] == {"2024": 2, "2025": 1}
+    assert engine.facet_search("风险", 5, "year>2024")["total"] == 0
+
+
+def test_impact_mode_keeps_common_terms(knowledge_base):
+    engine = KnowledgeBaseSearchEngine(str(knowledge_base))
+    # “银行”出现在3篇中的2篇，BM25的IDF为负，影响力按IDF下限计算
+    impact = engine.hybrid_search("银行", 5, impact_mode=True)
+    assert set(result_ids(impact)) == {"inclusive", "stability"}
+    assert all(result["impact_complete"] for result in impact)
+
+
+def test_impact_budget_covers_document_scoring(knowledge_base):
+    engine = KnowledgeBaseSearchEngine(str(knowledge_base))
+    results = engine.hybrid_search("银行 风险 普惠金融", 5, impact_mode=True, budget_ms=0)
+    assert all(not result["impact_complete"] for result in results)
+    assert len(results) < 2
+
+
+def test_union_skips_blocks_that_cannot_score(knowledge_base):
+    engine = KnowledgeBaseSearchEngine(str(knowledge_base))
+    # “银行”出现在3个文档中的2个，IDF为负，块头的BM25上界小于0
+    assert engine.postings["银行"].block_max_impact[0] < 0
+    assert [doc for doc, _ in engine._candidate_documents(["银行"])] == [0, 1]
+    assert engine._candidate_documents(["银行"], min_bm25=-1e-6) == []
+    # 跳过的块中的文档出现在其他查询词的保留块中时，词频照常取出
+    assert engine._candidate_documents(["银行", "房地产"], min_bm25=-1e-6) == [(1, {"银行": 2, "房地产": 1})]
+    assert engine.hybrid_search("银行", 5) == []
+    assert result_ids(engine.hybrid_search("银行", 5, chapter="第二部分")) == []
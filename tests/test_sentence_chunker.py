@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""按句流式分块：句子边界、字节偏移、页边界和块间重叠"""
+
+import pytest
+
+from sentence_chunker import Sentence, iter_chunks, iter_sentences, split_text_file_by_sentences
+
+TEXT = "\r\n".join([
+    "--- 第 1 页 ---",
+    "银行业总资产稳步增长。普惠小微贷款",
+    "余额同比增长23.5%；风险总体可控！",
+    "--- 第 2 页 ---",
+    "表格 1 2 3",
+    "房地产市场仍在调整。",
+])
+
+
+@pytest.fixture
+def text_file(tmp_path):
+    path = tmp_path / "report_extracted.txt"
+    path.write_bytes(TEXT.encode('utf-8'))
+    return path
+
+
+def read(text_file, start, end):
+    return text_file.read_bytes()[start:end].decode('utf-8').replace('\r\n', '\n')
+
+
+def test_sentences_follow_punctuation_lines_and_pages(text_file):
+    sentences = list(iter_sentences(text_file))
+    assert [read(text_file, s.start, s.end) for s in sentences] == [
+        "银行业总资产稳步增长。",
+        "普惠小微贷款\n余额同比增长23.5%；",
+        "风险总体可控！",
+        "表格 1 2 3\n房地产市场仍在调整。",
+    ]
+    assert [(s.start_line, s.end_line, s.page) for s in sentences] == [(2, 2, 1), (2, 3, 1), (3, 3, 1), (5, 6, 2)]
+    assert sentences[1].chars == len("普惠小微贷款余额同比增长23.5%；")
+
+
+def test_text_without_punctuation_is_cut_at_max_chars(tmp_path):
+    path = tmp_path / "table.txt"
+    path.write_text("\n".join(["数据" * 10] * 6), encoding='utf-8')
+    sentences = list(iter_sentences(path, max_chars=50))
+    assert [(s.start_line, s.end_line) for s in sentences] == [(1, 3), (4, 6)]
+
+
+def test_chunks_respect_budget_pages_and_overlap():
+    sentences = [Sentence(i * 10, i * 10 + 10, i + 1, i + 1, 10, 1 if i < 5 else 2) for i in range(7)]
+    chunks = list(iter_chunks(iter(sentences), chunk_chars=30, overlap_chars=10))
+    assert [chunk["lines"] for chunk in chunks] == [[1, 3], [3, 5], [6, 7]]
+    assert all(chunk["chars"] <= 30 for chunk in chunks)
+    # 重叠只在同一页内，换页时从新页的第一句开始
+    assert [chunk["page"] for chunk in chunks] == [1, 1, 2]
+
+
+def test_split_text_file_offsets_cover_the_chunks(text_file):
+    chunks = split_text_file_by_sentences(text_file, chunk_chars=30, overlap_chars=0)
+    texts = [read(text_file, *chunk["offsets"]) for chunk in chunks]
+    assert texts == ["银行业总资产稳步增长。普惠小微贷款\n余额同比增长23.5%；", "风险总体可控！",
+                     "表格 1 2 3\n房地产市场仍在调整。"]
+    assert [chunk["page"] for chunk in chunks] == [1, 1, 2]
+
+
+def test_process_pool_chunks_like_a_single_process(tmp_path):
+    from chunk_store import ChunkStore
+    from convert_txt_to_json import chunk_text_files
+    
+    text_dir = tmp_path / "data" / "extracted_texts"
+    text_dir.mkdir(parents=True)
+    for name in ("a", "b", "c"):
+        (text_dir / f"{name}_extracted.txt").write_text(f"{name}报告第一句话。" * 120, encoding='utf-8')
+    
+    stored = []
+    for workers, output in ((1, "serial"), (2, "pooled")):
+        chunk_text_files(text_dir, tmp_path / output, dedup_threshold=0, workers=workers, base_path=tmp_path)
+        with ChunkStore(tmp_path / output / "chunks.db", tmp_path) as store:
+            stored.append(list(store.iter_chunks()))
+    assert stored[0] == stored[1]
+    assert len(stored[0]) > 3
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""子串索引：只保存位置表，命中行的文本按需读取"""
+
+import pytest
+
+from substring_index import SubstringIndex
+
+DOCUMENTS = {
+    "first": "普惠金融服务\n小微企业GDP增长\n银行",
+    "second": "金融稳定\nGDP",
+}
+
+
+def build(**kwargs):
+    index = SubstringIndex(**kwargs)
+    index.build(DOCUMENTS)
+    return index
+
+
+def test_find_checks_every_gram_without_corpus_text():
+    index = build(read_lines=lambda doc_id, start, end: DOCUMENTS[doc_id].split('\n')[start:end])
+    assert not hasattr(index, "corpus") and index.documents is None
+    assert [index.locate(pos) for pos in index.find("金融")] == [("first", 0), ("second", 0)]
+    assert [index.locate(pos) for pos in index.find("gdp增长")] == [("first", 1)]
+    # 每个2-gram都存在，但不在连续的位置上
+    assert index.find("金融企业") == []
+    assert index.find("服务\n小微") == []
+    assert index.size_bytes() > 0
+
+
+def test_search_reads_lines_once_per_document():
+    reads = []
+    
+    def read_lines(doc_id, start, end):
+        reads.append((doc_id, start, end))
+        return DOCUMENTS[doc_id].split('\n')[start:end]
+    
+    results = build(read_lines=read_lines).search("融")
+    assert sorted(reads) == [("first", 0, 2), ("second", 0, 2)]
+    assert results["first"] == [{"paragraph": 1, "positions": [3], "content": "普惠金融服务",
+                                 "context": ["普惠金融服务", "小微企业GDP增长"]}]
+
+
+def naive_lines(documents, query):
+    """逐行不区分大小写查找，作为子串索引的对照"""
+    return {doc_id: [i for i, line in enumerate(content.split('\n')) if query.lower() in line.lower()]
+            for doc_id, content in documents.items()}
+
+
+@pytest.mark.parametrize("ngram_size", [2, 3])
+@pytest.mark.parametrize("query", ["金", "金融", "GDP", "gdp增", "小微企业GDP增长", "银行", "不存在", "融服"])
+def test_lines_match_a_naive_scan(ngram_size, query):
+    index = build(ngram_size=ngram_size)
+    for doc_id, expected in naive_lines(DOCUMENTS, query).items():
+        assert index.lines_containing(doc_id, [query]) == expected
+        assert [match["paragraph"] - 1 for match in index.search(query).get(doc_id, [])] == expected
+
+
+def test_repeated_matches_on_one_line_share_an_entry():
+    index = SubstringIndex()
+    index.build({"doc": "风险 风险 风险\n无关"})
+    assert index.search("风险") == {"doc": [{"paragraph": 1, "positions": [0, 3, 6], "content": "风险 风险 风险",
+                                             "context": ["风险 风险 风险", "无关"]}]}
+
+
+def test_invalid_ngram_size_is_rejected():
+    with pytest.raises(ValueError):
+        SubstringIndex(ngram_size=4)
+
+
+def test_search_content_pages_come_from_page_markers(knowledge_base):
+    from search_engine import KnowledgeBaseSearchEngine
+    
+    results = KnowledgeBaseSearchEngine(str(knowledge_base)).search_content("小微企业")
+    assert [(result["document_id"], result["pages"]) for result in results] == [("inclusive", [1, 2])]
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""主题向量：key_terms编译为归一化的词项向量，文档排序在建索引时预先算好"""
+
+import math
+
+import pytest
+
+from topic_vectors import TopicVectorIndex
+
+TOPIC_INDEX = {"topics": {
+    "普惠金融": {"subtopics": {"小微": {"key_terms": ["普惠金融", "小微企业"]},
+                           "农村": {"key_terms": ["普惠金融", "涉农贷款"]}}},
+    "金融稳定": {"subtopics": {"风险": {"key_terms": ["房地产 风险"]}}},
+    "数字货币": {"subtopics": {}},
+}}
+
+TERM_FREQ = {
+    "inclusive": {"普惠金融": 4, "小微企业": 2, "银行": 3},
+    "rural": {"普惠金融": 1, "涉农贷款": 3, "银行": 2},
+    "stability": {"房地产": 2, "风险": 5, "银行": 4},
+    "outlook": {"经济": 3, "增长": 2},
+}
+
+
+@pytest.fixture
+def index():
+    term_ids = {term: i for i, term in enumerate(sorted({t for terms in TERM_FREQ.values() for t in terms}))}
+    doc_freq = {term: sum(term in terms for terms in TERM_FREQ.values()) for term in term_ids}
+    doc_lengths = {doc_id: sum(terms.values()) for doc_id, terms in TERM_FREQ.items()}
+    index = TopicVectorIndex(str.split)
+    index.build(TOPIC_INDEX, term_ids, TERM_FREQ, doc_freq, doc_lengths,
+                sum(doc_lengths.values()) / len(doc_lengths), len(TERM_FREQ))
+    return index
+
+
+def test_vectors_are_unit_length_and_weighted_by_repetition(index):
+    vector = index.vectors["普惠金融"]
+    assert math.isclose(math.sqrt(sum(w * w for w in vector.values())), 1.0)
+    # 在两个子主题中都出现的词项权重最高
+    assert index.topic_terms("普惠金融")[0] == "普惠金融"
+    assert set(index.topic_terms("普惠金融")) == {"普惠金融", "小微企业", "涉农贷款"}
+
+
+def test_rankings_only_list_matching_documents(index):
+    ranking = index.search("普惠金融")
+    assert {item["document_id"] for item in ranking} == {"inclusive", "rural"}
+    keys = [(item["hybrid_score"], item["bm25_score"]) for item in ranking]
+    assert keys == sorted(keys, reverse=True)
+    assert [item["document_id"] for item in index.search("金融稳定")] == ["stability"]
+    assert len(index.search("普惠金融", limit=1)) == 1
+
+
+def test_topic_without_key_terms_uses_its_name(index):
+    assert index.key_terms["数字货币"] == ["数字货币"]
+    assert index.has_topic("数字货币")
+    assert index.search("数字货币") == []
+    assert not index.has_topic("不存在")
+
+
+def test_search_returns_copies(index):
+    index.search("普惠金融")[0]["hybrid_score"] = -1
+    assert index.search("普惠金融")[0]["hybrid_score"] > 0
+
+
+def test_engine_topic_search_uses_precomputed_rankings(tmp_path):
+    from conftest import write_knowledge_base
+    from search_engine import KnowledgeBaseSearchEngine
+    
+    topics = {"房地产风险": {"subtopics": {"房地产": {"key_terms": ["房地产", "风险"]}}}}
+    engine = KnowledgeBaseSearchEngine(str(write_knowledge_base(tmp_path, topics=topics)))
+    results = engine.search_by_topic_hybrid("房地产风险", 3)
+    assert [result["document_id"] for result in results] == ["stability"]